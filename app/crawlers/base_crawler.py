@@ -5,8 +5,11 @@ Base crawler class with anti-detection capabilities
 import random
 import logging
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import Awaitable, Callable, List, Dict, Any, Optional
 from playwright.async_api import Browser, BrowserContext, Page
+from playwright.async_api import Error as PlaywrightError
+
+from .anti_detection.proxy import AdvancedProxyManager
 
 
 class CrawlerException(Exception):
@@ -14,6 +17,11 @@ class CrawlerException(Exception):
     pass
 
 
+class ProxyConnectionError(CrawlerException):
+    """The browser could not reach the page through its proxy"""
+    pass
+
+
 class AntiDetectionManager:
     """Mock anti-detection manager for basic functionality"""
     def __init__(self, proxy_list: List[str] = None):
@@ -70,32 +78,18 @@ class HeaderRotator:
         }
 
 
-class AdvancedProxyManager:
-    """Manages proxy rotation"""
-    def __init__(self, proxy_list: List[str]):
-        self.proxy_list = proxy_list
-        self.current_proxy = None
-        self.failed_proxies = set()
-    
-    def get_next_proxy(self):
-        available_proxies = [p for p in self.proxy_list if p not in self.failed_proxies]
-        if available_proxies:
-            self.current_proxy = {"server": random.choice(available_proxies)}
-            return self.current_proxy
-        return None
-    
-    def mark_proxy_failed(self, proxy_url: str):
-        self.failed_proxies.add(proxy_url)
-
-
 class BaseCrawler(ABC):
     """Base crawler class with anti-detection capabilities"""
     
+    # Attempts per crawl when the proxy fails; each retry goes through another proxy
+    max_proxy_attempts = 3
+    
     def __init__(self, proxy_list: List[str] = None):
         self.proxy_list = proxy_list or []
         self.anti_detection = AntiDetectionManager(proxy_list)
         self.header_rotator = HeaderRotator()
-        self.proxy_manager = AdvancedProxyManager(proxy_list) if proxy_list else None
+        # Seeded from proxy_list; proxies stored in crawler_proxies replace it once a crawl starts
+        self.proxy_manager = AdvancedProxyManager(proxy_list)
         
         # Setup logging
         self.logger = logging.getLogger(self.__class__.__name__)
@@ -109,7 +103,8 @@ class BaseCrawler(ABC):
     async def _configure_browser_context(self, browser: Browser) -> BrowserContext:
         """Configure browser context with anti-detection measures"""
         headers = self.header_rotator.get_random_headers()
-        proxy = self.proxy_manager.get_next_proxy() if self.proxy_manager else None
+        # The proxy leased for the running crawl attempt, if any
+        proxy = self.proxy_manager.current_proxy if self.proxy_manager else None
         
         context_options = {
             "user_agent": headers["User-Agent"],
@@ -152,6 +147,37 @@ class BaseCrawler(ABC):
             self.logger.error("Multiple consecutive failures, aborting crawl")
             raise CrawlerException("Excessive request failures")
     
+    async def _crawl_with_proxy_retries(self, crawl_once: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Run crawl_once on a leased proxy, retrying proxy errors on another proxy at most max_proxy_attempts times
+        
+        The pool is loaded from crawler_proxies and probed for the duration of the crawl.
+        Each attempt holds a proxy slot, so the per-proxy concurrency cap applies.
+        """
+        attempts = 0
+        
+        async def attempt() -> Any:
+            nonlocal attempts
+            attempts += 1
+            try:
+                return await crawl_once(*args, **kwargs)
+            except PlaywrightError as e:
+                if "proxy" not in str(e).lower():
+                    raise
+                self.logger.error(f"Proxy connection failed (attempt {attempts}/{self.max_proxy_attempts}): {e}")
+                raise ProxyConnectionError(str(e)) from e
+        
+        await self.proxy_manager.start()
+        try:
+            if not self.proxy_manager.proxies:
+                return await crawl_once(*args, **kwargs)
+            return await self.proxy_manager.run(
+                attempt, attempts=self.max_proxy_attempts, retry_on=(ProxyConnectionError,)
+            )
+        except ProxyConnectionError as e:
+            raise CrawlerException("Proxy failures on every attempt") from e
+        finally:
+            await self.proxy_manager.stop()
+    
     @abstractmethod
     async def crawl(self, *args, **kwargs):
         """Abstract method that must be implemented by subclasses"""
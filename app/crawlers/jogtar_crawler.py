@@ -2,7 +2,6 @@ import random
 from playwright.async_api import Page
 from .base_crawler import BaseCrawler
 from app.core.config import settings
-from playwright.async_api import PlaywrightError
 
 class JogtarCrawler(BaseCrawler):
     def __init__(self):
@@ -11,6 +10,10 @@ class JogtarCrawler(BaseCrawler):
         # ... rest of initialization ...
 
     async def crawl(self):
+        # Proxy failures are retried on another proxy, a bounded number of times
+        return await self._crawl_with_proxy_retries(self._crawl_once)
+
+    async def _crawl_once(self):
         # ... existing setup ...
         
         try:
@@ -29,16 +32,6 @@ class JogtarCrawler(BaseCrawler):
                 if random.random() > 0.8:  # 20% chance of pause
                     await self.anti_detection.delays.short_pause()
         
-        except PlaywrightError as e:
-            if "proxy" in str(e).lower():
-                # Report proxy failure to manager
-                if self.proxy_manager and self.proxy_manager.current_proxy:
-                    self.proxy_manager.mark_proxy_failed(
-                        self.proxy_manager.current_proxy['server']
-                    )
-                self.logger.error(f"Proxy connection failed: {e}")
-                # Retry with new proxy
-                return await self.crawl()
-            raise
-        
-        # ... existing cleanup ... 
\ No newline at end of file
+        finally:
+            # ... existing cleanup ...
+            pass
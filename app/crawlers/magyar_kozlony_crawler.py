@@ -7,16 +7,9 @@ class MagyarKozlonyCrawler(BaseCrawler):
         # ... rest of initialization ...
     
     async def crawl(self):
-        try:
-            # ... existing crawl logic ...
-        except PlaywrightError as e:
-            if "proxy" in str(e).lower():
-                # Report proxy failure to manager
-                if self.proxy_manager and self.proxy_manager.current_proxy:
-                    self.proxy_manager.mark_proxy_failed(
-                        self.proxy_manager.current_proxy['server']
-                    )
-                self.logger.error(f"Proxy connection failed: {e}")
-                # Retry with new proxy
-                return await self.crawl()
-            raise 
\ No newline at end of file
+        # Proxy failures are retried on another proxy, a bounded number of times
+        return await self._crawl_with_proxy_retries(self._crawl_once)
+
+    async def _crawl_once(self):
+        # ... existing crawl logic ...
+        pass
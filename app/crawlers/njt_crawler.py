@@ -8,24 +8,40 @@ ELI URI Template for Hungary: http://www.njt.hu/eli/{type}/{year}/{number}/{poin
 """
 
 import asyncio
-import re
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 from datetime import datetime, date
-from urllib.parse import urljoin
+from urllib.parse import urlencode
 from dataclasses import dataclass
 import hashlib
+import re
 
 from playwright.async_api import Page, async_playwright
-from bs4 import BeautifulSoup
+
+from energia_ai.crawling.browser import PagePool
+from energia_ai.crawling.changes import ChangeTracker
+from energia_ai.crawling.extraction import ExtractionEngine, get_extraction_engine
+from energia_ai.crawling.fetcher import BrowserFetcher, FetchResult, HttpFetcher, TieredFetcher
+from energia_ai.crawling.frontier import CrawlFrontier, FrontierEntry
+from energia_ai.crawling.scheduler import CrawlScheduler, HostPolicy
+from energia_ai.nlp.citation_extractor import (
+    KIND_ACT,
+    KIND_DECREE,
+    KIND_GOVERNMENT_DECREE,
+    cited_acts,
+    first_citation,
+)
 
 try:
-    from .base_crawler import BaseCrawler
+    from .base_crawler import BaseCrawler, CrawlerException
 except ImportError:
     # For standalone testing, create a minimal base crawler
     from abc import ABC, abstractmethod
     import random
     
+    class CrawlerException(Exception):
+        pass
+    
     class DelayManager:
         async def short_pause(self):
             import asyncio
@@ -111,6 +127,16 @@ except ImportError:
             pass
 
 
+# njt.hu is a public service: a few parallel pages, spaced out with jitter
+NJT_HOST_POLICY = HostPolicy(max_concurrency=2, min_interval=1.0, jitter=2.0)
+
+LEGAL_LINK_TEXT = ("törvény", "rendelet", "határozat", "utasítás", "jogszabály", "alaptörvény", "korm.", "tv.")
+LEGAL_LINK_HREF = ("jogszabaly", "law", "act")
+# Classification looks for these case-insensitively instead of lowercasing the whole text
+_ACT_RE = re.compile("törvény", re.IGNORECASE)
+_DECREE_RE = re.compile("rendelet", re.IGNORECASE)
+
+
 @dataclass
 class ELIIdentifier:
     """European Legislation Identifier structure for Hungarian legal documents"""
@@ -140,25 +166,12 @@ class ELIIdentifier:
         """Parse NJT reference into ELI identifier"""
         eli = cls()
         
-        # Match law pattern: "YYYY. évi ROMAN. törvény"
-        law_match = re.match(r'(\d{4})\.\s*évi\s+([IVXLCDM]+)\.\s*törvény', reference)
-        if law_match:
-            eli.year = int(law_match.group(1))
-            eli.number = law_match.group(2)
-            eli.type = "torveny"
-            return eli
-        
-        # Match decree pattern
-        decree_match = re.match(r'(\d+)/(\d{4})\.\s*\([^)]+\)\s*([^.]+)\.\s*rendelet', reference)
-        if decree_match:
-            eli.number = decree_match.group(1)
-            eli.year = int(decree_match.group(2))
-            issuer = decree_match.group(3).lower()
-            if "korm" in issuer:
-                eli.type = "korm.rendelet"
-            else:
-                eli.type = "rendelet"
-            return eli
+        # Acts and decrees share the extractor used for in-text citations
+        citation = first_citation(reference)
+        if citation and citation.kind in (KIND_ACT, KIND_GOVERNMENT_DECREE, KIND_DECREE):
+            eli.type = citation.kind
+            eli.year = citation.year
+            eli.number = citation.number
         
         return eli
 
@@ -209,10 +222,19 @@ class NJTCrawler(BaseCrawler):
         super().__init__(proxy_list)
         self.base_url = "https://njt.hu"
         self.eli_base = "http://www.njt.hu/eli"
+        self._browser_lock = asyncio.Lock()
+        self._browser_concurrency = 2
+        self._playwright = None
+        self._browser = None
+        self._page_pool: Optional[PagePool] = None
+        self.extraction: ExtractionEngine = get_extraction_engine()
         self.crawl_statistics = {
             "documents_found": 0,
             "documents_processed": 0,
             "documents_updated": 0,
+            "documents_skipped": 0,
+            "bytes_downloaded": 0,
+            "bytes_saved": 0,
             "errors": 0,
             "start_time": None,
             "end_time": None
@@ -230,123 +252,161 @@ class NJTCrawler(BaseCrawler):
         """
         return await self.crawl_search_results(search_params)
     
-    async def crawl_search_results(self, search_params: Dict[str, str] = None) -> List[Dict[str, Any]]:
-        """Crawl NJT search results with given parameters"""
+    async def crawl_search_results(
+        self,
+        search_params: Dict[str, str] = None,
+        max_documents: Optional[int] = None,
+        frontier_path: str = "njt_frontier.sqlite",
+        concurrency: int = 4,
+        validators_path: str = "njt_validators.sqlite",
+        revisit_after: Optional[float] = 24 * 3600.0,
+        on_document: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Crawl NJT through the persistent frontier
+        
+        The frontier survives restarts, so an interrupted backfill resumes where
+        it stopped. Politeness towards njt.hu is enforced per host by the
+        scheduler instead of sleeping between documents. Pages are fetched over
+        plain HTTP; a browser is only launched if a page needs JavaScript.
+        
+        Documents finished more than revisit_after seconds ago are fetched
+        again with conditional requests; pages that did not change are left
+        out of the result, so they are not parsed, embedded or re-indexed.
+        
+        on_document runs the downstream steps (chunking, embedding, indexing)
+        for each changed document. A page counts as seen only once it and
+        on_document succeeded; if either fails the URL is retried by the
+        frontier and fetched in full again.
+        """
         self.crawl_statistics["start_time"] = datetime.now()
-        documents = []
+        documents: List[Dict[str, Any]] = []
+        frontier = CrawlFrontier(frontier_path, revisit_after=revisit_after)
+        frontier.add([self._search_url(search_params)], depth=0, priority=1)
+        tracker = ChangeTracker(validators_path, name="njt")
         
-        async with async_playwright() as playwright:
-            browser = await playwright.chromium.launch(headless=True)
-            context = await self._configure_browser_context(browser)
-            page = await context.new_page()
-            
-            try:
-                # Navigate to main page first
-                self.logger.info("Navigating to NJT.hu...")
-                await page.goto(self.base_url, timeout=30000)
-                await self.anti_detection.delays.short_pause()
-                
-                # For testing, let's just get some links from the main page
-                document_links = await self._extract_document_links(page)
-                self.crawl_statistics["documents_found"] = len(document_links)
-                
-                self.logger.info(f"Found {len(document_links)} potential document links")
-                
-                # Process a limited number of documents for testing
-                for i, link in enumerate(document_links[:5]):  # Only process first 5 for testing
-                    try:
-                        self.logger.info(f"Processing document {i+1}: {link}")
-                        document = await self._process_document(page, link)
-                        if document:
-                            documents.append(document)
-                            self.crawl_statistics["documents_processed"] += 1
-                        
-                        # Human-like delay between documents
-                        if i < len(document_links) - 1:
-                            await self.anti_detection.delays.medium_pause()
-                            
-                    except Exception as e:
-                        self.logger.error(f"Error processing document {link}: {e}")
-                        self.crawl_statistics["errors"] += 1
-                        continue
-                
-            except Exception as e:
-                self.logger.error(f"Error during crawling: {e}")
-                raise
-            finally:
-                await context.close()
-                await browser.close()
+        headers = self.header_rotator.get_random_headers()
+        fetcher = TieredFetcher(
+            HttpFetcher(max_connections=concurrency, headers=headers),
+            browser=self._browser_fetch,
+            tracker=tracker,
+        )
+        self._browser_concurrency = concurrency
+        try:
+            scheduler = CrawlScheduler(
+                frontier,
+                lambda entry: self._crawl_entry(fetcher, entry, documents, on_document),
+                concurrency=concurrency,
+                host_policy=NJT_HOST_POLICY,
+                max_depth=1,
+                name="njt",
+            )
+            stats = await scheduler.run(max_pages=max_documents)
+        finally:
+            await fetcher.close()
+            await self._close_browser()
+            frontier.close()
+            tracker.close()
         
+        self.crawl_statistics["documents_processed"] = len(documents)
+        self.crawl_statistics["documents_skipped"] = tracker.stats.documents_skipped
+        self.crawl_statistics["bytes_downloaded"] = tracker.stats.bytes_downloaded
+        self.crawl_statistics["bytes_saved"] = tracker.stats.bytes_saved
+        self.crawl_statistics["errors"] = stats.failed
         self.crawl_statistics["end_time"] = datetime.now()
-        self.logger.info(f"Crawling completed. Processed {len(documents)} documents.")
+        self.logger.info(
+            f"Crawling completed. Processed {len(documents)} documents, "
+            f"skipped {tracker.stats.documents_skipped} unchanged ({tracker.stats.bytes_saved} bytes not downloaded)."
+        )
         return documents
     
-    async def _extract_document_links(self, page: Page) -> List[str]:
-        """Extract all document links from page"""
+    def _search_url(self, search_params: Dict[str, str] = None) -> str:
+        """Seed URL: the search results for search_params, or the main page"""
+        if not search_params:
+            return self.base_url
+        return f"{self.base_url}/search?{urlencode(search_params)}"
+    
+    async def _crawl_entry(
+        self,
+        fetcher: TieredFetcher,
+        entry: FrontierEntry,
+        documents: List[Dict[str, Any]],
+        on_document: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+    ) -> List[str]:
+        """Listing pages (depth 0) yield document links; changed document pages are processed"""
+        result = await fetcher.fetch(entry.url, conditional=entry.depth > 0)
+        if entry.depth == 0:
+            links = self._extract_document_links(result.html)
+            self.crawl_statistics["documents_found"] += len(links)
+            self.logger.info(f"Found {len(links)} potential document links on {entry.url}")
+            return links
+        
+        if not result.changed:
+            return []
+        document = self._process_document(result.html, result.url)
+        if document is None:
+            raise CrawlerException(f"Failed to process {entry.url}")
+        if on_document is not None:
+            await on_document(document)
+        documents.append(document)
+        # Only a processed page is remembered; a failed one is fetched in full again on retry
+        fetcher.commit(entry.url, result)
+        return []
+    
+    async def _browser_fetch(self, url: str) -> FetchResult:
+        """Render a page in Chromium, starting the browser on first use"""
+        async with self._browser_lock:
+            if self._page_pool is None:
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=True)
+                self._page_pool = await PagePool(
+                    self._browser, self._browser_concurrency, self._configure_browser_context
+                ).start()
+        return await BrowserFetcher(self._page_pool).fetch(url)
+    
+    async def _close_browser(self) -> None:
+        if self._page_pool is not None:
+            await self._page_pool.close()
+            await self._browser.close()
+            await self._playwright.stop()
+            self._page_pool = self._browser = self._playwright = None
+    
+    def _extract_document_links(self, html: str) -> List[str]:
+        """Extract all document links from a listing page"""
         links = []
         
         try:
-            # Wait for page to load
-            await page.wait_for_selector("a", timeout=10000)
+            anchors = self.extraction.links(html, self.base_url)
             
-            # Get all links on the page
-            link_elements = await page.query_selector_all("a[href]")
-            
-            for element in link_elements:
-                try:
-                    href = await element.get_attribute("href")
-                    text = await element.text_content()
-                    
-                    if href and text:
-                        # Check if it's likely a legal document link
-                        text_lower = text.lower().strip()
-                        href_lower = href.lower()
-                        
-                        # Look for patterns that indicate legal documents
-                        legal_patterns = [
-                            "törvény", "rendelet", "határozat", "utasítás",
-                            "jogszabály", "alaptörvény", "korm.", "tv."
-                        ]
-                        
-                        if (any(pattern in text_lower for pattern in legal_patterns) or
-                            any(pattern in href_lower for pattern in ["jogszabaly", "law", "act"])):
-                            
-                            full_url = urljoin(self.base_url, href)
-                            if full_url not in links and "njt.hu" in full_url:
-                                links.append(full_url)
-                                
-                except Exception as e:
-                    # Skip problematic links
+            for full_url, text in anchors:
+                if not text:
                     continue
+                # Look for patterns that indicate legal documents
+                text_lower = text.lower()
+                href_lower = full_url.lower()
+                if (any(pattern in text_lower for pattern in LEGAL_LINK_TEXT) or
+                    any(pattern in href_lower for pattern in LEGAL_LINK_HREF)):
+                    if full_url not in links and "njt.hu" in full_url:
+                        links.append(full_url)
             
             # If no specific legal document links found, get some general links for testing
             if not links:
                 self.logger.warning("No legal document links found, getting general links for testing")
-                for element in link_elements[:10]:  # Get first 10 links
-                    try:
-                        href = await element.get_attribute("href")
-                        if href:
-                            full_url = urljoin(self.base_url, href)
-                            if "njt.hu" in full_url:
-                                links.append(full_url)
-                    except:
-                        continue
+                for full_url, _ in anchors[:10]:  # Get first 10 links
+                    if "njt.hu" in full_url:
+                        links.append(full_url)
                 
         except Exception as e:
             self.logger.warning(f"Error extracting document links: {e}")
         
-        return links[:10]  # Limit to first 10 for testing
+        return links
     
-    async def _process_document(self, page: Page, document_url: str) -> Optional[Dict[str, Any]]:
+    def _process_document(self, html: str, document_url: str) -> Optional[Dict[str, Any]]:
         """Process individual document"""
         try:
             self.logger.info(f"Processing: {document_url}")
-            await page.goto(document_url, timeout=30000)
-            await page.wait_for_load_state("networkidle", timeout=10000)
-            await self.anti_detection.delays.short_pause()
             
             # Extract document data
-            document_data = await self._extract_document_data(page, document_url)
+            document_data = self._extract_document_data(html, document_url)
             
             if document_data and document_data.get("title"):
                 # Generate ELI identifier
@@ -375,22 +435,16 @@ class NJTCrawler(BaseCrawler):
             self.logger.error(f"Error processing document {document_url}: {e}")
             return None
     
-    async def _extract_document_data(self, page: Page, url: str) -> Dict[str, Any]:
+    def _extract_document_data(self, html: str, url: str) -> Dict[str, Any]:
         """Extract structured data from page"""
         data = {"url": url}
         
         try:
-            # Get page content
-            content = await page.content()
-            soup = BeautifulSoup(content, 'html.parser')
+            page = self.extraction.extract(html, url)
             
             # Extract title
-            title_element = (soup.find("h1") or 
-                           soup.find("h2") or 
-                           soup.find("title"))
-            
-            if title_element:
-                title_text = title_element.get_text(strip=True)
+            title_text = page.title
+            if title_text:
                 # Clean up title
                 if "Nemzeti Jogszabálytár" in title_text:
                     parts = title_text.split("-")
@@ -398,31 +452,23 @@ class NJTCrawler(BaseCrawler):
                         title_text = parts[0].strip()
                 data["title"] = title_text
             else:
-                # Fallback: try to get title from page title or first heading
-                page_title = await page.title()
-                data["title"] = page_title if page_title else f"Document from {url}"
-            
-            # Extract content
-            body = soup.find("body")
-            if body:
-                # Remove script and style elements
-                for script in body(["script", "style"]):
-                    script.decompose()
-                document_content = body.get_text(separator="\n", strip=True)
-            else:
-                document_content = soup.get_text(separator="\n", strip=True)
+                data["title"] = f"Document from {url}"
             
+            # Paragraphs are separated by blank lines, which the chunker splits on
+            document_content = page.text
             data["content"] = document_content[:5000]  # Limit content for testing
             
+            # Outgoing citations from the full text, as ELI URIs of the cited acts
+            data["citations"] = cited_acts(document_content)
+            
             # Basic document classification
-            title_lower = data.get("title", "").lower()
-            content_lower = document_content.lower()
+            title = data.get("title", "")
             
-            if "törvény" in title_lower or "törvény" in content_lower:
+            if _ACT_RE.search(title) or _ACT_RE.search(document_content):
                 data["document_type"] = "törvény"
                 data["issuer"] = "országgyűlés"
                 data["status"] = "hatályos"
-            elif "rendelet" in title_lower or "rendelet" in content_lower:
+            elif _DECREE_RE.search(title) or _DECREE_RE.search(document_content):
                 data["document_type"] = "rendelet"
                 data["issuer"] = "kormány"
                 data["status"] = "hatályos"
@@ -1,32 +1,185 @@
 """
 Magyar Kozlony Monitoring System
 Monitors Magyar Kozlony publications for new legal documents and changes.
+
+New issues are detected by the change monitor, which records them in
+legal_change_events and queues a message per issue; ingestion runs in the
+queue consumer below, not in the poll loop.
 """
 import asyncio
 import logging
+import os
+import tempfile
 from datetime import datetime
-from typing import List, Dict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from energia_ai.cache.llm_cache import get_llm_cache
+from energia_ai.crawling.extraction import get_extraction_engine
+from energia_ai.crawling.fetcher import HttpFetcher
+from energia_ai.database.connection import get_database_manager
+from energia_ai.database.repositories import QueueMessageRepository
+from energia_ai.ingestion.kozlony_pdf import KozlonyAct, KozlonyPdfPipeline, act_citations
+from energia_ai.monitoring.change_monitor import ChangeMonitor
+from energia_ai.monitoring.schedule import PollSchedule
+from energia_ai.monitoring.sources import ListingSource
+
+from app.nlp.document_chunker import LegalDocumentChunker
+
+ActHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+SOURCE_NAME = "magyar_kozlony"
+# Issues appear on working days, occasionally late in the evening
+KOZLONY_SCHEDULE = PollSchedule(
+    peak_interval=120.0, peak_max_interval=600.0, off_peak_interval=1800.0, publishing_hours=(7, 23)
+)
+
+
+def is_issue_pdf(url: str) -> bool:
+    return "/dokumentumok/" in url and url.rstrip("/").endswith("/letoltes")
+
 
 class MagyarKozlonyMonitor:
-    def __init__(self):
+    def __init__(
+        self,
+        base_url: str = "https://magyarkozlony.hu",
+        act_handler: Optional[ActHandler] = None,
+        workers: Optional[int] = None,
+        state_path: str = "magyar_kozlony_monitor.sqlite",
+    ):
         self.logger = logging.getLogger(__name__)
+        self.base_url = base_url
+        self.act_handler = act_handler
+        self.workers = workers
+        self.state_path = state_path
+        self.chunker = LegalDocumentChunker()
+        self.seen_issues: Set[str] = set()
         
-    async def check_publications(self):
-        """Check for new publications"""
+    async def check_publications(self) -> List[Dict[str, Any]]:
+        """Download every issue on the front page not seen yet and ingest it (one-off backfill)"""
         self.logger.info("Checking Magyar Kozlony for new publications...")
-        # Implementation would go here
-        return []
+        fetcher = HttpFetcher(max_connections=2)
+        pipeline = KozlonyPdfPipeline(workers=self.workers)
+        processed: List[Dict[str, Any]] = []
+        try:
+            listing = await fetcher.fetch(self.base_url)
+            for issue_url in self._issue_pdf_links(listing.html):
+                if issue_url in self.seen_issues:
+                    continue
+                processed.extend(await self._ingest_issue(fetcher, pipeline, issue_url))
+                self.seen_issues.add(issue_url)
+        finally:
+            pipeline.close()
+            await fetcher.close()
+        self.logger.info(f"Ingested {len(processed)} acts from Magyar Kozlony")
+        return processed
+    
+    def _issue_pdf_links(self, html: str) -> List[str]:
+        """Download links of the issues on the front page, oldest first"""
+        links = []
+        for url, _ in get_extraction_engine().links(html, self.base_url):
+            if is_issue_pdf(url) and url not in links:
+                links.append(url)
+        return list(reversed(links))
+    
+    async def _ingest_issue(
+        self, fetcher: HttpFetcher, pipeline: KozlonyPdfPipeline, issue_url: str
+    ) -> List[Dict[str, Any]]:
+        """Stream one issue PDF; every act is chunked and handed on as soon as it is complete"""
+        handle, path = tempfile.mkstemp(suffix=".pdf", prefix="magyar_kozlony_")
+        os.close(handle)
+        summaries = []
+        try:
+            size = await fetcher.download(issue_url, path)
+            self.logger.info(f"Downloaded issue {issue_url} ({size} bytes)")
+            async for act in pipeline.stream_acts(path):
+                document = self.process_act(act, issue_url)
+                await self._invalidate_cached_answers(document)
+                if self.act_handler:
+                    await self.act_handler(document)
+                summaries.append({
+                    "eli_uri": document["eli_uri"],
+                    "title": document["title"],
+                    "document_type": document["document_type"],
+                    "chunks": len(document["chunks"]),
+                    "citations": len(document["citations"]),
+                })
+        finally:
+            os.unlink(path)
+        return summaries
+    
+    def process_act(self, act: KozlonyAct, issue_url: str) -> Dict[str, Any]:
+        """Chunk an act and extract its citations"""
+        text = act.text
+        chunks = self.chunker.chunk_document(text)
+        return {
+            "eli_uri": act.eli_uri,
+            "title": act.title,
+            "content": text,
+            "document_type": act.kind,
+            "issuer": act.issuer,
+            "source_url": issue_url,
+            "pages": [act.first_page, act.last_page],
+            "citations": act_citations(act),
+            "chunks": [
+                {"content": chunk.content, "start": chunk.start_position, "end": chunk.end_position}
+                for chunk in chunks
+            ],
+            "crawled_at": datetime.now().isoformat(),
+        }
+        
+    async def _invalidate_cached_answers(self, document: Dict[str, Any]) -> None:
+        """Drop cached LLM responses built on the act or on the acts it amends or cites"""
+        sources = [uri for uri in [document["eli_uri"], *document["citations"]] if uri]
+        try:
+            cache = await get_llm_cache()
+            await cache.invalidate_sources(sources)
+        except Exception as e:
+            self.logger.warning(f"LLM cache invalidation failed for {document['eli_uri']}: {e}")
+        
+    def change_source(self) -> ListingSource:
+        return ListingSource(SOURCE_NAME, self.base_url, is_issue_pdf, KOZLONY_SCHEDULE)
+    
+    async def consume_queue(self, stop: asyncio.Event, poll_interval: float = 5.0):
+        """Ingest issues announced through queue_messages
+        
+        Issues are claimed one at a time: a long issue must not run down the
+        lease of messages claimed with it, or another consumer ingests them too.
+        """
+        db_manager = await get_database_manager()
+        fetcher = HttpFetcher(max_connections=2)
+        pipeline = KozlonyPdfPipeline(workers=self.workers)
+        try:
+            while not stop.is_set():
+                claimed = 0
+                try:
+                    async for session in db_manager.get_session():
+                        queue = QueueMessageRepository(session)
+                        messages = await queue.claim(f"legal_change.{SOURCE_NAME}", limit=1)
+                        claimed = len(messages)
+                        for message in messages:
+                            try:
+                                await self._ingest_issue(fetcher, pipeline, message.payload["url"])
+                                await queue.complete(message.id)
+                            except Exception as e:
+                                self.logger.error(f"Failed to ingest {message.payload.get('url')}: {e}")
+                                await queue.fail(message.id, str(e))
+                except Exception as e:
+                    self.logger.error(f"Queue consumer error: {e}")
+                if not claimed:
+                    try:
+                        await asyncio.wait_for(stop.wait(), timeout=poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            pipeline.close()
+            await fetcher.close()
         
-    async def run(self):
-        """Run the monitor"""
+    async def run(self, stop: Optional[asyncio.Event] = None):
+        """Run change detection and the ingestion consumer until stop is set"""
         self.logger.info("Starting Magyar Kozlony monitor")
-        while True:
-            try:
-                await self.check_publications()
-                await asyncio.sleep(3600)  # Check every hour
-            except Exception as e:
-                self.logger.error(f"Monitor error: {e}")
-                await asyncio.sleep(300)  # Wait 5 minutes on error
+        stop = stop or asyncio.Event()
+        monitor = ChangeMonitor([self.change_source()], state_path=self.state_path)
+        await asyncio.gather(monitor.run(stop), self.consume_queue(stop))
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
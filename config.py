@@ -8,6 +8,7 @@ import sys
 from supabase import create_client, Client
 from dotenv import load_dotenv
 import anthropic
+import httpx
 
 # Load environment variables from .env file
 load_dotenv()
@@ -20,6 +21,12 @@ SUPABASE_SERVICE_KEY = os.environ.get("SUPABASE_SERVICE_KEY")
 # Anthropic Configuration
 ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY")
 
+# Outbound HTTP: one pooled connection set for the synchronous Anthropic client
+ANTHROPIC_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+ANTHROPIC_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT_SECONDS", "600"))
+
+_anthropic_client = None
+
 # Application Configuration
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
 DEBUG = os.getenv("DEBUG", "True").lower() == "true"
@@ -51,10 +58,11 @@ def get_supabase_admin_client() -> Client:
 
 def get_anthropic_client() -> anthropic.Anthropic:
     """
-    Returns an Anthropic client instance.
+    Returns the shared Anthropic client instance.
     
-    This function initializes the Anthropic client using the API key.
-    It's crucial that ANTHROPIC_API_KEY is set in your .env file.
+    The client is created once, on a keep-alive connection pool, and reused
+    by every caller. Async application code uses ``energia_ai.core.http``
+    instead. It's crucial that ANTHROPIC_API_KEY is set in your .env file.
     
     Returns:
         anthropic.Anthropic: An initialized Anthropic client instance.
@@ -63,12 +71,24 @@ def get_anthropic_client() -> anthropic.Anthropic:
         ValueError: If Anthropic API key is not configured.
         ConnectionError: If the client fails to initialize.
     """
+    global _anthropic_client
     if not ANTHROPIC_API_KEY:
         raise ValueError("Anthropic API Key must be set in the environment.")
+    if _anthropic_client is not None:
+        return _anthropic_client
     
     try:
-        client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-        return client
+        _anthropic_client = anthropic.Anthropic(
+            api_key=ANTHROPIC_API_KEY,
+            http_client=anthropic.DefaultHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=ANTHROPIC_MAX_CONNECTIONS,
+                    max_keepalive_connections=ANTHROPIC_MAX_CONNECTIONS,
+                ),
+                timeout=httpx.Timeout(ANTHROPIC_TIMEOUT, connect=5.0),
+            ),
+        )
+        return _anthropic_client
     except Exception as e:
         raise ConnectionError(f"Failed to create Anthropic client: {e}") from e
 
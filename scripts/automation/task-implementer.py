@@ -63,6 +63,8 @@ from bs4 import BeautifulSoup
 import re
 from dataclasses import dataclass
 
+from energia_ai.nlp.citation_extractor import cited_acts
+
 @dataclass
 class Publication:
     """Magyar Közlöny publication"""
@@ -161,20 +163,8 @@ class MagyarKozlonyMonitor:
             return None
     
     def extract_legal_references(self, content: str) -> List[str]:
-        """Extract legal document references from content"""
-        references = []
-        
-        # Pattern for laws
-        law_pattern = r'\\d{4}\\. évi [IVXLCDM]+\\. törvény'
-        law_matches = re.findall(law_pattern, content)
-        references.extend(law_matches)
-        
-        # Pattern for decrees
-        decree_pattern = r'\\d+/\\d{4}\\. \\([^)]+\\) [^.]+\\. rendelet'
-        decree_matches = re.findall(decree_pattern, content)
-        references.extend(decree_matches)
-        
-        return list(set(references))  # Remove duplicates
+        """Extract legal document references from content as ELI URIs"""
+        return cited_acts(content)
 
 async def main():
     """Main function for standalone usage"""
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark: HTML extraction pages/sec per backend
+
+Builds saved-style fixture pages in the NJT, Magyar Közlöny and Jogtár
+layouts (navigation, menus, scripts and a few hundred numbered paragraphs)
+and times title + paragraph extraction with every available backend. The
+``legacy`` row is the previous crawler code path: BeautifulSoup with
+html.parser, decompose script/style and get_text over the whole body.
+
+    python scripts/benchmarks/html_extraction.py --pages 50 --paragraphs 300
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from energia_ai.crawling.extraction import ExtractionEngine, available_backends
+
+PARAGRAPH = (
+    "<p>{i}. § ({j}) A villamosenergia-rendszer irányítója a <b>2007. évi LXXXVI. törvény</b> "
+    "szerinti feladatait a <a href=\"/jogszabaly/2007-273-20-22\">273/2007. (X. 19.) Korm. rendeletben</a> "
+    "foglaltak szerint látja el.</p>"
+)
+CHROME = (
+    "<script>window.dataLayer = [];</script><style>.x {{ color: red }}</style>"
+    "<header><nav>" + "".join(f"<a href=\"/menu/{i}\">Menüpont {i}</a>" for i in range(30)) + "</nav></header>"
+)
+LAYOUTS = {
+    "https://njt.hu/jogszabaly/2007-86-00-00": (
+        "<html><head><title>{title} - Nemzeti Jogszabálytár</title></head><body>" + CHROME
+        + "<div class=\"jogszabalyCim\">{title}</div><div class=\"jogszabaly\">"
+        "<div class=\"jogszabalyMenu\">Tartalomjegyzék</div>{body}</div><footer>NJT</footer></body></html>"
+    ),
+    "https://magyarkozlony.hu/dokumentumok/abc123/megtekintes": (
+        "<html><head><title>Magyar Közlöny</title></head><body>" + CHROME
+        + "<div class=\"journal-title\"><h1>{title}</h1></div><div class=\"sidebar\">Lapszámok</div>"
+        "<div class=\"journal-content\">{body}</div></body></html>"
+    ),
+    "https://net.jogtar.hu/jogszabaly?docid=a0700086.tv": (
+        "<html><head><title>Jogtár</title></head><body>" + CHROME
+        + "<div class=\"docHeader\"><h1 class=\"docTitle\">{title}</h1></div>"
+        "<div class=\"docToolbar\">Nyomtatás</div><div class=\"docBody\">{body}</div></body></html>"
+    ),
+}
+
+
+def fixture_pages(pages: int, paragraphs: int, seed: int = 7):
+    rng = random.Random(seed)
+    urls = list(LAYOUTS)
+    fixtures = []
+    for n in range(pages):
+        url = urls[n % len(urls)]
+        body = "".join(PARAGRAPH.format(i=i, j=rng.randint(1, 9)) for i in range(paragraphs))
+        fixtures.append((url, LAYOUTS[url].format(title="2007. évi LXXXVI. törvény a villamos energiáról", body=body)))
+    return fixtures
+
+
+def legacy_extract(html: str, url: str) -> str:
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.find("h1") or soup.find("h2") or soup.find("title")
+    body = soup.find("body")
+    for element in body(["script", "style"]):
+        element.decompose()
+    text = body.get_text(separator="\n", strip=True)
+    return (title.get_text(strip=True) if title else "") + text
+
+
+def run(label: str, extract, fixtures, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for url, html in fixtures:
+            extract(html, url)
+    elapsed = time.perf_counter() - start
+    pages_per_second = len(fixtures) * repeat / elapsed
+    print(f"{label:<11} {pages_per_second:9.1f} pages/s   {elapsed / (len(fixtures) * repeat) * 1000:7.2f} ms/page")
+    return pages_per_second
+
+
+def main(pages: int, paragraphs: int, repeat: int) -> None:
+    fixtures = fixture_pages(pages, paragraphs)
+    size_kb = sum(len(html.encode("utf-8")) for _, html in fixtures) / len(fixtures) / 1024
+    print(f"{len(fixtures)} pages, {size_kb:.0f} KB each on average, {repeat} rounds")
+    baseline = run("legacy", legacy_extract, fixtures, repeat)
+    for backend in available_backends():
+        engine = ExtractionEngine(backend)
+        rate = run(backend, engine.extract, fixtures, repeat)
+        print(f"{'':<11} {rate / baseline:9.1f}x legacy")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--paragraphs", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.pages, args.paragraphs, args.repeat)
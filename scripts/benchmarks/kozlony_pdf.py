@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Magyar Közlöny PDF ingestion pages/sec
+
+Writes synthetic gazette issues (running headers, page numbers, a mix of acts,
+decrees and resolutions, about 45 lines per page) and streams them through
+KozlonyPdfPipeline with different worker counts. Reports pages/sec, acts/sec,
+time to the first act and the parent's peak RSS, which should not grow with
+the issue size.
+
+    python scripts/benchmarks/kozlony_pdf.py --pages 100 400 --workers 1 2 4
+"""
+import argparse
+import asyncio
+import random
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from energia_ai.ingestion.kozlony_pdf import KozlonyPdfPipeline, act_citations
+
+# WinAnsi lacks the Hungarian double-acute letters; map them to spare codes
+DOUBLE_ACUTE = {"ő": b"\x80", "ű": b"\x81", "Ő": b"\x82", "Ű": b"\x83"}
+FONT = (
+    b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding << /Type /Encoding "
+    b"/BaseEncoding /WinAnsiEncoding /Differences [128 /odblacute /udblacute /Odblacute /Udblacute] >> >>"
+)
+
+
+def _pdf_string(line):
+    line = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return b"".join(DOUBLE_ACUTE.get(char) or char.encode("cp1252") for char in line)
+
+
+def write_pdf(path, pages):
+    """Minimal text-only PDF: one line per entry, one list of lines per page"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", b"", FONT]
+    kids = []
+    for lines in pages:
+        stream = b"BT /F1 10 Tf 12 TL 50 800 Td " + b" ".join(b"(%s) Tj T*" % _pdf_string(line) for line in lines) + b" ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(bytes(out))
+
+
+BODY_LINES = [
+    "{s}. § (1) A villamos energiáról szóló 2007. évi LXXXVI. törvény {s}. §-a helyébe",
+    "a következő rendelkezés lép, a 273/2007. (X. 19.) Korm. rendelet szerint.",
+    "(2) Az engedélyes a rendszerhasználati díjakat a Hivatal határozata alapján",
+    "állapítja meg, és azokat a honlapján közzéteszi.",
+    "a) a földgázellátásról szóló 2008. évi XL. törvény hatálya alá tartozó",
+    "b) az (EU) 2019/943 európai parlamenti és tanácsi rendelet szerinti piaci szereplők",
+]
+HEADERS = [
+    "{year}. évi {roman}. törvény",
+    "A Kormány {n}/{year}. (VI. 30.) Korm. rendelete",
+    "Az energiaügyi miniszter {n}/{year}. (VI. 30.) EM rendelete",
+    "A Kormány {n}/{year}. (VI. 30.) Korm. határozata",
+]
+ROMAN = ["I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X", "XI", "XII"]
+
+
+def synthetic_issue(pages: int, lines_per_page: int = 45, seed: int = 3):
+    rng = random.Random(seed)
+    issue, section = [], 1
+    for page in range(pages):
+        lines = ["MAGYAR KÖZLÖNY • 2023. évi 95. szám"]
+        while len(lines) < lines_per_page:
+            if rng.random() < 0.02:
+                header = rng.choice(HEADERS).format(year=2023, roman=rng.choice(ROMAN), n=rng.randint(1, 900))
+                lines += [header, "a villamosenergia-rendszer működésével összefüggő módosításokról"]
+                section = 1
+            else:
+                lines.append(rng.choice(BODY_LINES).format(s=section))
+                section += 1
+        lines.append(str(4500 + page))
+        issue.append(lines)
+    return issue
+
+
+async def ingest(path: str, workers: int):
+    pipeline = KozlonyPdfPipeline(workers=workers)
+    start = time.perf_counter()
+    first_act, acts = None, 0
+    try:
+        async for act in pipeline.stream_acts(path):
+            act_citations(act)
+            acts += 1
+            if first_act is None:
+                first_act = time.perf_counter() - start
+    finally:
+        pipeline.close()
+    return time.perf_counter() - start, first_act or 0.0, acts
+
+
+def main(page_counts, worker_counts) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        for pages in page_counts:
+            path = str(Path(directory) / f"issue_{pages}.pdf")
+            write_pdf(path, synthetic_issue(pages))
+            size_mb = Path(path).stat().st_size / 1e6
+            for workers in worker_counts:
+                elapsed, first_act, acts = asyncio.run(ingest(path, workers))
+                rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+                print(
+                    f"{pages:5d} pages ({size_mb:5.1f} MB)  workers={workers}  "
+                    f"{pages / elapsed:7.1f} pages/s  {acts / elapsed:6.1f} acts/s  "
+                    f"first act after {first_act * 1000:6.1f} ms  parent peak RSS {rss_mb:6.1f} MB"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 400])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+    main(args.pages, args.workers)
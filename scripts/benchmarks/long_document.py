@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: map-reduce long-document analysis, serial vs concurrent
+
+Analyses a synthetic consolidated act against a mock Anthropic client whose
+calls sleep for a fixed latency, first with one chunk call at a time, then
+with the configured concurrency, then again after amending one section
+(chunk notes cached). Reports wall-clock time, speedup over serial and the
+number of model calls for each run.
+
+    python scripts/benchmarks/long_document.py --sections 400 --latency 0.2 --concurrency 8
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from energia_ai.ai.claude_client import ClaudeClient
+from energia_ai.ai.long_document import LongDocumentAnalyzer
+from energia_ai.cache.llm_cache import LLMResponseCache
+
+SECTION = (
+    "{i}. § (1) A villamosenergia-rendszer irányítója a 2007. évi LXXXVI. törvény szerinti feladatait "
+    "a 273/2007. (X. 19.) Korm. rendeletben foglaltak szerint látja el. {filler}\n"
+    "(2) Az engedélyes a Hivatal határozatában megállapított határidőn belül adatot szolgáltat.\n\n"
+)
+
+
+class MockMessages:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        usage = SimpleNamespace(input_tokens=2000, output_tokens=300)
+        return SimpleNamespace(content=[SimpleNamespace(text=f"notes {self.calls}")], usage=usage)
+
+
+def build_document(sections: int) -> str:
+    filler = "Az előírások megsértése esetén a Hivatal bírságot szabhat ki. " * 20
+    body = "".join(SECTION.format(i=i, filler=filler) for i in range(1, sections + 1))
+    return "2007. évi LXXXVI. törvény a villamos energiáról\n\nAz Országgyűlés a következő törvényt alkotja:\n\n" + body
+
+
+async def run(label: str, client: ClaudeClient, analyzer: LongDocumentAnalyzer, document: str, serial: float = None):
+    calls = client.client.messages.calls
+    start = time.perf_counter()
+    result = await analyzer.analyze(document, "summary")
+    elapsed = time.perf_counter() - start
+    speedup = f"{serial / elapsed:6.1f}x" if serial else "     -"
+    print(
+        f"{label:<24} {elapsed:7.2f} s   speedup {speedup}   "
+        f"calls {client.client.messages.calls - calls:4d}   chunks {result['chunks']} ({result['chunks_cached']} cached)"
+    )
+    return elapsed
+
+
+async def main(sections: int, latency: float, concurrency: int) -> None:
+    with patch("energia_ai.ai.claude_client.AsyncAnthropic"):
+        client = ClaudeClient()
+    client.client = SimpleNamespace(messages=MockMessages(latency))
+    document = build_document(sections)
+    print(f"document: {len(document)} characters, {sections} sections, {latency * 1000:.0f} ms per call")
+
+    serial = await run("serial (concurrency 1)", client, LongDocumentAnalyzer(client, 1, LLMResponseCache()), document)
+    analyzer = LongDocumentAnalyzer(client, concurrency, LLMResponseCache())
+    await run(f"concurrency {concurrency}", client, analyzer, document, serial)
+    amended = document.replace("\n12. § (1) A villamosenergia", "\n12. § (1) A módosított villamosenergia")
+    await run("after one amendment", client, analyzer, amended, serial)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.2, help="mock model latency per call, seconds")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.sections, args.latency, args.concurrency))
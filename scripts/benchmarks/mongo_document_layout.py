@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark: inline vs split document layout in MongoDB
+
+Loads a synthetic corpus twice - once with bodies inline (the old layout) and
+once through MongoDBManager (bodies in the compressed content store) - and
+compares list and text-search latency.
+
+Requires a local MongoDB (MONGODB_URL, default mongodb://localhost:27017).
+The benchmark database is dropped before and after the run.
+
+    python scripts/benchmarks/mongo_document_layout.py --documents 2000
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel, TEXT, DESCENDING
+
+from energia_ai.storage.content_store import DocumentContentStore
+from energia_ai.storage.mongodb_manager import MongoDBManager
+from energia_ai.storage.schemas import LegalDocumentSchema, FetchMode
+
+WORDS = [
+    "törvény", "rendelet", "bekezdés", "pont", "hatály", "kötelezettség", "jogosult",
+    "miniszter", "kormány", "energia", "villamos", "földgáz", "engedély", "hivatal",
+    "szerződés", "felügyelet", "bírság", "eljárás", "határidő", "fogyasztó",
+]
+QUERIES = ["energia", "földgáz engedély", "bírság", "villamos hivatal", "fogyasztó szerződés"]
+
+
+def synthetic_document(i: int, body_kb: int) -> LegalDocumentSchema:
+    """Build a legal-looking document with a body of roughly body_kb kilobytes"""
+    rng = random.Random(i)
+    words = body_kb * 1024 // 8
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return LegalDocumentSchema(
+        title=f"{2000 + i % 24}. évi {i}. törvény a {rng.choice(WORDS)} tárgyában",
+        document_type=rng.choice(["törvény", "rendelet"]),
+        raw_content=f"<html><body>{text}</body></html>",
+        processed_content=text,
+        extracted_text=text,
+        content_hash=hashlib.sha256(f"{i}".encode()).hexdigest(),
+        keywords=rng.sample(WORDS, 3),
+        search_vector=[rng.random() for _ in range(1536)],
+    )
+
+
+async def timed(fn, repeat: int) -> float:
+    """Median wall time of fn() in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+async def run(documents: int, body_kb: int, limit: int, repeat: int) -> None:
+    url = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+    client = AsyncIOMotorClient(url)
+    await client.drop_database("energia_ai_bench")
+    database = client.energia_ai_bench
+
+    # Old layout: bodies and vector inline, text index over the full extracted text
+    inline = database.documents_inline
+    await inline.create_indexes([
+        IndexModel([("title", TEXT), ("extracted_text", TEXT)], name="text_search"),
+        IndexModel([("publication_date", DESCENDING)], name="publication_date_idx"),
+    ])
+
+    # New layout through the manager, pointed at the benchmark database
+    manager = MongoDBManager()
+    manager.client = client
+    manager.database = database
+    manager.content_store = DocumentContentStore(database)
+    await manager.create_indexes()
+
+    corpus = [synthetic_document(i, body_kb) for i in range(documents)]
+    for doc in corpus:
+        await inline.insert_one(doc.dict(by_alias=True, exclude_unset=True))
+        await manager.store_document(doc)
+
+    async def inline_list():
+        await inline.find({}).sort([("publication_date", DESCENDING)]).limit(limit).to_list(limit)
+
+    async def inline_search():
+        for query in QUERIES:
+            await inline.find(
+                {"$text": {"$search": query}}, {"score": {"$meta": "textScore"}}
+            ).sort([("score", {"$meta": "textScore"})]).limit(limit).to_list(limit)
+
+    async def split_list():
+        await manager.list_documents(limit=limit, mode=FetchMode.SUMMARY)
+
+    async def split_search():
+        for query in QUERIES:
+            await manager.search_documents(query, limit=limit, mode=FetchMode.SUMMARY)
+
+    stats = await database.command("collStats", "documents")
+    inline_stats = await database.command("collStats", "documents_inline")
+    content_stats = await database.command("collStats", "document_contents")
+
+    print(f"corpus: {documents} documents, ~{body_kb} KB body each, limit={limit}")
+    print(f"hot collection size:     inline {inline_stats['size'] / 1e6:8.1f} MB   split {stats['size'] / 1e6:8.1f} MB")
+    print(f"content collection size:                  split {content_stats['size'] / 1e6:8.1f} MB")
+    print(f"list   (median ms):      inline {await timed(inline_list, repeat):8.2f}      split {await timed(split_list, repeat):8.2f}")
+    print(f"search (median ms, {len(QUERIES)} q): inline {await timed(inline_search, repeat):8.2f}      split {await timed(split_search, repeat):8.2f}")
+
+    await client.drop_database("energia_ai_bench")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=1000)
+    parser.add_argument("--body-kb", type=int, default=64)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.documents, args.body_kb, args.limit, args.repeat))
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: list-building vs cursor-streamed Mongo text search
+
+Seeds a corpus in which every document matches the query, then compares a
+10k-hit result set fetched three ways:
+
+  * search_documents          - full list, Pydantic summary per row
+  * stream_search_documents   - batches, Pydantic summary per row
+  * stream_search_documents   - batches, raw dicts, title/_id projection only
+
+Reports wall time and peak Python heap (tracemalloc) for each.
+
+Requires a local MongoDB (MONGODB_URL, default mongodb://localhost:27017).
+
+    python scripts/benchmarks/mongo_search_streaming.py --documents 10000
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from energia_ai.storage.content_store import DocumentContentStore
+from energia_ai.storage.mongodb_manager import MongoDBManager
+from energia_ai.storage.schemas import FetchMode
+
+QUERY = "energia"
+
+
+async def seed(database, documents: int) -> None:
+    """Insert hot documents directly - bodies are irrelevant to this benchmark"""
+    rng = random.Random(0)
+    batch = []
+    for i in range(documents):
+        batch.append({
+            "title": f"{2000 + i % 24}. évi {i}. törvény az energia tárgyában",
+            "document_type": rng.choice(["törvény", "rendelet"]),
+            "content_hash": hashlib.sha256(str(i).encode()).hexdigest(),
+            "keywords": ["energia"],
+            "text_excerpt": "energia " * rng.randint(1, 200),
+        })
+        if len(batch) == 1000:
+            await database.documents.insert_many(batch)
+            batch = []
+    if batch:
+        await database.documents.insert_many(batch)
+
+
+async def measure(label: str, fn) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = await fn()
+    elapsed = (time.perf_counter() - start) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<44} {count:>7} hits {elapsed:>10.1f} ms {peak / 1e6:>9.1f} MB peak")
+
+
+async def run(documents: int, batch_size: int) -> None:
+    url = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+    client = AsyncIOMotorClient(url)
+    await client.drop_database("energia_ai_bench")
+    database = client.energia_ai_bench
+
+    manager = MongoDBManager()
+    manager.client = client
+    manager.database = database
+    manager.content_store = DocumentContentStore(database)
+    await manager.create_indexes()
+    await seed(database, documents)
+
+    async def listed():
+        return len(await manager.search_documents(QUERY, limit=documents, mode=FetchMode.SUMMARY))
+
+    async def streamed(raw: bool, fields=None):
+        count = 0
+        async for batch in manager.stream_search_documents(
+            QUERY, fields=fields, raw=raw, batch_size=batch_size, limit=documents
+        ):
+            count += len(batch)  # consume and drop each batch
+        return count
+
+    await measure("search_documents (list, validated)", listed)
+    await measure("stream_search_documents (validated)", lambda: streamed(False))
+    await measure("stream_search_documents (raw, title only)", lambda: streamed(True, ["title"]))
+
+    await client.drop_database("energia_ai_bench")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args.documents, args.batch_size))
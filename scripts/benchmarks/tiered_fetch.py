@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark: HTTP tier vs browser tier on local fixture pages
+
+Serves saved-style legislation pages from a local aiohttp server and fetches
+them with the pooled HTTP client and, when Playwright is installed, with a
+pool of headless Chromium pages. Reports pages/sec, CPU seconds per page and
+peak RSS of the process tree for each tier (the fixture server runs in the
+same process, so its cost is included in both tiers).
+
+    python scripts/benchmarks/tiered_fetch.py --pages 200 --concurrency 8
+"""
+import argparse
+import asyncio
+import resource
+import sys
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from energia_ai.crawling.browser import PagePool
+from energia_ai.crawling.fetcher import BrowserFetcher, HttpFetcher
+
+PARAGRAPH = (
+    "<p>{i}. § (1) A villamosenergia-rendszer irányítója a 2007. évi LXXXVI. törvény "
+    "szerinti feladatait a 273/2007. (X. 19.) Korm. rendeletben foglaltak szerint látja el.</p>"
+)
+PAGE = (
+    "<html><head><title>Fixture {n}</title><style>p {{ margin: 0 }}</style></head><body>"
+    "<h1>2007. évi LXXXVI. törvény a villamos energiáról</h1>{body}</body></html>"
+)
+
+
+async def start_server(paragraphs: int):
+    body = "".join(PARAGRAPH.format(i=i) for i in range(paragraphs))
+
+    async def handle(request):
+        return web.Response(text=PAGE.format(n=request.match_info["n"], body=body), content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/jogszabaly/{n}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{runner.addresses[0][1]}"
+
+
+def cpu_seconds() -> float:
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+async def run_tier(label, fetch, urls, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(url):
+        async with semaphore:
+            return await fetch(url)
+
+    cpu_start, start = cpu_seconds(), time.perf_counter()
+    results = await asyncio.gather(*(one(url) for url in urls))
+    elapsed, cpu = time.perf_counter() - start, cpu_seconds() - cpu_start
+    rss_mb = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    ) / 1024
+    print(
+        f"{label:<8} {len(results) / elapsed:8.1f} pages/s   "
+        f"{cpu / len(results) * 1000:7.2f} ms CPU/page   peak RSS {rss_mb:7.1f} MB"
+    )
+
+
+async def main(pages: int, concurrency: int, paragraphs: int) -> None:
+    runner, base_url = await start_server(paragraphs)
+    urls = [f"{base_url}/jogszabaly/{n}" for n in range(pages)]
+    try:
+        http = HttpFetcher(max_connections=concurrency)
+        await run_tier("http", http.fetch, urls, concurrency)
+        await http.close()
+
+        try:
+            from playwright.async_api import async_playwright
+        except ImportError:
+            print("browser  skipped (playwright is not installed)")
+            return
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(headless=True)
+            async with PagePool(browser, size=concurrency) as pool:
+                await run_tier("browser", BrowserFetcher(pool).fetch, urls, concurrency)
+            await browser.close()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--paragraphs", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.pages, args.concurrency, args.paragraphs))
@@ -0,0 +1,622 @@
+"""
+Batch analysis of document sets
+
+Bulk scans (e.g. a compliance check of every contract after a law change)
+run as jobs instead of thousands of interactive calls:
+
+* with the provider's Message Batches API, requests are submitted in
+  batches of up to ``max_batch_requests``, billed at the batch discount and
+  collected when each batch ends;
+* where that API is unavailable, a bounded worker pool runs the analyses
+  through ``ClaudeClient`` at batch priority, so interactive traffic keeps
+  precedence in the scheduler.
+
+Job and item state is persisted in a ``BatchStore`` (``analysis_batch_jobs``
+and ``analysis_batch_items`` in PostgreSQL). Results are written as they
+arrive: the item, a ``contract_impacts`` row for every affected contract and
+the job's ``impact_analysis_results`` row in one transaction per flush. A job
+interrupted at any point is resumed by running it again: submitted batches are
+polled, unfinished items are re-run and finished ones are never counted twice.
+
+A job is run by one runner at a time: ``run`` takes a lease on the job, renewed
+while it works, and a second ``run`` of a leased job raises ``BatchJobBusy``.
+Items are claimed (``submitting``) before their batch is created, so they are
+never sent twice; items whose submission was cut off before the batch id was
+stored are failed rather than resubmitted. Batch requests are charged to the
+tenant's token budget at their estimated cost when submitted.
+"""
+import asyncio
+import re
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+import anthropic
+import structlog
+
+from ..config.settings import get_settings
+from ..core.metrics import get_metrics_registry
+from .claude_client import ClaudeClient, token_usage
+from .prompts import PromptLayout, impact_prompt
+from .scheduler import PRIORITY_BATCH, LLMRateLimited, estimate_tokens
+
+logger = structlog.get_logger()
+
+MODE_MESSAGE_BATCHES = "message_batches"
+MODE_WORKERS = "workers"
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+
+ITEM_PENDING = "pending"
+ITEM_SUBMITTING = "submitting"
+ITEM_SUBMITTED = "submitted"
+ITEM_SUCCEEDED = "succeeded"
+ITEM_ERRORED = "errored"
+
+PRIORITY_LEVELS = ("low", "medium", "high", "urgent")
+
+_PRIORITY_LINE = re.compile(r"^\W*priority\W*:\W*(?P<level>none|low|medium|high|urgent)\b.*$", re.IGNORECASE | re.MULTILINE)
+_ACTION_LINE = re.compile(r"^\W*action required\W*:\s*(?P<action>.+?)\s*$", re.IGNORECASE | re.MULTILINE)
+
+
+@dataclass
+class BatchJob:
+    id: uuid.UUID
+    analysis_type: str
+    mode: str
+    model: str
+    status: str = JOB_PENDING
+    tenant: str = "default"
+    context: Optional[str] = None
+    change_id: Optional[uuid.UUID] = None
+    legal_document_id: Optional[uuid.UUID] = None
+    analysis_id: Optional[uuid.UUID] = None
+    total_items: int = 0
+    succeeded_items: int = 0
+    failed_items: int = 0
+    error: Optional[str] = None
+    completed_at: Optional[datetime] = None
+    runner: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+
+    def leased(self) -> bool:
+        """Whether a runner currently holds the job"""
+        return self.runner is not None and self.lease_expires_at is not None and self.lease_expires_at > datetime.now(timezone.utc)
+
+
+@dataclass
+class BatchItem:
+    id: uuid.UUID
+    job_id: uuid.UUID
+    contract_id: uuid.UUID
+    status: str = ITEM_PENDING
+    provider_batch_id: Optional[str] = None
+    result: Optional[str] = None
+    error: Optional[str] = None
+    token_usage: Optional[Dict[str, int]] = None
+
+
+class BatchJobBusy(Exception):
+    """The job is being run by another runner"""
+
+
+def parse_impact(text: str) -> Optional[Dict[str, str]]:
+    """contract_impacts fields from an impact analysis; None when the document is not affected"""
+    priority = _PRIORITY_LINE.search(text)
+    level = priority.group("level").lower() if priority else "medium"
+    if level == "none":
+        return None
+    action = _ACTION_LINE.search(text)
+    description = text[:priority.start()] if priority else text
+    return {
+        "impact_description": description.strip() or text.strip(),
+        "action_required": action.group("action") if action and action.group("action").lower() != "none" else "Review",
+        "priority_level": level,
+    }
+
+
+def _row(record: Any, model: type) -> Any:
+    return model(**{f.name: getattr(record, f.name) for f in fields(model)})
+
+
+class MemoryBatchStore:
+    """Process-local BatchStore, for tests and local runs"""
+
+    def __init__(self, contracts: Optional[Dict[uuid.UUID, str]] = None):
+        self.contracts = dict(contracts or {})
+        self.jobs: Dict[uuid.UUID, BatchJob] = {}
+        self.items_by_job: Dict[uuid.UUID, Dict[uuid.UUID, BatchItem]] = {}
+        self.impacts: List[Dict[str, Any]] = []
+        self.analyses: Dict[uuid.UUID, Dict[str, Any]] = {}
+
+    async def create_job(self, job: BatchJob, items: Sequence[BatchItem]) -> None:
+        self.jobs[job.id] = BatchJob(**asdict(job))
+        self.items_by_job[job.id] = {item.id: BatchItem(**asdict(item)) for item in items}
+        if job.analysis_id:
+            self.analyses[job.analysis_id] = {"document_id": job.legal_document_id, "referenced_documents": [], "impact_summary": None}
+
+    async def get_job(self, job_id: uuid.UUID) -> Optional[BatchJob]:
+        job = self.jobs.get(job_id)
+        return BatchJob(**asdict(job)) if job else None
+
+    async def unfinished_jobs(self) -> List[BatchJob]:
+        return [BatchJob(**asdict(job)) for job in self.jobs.values() if job.status in (JOB_PENDING, JOB_RUNNING)]
+
+    async def claim_job(self, job_id: uuid.UUID, runner: str, lease_seconds: float) -> bool:
+        job = self.jobs[job_id]
+        if job.status == JOB_COMPLETED or (job.leased() and job.runner != runner):
+            return False
+        job.status, job.runner = JOB_RUNNING, runner
+        job.lease_expires_at = datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)
+        return True
+
+    async def release_job(self, job_id: uuid.UUID, runner: str) -> None:
+        job = self.jobs[job_id]
+        if job.runner == runner:
+            job.runner, job.lease_expires_at = None, None
+
+    async def items(self, job_id: uuid.UUID, statuses: Sequence[str], limit: Optional[int] = None) -> List[BatchItem]:
+        found = [BatchItem(**asdict(item)) for item in self.items_by_job[job_id].values() if item.status in statuses]
+        return found[:limit] if limit else found
+
+    async def claim_items(self, job_id: uuid.UUID, limit: int) -> List[BatchItem]:
+        claimed = [item for item in self.items_by_job[job_id].values() if item.status == ITEM_PENDING][:limit]
+        for item in claimed:
+            item.status = ITEM_SUBMITTING
+        return [BatchItem(**asdict(item)) for item in claimed]
+
+    async def release_items(self, item_ids: Sequence[uuid.UUID], job_id: uuid.UUID) -> None:
+        for item_id in item_ids:
+            item = self.items_by_job[job_id][item_id]
+            if item.status == ITEM_SUBMITTING:
+                item.status = ITEM_PENDING
+
+    async def contract_texts(self, contract_ids: Sequence[uuid.UUID]) -> Dict[uuid.UUID, str]:
+        return {contract_id: self.contracts[contract_id] for contract_id in contract_ids if contract_id in self.contracts}
+
+    async def mark_submitted(self, item_ids: Sequence[uuid.UUID], provider_batch_id: str, job_id: uuid.UUID) -> None:
+        for item_id in item_ids:
+            item = self.items_by_job[job_id][item_id]
+            item.status, item.provider_batch_id = ITEM_SUBMITTED, provider_batch_id
+
+    async def record_results(
+        self,
+        job: BatchJob,
+        items: Sequence[BatchItem],
+        impacts: Sequence[Dict[str, Any]],
+        referenced: Sequence[Dict[str, Any]],
+    ) -> None:
+        stored = self.items_by_job[job.id]
+        fresh = [item for item in items if stored[item.id].status in (ITEM_PENDING, ITEM_SUBMITTING, ITEM_SUBMITTED)]
+        contracts = {item.contract_id for item in fresh}
+        for item in fresh:
+            stored[item.id] = BatchItem(**asdict(item))
+        self.impacts.extend(impact for impact in impacts if impact["contract_id"] in contracts)
+        if job.analysis_id:
+            self.analyses[job.analysis_id]["referenced_documents"].extend(
+                entry for entry in referenced if uuid.UUID(entry["contract_id"]) in contracts
+            )
+        succeeded = sum(item.status == ITEM_SUCCEEDED for item in fresh)
+        self.jobs[job.id].succeeded_items += succeeded
+        self.jobs[job.id].failed_items += len(fresh) - succeeded
+
+    async def update_job(self, job_id: uuid.UUID, **values: Any) -> None:
+        for name, value in values.items():
+            setattr(self.jobs[job_id], name, value)
+
+    async def set_impact_summary(self, analysis_id: uuid.UUID, summary: str) -> None:
+        self.analyses[analysis_id]["impact_summary"] = summary
+
+
+class PostgresBatchStore:
+    """BatchStore on analysis_batch_jobs/items, contract_impacts and impact_analysis_results"""
+
+    @asynccontextmanager
+    async def _repository(self) -> AsyncIterator[Any]:
+        from ..database.connection import get_database_manager
+        from ..database.repositories import AnalysisBatchRepository
+
+        db_manager = await get_database_manager()
+        async for session in db_manager.get_session():
+            yield AnalysisBatchRepository(session)
+
+    async def create_job(self, job: BatchJob, items: Sequence[BatchItem]) -> None:
+        analysis_row = None
+        if job.analysis_id:
+            analysis_row = {"analysis_id": job.analysis_id, "document_id": job.legal_document_id, "referenced_documents": []}
+        async with self._repository() as repository:
+            await repository.create_job(asdict(job), [asdict(item) for item in items], analysis_row)
+
+    async def get_job(self, job_id: uuid.UUID) -> Optional[BatchJob]:
+        async with self._repository() as repository:
+            record = await repository.get_job(job_id)
+            return _row(record, BatchJob) if record else None
+
+    async def unfinished_jobs(self) -> List[BatchJob]:
+        async with self._repository() as repository:
+            return [_row(record, BatchJob) for record in await repository.unfinished_jobs()]
+
+    async def claim_job(self, job_id: uuid.UUID, runner: str, lease_seconds: float) -> bool:
+        async with self._repository() as repository:
+            return await repository.claim_job(job_id, runner, lease_seconds)
+
+    async def release_job(self, job_id: uuid.UUID, runner: str) -> None:
+        async with self._repository() as repository:
+            await repository.release_job(job_id, runner)
+
+    async def items(self, job_id: uuid.UUID, statuses: Sequence[str], limit: Optional[int] = None) -> List[BatchItem]:
+        async with self._repository() as repository:
+            return [_row(record, BatchItem) for record in await repository.items(job_id, statuses, limit)]
+
+    async def claim_items(self, job_id: uuid.UUID, limit: int) -> List[BatchItem]:
+        async with self._repository() as repository:
+            return [_row(record, BatchItem) for record in await repository.claim_items(job_id, limit)]
+
+    async def release_items(self, item_ids: Sequence[uuid.UUID], job_id: uuid.UUID) -> None:
+        async with self._repository() as repository:
+            await repository.release_items(item_ids)
+
+    async def contract_texts(self, contract_ids: Sequence[uuid.UUID]) -> Dict[uuid.UUID, str]:
+        async with self._repository() as repository:
+            return await repository.contract_texts(contract_ids)
+
+    async def mark_submitted(self, item_ids: Sequence[uuid.UUID], provider_batch_id: str, job_id: uuid.UUID) -> None:
+        async with self._repository() as repository:
+            await repository.mark_submitted(item_ids, provider_batch_id)
+
+    async def record_results(
+        self,
+        job: BatchJob,
+        items: Sequence[BatchItem],
+        impacts: Sequence[Dict[str, Any]],
+        referenced: Sequence[Dict[str, Any]],
+    ) -> None:
+        item_rows = [
+            {
+                "id": item.id,
+                "contract_id": item.contract_id,
+                "status": item.status,
+                "result": item.result,
+                "error": item.error,
+                "token_usage": item.token_usage,
+            }
+            for item in items
+        ]
+        async with self._repository() as repository:
+            await repository.record_results(job.id, item_rows, impacts, job.analysis_id, referenced)
+
+    async def update_job(self, job_id: uuid.UUID, **values: Any) -> None:
+        async with self._repository() as repository:
+            await repository.update_job(job_id, **values)
+
+    async def set_impact_summary(self, analysis_id: uuid.UUID, summary: str) -> None:
+        async with self._repository() as repository:
+            await repository.set_impact_summary(analysis_id, summary)
+
+
+class BatchAnalyzer:
+    """Runs analysis jobs over document sets through the batch API or a worker pool"""
+
+    def __init__(
+        self,
+        client: ClaudeClient,
+        store: Any = None,
+        use_batch_api: bool = True,
+        concurrency: int = 8,
+        poll_interval: float = 60.0,
+        max_batch_requests: int = 10000,
+        flush_size: int = 20,
+        max_tokens: int = 2000,
+        lease_seconds: float = 900.0,
+    ):
+        self.client = client
+        self.store = store or PostgresBatchStore()
+        self.use_batch_api = use_batch_api
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_batch_requests = max_batch_requests
+        self.flush_size = flush_size
+        self.max_tokens = max_tokens
+        self.lease_seconds = lease_seconds
+        self.metrics = get_metrics_registry()
+
+    async def submit(
+        self,
+        contract_ids: Sequence[uuid.UUID],
+        analysis_type: str = "compliance",
+        context: Optional[str] = None,
+        change_id: Optional[uuid.UUID] = None,
+        legal_document_id: Optional[uuid.UUID] = None,
+        tenant: str = "default",
+    ) -> BatchJob:
+        """Create a job over the given contracts; ``run`` executes it"""
+        contract_ids = list(dict.fromkeys(contract_ids))
+        mode = MODE_MESSAGE_BATCHES if self.use_batch_api else MODE_WORKERS
+        job = BatchJob(
+            id=uuid.uuid4(),
+            analysis_type=analysis_type,
+            mode=mode,
+            model=self.client.model,
+            tenant=tenant,
+            context=context,
+            change_id=change_id,
+            legal_document_id=legal_document_id,
+            analysis_id=uuid.uuid4(),
+            total_items=len(contract_ids),
+        )
+        items = [BatchItem(id=uuid.uuid4(), job_id=job.id, contract_id=contract_id) for contract_id in contract_ids]
+        await self.store.create_job(job, items)
+        logger.info("Batch job created", job_id=str(job.id), mode=mode, items=len(items), analysis_type=analysis_type)
+        return job
+
+    async def run(self, job_id: uuid.UUID) -> BatchJob:
+        """Run a job to completion; safe to call again on an interrupted job
+
+        Raises ``BatchJobBusy`` while another runner holds the job.
+        """
+        job = await self.store.get_job(job_id)
+        if job is None:
+            raise KeyError(f"Unknown batch job {job_id}")
+        if job.status == JOB_COMPLETED:
+            return job
+        runner = uuid.uuid4().hex
+        if not await self.store.claim_job(job.id, runner, self.lease_seconds):
+            job = await self.store.get_job(job.id)
+            if job.status == JOB_COMPLETED:
+                return job
+            raise BatchJobBusy(f"Batch job {job_id} is already running")
+        job.runner = runner
+        try:
+            return await self._run(job)
+        finally:
+            await self.store.release_job(job.id, runner)
+
+    async def _run(self, job: BatchJob) -> BatchJob:
+        try:
+            paused = False
+            if job.mode == MODE_MESSAGE_BATCHES:
+                try:
+                    paused = not await self._submit_batches(job)
+                except (AttributeError, anthropic.NotFoundError, anthropic.PermissionDeniedError) as e:
+                    logger.warning("Message Batches API unavailable, using the worker pool", job_id=str(job.id), error=str(e))
+                    job.mode = MODE_WORKERS
+                    await self.store.update_job(job.id, mode=MODE_WORKERS)
+            if job.mode == MODE_MESSAGE_BATCHES:
+                await self._collect_batches(job)
+                if paused:
+                    # Out of budget: what was submitted is collected, the rest waits for a resume
+                    return await self.store.get_job(job.id)
+            elif not await self._run_workers(job):
+                # Rate limited or out of budget: stays running, resume later
+                return await self.store.get_job(job.id)
+        except Exception as e:
+            # The job stays running: finished items are kept and resume() picks up the rest
+            logger.error("Batch job interrupted", job_id=str(job.id), error=str(e))
+            await self.store.update_job(job.id, error=str(e)[:1000])
+            raise
+
+        job = await self.store.get_job(job.id)
+        if job.analysis_id:
+            await self.store.set_impact_summary(
+                job.analysis_id,
+                f"{job.analysis_type} analysis of {job.total_items} documents: "
+                f"{job.succeeded_items} analysed, {job.failed_items} failed",
+            )
+        await self.store.update_job(job.id, status=JOB_COMPLETED, error=None, completed_at=datetime.now(timezone.utc))
+        logger.info(
+            "Batch job completed",
+            job_id=str(job.id),
+            mode=job.mode,
+            succeeded=job.succeeded_items,
+            failed=job.failed_items,
+        )
+        return await self.store.get_job(job.id)
+
+    async def resume(self) -> List[BatchJob]:
+        """Run every pending or interrupted job not held by another runner"""
+        resumed = []
+        for job in await self.store.unfinished_jobs():
+            try:
+                resumed.append(await self.run(job.id))
+            except BatchJobBusy:
+                logger.info("Batch job is running elsewhere, not resumed", job_id=str(job.id))
+        return resumed
+
+    async def _renew(self, job: BatchJob) -> None:
+        """Extend the job's lease; raises ``BatchJobBusy`` if another runner took it over"""
+        if not await self.store.claim_job(job.id, job.runner, self.lease_seconds):
+            raise BatchJobBusy(f"Lease on batch job {job.id} was lost")
+
+    def _prompt_params(self, job: BatchJob, prompt: PromptLayout) -> Dict[str, Any]:
+        return {
+            "model": job.model,
+            "max_tokens": self.max_tokens,
+            "temperature": 0.1,
+            "system": prompt.system_blocks(),
+            "messages": prompt.messages(),
+        }
+
+    async def _submit_batches(self, job: BatchJob) -> bool:
+        """Submit pending items in batches; False if the tenant budget stopped the submission"""
+        batches = self.client.client.messages.batches
+        interrupted = await self.store.items(job.id, [ITEM_SUBMITTING])
+        if interrupted:
+            # The batch may exist at the provider without its id: failing them beats paying twice
+            logger.warning("Batch submission was interrupted, failing its items", job_id=str(job.id), items=len(interrupted))
+            await self._record(job, [_errored(item, "Submission interrupted before the batch id was stored") for item in interrupted])
+        while True:
+            await self._renew(job)
+            items = await self.store.claim_items(job.id, self.max_batch_requests)
+            if not items:
+                return True
+            texts = await self.store.contract_texts([item.contract_id for item in items])
+            missing = [item for item in items if item.contract_id not in texts]
+            if missing:
+                await self._record(job, [_errored(item, "Contract not found") for item in missing])
+            prompts = [
+                (item, impact_prompt(texts[item.contract_id], job.analysis_type, job.context))
+                for item in items if item.contract_id in texts
+            ]
+            if not prompts:
+                continue
+            requests = [{"custom_id": str(item.id), "params": self._prompt_params(job, prompt)} for item, prompt in prompts]
+            affordable = self.client.scheduler.charge(
+                "batch_analysis", job.tenant, [estimate_tokens(prompt.text) + self.max_tokens for _, prompt in prompts]
+            )
+            if affordable < len(requests):
+                await self.store.release_items([uuid.UUID(request["custom_id"]) for request in requests[affordable:]], job.id)
+                requests = requests[:affordable]
+            ids = [uuid.UUID(request["custom_id"]) for request in requests]
+            if requests:
+                try:
+                    batch = await batches.create(requests=requests)
+                except (anthropic.APIStatusError, AttributeError):
+                    # Rejected, so no batch was created: the items can be submitted again
+                    await self.store.release_items(ids, job.id)
+                    raise
+                await self.store.mark_submitted(ids, batch.id, job.id)
+                self.metrics.counter("llm_batch_requests_total").inc(len(requests), mode=MODE_MESSAGE_BATCHES, outcome="submitted")
+                logger.info("Message batch submitted", job_id=str(job.id), batch_id=batch.id, requests=len(requests))
+            if affordable < len(prompts):
+                await self.store.update_job(job.id, error=f"Paused: token budget of tenant {job.tenant} exceeded")
+                logger.warning("Batch job paused by the tenant budget", job_id=str(job.id), tenant=job.tenant)
+                return False
+
+    async def _collect_batches(self, job: BatchJob) -> None:
+        batches = self.client.client.messages.batches
+        while True:
+            await self._renew(job)
+            submitted = await self.store.items(job.id, [ITEM_SUBMITTED])
+            if not submitted:
+                return
+            waiting = False
+            for batch_id in dict.fromkeys(item.provider_batch_id for item in submitted):
+                batch = await batches.retrieve(batch_id)
+                if batch.processing_status != "ended":
+                    waiting = True
+                    continue
+                items = {str(item.id): item for item in submitted if item.provider_batch_id == batch_id}
+                buffer: List[BatchItem] = []
+                async for entry in await batches.results(batch_id):
+                    item = items.pop(entry.custom_id, None)
+                    if item is None:
+                        continue
+                    buffer.append(_from_batch_result(item, entry.result))
+                    if len(buffer) >= self.flush_size:
+                        await self._record(job, buffer)
+                        buffer = []
+                buffer.extend(_errored(item, "Missing from batch results") for item in items.values())
+                await self._record(job, buffer)
+            if waiting:
+                await asyncio.sleep(self.poll_interval)
+
+    async def _run_workers(self, job: BatchJob) -> bool:
+        """Analyse unfinished items concurrently; False if stopped by rate limits or the tenant budget"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        buffer: List[BatchItem] = []
+        throttled: List[LLMRateLimited] = []
+
+        async def flush() -> None:
+            nonlocal buffer
+            ready, buffer = buffer, []
+            await self._record(job, ready)
+
+        async def analyze(item: BatchItem, text: Optional[str]) -> None:
+            if text is None:
+                buffer.append(_errored(item, "Contract not found"))
+            else:
+                async with semaphore:
+                    if throttled:
+                        return
+                    try:
+                        completion = await self.client.complete(
+                            "batch_analysis",
+                            impact_prompt(text, job.analysis_type, job.context),
+                            max_tokens=self.max_tokens,
+                            temperature=0.1,
+                            tenant=job.tenant,
+                            priority=PRIORITY_BATCH,
+                        )
+                    except LLMRateLimited as e:
+                        throttled.append(e)
+                        return
+                    except Exception as e:
+                        buffer.append(_errored(item, str(e)))
+                    else:
+                        item.status = ITEM_SUCCEEDED
+                        item.result = completion["text"]
+                        item.token_usage = completion["token_usage"]
+                        buffer.append(item)
+            if len(buffer) >= self.flush_size:
+                await flush()
+
+        while not throttled:
+            await self._renew(job)
+            items = await self.store.items(job.id, [ITEM_PENDING, ITEM_SUBMITTED], limit=self.concurrency * self.flush_size)
+            if not items:
+                break
+            texts = await self.store.contract_texts([item.contract_id for item in items])
+            await asyncio.gather(*(analyze(item, texts.get(item.contract_id)) for item in items))
+            await flush()
+
+        if throttled:
+            await self.store.update_job(job.id, error=f"Paused: {throttled[0]}")
+            logger.warning("Batch job paused by rate limits", job_id=str(job.id), retry_after=throttled[0].retry_after)
+            return False
+        return True
+
+    async def _record(self, job: BatchJob, items: Sequence[BatchItem]) -> None:
+        """Persist finished items with the impacts their results describe"""
+        if not items:
+            return
+        impacts, referenced = [], []
+        for item in items:
+            impact = parse_impact(item.result) if item.status == ITEM_SUCCEEDED and item.result else None
+            if impact:
+                impacts.append({"id": uuid.uuid4(), "contract_id": item.contract_id, "change_id": job.change_id, **impact})
+                referenced.append({"contract_id": str(item.contract_id), "priority_level": impact["priority_level"]})
+        await self.store.record_results(job, items, impacts, referenced)
+        for outcome in (ITEM_SUCCEEDED, ITEM_ERRORED):
+            count = sum(item.status == outcome for item in items)
+            if count:
+                self.metrics.counter("llm_batch_requests_total").inc(count, mode=job.mode, outcome=outcome)
+
+
+def _errored(item: BatchItem, error: str) -> BatchItem:
+    item.status = ITEM_ERRORED
+    item.error = error[:1000]
+    return item
+
+
+def _from_batch_result(item: BatchItem, result: Any) -> BatchItem:
+    if result.type != "succeeded":
+        error = getattr(getattr(result, "error", None), "error", None)
+        return _errored(item, f"{result.type}: {getattr(error, 'message', '')}".rstrip(": "))
+    item.status = ITEM_SUCCEEDED
+    item.result = "".join(block.text for block in result.message.content if block.type == "text")
+    item.token_usage = token_usage(result.message.usage)
+    return item
+
+
+# Global batch analyzer instance
+_batch_analyzer = None
+
+
+async def get_batch_analyzer() -> BatchAnalyzer:
+    """Get the global batch analyzer (PostgreSQL job store)"""
+    global _batch_analyzer
+    if _batch_analyzer is None:
+        from .claude_client import get_claude_client
+
+        settings = get_settings()
+        _batch_analyzer = BatchAnalyzer(
+            await get_claude_client(),
+            use_batch_api=settings.llm_batch_api,
+            concurrency=settings.llm_batch_concurrency,
+            poll_interval=settings.llm_batch_poll_seconds,
+        )
+    return _batch_analyzer
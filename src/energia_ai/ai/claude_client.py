@@ -1,30 +1,106 @@
 """
 Claude API client for legal analysis
+
+Every call has a streaming twin that yields text deltas as they arrive and a
+final ``done`` event with token usage, time to first token and total latency.
+Calls go through the response cache (``cache.llm_cache``), the model cascade
+(``routing``) and the scheduler (``scheduler``) on the shared Anthropic HTTP
+client (``core.http``). Long documents, structured outputs and retrieval are
+handled by ``long_document``, ``structured`` and ``rag``.
 """
 import asyncio
-from typing import Dict, List, Optional, Any
+import time
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 import anthropic
 from anthropic import AsyncAnthropic
 import structlog
+from ..cache.llm_cache import (
+    CacheHit,
+    LLMResponseCache,
+    citation_fingerprint,
+    context_fingerprint,
+    get_llm_cache,
+    request_key,
+    response_sources,
+)
 from ..config.settings import get_settings
+from ..core.http import PROVIDER_ANTHROPIC, get_http_clients
+from ..core.metrics import get_metrics_registry
+from .long_document import REDUCE_MAX_TOKENS, TEMPERATURE as LONG_TEMPERATURE, LongDocumentAnalyzer
+from .prompts import PromptLayout, analysis_prompt, question_prompt, structured_prompt
+from .rag import RetrievalPipeline
+from .routing import TIER_FAST, TIER_STRONG, ModelRouter, Route
+from .structured import StructuredExtractor
+from .scheduler import PRIORITY_BATCH, PRIORITY_INTERACTIVE, PRIORITY_NORMAL, LLMScheduler, estimate_tokens
 
 logger = structlog.get_logger()
 
+# Usage fields reported per call, and their llm_tokens_total kind label
+USAGE_KINDS = {
+    "input_tokens": "input",
+    "cache_creation_input_tokens": "cache_write",
+    "cache_read_input_tokens": "cache_read",
+    "output_tokens": "output",
+}
+
+# Queue priority per operation; interactive answers go first
+OPERATION_PRIORITIES = {
+    "answer_question": PRIORITY_INTERACTIVE,
+    "analyze_document": PRIORITY_NORMAL,
+    "analyze_chunk": PRIORITY_BATCH,
+    "reduce_chunks": PRIORITY_BATCH,
+    "batch_analysis": PRIORITY_BATCH,
+}
+
+
+def token_usage(usage: Any) -> Dict[str, int]:
+    """Token counts of a response; input_tokens excludes tokens written to or read from the prompt cache"""
+    counts = {}
+    for name in USAGE_KINDS:
+        value = getattr(usage, name, None)
+        counts[name] = value if isinstance(value, int) else 0
+    return counts
+
+
 class ClaudeClient:
     """Async Claude API client for legal document analysis"""
     
-    def __init__(self):
+    def __init__(self, cache: Optional[LLMResponseCache] = None, scheduler: Optional[LLMScheduler] = None):
         self.settings = get_settings()
+        self.scheduler = scheduler or LLMScheduler(
+            max_concurrency=self.settings.llm_max_concurrency,
+            max_retries=self.settings.llm_max_retries,
+            default_budget=self.settings.llm_tenant_token_budget or None,
+            budget_window=self.settings.llm_budget_window_seconds
+        )
+        self._http_clients = get_http_clients()
+        self._http_clients.add_response_hook(PROVIDER_ANTHROPIC, self.scheduler.on_response)
         self.client = AsyncAnthropic(
-            api_key=self.settings.claude_api_key
+            api_key=self.settings.claude_api_key,
+            max_retries=0,
+            http_client=self._http_clients.get(PROVIDER_ANTHROPIC)
+        )
+        self.model = self.settings.llm_strong_model
+        self.router = ModelRouter(
+            {TIER_FAST: self.settings.llm_fast_model, TIER_STRONG: self.model},
+            self.settings.llm_routes
         )
-        self.model = "claude-3-sonnet-20240229"
+        self.metrics = get_metrics_registry()
+        self.cache = cache
+        self.long_document_chars = self.settings.long_document_chars
+        self._long_documents = None
+        self._structured = None
+        self._retrieval = None
         
     async def analyze_legal_document(
         self, 
         document_text: str, 
         analysis_type: str = "general",
-        context: Optional[str] = None
+        context: Optional[str] = None,
+        tenant: str = "default",
+        sources: Optional[List[str]] = None,
+        priority: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Analyze a legal document using Claude
@@ -33,42 +109,40 @@ class ClaudeClient:
             document_text: The legal document text to analyze
             analysis_type: Type of analysis (general, summary, key_points, etc.)
             context: Additional context for the analysis
+            tenant: Cache scope for near-duplicate matching, and whose token budget is charged
+            sources: Ids of the documents the analysis depends on, for cache invalidation
+            priority: Scheduler priority, e.g. PRIORITY_BATCH for background compliance scans
             
         Returns:
             Dictionary containing the analysis results
         """
-        try:
-            prompt = self._build_legal_analysis_prompt(
-                document_text, analysis_type, context
+        if len(document_text) > self.long_document_chars:
+            return await self.long_documents.analyze(
+                document_text, analysis_type, context, tenant=tenant, sources=sources, priority=priority
             )
+        
+        try:
+            prompt = analysis_prompt(document_text, analysis_type, context)
             
-            message = await self.client.messages.create(
-                model=self.model,
-                max_tokens=4000,
-                temperature=0.1,
-                messages=[
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ]
+            completion = await self.complete(
+                "analyze_document", prompt, max_tokens=4000, temperature=0.1,
+                scope=(tenant, analysis_type), sources=sources, tenant=tenant, priority=priority,
+                analysis_type=analysis_type
             )
             
             result = {
-                "analysis": message.content[0].text,
-                "model": self.model,
+                "analysis": completion["text"],
+                "model": completion["model"],
                 "analysis_type": analysis_type,
-                "token_usage": {
-                    "input_tokens": message.usage.input_tokens,
-                    "output_tokens": message.usage.output_tokens
-                }
+                "token_usage": completion["token_usage"],
+                "cached": completion["cached"]
             }
             
             logger.info(
                 "Legal document analyzed",
                 analysis_type=analysis_type,
-                input_tokens=message.usage.input_tokens,
-                output_tokens=message.usage.output_tokens
+                cached=completion["cached"],
+                **completion["token_usage"]
             )
             
             return result
@@ -77,6 +151,34 @@ class ClaudeClient:
             logger.error("Error analyzing legal document", error=str(e))
             raise
     
+    @property
+    def long_documents(self) -> LongDocumentAnalyzer:
+        """Map-reduce analyzer for documents longer than ``long_document_chars``"""
+        if self._long_documents is None:
+            self._long_documents = LongDocumentAnalyzer(
+                self, max_concurrency=self.settings.long_document_concurrency, cache=self.cache
+            )
+        return self._long_documents
+    
+    @property
+    def structured(self) -> StructuredExtractor:
+        """Schema-validated extraction through forced tool calls"""
+        if self._structured is None:
+            self._structured = StructuredExtractor(self)
+        return self._structured
+    
+    @property
+    def retrieval(self) -> RetrievalPipeline:
+        """Retrieval-augmented answering over the vector and lexical search indexes"""
+        if self._retrieval is None:
+            self._retrieval = RetrievalPipeline(
+                self,
+                candidates=self.settings.rag_candidates,
+                context_tokens=self.settings.rag_context_tokens,
+                passage_chars=self.settings.rag_passage_chars
+            )
+        return self._retrieval
+    
     async def generate_legal_summary(
         self, 
         document_text: str, 
@@ -92,133 +194,429 @@ class ClaudeClient:
         
         return result["analysis"]
     
-    async def extract_key_points(self, document_text: str) -> List[str]:
+    async def extract_key_points(self, document_text: str, tenant: str = "default") -> List[str]:
         """Extract key legal points from a document"""
+        if len(document_text) > self.long_document_chars:
+            # Map-reduce the document first, then structure the merged key points
+            document_text = (await self.analyze_legal_document(document_text, "key_points", tenant=tenant))["analysis"]
         
-        result = await self.analyze_legal_document(
-            document_text, 
-            analysis_type="key_points"
+        result = await self.structured.extract(
+            "key_points", structured_prompt(document_text, "key_points", "key_points"),
+            "analyze_document", analysis_type="key_points", tenant=tenant
         )
+        return result["data"]["points"]
+    
+    async def extract_compliance_findings(
+        self, 
+        document_text: str, 
+        context: Optional[str] = None,
+        tenant: str = "default"
+    ) -> Dict[str, Any]:
+        """Compliance requirements of a document with their status, deadlines and actions"""
+        result = await self.structured.extract(
+            "compliance_findings", structured_prompt(document_text, "compliance", "compliance_findings", context),
+            "analyze_document", analysis_type="compliance", max_tokens=4000, tenant=tenant
+        )
+        return result["data"]
+    
+    async def assess_risks(
+        self, 
+        document_text: str, 
+        context: Optional[str] = None,
+        tenant: str = "default"
+    ) -> Dict[str, Any]:
+        """Legal risks of a document with likelihood, impact and mitigation"""
+        result = await self.structured.extract(
+            "risks", structured_prompt(document_text, "risks", "risks", context),
+            "analyze_document", analysis_type="risks", max_tokens=4000, tenant=tenant
+        )
+        return result["data"]
+    
+    async def analyze_legal_document_types(
+        self, 
+        document_text: str, 
+        analysis_types: List[str],
+        context: Optional[str] = None,
+        tenant: str = "default",
+        sources: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Run several analyses of one document, reusing the cached document prefix
         
-        # Parse the key points from the response
-        analysis_text = result["analysis"]
-        key_points = []
-        
-        # Simple parsing - look for bullet points or numbered lists
-        lines = analysis_text.split('\n')
-        for line in lines:
-            line = line.strip()
-            if line.startswith(('', '-', '*')) or (line and line[0].isdigit() and '.' in line):
-                key_points.append(line)
-        
-        return key_points
+        The first analysis writes the document to the provider's prompt cache;
+        the others then run concurrently and read it from there.
+        """
+        if not analysis_types:
+            return {}
+        first, *rest = analysis_types
+        results = {first: await self.analyze_legal_document(document_text, first, context, tenant, sources)}
+        others = await asyncio.gather(*(
+            self.analyze_legal_document(document_text, analysis_type, context, tenant, sources)
+            for analysis_type in rest
+        ))
+        results.update(zip(rest, others))
+        return results
     
     async def answer_legal_question(
         self, 
         question: str, 
-        context_documents: List[str] = None
+        context_documents: List[str] = None,
+        tenant: str = "default",
+        sources: Optional[List[str]] = None
     ) -> Dict[str, Any]:
-        """Answer a legal question with optional document context"""
-        
-        context_text = ""
-        if context_documents:
-            context_text = "\n\n".join(context_documents)
-        
-        prompt = f"""
-        You are a Hungarian legal AI assistant. Answer the following legal question based on Hungarian law.
-        
-        Question: {question}
-        
-        {f"Context documents:\n{context_text}" if context_text else ""}
+        """Answer a legal question with optional document context
         
-        Please provide:
-        1. A direct answer to the question
-        2. Relevant legal principles
-        3. Any applicable Hungarian legal references
-        4. Confidence level in your answer
-        
-        Answer in Hungarian if the question is in Hungarian, otherwise in English.
+        Near-duplicate questions from the same tenant with the same context
+        documents and citing the same provisions are answered from the
+        semantic cache.
         """
         
+        prompt = question_prompt(question, context_documents)
+        
         try:
-            message = await self.client.messages.create(
-                model=self.model,
-                max_tokens=3000,
-                temperature=0.2,
-                messages=[
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ]
+            completion = await self.complete(
+                "answer_question", prompt, max_tokens=3000, temperature=0.2,
+                semantic_text=question,
+                scope=(tenant, "answer_question", context_fingerprint(context_documents), citation_fingerprint(question)),
+                sources=sources, tenant=tenant
             )
             
             return {
-                "answer": message.content[0].text,
+                "answer": completion["text"],
                 "question": question,
-                "model": self.model,
-                "token_usage": {
-                    "input_tokens": message.usage.input_tokens,
-                    "output_tokens": message.usage.output_tokens
-                }
+                "model": completion["model"],
+                "token_usage": completion["token_usage"],
+                "cached": completion["cached"]
             }
             
         except Exception as e:
             logger.error("Error answering legal question", error=str(e))
             raise
     
-    def _build_legal_analysis_prompt(
+    async def answer_with_retrieval(
+        self, 
+        question: str, 
+        tenant: str = "default",
+        document_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Answer a legal question from retrieved passages, with citations and per-stage latencies"""
+        return await self.retrieval.answer(question, tenant=tenant, document_type=document_type)
+    
+    async def stream_legal_document_analysis(
         self, 
         document_text: str, 
-        analysis_type: str, 
-        context: Optional[str] = None
-    ) -> str:
-        """Build a prompt for legal document analysis"""
+        analysis_type: str = "general",
+        context: Optional[str] = None,
+        tenant: str = "default",
+        sources: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of analyze_legal_document
+        
+        Yields ``{"type": "delta", "text": ...}`` events as the model writes,
+        then one ``{"type": "done", ...}`` event with the model, token usage,
+        time to first token and total latency. A cached response arrives as
+        a single delta and is marked in the done event. Long documents are
+        mapped first and only the final reduce is streamed; their done event
+        also carries the chunk counts and the usage of every call.
+        """
+        mapped, map_ms = None, 0.0
+        if len(document_text) > self.long_document_chars:
+            start = time.perf_counter()
+            mapped = await self.long_documents.map(document_text, analysis_type, context, tenant=tenant)
+            map_ms = round((time.perf_counter() - start) * 1000, 1)
+            events = self._stream_completion(
+                "analyze_document", mapped.prompt, max_tokens=REDUCE_MAX_TOKENS, temperature=LONG_TEMPERATURE,
+                sources=sources, tenant=tenant, analysis_type=analysis_type
+            )
+        else:
+            prompt = analysis_prompt(document_text, analysis_type, context)
+            events = self._stream_completion(
+                "analyze_document", prompt, max_tokens=4000, temperature=0.1,
+                scope=(tenant, analysis_type), sources=sources, tenant=tenant, analysis_type=analysis_type
+            )
+        async with aclosing(events):
+            async for event in events:
+                if event["type"] == "done":
+                    event["analysis_type"] = analysis_type
+                    if mapped is not None:
+                        event.update(
+                            mapped.fields(),
+                            token_usage=mapped.total_usage(event["token_usage"]),
+                            time_to_first_token_ms=round(event["time_to_first_token_ms"] + map_ms, 1),
+                            latency_ms=round(event["latency_ms"] + map_ms, 1)
+                        )
+                yield event
+    
+    async def stream_legal_answer(
+        self, 
+        question: str, 
+        context_documents: List[str] = None,
+        tenant: str = "default",
+        sources: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Streaming variant of answer_legal_question, with the same events as stream_legal_document_analysis"""
+        prompt = question_prompt(question, context_documents)
+        events = self._stream_completion(
+            "answer_question", prompt, max_tokens=3000, temperature=0.2,
+            semantic_text=question,
+            scope=(tenant, "answer_question", context_fingerprint(context_documents), citation_fingerprint(question)),
+            sources=sources, tenant=tenant
+        )
+        async with aclosing(events):
+            async for event in events:
+                if event["type"] == "done":
+                    event["question"] = question
+                yield event
+    
+    async def complete(
+        self, 
+        operation: str, 
+        prompt: PromptLayout, 
+        max_tokens: int, 
+        temperature: float,
+        semantic_text: Optional[str] = None,
+        scope: Tuple[str, ...] = (),
+        sources: Optional[List[str]] = None,
+        use_cache: bool = True,
+        tenant: str = "default",
+        priority: Optional[int] = None,
+        analysis_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """One completion through the response cache, the model cascade and the scheduler: text, model, token usage, the cache tier used and whether the router accepted it"""
+        route = self.router.route(operation, analysis_type)
+        key, hit = None, None
+        if use_cache:
+            key, hit = await self._cache_lookup(operation, prompt, max_tokens, temperature, semantic_text, scope, route)
+        if hit:
+            return {**hit.response, "token_usage": hit.usage, "cached": hit.tier, "accepted": True}
         
-        base_prompt = f"""
-        You are an expert Hungarian legal AI assistant. Analyze the following legal document.
+        # Every tier tried is billed, not only the one that answered
+        usage: Dict[str, int] = {}
+        for tier, model in enumerate(route.models, start=1):
+            message, call_usage, latency = await self.create_message(
+                operation, model, prompt, max_tokens, temperature, tenant=tenant, priority=priority
+            )
+            for name, count in call_usage.items():
+                usage[name] = usage.get(name, 0) + count
+            text = message.content[0].text
+            rejection = self.router.check(route, text, getattr(message, "stop_reason", None))
+            last = tier == len(route.models)
+            outcome = "accepted" if rejection is None else ("rejected" if last else "escalated")
+            self.router.record(route, model, latency, call_usage, outcome)
+            if rejection is None or last:
+                break
+            logger.info("Escalating to the next model tier", route=route.name, model=model, reason=rejection)
         
-        Document text:
-        {document_text}
+        completion = {
+            "text": text,
+            "model": model,
+            "token_usage": usage,
+            "cached": None,
+            # False when even the last tier failed the router's check (e.g. truncated)
+            "accepted": rejection is None
+        }
+        if rejection is None:
+            await self._cache_store(key, completion, prompt, semantic_text, scope, sources)
+        return completion
+    
+    async def create_message(
+        self, 
+        operation: str, 
+        model: str, 
+        prompt: PromptLayout, 
+        max_tokens: int, 
+        temperature: float,
+        tenant: str = "default",
+        priority: Optional[int] = None,
+        messages: Optional[List[Dict[str, Any]]] = None,
+        **params: Any
+    ) -> Tuple[Any, Dict[str, int], float]:
+        """One scheduled Messages API call, accounted in the metrics: the message, its token usage and latency
         
-        Analysis type: {analysis_type}
-        {f"Additional context: {context}" if context else ""}
+        ``messages`` replaces the prompt's user message (e.g. to continue a
+        tool-use exchange); ``params`` are passed to the API (tools, tool_choice).
         """
+        start = time.perf_counter()
+        message = await self.scheduler.run(
+            lambda: self.client.messages.create(
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                system=prompt.system_blocks() or anthropic.NOT_GIVEN,
+                messages=messages or prompt.messages(),
+                **params
+            ),
+            operation,
+            tenant=tenant,
+            priority=self._priority(operation, priority),
+            input_tokens=estimate_tokens(prompt.text),
+            max_tokens=max_tokens,
+            usage=lambda message: sum(token_usage(message.usage).values())
+        )
+        latency = time.perf_counter() - start
+        self._record_usage(operation, message.usage, latency)
+        return message, token_usage(message.usage), latency
+    
+    async def _cache_lookup(
+        self, 
+        operation: str, 
+        prompt: PromptLayout, 
+        max_tokens: int, 
+        temperature: float,
+        semantic_text: Optional[str],
+        scope: Tuple[str, ...],
+        route: Route
+    ) -> Tuple[Optional[str], Optional[CacheHit]]:
+        if self.cache is None:
+            return None, None
+        key = request_key(route.cache_model, prompt.fingerprint(), max_tokens=max_tokens, temperature=temperature)
+        try:
+            return key, await self.cache.get(key, operation, semantic_text=semantic_text, scope=scope)
+        except Exception as e:
+            logger.warning("LLM cache lookup failed", operation=operation, error=str(e))
+            return key, None
+    
+    async def _cache_store(
+        self, 
+        key: Optional[str], 
+        completion: Dict[str, Any], 
+        prompt: PromptLayout,
+        semantic_text: Optional[str],
+        scope: Tuple[str, ...],
+        sources: Optional[List[str]]
+    ) -> None:
+        if self.cache is None or key is None:
+            return
+        try:
+            await self.cache.put(
+                key,
+                {"text": completion["text"], "model": completion["model"]},
+                completion["token_usage"],
+                semantic_text=semantic_text,
+                scope=scope,
+                sources=response_sources(prompt.text, completion["text"], sources=sources or ())
+            )
+        except Exception as e:
+            logger.warning("LLM cache store failed", error=str(e))
+    
+    async def _stream_completion(
+        self, 
+        operation: str, 
+        prompt: PromptLayout, 
+        max_tokens: int, 
+        temperature: float,
+        semantic_text: Optional[str] = None,
+        scope: Tuple[str, ...] = (),
+        sources: Optional[List[str]] = None,
+        tenant: str = "default",
+        priority: Optional[int] = None,
+        analysis_type: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream one completion; usage is accounted at stream end, or from the partial message if the consumer leaves early"""
+        start = time.perf_counter()
+        route = self.router.route(operation, analysis_type)
+        model = route.models[-1]
+        key, hit = await self._cache_lookup(operation, prompt, max_tokens, temperature, semantic_text, scope, route)
+        if hit:
+            yield {"type": "delta", "text": hit.response["text"]}
+            latency_ms = round((time.perf_counter() - start) * 1000, 1)
+            yield {
+                "type": "done",
+                "model": hit.response["model"],
+                "stop_reason": "end_turn",
+                "token_usage": hit.usage,
+                "cached": hit.tier,
+                "time_to_first_token_ms": latency_ms,
+                "latency_ms": latency_ms
+            }
+            return
         
-        if analysis_type == "summary":
-            base_prompt += """
-            
-            Please provide a comprehensive summary that includes:
-            1. Main legal concepts and principles
-            2. Key obligations and rights
-            3. Important deadlines or conditions
-            4. Potential legal implications
-            
-            Write the summary in clear, professional Hungarian.
-            """
-            
-        elif analysis_type == "key_points":
-            base_prompt += """
-            
-            Please extract the key legal points from this document. Format as a bullet list:
-             Point 1
-             Point 2
-            etc.
-            
-            Focus on actionable items, legal obligations, rights, and important conditions.
-            """
-            
-        elif analysis_type == "compliance":
-            base_prompt += """
-            
-            Please analyze this document for compliance requirements:
-            1. Identify all legal obligations
-            2. Note any deadlines or time-sensitive requirements
-            3. Highlight potential compliance risks
-            4. Suggest compliance actions if applicable
-            """
-        
-        return base_prompt
+        first_token = None
+        stream = None
+        parts: List[str] = []
+        # Streams are admitted and budgeted like other calls, but not retried once started
+        async with self.scheduler.slot(
+            operation, tenant, self._priority(operation, priority), estimate_tokens(prompt.text), max_tokens
+        ) as slot:
+            try:
+                async with self.client.messages.stream(
+                    model=model,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    system=prompt.system_blocks(),
+                    messages=prompt.messages()
+                ) as stream:
+                    async for text in stream.text_stream:
+                        if first_token is None:
+                            first_token = time.perf_counter() - start
+                            self.metrics.histogram("llm_time_to_first_token_seconds").observe(
+                                first_token, operation=operation
+                            )
+                        parts.append(text)
+                        yield {"type": "delta", "text": text}
+                    message = await stream.get_final_message()
+            except (GeneratorExit, asyncio.CancelledError):
+                # Client went away: the context manager closed the HTTP stream, account what was used
+                if first_token is not None:
+                    # Text only arrives after message_start, so the snapshot carries the input tokens
+                    usage = stream.current_message_snapshot.usage
+                    slot.used(sum(token_usage(usage).values()))
+                    self._record_usage(operation, usage, time.perf_counter() - start, outcome="cancelled")
+                logger.info("Streaming completion cancelled", operation=operation)
+                raise
+            except Exception as e:
+                self.metrics.counter("llm_requests_total").inc(operation=operation, outcome="error")
+                logger.error("Error streaming completion", operation=operation, error=str(e))
+                raise
+            slot.used(sum(token_usage(message.usage).values()))
+        
+        latency = time.perf_counter() - start
+        self._record_usage(operation, message.usage, latency)
+        self.router.record(route, model, latency, token_usage(message.usage), "accepted")
+        logger.info(
+            "Streaming completion finished",
+            operation=operation,
+            **token_usage(message.usage),
+            time_to_first_token_ms=round((first_token or latency) * 1000),
+            latency_ms=round(latency * 1000)
+        )
+        completion = {
+            "text": "".join(parts),
+            "model": model,
+            "token_usage": token_usage(message.usage),
+            "cached": None
+        }
+        if message.stop_reason == "end_turn":
+            # Truncated (max_tokens) answers are not worth serving again
+            await self._cache_store(key, completion, prompt, semantic_text, scope, sources)
+        yield {
+            "type": "done",
+            "model": model,
+            "stop_reason": message.stop_reason,
+            "token_usage": completion["token_usage"],
+            "cached": None,
+            "time_to_first_token_ms": round((first_token or latency) * 1000, 1),
+            "latency_ms": round(latency * 1000, 1)
+        }
+    
+    @staticmethod
+    def _priority(operation: str, priority: Optional[int]) -> int:
+        if priority is not None:
+            return priority
+        return OPERATION_PRIORITIES.get(operation, PRIORITY_NORMAL)
+    
+    def _record_usage(self, operation: str, usage: Any, latency: float, outcome: str = "success") -> None:
+        """Account tokens and latency of one completion"""
+        self.metrics.counter("llm_requests_total").inc(operation=operation, outcome=outcome)
+        self.metrics.histogram("llm_request_seconds").observe(latency, operation=operation)
+        tokens = self.metrics.counter("llm_tokens_total")
+        for kind, count in token_usage(usage).items():
+            tokens.inc(count, operation=operation, kind=USAGE_KINDS[kind])
+
+    def close(self) -> None:
+        """Detach this client's scheduler from the shared HTTP client"""
+        self._http_clients.remove_response_hook(PROVIDER_ANTHROPIC, self.scheduler.on_response)
 
 # Global client instance
 _claude_client = None
@@ -227,5 +625,5 @@ async def get_claude_client() -> ClaudeClient:
     """Get the global Claude client instance"""
     global _claude_client
     if _claude_client is None:
-        _claude_client = ClaudeClient()
+        _claude_client = ClaudeClient(cache=await get_llm_cache())
     return _claude_client
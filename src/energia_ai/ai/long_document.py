@@ -0,0 +1,344 @@
+"""
+Map-reduce analysis for documents longer than one prompt
+
+Consolidated acts can run to megabytes, well past what a single analysis
+prompt holds. Such documents are:
+
+1. chunked structurally: split at section (``12. §``), chapter, part and
+   annex headings, with units packed into chunks whose boundaries are chosen
+   by a hash of the heading (content-defined), so an amendment to one section
+   changes one chunk instead of shifting every chunk after it;
+2. mapped: every chunk is analysed on its own, with bounded concurrency,
+   against a short overview of the document that is shared (and prompt
+   cached) across chunks;
+3. reduced: the chunk notes are merged, in groups when there are many of
+   them, into the requested summary, key points or compliance output.
+
+Chunk notes are cached by content (model, overview, chunk text, analysis
+type), so re-analysing an amended document only re-runs the changed chunks
+and the reduce.
+"""
+import asyncio
+import hashlib
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import structlog
+
+from ..cache.llm_cache import LLMResponseCache, request_key
+from .prompts import PromptLayout, chunk_prompt, reduce_prompt
+
+logger = structlog.get_logger()
+
+# Structural headings at the start of a line: "12. §", "12/A. §", "II. FEJEZET", "ELSŐ RÉSZ", "3. melléklet"
+_HEADING = re.compile(
+    r"^[ \t]*(?:\d+(?:/[A-Z])?\. §|[IVXLC]+\. (?:FEJEZET|RÉSZ|CÍM)\b|[A-ZÁÉÍÓÖŐÚÜŰ]+ RÉSZ\b|\d+\. (?:számú )?melléklet\b)",
+    re.MULTILINE,
+)
+_BLANK_LINES = re.compile(r"\n[ \t]*\n")
+
+PREAMBLE = "preamble"
+
+# Map and reduce calls
+CHUNK_MAX_TOKENS = 1500
+REDUCE_MAX_TOKENS = 4000
+TEMPERATURE = 0.1
+
+
+@dataclass
+class DocumentChunk:
+    """A run of consecutive structural units analysed in one call"""
+    index: int
+    label: str
+    text: str
+
+    @property
+    def digest(self) -> str:
+        return hashlib.sha256(self.text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class MappedDocument:
+    """A long document after the map step: the final reduce prompt and what it took to build it"""
+    prompt: PromptLayout
+    chunks: int
+    chunks_cached: int
+    usage: Dict[str, int]
+    map_speedup: Optional[float]
+
+    def total_usage(self, reduce_usage: Dict[str, int]) -> Dict[str, int]:
+        """Token usage of the map calls plus the final reduce"""
+        total = dict(self.usage)
+        _add_usage(total, reduce_usage)
+        return total
+
+    def fields(self) -> Dict[str, Any]:
+        """Map-reduce fields added to an analysis result"""
+        return {"chunks": self.chunks, "chunks_cached": self.chunks_cached, "map_speedup": self.map_speedup}
+
+
+def _heading(unit: str) -> str:
+    first_line = unit.lstrip().split("\n", 1)[0]
+    match = _HEADING.match(first_line)
+    return match.group(0).strip() if match else first_line[:40].strip()
+
+
+def split_units(text: str) -> List[Tuple[str, str]]:
+    """(heading, text) units at structural headings; blank-line paragraphs if there are none"""
+    starts = [match.start() for match in _HEADING.finditer(text)]
+    if starts:
+        bounds = ([0] if starts[0] > 0 else []) + starts + [len(text)]
+    else:
+        bounds = [0] + [match.end() for match in _BLANK_LINES.finditer(text)] + [len(text)]
+
+    units = []
+    for start, end in zip(bounds, bounds[1:]):
+        unit = text[start:end]
+        if unit.strip():
+            units.append((PREAMBLE if start == 0 and starts and starts[0] > 0 else _heading(unit), unit))
+    return units
+
+
+def _split_oversized(heading: str, unit: str, max_chars: int) -> List[Tuple[str, str]]:
+    """Cut a unit longer than max_chars at blank lines, or hard at max_chars"""
+    pieces: List[str] = []
+    current = ""
+    for paragraph in re.split(r"(?<=\n)(?=[ \t]*\n)", unit):
+        while len(paragraph) > max_chars:
+            pieces.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        if current and len(current) + len(paragraph) > max_chars:
+            pieces.append(current)
+            current = ""
+        current += paragraph
+    if current:
+        pieces.append(current)
+    if len(pieces) == 1:
+        return [(heading, unit)]
+    return [(f"{heading} ({number}/{len(pieces)})", piece) for number, piece in enumerate(pieces, start=1)]
+
+
+def _is_anchor(heading: str, anchor_every: int) -> bool:
+    return int(hashlib.sha1(heading.encode("utf-8")).hexdigest()[:8], 16) % anchor_every == 0
+
+
+def chunk_document(
+    text: str,
+    max_chars: int = 24000,
+    min_chars: int = 6000,
+    anchor_every: int = 4,
+) -> List[DocumentChunk]:
+    """Pack structural units into chunks of at most max_chars characters
+
+    A chunk ends after a unit whose heading hashes to an anchor once it holds
+    min_chars, or earlier when the next unit would not fit. Boundaries depend
+    only on nearby headings, so editing one section leaves the other chunks
+    byte-identical.
+    """
+    units: List[Tuple[str, str]] = []
+    for heading, unit in split_units(text):
+        units.extend(_split_oversized(heading, unit, max_chars) if len(unit) > max_chars else [(heading, unit)])
+
+    chunks: List[DocumentChunk] = []
+    headings: List[str] = []
+    parts: List[str] = []
+    size = 0
+
+    def flush() -> None:
+        nonlocal size
+        if not parts:
+            return
+        label = headings[0] if len(headings) == 1 else f"{headings[0]} – {headings[-1]}"
+        chunks.append(DocumentChunk(index=len(chunks), label=label, text="".join(parts).strip()))
+        headings.clear()
+        parts.clear()
+        size = 0
+
+    for heading, unit in units:
+        if parts and size + len(unit) > max_chars:
+            flush()
+        headings.append(heading)
+        parts.append(unit)
+        size += len(unit)
+        if size >= min_chars and _is_anchor(heading, anchor_every):
+            flush()
+    flush()
+    return chunks
+
+
+def document_overview(text: str, max_chars: int = 1500) -> str:
+    """Title and opening of the document, shared by every chunk prompt"""
+    match = _HEADING.search(text)
+    opening = text[:match.start()] if match and match.start() > 0 else text
+    return opening.strip()[:max_chars]
+
+
+class LongDocumentAnalyzer:
+    """Chunk, analyse chunks concurrently and merge, reusing cached chunk notes"""
+
+    def __init__(
+        self,
+        client: Any,
+        max_concurrency: int = 8,
+        cache: Optional[LLMResponseCache] = None,
+        chunk_chars: int = 24000,
+        min_chunk_chars: int = 6000,
+        reduce_fan_in: int = 12,
+    ):
+        self.client = client
+        self.max_concurrency = max_concurrency
+        # Chunk notes are keyed by content, never served stale, so they are not
+        # tagged with the document id: an amendment must not drop the notes of
+        # the chunks it left unchanged
+        self.cache = cache or getattr(client, "cache", None) or LLMResponseCache()
+        self.chunk_chars = chunk_chars
+        self.min_chunk_chars = min_chunk_chars
+        self.reduce_fan_in = reduce_fan_in
+
+    async def analyze(
+        self,
+        document_text: str,
+        analysis_type: str = "general",
+        context: Optional[str] = None,
+        tenant: str = "default",
+        sources: Optional[List[str]] = None,
+        priority: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Analyse a long document; the result has the same fields as ``analyze_legal_document``
+
+        ``priority`` overrides the scheduler priority of every chunk, merge and final call.
+        """
+        try:
+            start = time.perf_counter()
+            mapped = await self.map(document_text, analysis_type, context, tenant=tenant, priority=priority)
+            completion = await self.client.complete(
+                "analyze_document",
+                mapped.prompt,
+                max_tokens=REDUCE_MAX_TOKENS,
+                temperature=TEMPERATURE,
+                sources=sources,
+                tenant=tenant,
+                priority=priority,
+                analysis_type=analysis_type,
+            )
+
+            result = {
+                "analysis": completion["text"],
+                "model": completion["model"],
+                "analysis_type": analysis_type,
+                "token_usage": mapped.total_usage(completion["token_usage"]),
+                "cached": completion["cached"],
+                **mapped.fields(),
+                "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            }
+
+            logger.info(
+                "Long document analyzed",
+                analysis_type=analysis_type,
+                chunks=mapped.chunks,
+                chunks_cached=mapped.chunks_cached,
+                latency_ms=result["latency_ms"],
+                map_speedup=mapped.map_speedup,
+            )
+            return result
+
+        except Exception as e:
+            logger.error("Error analyzing long document", error=str(e))
+            raise
+
+    async def map(
+        self,
+        document_text: str,
+        analysis_type: str = "general",
+        context: Optional[str] = None,
+        tenant: str = "default",
+        priority: Optional[int] = None,
+    ) -> MappedDocument:
+        """Chunk notes, merged until they fit the final reduce prompt"""
+        start = time.perf_counter()
+        chunks = chunk_document(document_text, self.chunk_chars, self.min_chunk_chars)
+        overview = document_overview(document_text)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        usage: Dict[str, int] = {}
+        call_seconds: List[float] = []
+
+        async def call(operation: str, prompt, max_tokens: int) -> Dict[str, Any]:
+            async with semaphore:
+                call_start = time.perf_counter()
+                completion = await self.client.complete(
+                    operation, prompt, max_tokens=max_tokens, temperature=TEMPERATURE, use_cache=False,
+                    tenant=tenant, priority=priority,
+                )
+                call_seconds.append(time.perf_counter() - call_start)
+            _add_usage(usage, completion["token_usage"])
+            return completion
+
+        cached = 0
+
+        async def map_chunk(chunk: DocumentChunk) -> str:
+            nonlocal cached
+            prompt = chunk_prompt(overview, chunk.label, chunk.text, analysis_type)
+            key = request_key(
+                self.client.router.route("analyze_chunk").cache_model,
+                prompt.fingerprint(),
+                max_tokens=CHUNK_MAX_TOKENS,
+                temperature=TEMPERATURE,
+            )
+            hit = await self.cache.get(key, "analyze_chunk")
+            if hit:
+                cached += 1
+                return hit.response["text"]
+            completion = await call("analyze_chunk", prompt, CHUNK_MAX_TOKENS)
+            # Truncated or rejected notes are used once but not reused
+            if completion["accepted"]:
+                await self.cache.put(key, {"text": completion["text"]}, completion["token_usage"])
+            return completion["text"]
+
+        notes = list(await asyncio.gather(*(map_chunk(chunk) for chunk in chunks)))
+        map_seconds = time.perf_counter() - start
+        map_call_seconds = sum(call_seconds)
+
+        labels = [chunk.label for chunk in chunks]
+        notes, labels = await self._reduce_groups(notes, labels, analysis_type, call)
+        return MappedDocument(
+            prompt=reduce_prompt(notes, labels, analysis_type, context),
+            chunks=len(chunks),
+            chunks_cached=cached,
+            usage=usage,
+            # Time the map calls would have taken one after another, over the time they took
+            map_speedup=round(map_call_seconds / map_seconds, 2) if map_seconds and map_call_seconds else None,
+        )
+
+    async def _reduce_groups(
+        self,
+        notes: List[str],
+        labels: List[str],
+        analysis_type: str,
+        call: Any,
+    ) -> Tuple[List[str], List[str]]:
+        """Merge notes group by group until one final reduce can take them all"""
+        while len(notes) > self.reduce_fan_in:
+            groups = [range(i, min(i + self.reduce_fan_in, len(notes))) for i in range(0, len(notes), self.reduce_fan_in)]
+            completions = await asyncio.gather(*(
+                call(
+                    "reduce_chunks",
+                    reduce_prompt([notes[i] for i in group], [labels[i] for i in group], analysis_type, final=False),
+                    REDUCE_MAX_TOKENS,
+                )
+                for group in groups
+            ))
+            notes = [completion["text"] for completion in completions]
+            labels = [_span(labels[group[0]], labels[group[-1]]) for group in groups]
+        return notes, labels
+
+
+def _add_usage(total: Dict[str, int], usage: Dict[str, int]) -> None:
+    for name, count in usage.items():
+        total[name] = total.get(name, 0) + count
+
+
+def _span(first: str, last: str) -> str:
+    return first if first == last else f"{first.split(' – ')[0]} – {last.split(' – ')[-1]}"
+
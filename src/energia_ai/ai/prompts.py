@@ -0,0 +1,237 @@
+"""
+Prompt templates for Claude with a cache-friendly layout
+
+Provider-side prompt caching reuses the longest unchanged prefix of a
+request, so every prompt is laid out from most to least stable:
+
+1. static instructions (system prompt, identical for every call);
+2. reused context: the document under analysis or the question's context
+   documents, identical across analysis types of the same document;
+3. the per-call request: analysis type instructions, extra context or the
+   question.
+
+A cache breakpoint is placed after (1) and after (2). Analysing one document
+several ways therefore pays for the document once and reads it from the cache
+afterwards; blocks shorter than the provider's minimum are simply not cached.
+"""
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+CACHE_BREAKPOINT = {"type": "ephemeral"}
+
+SYSTEM_INSTRUCTIONS = """You are an expert Hungarian legal AI assistant working with Hungarian legislation, \
+court decisions and contracts.
+
+Ground every statement in the documents provided and in Hungarian law. Cite legal sources precisely, \
+in the Hungarian form (for example "2007. évi LXXXVI. törvény 12. § (1) bekezdés" or \
+"273/2007. (X. 19.) Korm. rendelet"). Distinguish clearly between what a document states and your \
+interpretation of it, and say so when the documents do not answer the request."""
+
+ANALYSIS_INSTRUCTIONS = {
+    "general": """Analyze the legal document above.""",
+    "summary": """Please provide a comprehensive summary that includes:
+1. Main legal concepts and principles
+2. Key obligations and rights
+3. Important deadlines or conditions
+4. Potential legal implications
+
+Write the summary in clear, professional Hungarian.""",
+    "key_points": """Please extract the key legal points from this document. Format as a bullet list:
+• Point 1
+• Point 2
+etc.
+
+Focus on actionable items, legal obligations, rights, and important conditions.""",
+    "compliance": """Please analyze this document for compliance requirements:
+1. Identify all legal obligations
+2. Note any deadlines or time-sensitive requirements
+3. Highlight potential compliance risks
+4. Suggest compliance actions if applicable""",
+    "risks": """Please identify the legal risks this document creates or exposes:
+1. What could go wrong, and under which provision
+2. How likely it is and how severe the consequences would be
+3. How the risk can be mitigated""",
+}
+
+QUESTION_INSTRUCTIONS = """Answer the following legal question based on Hungarian law{context_note}.
+
+Please provide:
+1. A direct answer to the question
+2. Relevant legal principles
+3. Any applicable Hungarian legal references
+4. Confidence level in your answer
+
+Answer in Hungarian if the question is in Hungarian, otherwise in English.
+
+Question: {question}"""
+
+# Retrieval-augmented answers: passages are numbered sources the answer cites
+CITATION_INSTRUCTIONS = """Base the answer only on the numbered passages above. Cite the passage behind every \
+statement with its index in square brackets, e.g. [2] or [1][3]. If the passages do not answer the question, \
+say so instead of answering from memory."""
+
+
+# Map step of long-document analysis: notes on one part, written to be merged later
+MAP_INSTRUCTIONS = {
+    "general": "Write concise analysis notes on this part: subject matter, legal effects and notable provisions.",
+    "summary": "Summarize this part: main legal concepts, obligations and rights, deadlines and conditions.",
+    "key_points": "List the key legal points of this part as bullets (•), each with its section reference.",
+    "compliance": "List every obligation, deadline and compliance risk in this part, each with its section reference.",
+}
+
+CHUNK_REQUEST = """The text below is part {label} of the document introduced above. \
+Work only from this part; other parts are analysed separately and merged afterwards.
+
+{instructions}
+
+<part label="{label}">
+{text}
+</part>"""
+
+REDUCE_REQUEST = """Below are notes on consecutive parts of one legal document, in document order. \
+Merge them into a single result for the whole document: remove duplicates, keep section references, \
+and resolve cross-references between parts.
+
+{notes}
+
+{instructions}"""
+
+# Batch impact scans end with two fixed lines, parsed into contract_impacts rows
+IMPACT_INSTRUCTIONS = """Finish with exactly these two lines:
+Priority: none, low, medium, high or urgent (none if the change does not affect this document)
+Action required: the most important action to take, or none"""
+
+# Structured extraction: the answer goes into a tool call checked against its JSON schema
+STRUCTURED_REQUEST = "Report the result by calling the {tool} tool."
+
+REPAIR_REQUEST = """The {tool} input did not match its schema:
+{errors}
+
+Call {tool} again with corrected values for these fields only: {fields}."""
+
+
+@dataclass
+class PromptLayout:
+    """A prompt split into static instructions, reused context and the per-call request"""
+    system: List[str]
+    context: List[str] = field(default_factory=list)
+    request: str = ""
+
+    def system_blocks(self) -> List[Dict[str, Any]]:
+        """System prompt blocks with a cache breakpoint after the static instructions"""
+        blocks: List[Dict[str, Any]] = [{"type": "text", "text": text} for text in self.system]
+        if blocks:
+            blocks[-1]["cache_control"] = CACHE_BREAKPOINT
+        return blocks
+
+    def messages(self) -> List[Dict[str, Any]]:
+        """User message: context blocks (breakpoint after the last one), then the request"""
+        content: List[Dict[str, Any]] = [{"type": "text", "text": text} for text in self.context]
+        if content:
+            content[-1]["cache_control"] = CACHE_BREAKPOINT
+        content.append({"type": "text", "text": self.request})
+        return [{"role": "user", "content": content}]
+
+    @property
+    def text(self) -> str:
+        """The whole prompt as plain text (citation scanning, logging)"""
+        return "\n\n".join([*self.system, *self.context, self.request])
+
+    def fingerprint(self) -> str:
+        """Canonical serialization, for response cache keys"""
+        return json.dumps(
+            {"system": self.system, "context": self.context, "request": self.request},
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+
+
+def analysis_prompt(document_text: str, analysis_type: str = "general", context: Optional[str] = None) -> PromptLayout:
+    """Document first, analysis instructions last, so one document is cached across analysis types"""
+    instructions = ANALYSIS_INSTRUCTIONS.get(analysis_type)
+    if instructions is None:
+        instructions = f"{ANALYSIS_INSTRUCTIONS['general']}\nAnalysis type: {analysis_type}"
+    if context:
+        instructions += f"\n\nAdditional context: {context}"
+    return PromptLayout(
+        system=[SYSTEM_INSTRUCTIONS],
+        context=[f"<document>\n{document_text}\n</document>"],
+        request=instructions,
+    )
+
+
+def question_prompt(question: str, context_documents: Optional[List[str]] = None) -> PromptLayout:
+    """Context documents first, the question last"""
+    documents = [
+        f'<document index="{number}">\n{document}\n</document>'
+        for number, document in enumerate(context_documents or [], start=1)
+    ]
+    context_note = " and the context documents above" if documents else ""
+    return PromptLayout(
+        system=[SYSTEM_INSTRUCTIONS],
+        context=documents,
+        request=QUESTION_INSTRUCTIONS.format(context_note=context_note, question=question),
+    )
+
+
+def retrieval_prompt(question: str, passages: List[Tuple[str, str]]) -> PromptLayout:
+    """Retrieved passages as numbered, labelled sources; the question and citation rules last"""
+    documents = [
+        f'<document index="{number}" source="{label}">\n{text}\n</document>'
+        for number, (label, text) in enumerate(passages, start=1)
+    ]
+    request = QUESTION_INSTRUCTIONS.format(context_note=" and the retrieved passages above", question=question)
+    return PromptLayout(
+        system=[SYSTEM_INSTRUCTIONS],
+        context=documents,
+        request=f"{CITATION_INSTRUCTIONS}\n\n{request}",
+    )
+
+
+def chunk_prompt(overview: str, label: str, text: str, analysis_type: str) -> PromptLayout:
+    """Map prompt for one part of a long document; the shared overview is the cached context"""
+    return PromptLayout(
+        system=[SYSTEM_INSTRUCTIONS],
+        context=[f"<document_overview>\n{overview}\n</document_overview>"],
+        request=CHUNK_REQUEST.format(
+            label=label,
+            instructions=MAP_INSTRUCTIONS.get(analysis_type, MAP_INSTRUCTIONS["general"]),
+            text=text,
+        ),
+    )
+
+
+def reduce_prompt(
+    notes: List[str],
+    labels: List[str],
+    analysis_type: str,
+    context: Optional[str] = None,
+    final: bool = True,
+) -> PromptLayout:
+    """Merge part notes into the requested output, or into combined notes for a further merge"""
+    if final:
+        instructions = analysis_prompt("", analysis_type, context).request
+    else:
+        instructions = MAP_INSTRUCTIONS.get(analysis_type, MAP_INSTRUCTIONS["general"])
+    return PromptLayout(
+        system=[SYSTEM_INSTRUCTIONS],
+        request=REDUCE_REQUEST.format(
+            notes="\n\n".join(f'<notes part="{label}">\n{note}\n</notes>' for label, note in zip(labels, notes)),
+            instructions=instructions,
+        ),
+    )
+
+
+def impact_prompt(document_text: str, analysis_type: str = "compliance", context: Optional[str] = None) -> PromptLayout:
+    """Analysis prompt for batch impact scans, ending in a parseable priority and action"""
+    prompt = analysis_prompt(document_text, analysis_type, context)
+    prompt.request += f"\n\n{IMPACT_INSTRUCTIONS}"
+    return prompt
+
+
+def structured_prompt(document_text: str, analysis_type: str, tool: str, context: Optional[str] = None) -> PromptLayout:
+    """Analysis prompt whose answer is reported through a tool call"""
+    prompt = analysis_prompt(document_text, analysis_type, context)
+    prompt.request += f"\n\n{STRUCTURED_REQUEST.format(tool=tool)}"
+    return prompt
@@ -0,0 +1,335 @@
+"""
+Retrieval-augmented answers to legal questions
+
+Instead of relying on context documents sent by the caller, the pipeline finds
+its own:
+
+1. retrieve: the question is embedded and searched in Qdrant while
+   Elasticsearch runs the lexical search, concurrently; a failing retriever
+   is logged and the other one's hits are used alone;
+2. fuse: the two rankings are merged by reciprocal rank fusion, and texts of
+   documents only the vector index returned are loaded from MongoDB
+   concurrently;
+3. rerank: documents are split into passages at section boundaries (see
+   ``long_document``), each scored by the share of question terms it contains
+   blended with its document's fused score;
+4. pack: the best passages go into the prompt until the context token budget
+   is spent, skipping passages whose normalised text was already packed;
+5. generate: Claude answers from the numbered passages, citing them as [n];
+   cited indices are mapped back to their documents.
+
+Each stage's wall-clock time is returned in ``metadata.stage_latency_ms`` and
+recorded in the ``rag_stage_seconds`` histogram. ``retrieve`` covers the
+concurrent embed, vector search and lexical search stages, which are also
+timed individually.
+"""
+import asyncio
+import hashlib
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import structlog
+
+from ..cache.llm_cache import citation_fingerprint, context_fingerprint
+from ..core.metrics import get_metrics_registry
+from .long_document import chunk_document
+from .prompts import retrieval_prompt
+from .scheduler import estimate_tokens
+
+logger = structlog.get_logger()
+
+RRF_K = 60  # Reciprocal rank fusion damping; the usual constant
+# Content store fields holding a document's text, best first
+STORED_TEXT_FIELDS = ("extracted_text", "processed_content", "raw_content")
+# Search hits may also carry the text in the index's own "content" field
+TEXT_FIELDS = ("extracted_text", "processed_content", "content", "raw_content")
+STAGES = ("embed", "vector_search", "lexical_search", "retrieve", "load", "rerank", "pack", "generate", "total")
+
+_TERM = re.compile(r"\w{3,}")
+_CITATION = re.compile(r"\[(\d+)\]")
+
+Retriever = Callable[..., Awaitable[List[Dict[str, Any]]]]
+
+
+@dataclass
+class Candidate:
+    """A retrieved document with its rank in each retriever"""
+    document_id: str
+    title: str = ""
+    legal_reference: str = ""
+    source_url: str = ""
+    text: str = ""
+    vector_rank: Optional[int] = None
+    lexical_rank: Optional[int] = None
+    score: float = 0.0
+
+
+@dataclass
+class Passage:
+    document: Candidate
+    label: str
+    text: str
+    score: float = 0.0
+
+    @property
+    def source(self) -> str:
+        name = self.document.legal_reference or self.document.title or self.document.document_id
+        return f"{name}, {self.label}".replace('"', "'")
+
+
+@dataclass
+class Retrieval:
+    """Packed passages and the pipeline's bookkeeping"""
+    passages: List[Passage] = field(default_factory=list)
+    candidates: int = 0
+    duplicates: int = 0
+    context_tokens: int = 0
+
+
+def terms(text: str) -> Set[str]:
+    return set(_TERM.findall(text.lower()))
+
+
+def _text_key(text: str) -> str:
+    return hashlib.sha1(" ".join(text.lower().split()).encode("utf-8")).hexdigest()
+
+
+def _first_text(source: Dict[str, Any]) -> str:
+    return next((source[name] for name in TEXT_FIELDS if source.get(name)), "")
+
+
+def fuse(vector_hits: List[Dict[str, Any]], lexical_hits: List[Dict[str, Any]]) -> List[Candidate]:
+    """Merge Qdrant and Elasticsearch hits by reciprocal rank fusion, best first"""
+    candidates: Dict[str, Candidate] = {}
+    for rank, hit in enumerate(vector_hits, start=1):
+        metadata = hit.get("metadata") or {}
+        candidate = candidates.setdefault(str(hit["id"]), Candidate(document_id=str(hit["id"])))
+        candidate.vector_rank = rank
+        candidate.score += 1 / (RRF_K + rank)
+        candidate.title = candidate.title or metadata.get("title") or ""
+        candidate.legal_reference = candidate.legal_reference or metadata.get("legal_reference") or ""
+        candidate.source_url = candidate.source_url or metadata.get("source_url") or ""
+    for rank, hit in enumerate(lexical_hits, start=1):
+        source = hit.get("source") or {}
+        candidate = candidates.setdefault(str(hit["id"]), Candidate(document_id=str(hit["id"])))
+        candidate.lexical_rank = rank
+        candidate.score += 1 / (RRF_K + rank)
+        candidate.title = candidate.title or source.get("title") or ""
+        candidate.legal_reference = candidate.legal_reference or source.get("legal_reference") or ""
+        candidate.source_url = candidate.source_url or source.get("source_url") or ""
+        candidate.text = candidate.text or _first_text(source)
+    return sorted(candidates.values(), key=lambda candidate: candidate.score, reverse=True)
+
+
+def rerank(question: str, candidates: List[Candidate], passage_chars: int, term_weight: float = 0.5) -> List[Passage]:
+    """Passages of the candidates, scored by question term coverage and their document's fused score"""
+    question_terms = terms(question)
+    top_score = max((candidate.score for candidate in candidates), default=0.0) or 1.0
+    passages = []
+    for candidate in candidates:
+        if not candidate.text:
+            continue
+        for chunk in chunk_document(candidate.text, max_chars=passage_chars, min_chars=passage_chars // 2):
+            coverage = len(question_terms & terms(chunk.text)) / len(question_terms) if question_terms else 0.0
+            score = term_weight * coverage + (1 - term_weight) * candidate.score / top_score
+            passages.append(Passage(document=candidate, label=chunk.label, text=chunk.text, score=score))
+    return sorted(passages, key=lambda passage: passage.score, reverse=True)
+
+
+def pack(passages: List[Passage], token_budget: int) -> Tuple[List[Passage], int, int]:
+    """Best passages within the token budget, duplicates skipped; returns the passages, duplicates and tokens used"""
+    packed: List[Passage] = []
+    seen: Set[str] = set()
+    duplicates = 0
+    used = 0
+    for passage in passages:
+        key = _text_key(passage.text)
+        if key in seen:
+            duplicates += 1
+            continue
+        tokens = estimate_tokens(passage.text)
+        if used + tokens > token_budget:
+            # A shorter, lower-ranked passage may still fit
+            continue
+        seen.add(key)
+        packed.append(passage)
+        used += tokens
+    return packed, duplicates, used
+
+
+def citations(answer: str, passages: List[Passage]) -> List[Dict[str, Any]]:
+    """Passages the answer cites as [n], in order of first citation"""
+    cited = []
+    for index in dict.fromkeys(int(number) for number in _CITATION.findall(answer)):
+        if 1 <= index <= len(passages):
+            passage = passages[index - 1]
+            cited.append({
+                "index": index,
+                "document_id": passage.document.document_id,
+                "title": passage.document.title,
+                "legal_reference": passage.document.legal_reference,
+                "source_url": passage.document.source_url,
+                "passage": passage.label,
+            })
+    return cited
+
+
+async def _embed(question: str) -> List[float]:
+    # Search backends are optional dependencies; import them on first use
+    from ..vector_search.embeddings import get_embedding_manager
+    return await (await get_embedding_manager()).generate_embedding(question)
+
+
+async def _vector_search(embedding: List[float], limit: int, document_type: Optional[str]) -> List[Dict[str, Any]]:
+    from ..vector_search.qdrant_manager import get_qdrant_manager
+    manager = await get_qdrant_manager()
+    return await manager.search_similar_documents(embedding, limit=limit, document_type=document_type)
+
+
+async def _lexical_search(question: str, limit: int, document_type: Optional[str]) -> List[Dict[str, Any]]:
+    from ..search.elasticsearch_manager import get_elasticsearch_manager
+    manager = await get_elasticsearch_manager()
+    return (await manager.search_documents(question, document_type=document_type, limit=limit))["documents"]
+
+
+async def _load_text(document_id: str) -> str:
+    from ..storage.mongodb_manager import get_mongodb_manager
+    manager = await get_mongodb_manager()
+    return _first_text(await manager.load_document_content(document_id, STORED_TEXT_FIELDS))
+
+
+class RetrievalPipeline:
+    """Answers questions from retrieved, reranked and packed passages with citations"""
+
+    def __init__(
+        self,
+        client: Any,
+        embed: Callable[[str], Awaitable[List[float]]] = _embed,
+        vector_search: Retriever = _vector_search,
+        lexical_search: Retriever = _lexical_search,
+        load_text: Callable[[str], Awaitable[str]] = _load_text,
+        candidates: int = 20,
+        context_tokens: int = 6000,
+        passage_chars: int = 2000,
+    ):
+        self.client = client
+        self.embed = embed
+        self.vector_search = vector_search
+        self.lexical_search = lexical_search
+        self.load_text = load_text
+        self.candidates = candidates
+        self.context_tokens = context_tokens
+        self.passage_chars = passage_chars
+        self.metrics = get_metrics_registry()
+        self.metrics.register_collector("rag_pipeline", self.report)
+
+    async def _timed(self, timings: Dict[str, float], stage: str, awaitable: Awaitable[Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            elapsed = time.perf_counter() - start
+            timings[stage] = round(elapsed * 1000, 1)
+            self.metrics.histogram("rag_stage_seconds").observe(elapsed, stage=stage)
+
+    async def _guarded(self, retriever: str, awaitable: Awaitable[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        try:
+            return await awaitable
+        except Exception as e:
+            logger.warning("Retriever failed, answering from the other one", retriever=retriever, error=str(e))
+            self.metrics.counter("rag_retriever_errors_total").inc(retriever=retriever)
+            return []
+
+    async def retrieve(
+        self, question: str, timings: Dict[str, float], document_type: Optional[str] = None
+    ) -> Retrieval:
+        """Search, fuse, rerank and pack passages for a question, timing each stage"""
+
+        async def vector() -> List[Dict[str, Any]]:
+            embedding = await self._timed(timings, "embed", self.embed(question))
+            if not embedding:
+                return []
+            return await self._timed(
+                timings, "vector_search", self.vector_search(embedding, self.candidates, document_type)
+            )
+
+        lexical = self._timed(timings, "lexical_search", self.lexical_search(question, self.candidates, document_type))
+        vector_hits, lexical_hits = await self._timed(
+            timings, "retrieve", asyncio.gather(self._guarded("vector", vector()), self._guarded("lexical", lexical))
+        )
+        candidates = fuse(vector_hits, lexical_hits)[:self.candidates]
+
+        missing = [candidate for candidate in candidates if not candidate.text]
+        if missing:
+            texts = await self._timed(
+                timings, "load",
+                asyncio.gather(*(self.load_text(candidate.document_id) for candidate in missing), return_exceptions=True)
+            )
+            for candidate, text in zip(missing, texts):
+                if isinstance(text, Exception):
+                    logger.warning("Loading retrieved document failed", document_id=candidate.document_id, error=str(text))
+                else:
+                    candidate.text = text or ""
+
+        start = time.perf_counter()
+        passages = rerank(question, candidates, self.passage_chars)
+        timings["rerank"] = round((time.perf_counter() - start) * 1000, 1)
+        start = time.perf_counter()
+        packed, duplicates, used = pack(passages, self.context_tokens)
+        timings["pack"] = round((time.perf_counter() - start) * 1000, 1)
+        return Retrieval(passages=packed, candidates=len(candidates), duplicates=duplicates, context_tokens=used)
+
+    async def answer(
+        self,
+        question: str,
+        tenant: str = "default",
+        document_type: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Answer from retrieved passages: the answer, its citations and per-stage latencies"""
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+        try:
+            retrieval = await self.retrieve(question, timings, document_type)
+            texts = [passage.text for passage in retrieval.passages]
+            prompt = retrieval_prompt(question, [(passage.source, passage.text) for passage in retrieval.passages])
+            completion = await self._timed(timings, "generate", self.client.complete(
+                "answer_question", prompt, max_tokens=3000, temperature=0.2,
+                semantic_text=question,
+                scope=(tenant, "answer_question", context_fingerprint(texts), citation_fingerprint(question)),
+                sources=list(dict.fromkeys(passage.document.document_id for passage in retrieval.passages)),
+                tenant=tenant
+            ))
+        except Exception as e:
+            logger.error("Retrieval-augmented answer failed", error=str(e))
+            raise
+        timings["total"] = round((time.perf_counter() - start) * 1000, 1)
+        self.metrics.histogram("rag_stage_seconds").observe(timings["total"] / 1000, stage="total")
+
+        logger.info(
+            "Retrieval-augmented answer completed",
+            candidates=retrieval.candidates,
+            passages=len(retrieval.passages),
+            context_tokens=retrieval.context_tokens,
+            total_ms=timings["total"],
+        )
+        return {
+            "answer": completion["text"],
+            "question": question,
+            "model": completion["model"],
+            "token_usage": completion["token_usage"],
+            "cached": completion["cached"],
+            "citations": citations(completion["text"], retrieval.passages),
+            "metadata": {
+                "stage_latency_ms": timings,
+                "candidates": retrieval.candidates,
+                "passages": len(retrieval.passages),
+                "duplicate_passages": retrieval.duplicates,
+                "context_tokens": retrieval.context_tokens,
+            },
+        }
+
+    def report(self) -> Dict[str, Any]:
+        histogram = self.metrics.histogram("rag_stage_seconds")
+        return {stage: histogram.summary(stage=stage) for stage in STAGES}
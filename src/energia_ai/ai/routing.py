@@ -0,0 +1,172 @@
+"""
+Model tiers and cascade routing
+
+Every completion is routed by ``operation:analysis_type`` (falling back to the
+operation) to a cascade of model tiers. Simple, structured work such as task
+plans, key-point lists and chunk notes starts on the fast tier; its answer is
+checked and escalated to the next tier when it fails the route's validator,
+was cut off at ``max_tokens`` or the model marked itself ``Confidence: low``.
+The last tier's answer is returned whatever the check says. Streams cannot be
+taken back once sent, so they go straight to the last tier.
+
+Routes are configured with ``LLM_ROUTES``, a JSON object of route to
+comma-separated tiers, e.g. ``{"analyze_document:summary": "fast,strong"}``;
+unlisted routes go straight to the strong tier. Requests, escalations,
+latency and cost are recorded per route and model.
+"""
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import structlog
+
+from ..core.metrics import get_metrics_registry
+
+logger = structlog.get_logger()
+
+TIER_FAST = "fast"
+TIER_STRONG = "strong"
+
+# USD per million input and output tokens
+MODEL_PRICES = {
+    "claude-3-haiku-20240307": (0.25, 1.25),
+    "claude-3-5-haiku-20241022": (0.8, 4.0),
+    "claude-3-sonnet-20240229": (3.0, 15.0),
+    "claude-3-5-sonnet-20241022": (3.0, 15.0),
+}
+# Prompt cache writes and reads, relative to the input price
+CACHE_WRITE_PRICE = 1.25
+CACHE_READ_PRICE = 0.1
+
+_LOW_CONFIDENCE = re.compile(r"^\W*confidence\W*:\W*low\b", re.IGNORECASE | re.MULTILINE)
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def json_payload(text: str) -> str:
+    """The JSON in a response, without a surrounding code fence"""
+    return _FENCE.sub("", text.strip())
+
+
+def non_empty(text: str) -> Optional[str]:
+    return None if text.strip() else "empty response"
+
+
+def valid_json(text: str) -> Optional[str]:
+    try:
+        payload = json.loads(json_payload(text))
+    except json.JSONDecodeError as e:
+        return f"invalid JSON: {e.msg}"
+    return None if isinstance(payload, dict) else "not a JSON object"
+
+
+def bullet_list(text: str) -> Optional[str]:
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith(("•", "-", "*")) or (line[:1].isdigit() and "." in line):
+            return None
+    return "no list items"
+
+
+# Default cascades, and the check an answer must pass to stop there
+DEFAULT_ROUTES = {
+    "plan_task": "fast,strong",
+    "analyze_document:key_points": "fast,strong",
+    "analyze_chunk": "fast,strong",
+}
+ROUTE_VALIDATORS: Dict[str, Callable[[str], Optional[str]]] = {
+    "plan_task": valid_json,
+    "analyze_document:key_points": bullet_list,
+}
+
+
+@dataclass(frozen=True)
+class Route:
+    name: str
+    models: Tuple[str, ...]
+    validator: Callable[[str], Optional[str]] = non_empty
+
+    @property
+    def cache_model(self) -> str:
+        """Model part of response cache keys: answers are cached per cascade, not per tier"""
+        return "+".join(self.models)
+
+
+def cost(model: str, usage: Dict[str, int]) -> float:
+    """USD cost of one call from its token usage; 0 for unpriced models"""
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (
+        usage.get("input_tokens", 0) * input_price
+        + usage.get("cache_creation_input_tokens", 0) * input_price * CACHE_WRITE_PRICE
+        + usage.get("cache_read_input_tokens", 0) * input_price * CACHE_READ_PRICE
+        + usage.get("output_tokens", 0) * output_price
+    ) / 1_000_000
+
+
+class ModelRouter:
+    """Maps operations to model cascades and accounts each route"""
+
+    def __init__(self, tiers: Dict[str, str], routes: Optional[Dict[str, str]] = None):
+        self.tiers = tiers
+        self.routes: Dict[str, Route] = {}
+        for name, spec in {**DEFAULT_ROUTES, **(routes or {})}.items():
+            names = [tier.strip() for tier in spec.split(",") if tier.strip()]
+            unknown = [tier for tier in names if tier not in tiers]
+            if not names or unknown:
+                raise ValueError(f"Invalid model route {name}: {spec!r}")
+            self.routes[name] = Route(name, tuple(tiers[tier] for tier in names), ROUTE_VALIDATORS.get(name, non_empty))
+        self.stats: Dict[str, Dict[str, Any]] = {}
+        self.metrics = get_metrics_registry()
+        self.metrics.register_collector("llm_routes", self.report)
+
+    def route(self, operation: str, analysis_type: Optional[str] = None) -> Route:
+        if analysis_type and f"{operation}:{analysis_type}" in self.routes:
+            return self.routes[f"{operation}:{analysis_type}"]
+        if operation in self.routes:
+            return self.routes[operation]
+        return Route(operation, (self.tiers[TIER_STRONG],))
+
+    def check(self, route: Route, text: str, stop_reason: Optional[str]) -> Optional[str]:
+        """Why an answer should be escalated, or None to accept it"""
+        if stop_reason == "max_tokens":
+            return "truncated"
+        if _LOW_CONFIDENCE.search(text):
+            return "low confidence"
+        return route.validator(text)
+
+    def record(self, route: Route, model: str, latency: float, usage: Dict[str, int], outcome: str) -> None:
+        """Account one call
+
+        ``outcome`` is accepted, retried (asked again on the same tier),
+        escalated, or rejected (failed the check on the last tier).
+        """
+        spent = cost(model, usage)
+        labels = {"route": route.name, "model": model}
+        self.metrics.counter("llm_route_requests_total").inc(outcome=outcome, **labels)
+        self.metrics.counter("llm_route_cost_usd_total").inc(spent, **labels)
+        self.metrics.histogram("llm_route_seconds").observe(latency, **labels)
+
+        stats = self.stats.setdefault(route.name, {"requests": 0, "escalations": 0, "cost_usd": 0.0, "models": {}})
+        if model == route.models[0] and outcome != "retried":
+            stats["requests"] += 1
+        stats["escalations"] += outcome == "escalated"
+        stats["cost_usd"] += spent
+        per_model = stats["models"].setdefault(model, {"calls": 0, "seconds": 0.0})
+        per_model["calls"] += 1
+        per_model["seconds"] += latency
+
+    def report(self) -> Dict[str, Any]:
+        report = {}
+        for name, stats in self.stats.items():
+            requests = stats["requests"] or 1
+            report[name] = {
+                "requests": stats["requests"],
+                "escalation_rate": round(stats["escalations"] / requests, 3),
+                "cost_usd": round(stats["cost_usd"], 6),
+                "cost_per_request_usd": round(stats["cost_usd"] / requests, 6),
+                "models": {
+                    model: {"calls": calls["calls"], "mean_seconds": round(calls["seconds"] / calls["calls"], 3)}
+                    for model, calls in stats["models"].items()
+                },
+            }
+        return report
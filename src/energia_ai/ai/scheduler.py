@@ -0,0 +1,409 @@
+"""
+Client-side scheduler for Claude API calls
+
+Every model call is admitted through one scheduler per API key:
+
+* requests wait in a priority queue (interactive Q&A before document
+  analysis before batch work) and at most ``max_concurrency`` run at once;
+* request and token rate limits are tracked from the ``anthropic-ratelimit-*``
+  response headers; a request that would exceed the remaining allowance waits
+  for the window to reset instead of drawing a 429, and a 429 pauses the whole
+  queue for its ``retry-after``;
+* rate-limited, overloaded and failed connections are retried with
+  full-jitter exponential backoff, capped at ``max_retries`` (the SDK's own
+  retries are turned off, so they do not multiply);
+* each tenant may have a token budget over a sliding window; a request that
+  would exceed it is rejected before it reaches the API. Message Batches
+  requests bypass the queue but are charged to the same budget when submitted.
+
+Errors the caller should answer with HTTP 429 are raised as ``LLMRateLimited``.
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Mapping, Optional, Sequence, TypeVar
+
+import anthropic
+import structlog
+
+from ..core.metrics import get_metrics_registry
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BATCH = 2
+
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_NORMAL: "normal", PRIORITY_BATCH: "batch"}
+
+# anthropic-ratelimit-<kind>-{limit,remaining,reset}
+RATE_LIMIT_KINDS = ("requests", "tokens", "input-tokens", "output-tokens")
+
+# Statuses worth retrying besides 5xx: timeout, conflict, rate limit
+_RETRY_STATUSES = {408, 409, 429}
+
+
+class LLMRateLimited(Exception):
+    """The request could not be served within the rate limits; retry after ``retry_after`` seconds"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBudgetExceeded(LLMRateLimited):
+    """The tenant spent its token budget for the current window"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of prompt text (about 4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, anthropic.APIConnectionError):
+        return True
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code in _RETRY_STATUSES or error.status_code >= 500
+    return False
+
+
+def retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds from a ``retry-after`` header, if present"""
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+@dataclass
+class _Limit:
+    limit: Optional[int]
+    remaining: int
+    reset_at: float  # monotonic time
+
+
+class RateLimitState:
+    """Remaining requests and tokens per limit kind, as last reported by the API"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.limits: Dict[str, _Limit] = {}
+
+    def observe(self, headers: Mapping[str, str]) -> None:
+        now, wall_now = self.clock(), time.time()
+        for kind in RATE_LIMIT_KINDS:
+            remaining = headers.get(f"anthropic-ratelimit-{kind}-remaining")
+            reset = headers.get(f"anthropic-ratelimit-{kind}-reset")
+            if remaining is None or reset is None:
+                continue
+            try:
+                reset_at = now + (datetime.fromisoformat(reset.replace("Z", "+00:00")).timestamp() - wall_now)
+                limit = headers.get(f"anthropic-ratelimit-{kind}-limit")
+                self.limits[kind] = _Limit(int(limit) if limit else None, int(remaining), reset_at)
+            except ValueError:
+                logger.debug("Unparseable rate limit header", kind=kind, remaining=remaining, reset=reset)
+
+    def wait_time(self, needs: Mapping[str, int]) -> float:
+        """Seconds until every limit has room for the request; 0 if it fits now"""
+        now = self.clock()
+        wait = 0.0
+        for kind, needed in needs.items():
+            limit = self.limits.get(kind)
+            if limit is None or limit.reset_at <= now:
+                continue
+            # A request larger than the whole limit goes through after a reset rather than never
+            if limit.remaining < needed and (limit.limit is None or limit.remaining < limit.limit):
+                wait = max(wait, limit.reset_at - now)
+        return wait
+
+    def reserve(self, needs: Mapping[str, int]) -> None:
+        """Count an admitted request against the remaining allowance until the next headers arrive"""
+        now = self.clock()
+        for kind, needed in needs.items():
+            limit = self.limits.get(kind)
+            if limit is not None and limit.reset_at > now:
+                limit.remaining -= needed
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        now = self.clock()
+        return {
+            kind: {"limit": limit.limit, "remaining": limit.remaining, "reset_in": round(max(0.0, limit.reset_at - now), 3)}
+            for kind, limit in self.limits.items()
+        }
+
+
+@dataclass
+class TenantBudget:
+    """Token budget of one tenant over a sliding window"""
+    tokens: int
+    window: float
+    spent: Deque[List] = field(default_factory=deque)  # [charged at, tokens]
+
+    def used(self, now: float) -> int:
+        while self.spent and self.spent[0][0] <= now - self.window:
+            self.spent.popleft()
+        return sum(tokens for _, tokens in self.spent)
+
+    def retry_after(self, now: float, needed: int) -> float:
+        """Seconds until enough of the window has aged out to spend ``needed`` tokens"""
+        excess = self.used(now) + needed - self.tokens
+        for spent_at, tokens in self.spent:
+            excess -= tokens
+            if excess <= 0:
+                return max(0.0, spent_at + self.window - now)
+        return self.window
+
+    def charge(self, now: float, tokens: int) -> List:
+        """Record spending; the returned entry can be corrected once actual usage is known"""
+        entry = [now, tokens]
+        self.spent.append(entry)
+        return entry
+
+
+@dataclass(order=True)
+class _Ticket:
+    priority: int
+    sequence: int
+    needs: Dict[str, int] = field(compare=False)
+
+
+class Slot:
+    """An admitted request; report its actual token usage with ``used``"""
+
+    def __init__(self, budget_entry: Optional[List] = None):
+        self.budget_entry = budget_entry
+        self.settled = False
+
+    def used(self, tokens: int) -> None:
+        """Replace the reserved estimate with the tokens the request actually used"""
+        if not self.settled:
+            self.settled = True
+            if self.budget_entry is not None:
+                self.budget_entry[1] = tokens
+
+
+class LLMScheduler:
+    """Priority queue, rate-limit tracking, retries and tenant budgets for model calls"""
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_retries: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        default_budget: Optional[int] = None,
+        budget_window: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Optional[random.Random] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.default_budget = default_budget
+        self.budget_window = budget_window
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.limits = RateLimitState(clock)
+        self.budgets: Dict[str, TenantBudget] = {}
+        self.metrics = get_metrics_registry()
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._queue: List[_Ticket] = []
+        self._sequence = itertools.count()
+        self._condition: Optional[asyncio.Condition] = None
+
+    @property
+    def condition(self) -> asyncio.Condition:
+        # Created lazily so the scheduler can be built outside a running loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    def set_budget(self, tenant: str, tokens: Optional[int]) -> None:
+        """Set (or with None remove) a tenant's token budget per ``budget_window``"""
+        if tokens is None:
+            self.budgets.pop(tenant, None)
+        elif tenant in self.budgets:
+            self.budgets[tenant].tokens = tokens
+        else:
+            self.budgets[tenant] = TenantBudget(tokens, self.budget_window)
+
+    def _budget(self, tenant: str) -> Optional[TenantBudget]:
+        if tenant not in self.budgets and self.default_budget:
+            self.budgets[tenant] = TenantBudget(self.default_budget, self.budget_window)
+        return self.budgets.get(tenant)
+
+    def charge(self, operation: str, tenant: str, costs: Sequence[int]) -> int:
+        """Charge requests sent outside ``slot`` (Message Batches) to the tenant budget
+
+        The leading requests that fit the budget are charged at their estimated
+        cost; returns how many.
+        """
+        budget = self._budget(tenant)
+        if budget is None:
+            return len(costs)
+        now = self.clock()
+        available = budget.tokens - budget.used(now)
+        count = total = 0
+        for cost in costs:
+            if total + cost > available:
+                break
+            total += cost
+            count += 1
+        if total:
+            budget.charge(now, total)
+        if count < len(costs):
+            self.metrics.counter("llm_scheduler_rejections_total").inc(len(costs) - count, operation=operation, reason="budget")
+            logger.warning("Tenant token budget exceeded", tenant=tenant, operation=operation, deferred=len(costs) - count)
+        return count
+
+    def observe(self, headers: Mapping[str, str]) -> None:
+        """Update rate-limit state from API response headers"""
+        self.limits.observe(headers)
+        after = retry_after(headers)
+        if after:
+            self.paused_until = max(self.paused_until, self.clock() + after)
+
+    async def on_response(self, response: Any) -> None:
+        """HTTP client response hook: every API response updates the rate-limit state"""
+        self.observe(response.headers)
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        operation: str,
+        tenant: str = "default",
+        priority: int = PRIORITY_NORMAL,
+        input_tokens: int = 0,
+        max_tokens: int = 0,
+    ) -> AsyncIterator[Slot]:
+        """Wait for admission, hold a concurrency slot for one API request"""
+        needs = {
+            "requests": 1,
+            "tokens": input_tokens + max_tokens,
+            "input-tokens": input_tokens,
+            "output-tokens": max_tokens,
+        }
+        reserved = input_tokens + max_tokens
+        budget = self._budget(tenant)
+        if budget is not None and budget.used(self.clock()) + reserved > budget.tokens:
+            self.metrics.counter("llm_scheduler_rejections_total").inc(operation=operation, reason="budget")
+            wait = budget.retry_after(self.clock(), reserved)
+            logger.warning("Tenant token budget exceeded", tenant=tenant, operation=operation, retry_after=round(wait, 1))
+            raise TokenBudgetExceeded(f"Token budget of tenant {tenant} exceeded", wait)
+
+        queued_at = self.clock()
+        await self._admit(_Ticket(priority, next(self._sequence), needs))
+        self.metrics.histogram("llm_scheduler_wait_seconds").observe(
+            self.clock() - queued_at, priority=PRIORITY_NAMES.get(priority, str(priority))
+        )
+        slot = Slot(budget.charge(self.clock(), reserved) if budget is not None else None)
+        try:
+            yield slot
+        except anthropic.APIStatusError as e:
+            # The 429's retry-after pauses the queue for everyone
+            self.observe(e.response.headers)
+            raise
+        finally:
+            # A failed request is not charged; a completed one settles its actual usage
+            slot.used(0)
+            async with self.condition:
+                self.in_flight -= 1
+                self.condition.notify_all()
+
+    async def _admit(self, ticket: _Ticket) -> None:
+        async with self.condition:
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    delay = self._admission_delay(ticket)
+                    if delay <= 0:
+                        break
+                    try:
+                        await asyncio.wait_for(self.condition.wait(), None if delay == math.inf else delay)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self.condition.notify_all()
+            self.in_flight += 1
+            self.limits.reserve(ticket.needs)
+
+    def _admission_delay(self, ticket: _Ticket) -> float:
+        if self._queue[0] is not ticket or self.in_flight >= self.max_concurrency:
+            return math.inf
+        return max(self.paused_until - self.clock(), self.limits.wait_time(ticket.needs), 0.0)
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's retry-after"""
+        delay = self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        response = getattr(error, "response", None)
+        after = retry_after(response.headers) if response is not None else None
+        if after is not None:
+            delay = max(delay, after + self.rng.uniform(0, self.base_delay))
+        return delay
+
+    async def run(
+        self,
+        send: Callable[[], Awaitable[T]],
+        operation: str,
+        tenant: str = "default",
+        priority: int = PRIORITY_NORMAL,
+        input_tokens: int = 0,
+        max_tokens: int = 0,
+        usage: Optional[Callable[[T], int]] = None,
+    ) -> T:
+        """Run one request through admission, retrying transient failures"""
+        attempt = 0
+        while True:
+            try:
+                async with self.slot(operation, tenant, priority, input_tokens, max_tokens) as slot:
+                    result = await send()
+                    slot.used(usage(result) if usage else input_tokens + max_tokens)
+                return result
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                error = e
+
+            status = getattr(error, "status_code", "connection")
+            if attempt >= self.max_retries:
+                logger.error("LLM request failed after retries", operation=operation, attempts=attempt + 1, status=status)
+                if status in (429, 529):
+                    raise LLMRateLimited(
+                        f"Model API rate limited after {attempt + 1} attempts", self.backoff(attempt, error)
+                    ) from error
+                raise error
+
+            delay = self.backoff(attempt, error)
+            attempt += 1
+            self.metrics.counter("llm_scheduler_retries_total").inc(operation=operation, status=str(status))
+            logger.warning(
+                "Retrying LLM request", operation=operation, attempt=attempt, status=status, delay=round(delay, 2)
+            )
+            await asyncio.sleep(delay)
+
+    def report(self) -> Dict[str, Any]:
+        now = self.clock()
+        return {
+            "queued": len(self._queue),
+            "in_flight": self.in_flight,
+            "paused_for": round(max(0.0, self.paused_until - now), 3),
+            "limits": self.limits.report(),
+            "tenants": {tenant: {"budget": budget.tokens, "used": budget.used(now)} for tenant, budget in self.budgets.items()},
+        }
@@ -0,0 +1,316 @@
+"""
+Structured outputs with tool schemas
+
+Key points, task plans, compliance findings and risk assessments are
+requested as a forced tool call whose input schema is the pydantic model's
+JSON schema, instead of being parsed out of free text. The tool input is
+checked against the model and, when it does not fit:
+
+1. repaired locally where the intent is unambiguous: JSON sent as a string,
+   a list sent as bullet lines, a single item instead of a list, enum values
+   in the wrong case or with dashes;
+2. otherwise only the failing top-level fields are asked for again, in the
+   same conversation, with the validation errors as the tool result;
+3. after ``max_repairs`` re-asks the request moves to the route's next model
+   tier (see ``routing``), and fails with ``StructuredOutputError`` on the last.
+
+Requests, local repairs, re-asks, escalations and failures are counted per
+schema.
+"""
+import json
+import re
+from typing import Any, Dict, List, Literal, Optional, Set, Tuple, Type
+
+import structlog
+from pydantic import BaseModel, Field, ValidationError
+
+from ..cache.llm_cache import request_key, response_sources
+from ..core.metrics import get_metrics_registry
+from .prompts import REPAIR_REQUEST, PromptLayout
+
+logger = structlog.get_logger()
+
+TEMPERATURE = 0.0
+
+_BULLET = re.compile(r"^\s*(?:[•\-*]|\d+[.)])\s*")
+
+Level = Literal["low", "medium", "high"]
+
+
+class KeyPoints(BaseModel):
+    """Key legal points of a document: obligations, rights, deadlines and conditions"""
+    points: List[str] = Field(..., min_length=1, description="One key point per item, with its section reference")
+
+
+class PlanStep(BaseModel):
+    agent: Literal["information_retrieval_agent", "document_analysis_agent", "comparison_agent"]
+    query: str = Field(..., min_length=1, description="What the agent should do")
+
+
+class Plan(BaseModel):
+    steps: List[PlanStep] = Field(..., min_length=1)
+
+
+class ExecutionPlan(BaseModel):
+    """Execution plan for a user query, as steps for the specialised agents"""
+    plan: Plan
+
+
+class ComplianceFinding(BaseModel):
+    requirement: str = Field(..., description="The legal obligation")
+    reference: Optional[str] = Field(None, description="Legal source, e.g. 2007. évi LXXXVI. törvény 12. § (1)")
+    status: Literal["compliant", "non_compliant", "unclear"]
+    deadline: Optional[str] = None
+    action_required: Optional[str] = None
+
+
+class ComplianceFindings(BaseModel):
+    """Compliance requirements of a document and whether they are met"""
+    findings: List[ComplianceFinding]
+    summary: str = Field(..., description="Overall compliance position in two or three sentences")
+
+
+class Risk(BaseModel):
+    description: str
+    reference: Optional[str] = Field(None, description="Provision the risk arises from")
+    likelihood: Level
+    impact: Level
+    mitigation: Optional[str] = None
+
+
+class RiskAssessment(BaseModel):
+    """Legal risks of a document with likelihood, impact and mitigation"""
+    risks: List[Risk]
+    overall_risk: Level
+
+
+SCHEMAS: Dict[str, Type[BaseModel]] = {
+    "key_points": KeyPoints,
+    "plan": ExecutionPlan,
+    "compliance_findings": ComplianceFindings,
+    "risks": RiskAssessment,
+}
+
+
+class StructuredOutputError(ValueError):
+    """Tool input still invalid after repairs on every model tier"""
+
+    def __init__(self, schema: str, errors: List[str]):
+        super().__init__(f"Invalid {schema} output: {'; '.join(errors)}")
+        self.schema = schema
+        self.errors = errors
+
+
+def tool_definition(name: str, fields: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """Tool for a schema; with ``fields``, a tool asking for those top-level fields only"""
+    model = SCHEMAS[name]
+    schema = model.model_json_schema()
+    if fields is not None:
+        schema["properties"] = {key: value for key, value in schema["properties"].items() if key in fields}
+        schema["required"] = [key for key in schema.get("required", []) if key in fields]
+    return {"name": name, "description": model.__doc__, "input_schema": schema}
+
+
+def _resolve(schema: Dict[str, Any], defs: Dict[str, Any]) -> Dict[str, Any]:
+    if "$ref" in schema:
+        return defs[schema["$ref"].rsplit("/", 1)[-1]]
+    if "anyOf" in schema:
+        # Optional[X]: repair towards X
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        if len(options) == 1:
+            return _resolve(options[0], defs)
+    return schema
+
+
+def _repair(value: Any, schema: Dict[str, Any], defs: Dict[str, Any]) -> Any:
+    schema = _resolve(schema, defs)
+    expected = schema.get("type")
+    if isinstance(value, str) and expected in ("object", "array"):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            if expected == "array":
+                value = [_BULLET.sub("", line).strip() for line in value.splitlines() if line.strip()]
+    if expected == "array":
+        if isinstance(value, dict):
+            value = [value]
+        if isinstance(value, list):
+            return [_repair(item, schema.get("items", {}), defs) for item in value]
+    if expected == "object" and isinstance(value, dict):
+        properties = schema.get("properties", {})
+        return {key: _repair(item, properties[key], defs) if key in properties else item for key, item in value.items()}
+    if "enum" in schema and isinstance(value, str) and value not in schema["enum"]:
+        normalized = re.sub(r"[\s\-]+", "_", value.strip().lower())
+        return normalized if normalized in schema["enum"] else value
+    if expected == "string" and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return value
+
+
+def repair(data: Any, model: Type[BaseModel]) -> Any:
+    """Fix near-miss tool input whose intent is unambiguous"""
+    schema = model.model_json_schema()
+    return _repair(data, schema, schema.get("$defs", {}))
+
+
+def _validate(data: Any, model: Type[BaseModel]) -> Tuple[Optional[BaseModel], List[Dict[str, Any]]]:
+    try:
+        return model.model_validate(data), []
+    except ValidationError as e:
+        return None, e.errors()
+
+
+def _describe(errors: List[Dict[str, Any]]) -> List[str]:
+    return [f"{'.'.join(str(part) for part in error['loc']) or 'input'}: {error['msg']}" for error in errors]
+
+
+def _failed_fields(errors: List[Dict[str, Any]], model: Type[BaseModel]) -> Set[str]:
+    fields = {str(error["loc"][0]) for error in errors if error["loc"] and str(error["loc"][0]) in model.model_fields}
+    # Errors on the input as a whole (not a dict, no tool call) need every field
+    return fields if all(error["loc"] for error in errors) else set(model.model_fields)
+
+
+class StructuredExtractor:
+    """Gets schema-valid tool input from Claude, repairing and re-asking as needed"""
+
+    def __init__(self, client: Any, max_repairs: int = 2):
+        self.client = client
+        self.max_repairs = max_repairs
+        self.metrics = get_metrics_registry()
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.metrics.register_collector("llm_structured", self.report)
+
+    async def extract(
+        self,
+        schema: str,
+        prompt: PromptLayout,
+        operation: str,
+        analysis_type: Optional[str] = None,
+        max_tokens: int = 2000,
+        tenant: str = "default",
+        priority: Optional[int] = None,
+        sources: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """Validated tool input (``data``), with the model, token usage and the number of re-asks"""
+        model = SCHEMAS[schema]
+        route = self.client.router.route(operation, analysis_type)
+        key = request_key(f"{route.cache_model}:{schema}", prompt.fingerprint(), max_tokens=max_tokens, temperature=TEMPERATURE)
+        self._count(schema, "requests")
+        if self.client.cache is not None:
+            try:
+                hit = await self.client.cache.get(key, operation)
+            except Exception as e:
+                logger.warning("LLM cache lookup failed", operation=operation, error=str(e))
+                hit = None
+            if hit:
+                self._count(schema, "succeeded")
+                return {**hit.response, "token_usage": hit.usage, "retries": 0, "cached": hit.tier}
+
+        usage: Dict[str, int] = {}
+        retries = 0
+        errors: List[str] = []
+        for tier, model_name in enumerate(route.models, start=1):
+            if tier > 1:
+                self._count(schema, "escalations")
+                logger.info("Escalating structured output to the next model tier", schema=schema, model=model_name, errors=errors)
+            result, errors, attempts = await self._extract_with(
+                schema, model, prompt, operation, route, model_name, max_tokens, tenant, priority, usage
+            )
+            retries += attempts
+            if result is not None:
+                self._count(schema, "succeeded")
+                completion = {"data": result.model_dump(), "model": model_name}
+                if self.client.cache is not None:
+                    try:
+                        await self.client.cache.put(
+                            key, completion, usage,
+                            sources=response_sources(prompt.text, json.dumps(completion["data"], ensure_ascii=False), sources or ())
+                        )
+                    except Exception as e:
+                        logger.warning("LLM cache store failed", error=str(e))
+                return {**completion, "token_usage": usage, "retries": retries, "cached": None}
+
+        self._count(schema, "failed")
+        logger.error("Structured output failed validation", schema=schema, errors=errors)
+        raise StructuredOutputError(schema, errors)
+
+    async def _extract_with(
+        self,
+        schema: str,
+        model: Type[BaseModel],
+        prompt: PromptLayout,
+        operation: str,
+        route: Any,
+        model_name: str,
+        max_tokens: int,
+        tenant: str,
+        priority: Optional[int],
+        usage: Dict[str, int],
+    ) -> Tuple[Optional[BaseModel], List[str], int]:
+        """One model tier: first call, then re-asks for the failing fields; returns the result, errors and re-asks"""
+        tool = tool_definition(schema)
+        messages = prompt.messages()
+        data: Dict[str, Any] = {}
+        for attempt in range(self.max_repairs + 1):
+            message, call_usage, latency = await self.client.create_message(
+                operation, model_name, prompt, max_tokens, TEMPERATURE,
+                tenant=tenant, priority=priority, messages=messages,
+                tools=[tool], tool_choice={"type": "tool", "name": schema}
+            )
+            for name, count in call_usage.items():
+                usage[name] = usage.get(name, 0) + count
+            block = next((block for block in message.content if block.type == "tool_use"), None)
+            if block is not None:
+                # Re-asks only carry the failed fields; keep the rest of the earlier answer
+                data = {**data, **block.input} if isinstance(block.input, dict) else block.input
+
+            result, errors = _validate(data, model)
+            if result is None and block is not None:
+                repaired = repair(data, model)
+                result, errors = _validate(repaired, model)
+                if result is not None:
+                    self._count(schema, "local_repairs")
+            if block is None:
+                errors = [{"loc": (), "msg": f"no {schema} tool call"}]
+
+            if result is not None:
+                outcome = "accepted"
+            elif attempt < self.max_repairs:
+                outcome = "retried"
+            else:
+                outcome = "rejected" if model_name == route.models[-1] else "escalated"
+            self.client.router.record(route, model_name, latency, call_usage, outcome)
+            if result is not None:
+                return result, [], attempt
+            if attempt == self.max_repairs:
+                return None, _describe(errors), attempt
+
+            self._count(schema, "reasks")
+            self.metrics.counter("llm_structured_retries_total").inc(schema=schema, model=model_name)
+            failed = _failed_fields(errors, model)
+            request = REPAIR_REQUEST.format(
+                tool=schema, errors="\n".join(_describe(errors)), fields=", ".join(sorted(failed))
+            )
+            if block is None:
+                assistant = [{"type": "text", "text": "".join(getattr(b, "text", "") for b in message.content) or "-"}]
+                reply = [{"type": "text", "text": request}]
+            else:
+                assistant = [{"type": "tool_use", "id": block.id, "name": block.name, "input": block.input}]
+                reply = [{"type": "tool_result", "tool_use_id": block.id, "is_error": True, "content": request}]
+            messages = [*messages, {"role": "assistant", "content": assistant}, {"role": "user", "content": reply}]
+            tool = tool_definition(schema, failed)
+            data = {key: value for key, value in data.items() if key not in failed} if isinstance(data, dict) else {}
+        return None, [], self.max_repairs
+
+    def _count(self, schema: str, event: str) -> None:
+        self.metrics.counter("llm_structured_total").inc(schema=schema, event=event)
+        stats = self.stats.setdefault(
+            schema, {"requests": 0, "succeeded": 0, "failed": 0, "local_repairs": 0, "reasks": 0, "escalations": 0}
+        )
+        stats[event] += 1
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            schema: {**stats, "success_rate": round(stats["succeeded"] / (stats["requests"] or 1), 3)}
+            for schema, stats in self.stats.items()
+        }
@@ -1,12 +1,27 @@
 """
 AI-powered legal analysis API endpoints
+
+The ``/stream`` variants return Server-Sent Events: ``delta`` events carry
+text as the model writes it, a final ``done`` event carries token usage and
+timings, and an ``error`` event reports a failure after streaming started.
+Requests turned away by the model scheduler (rate limits, spent tenant token
+budgets) get HTTP 429 with a ``Retry-After`` header instead of a 500.
+Batch jobs run in the background; ``GET /ai/batch-jobs/{id}`` reports progress.
+``/answer-question`` with ``retrieve`` set finds its own context (vector and
+lexical search, see ``ai.rag``) and returns citations and stage latencies.
 """
-from fastapi import APIRouter, HTTPException, Depends
+import json
+import math
+import uuid
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any
 import structlog
 
+from ...ai.batch import BatchAnalyzer, BatchJob, get_batch_analyzer
 from ...ai.claude_client import get_claude_client, ClaudeClient
+from ...ai.scheduler import LLMRateLimited
 
 logger = structlog.get_logger()
 router = APIRouter(prefix="/ai", tags=["AI Legal Analysis"])
@@ -22,21 +37,49 @@ class DocumentAnalysisResponse(BaseModel):
     analysis_type: str
     model: str
     token_usage: Dict[str, int]
+    cached: Optional[str] = Field(None, description="Cache tier that served the response (exact, semantic)")
 
 class LegalQuestionRequest(BaseModel):
     question: str = Field(..., description="Legal question to answer")
     context_documents: Optional[List[str]] = Field(None, description="Context documents")
+    retrieve: bool = Field(False, description="Retrieve context from the search indexes instead of context_documents")
+    document_type: Optional[str] = Field(None, description="Only retrieve documents of this type")
 
 class LegalQuestionResponse(BaseModel):
     answer: str
     question: str
     model: str
     token_usage: Dict[str, int]
+    cached: Optional[str] = Field(None, description="Cache tier that served the response (exact, semantic)")
+    citations: Optional[List[Dict[str, Any]]] = Field(None, description="Retrieved passages cited in the answer")
+    metadata: Optional[Dict[str, Any]] = Field(None, description="Retrieval statistics and per-stage latency in ms")
 
 class SummaryRequest(BaseModel):
     document_text: str = Field(..., description="Document text to summarize")
     summary_length: str = Field("medium", description="Length of summary (short, medium, long)")
 
+class BatchJobRequest(BaseModel):
+    contract_ids: List[uuid.UUID] = Field(..., min_length=1, description="Contracts to analyse")
+    analysis_type: str = Field("compliance", description="Type of analysis to perform")
+    context: Optional[str] = Field(None, description="Additional context, e.g. the legal change")
+    change_id: Optional[uuid.UUID] = Field(None, description="Legal change the impacts are recorded against")
+    legal_document_id: Optional[uuid.UUID] = Field(None, description="Legal document being assessed")
+
+class BatchJobResponse(BaseModel):
+    id: uuid.UUID
+    status: str
+    mode: str
+    analysis_type: str
+    analysis_id: Optional[uuid.UUID]
+    total_items: int
+    succeeded_items: int
+    failed_items: int
+    error: Optional[str] = None
+
+    @classmethod
+    def from_job(cls, job: BatchJob) -> "BatchJobResponse":
+        return cls(**{name: getattr(job, name) for name in cls.model_fields})
+
 @router.post("/analyze-document", response_model=DocumentAnalysisResponse)
 async def analyze_document(
     request: DocumentAnalysisRequest,
@@ -54,31 +97,60 @@ async def analyze_document(
         
     except Exception as e:
         logger.error("Document analysis failed", error=str(e))
-        raise HTTPException(
-            status_code=500, 
-            detail=f"Document analysis failed: {str(e)}"
-        )
+        raise _http_error(e, "Document analysis")
+
+@router.post("/analyze-document/stream")
+async def analyze_document_stream(
+    request: DocumentAnalysisRequest,
+    claude_client: ClaudeClient = Depends(get_claude_client)
+):
+    """Analyze a legal document, streaming the analysis as Server-Sent Events"""
+    events = claude_client.stream_legal_document_analysis(
+        document_text=request.document_text,
+        analysis_type=request.analysis_type,
+        context=request.context
+    )
+    return await _event_stream_response(events, "Document analysis")
 
 @router.post("/answer-question", response_model=LegalQuestionResponse)
 async def answer_legal_question(
     request: LegalQuestionRequest,
     claude_client: ClaudeClient = Depends(get_claude_client)
 ):
-    """Answer a legal question using Claude AI"""
+    """Answer a legal question using Claude AI, from given or retrieved context"""
+    if request.retrieve and request.context_documents:
+        raise HTTPException(status_code=422, detail="context_documents cannot be combined with retrieve")
     try:
-        result = await claude_client.answer_legal_question(
-            question=request.question,
-            context_documents=request.context_documents
-        )
+        if request.retrieve:
+            result = await claude_client.answer_with_retrieval(
+                question=request.question,
+                document_type=request.document_type
+            )
+        else:
+            result = await claude_client.answer_legal_question(
+                question=request.question,
+                context_documents=request.context_documents
+            )
         
         return LegalQuestionResponse(**result)
         
     except Exception as e:
         logger.error("Legal question answering failed", error=str(e))
-        raise HTTPException(
-            status_code=500, 
-            detail=f"Legal question answering failed: {str(e)}"
-        )
+        raise _http_error(e, "Legal question answering")
+
+@router.post("/answer-question/stream")
+async def answer_legal_question_stream(
+    request: LegalQuestionRequest,
+    claude_client: ClaudeClient = Depends(get_claude_client)
+):
+    """Answer a legal question, streaming the answer as Server-Sent Events"""
+    if request.retrieve:
+        raise HTTPException(status_code=422, detail="retrieve is only supported by /ai/answer-question")
+    events = claude_client.stream_legal_answer(
+        question=request.question,
+        context_documents=request.context_documents
+    )
+    return await _event_stream_response(events, "Legal question answering")
 
 @router.post("/summarize", response_model=str)
 async def summarize_document(
@@ -96,10 +168,7 @@ async def summarize_document(
         
     except Exception as e:
         logger.error("Document summarization failed", error=str(e))
-        raise HTTPException(
-            status_code=500, 
-            detail=f"Document summarization failed: {str(e)}"
-        )
+        raise _http_error(e, "Document summarization")
 
 @router.post("/extract-key-points", response_model=List[str])
 async def extract_key_points(
@@ -116,10 +185,87 @@ async def extract_key_points(
         
     except Exception as e:
         logger.error("Key point extraction failed", error=str(e))
-        raise HTTPException(
-            status_code=500, 
-            detail=f"Key point extraction failed: {str(e)}"
+        raise _http_error(e, "Key point extraction")
+
+@router.post("/compliance-findings", response_model=Dict[str, Any])
+async def extract_compliance_findings(
+    request: DocumentAnalysisRequest,
+    claude_client: ClaudeClient = Depends(get_claude_client)
+):
+    """Compliance requirements of a document as structured findings"""
+    try:
+        return await claude_client.extract_compliance_findings(
+            document_text=request.document_text,
+            context=request.context
         )
+        
+    except Exception as e:
+        logger.error("Compliance finding extraction failed", error=str(e))
+        raise _http_error(e, "Compliance finding extraction")
+
+@router.post("/risks", response_model=Dict[str, Any])
+async def assess_risks(
+    request: DocumentAnalysisRequest,
+    claude_client: ClaudeClient = Depends(get_claude_client)
+):
+    """Legal risks of a document as a structured assessment"""
+    try:
+        return await claude_client.assess_risks(
+            document_text=request.document_text,
+            context=request.context
+        )
+        
+    except Exception as e:
+        logger.error("Risk assessment failed", error=str(e))
+        raise _http_error(e, "Risk assessment")
+
+@router.post("/batch-jobs", response_model=BatchJobResponse, status_code=202)
+async def create_batch_job(
+    request: BatchJobRequest,
+    background_tasks: BackgroundTasks,
+    batch_analyzer: BatchAnalyzer = Depends(get_batch_analyzer)
+):
+    """Analyse a set of contracts as a background batch job"""
+    try:
+        job = await batch_analyzer.submit(
+            request.contract_ids,
+            analysis_type=request.analysis_type,
+            context=request.context,
+            change_id=request.change_id,
+            legal_document_id=request.legal_document_id
+        )
+        background_tasks.add_task(batch_analyzer.run, job.id)
+        return BatchJobResponse.from_job(job)
+        
+    except Exception as e:
+        logger.error("Batch job creation failed", error=str(e))
+        raise _http_error(e, "Batch job creation")
+
+@router.get("/batch-jobs/{job_id}", response_model=BatchJobResponse)
+async def get_batch_job(
+    job_id: uuid.UUID,
+    batch_analyzer: BatchAnalyzer = Depends(get_batch_analyzer)
+):
+    """Progress of a batch job"""
+    job = await batch_analyzer.store.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    return BatchJobResponse.from_job(job)
+
+@router.post("/batch-jobs/{job_id}/resume", response_model=BatchJobResponse, status_code=202)
+async def resume_batch_job(
+    job_id: uuid.UUID,
+    background_tasks: BackgroundTasks,
+    batch_analyzer: BatchAnalyzer = Depends(get_batch_analyzer)
+):
+    """Continue an interrupted or paused batch job"""
+    job = await batch_analyzer.store.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    if job.leased():
+        raise HTTPException(status_code=409, detail="Batch job is already running")
+    background_tasks.add_task(batch_analyzer.run, job.id)
+    return BatchJobResponse.from_job(job)
 
 @router.get("/health")
 async def ai_health_check():
@@ -138,3 +284,52 @@ async def ai_health_check():
             status_code=503,
             detail=f"AI service unavailable: {str(e)}"
         )
+
+def _http_error(e: Exception, operation: str) -> HTTPException:
+    """429 with Retry-After when the scheduler turned the request away, 500 otherwise"""
+    if isinstance(e, LLMRateLimited):
+        return HTTPException(
+            status_code=429,
+            detail=f"{operation} rate limited: {str(e)}",
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+        )
+    return HTTPException(
+        status_code=500, 
+        detail=f"{operation} failed: {str(e)}"
+    )
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _event_stream_response(events: AsyncIterator[Dict[str, Any]], operation: str) -> StreamingResponse:
+    """Wrap client stream events in an SSE response
+    
+    The first event is awaited before responding, so failures to start the
+    completion (bad key, overload) still surface as a regular HTTP error.
+    """
+    try:
+        first = await events.__anext__()
+    except Exception as e:
+        logger.error(f"{operation} failed", error=str(e))
+        raise _http_error(e, operation)
+    
+    async def body() -> AsyncIterator[str]:
+        event = first
+        try:
+            while True:
+                yield _sse(event.pop("type"), event)
+                event = await events.__anext__()
+        except StopAsyncIteration:
+            pass
+        except Exception as e:
+            logger.error(f"{operation} failed while streaming", error=str(e))
+            yield _sse("error", {"detail": f"{operation} failed: {str(e)}"})
+        finally:
+            await events.aclose()
+    
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
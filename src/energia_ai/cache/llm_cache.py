@@ -0,0 +1,313 @@
+"""
+LLM response cache
+
+Two tiers in front of the Claude API:
+
+* exact: responses keyed by a SHA-256 of (model, prompt, sampling params) in
+  Redis, with a TTL;
+* semantic: an in-process index of query embeddings per scope (tenant,
+  operation, analysis type, context, and the legal references a question
+  cites), so a near-duplicate question whose embedding is within the
+  similarity threshold of a cached one is served the cached answer. Questions
+  about "12. §" and "13. §" of an act embed almost identically; keeping their
+  references in the scope means they never share an answer.
+
+Semantic entries only point at exact entries, so expiry and invalidation in
+Redis apply to both tiers and across workers.
+
+Every entry is tagged with the source documents it was generated from (ids
+passed by the caller plus the acts cited in the prompt and the answer), and
+``invalidate_sources`` drops all responses tagged with a changed document.
+"""
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import structlog
+
+from ..core.metrics import get_metrics_registry
+from ..nlp.citation_extractor import cited_acts, extract_citations, pinpoint_path
+
+logger = structlog.get_logger()
+
+TIER_EXACT = "exact"
+TIER_SEMANTIC = "semantic"
+
+# Text to embedding vector; an empty list means the embedding is unavailable
+Embedder = Callable[[str], Awaitable[List[float]]]
+Scope = Tuple[str, ...]
+
+
+def request_key(model: str, prompt: str, **params: Any) -> str:
+    """Exact-tier key: SHA-256 of the model, prompt and sampling parameters"""
+    payload = json.dumps({"model": model, "prompt": prompt, "params": params}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def context_fingerprint(documents: Optional[Sequence[str]]) -> str:
+    """Short hash of context documents, so semantic matches never cross contexts"""
+    if not documents:
+        return "-"
+    return hashlib.sha256("\x00".join(documents).encode("utf-8")).hexdigest()[:16]
+
+
+def citation_fingerprint(text: str) -> str:
+    """Short hash of the legal references in text, down to section, paragraph and point"""
+    references = sorted({
+        citation.eli_uri or "/".join(
+            p for p in ("self", pinpoint_path(citation.section, citation.paragraph, citation.point)) if p
+        )
+        for citation in extract_citations(text)
+    })
+    if not references:
+        return "-"
+    return hashlib.sha256("\x00".join(references).encode("utf-8")).hexdigest()[:16]
+
+
+def response_sources(*texts: str, sources: Iterable[str] = ()) -> List[str]:
+    """Caller-supplied source ids plus the acts cited in the given texts"""
+    found = list(sources)
+    for text in texts:
+        found.extend(cited_acts(text))
+    return list(dict.fromkeys(found))
+
+
+class MemoryStore:
+    """Process-local store with the RedisManager methods the cache uses"""
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self._sets: Dict[str, Set[str]] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self._values.get(key)
+        if value is None:
+            return None
+        if value[1] is not None and value[1] <= time.time():
+            del self._values[key]
+            return None
+        return value[0]
+
+    async def set(self, key: str, value: Any, expire: Optional[int] = None) -> bool:
+        self._values[key] = (value, time.time() + expire if expire else None)
+        return True
+
+    async def delete(self, key: str) -> bool:
+        found = self._values.pop(key, None) is not None
+        return self._sets.pop(key, None) is not None or found
+
+    async def add_to_set(self, key: str, *members: str, expire: Optional[int] = None) -> bool:
+        self._sets.setdefault(key, set()).update(members)
+        return True
+
+    async def get_set_members(self, key: str) -> List[str]:
+        return list(self._sets.get(key, ()))
+
+
+@dataclass
+class CacheHit:
+    tier: str
+    response: Dict[str, Any]
+    usage: Dict[str, int]
+    similarity: float = 1.0
+
+
+@dataclass
+class _SemanticEntry:
+    vector: np.ndarray
+    key: str
+    expires_at: float
+
+
+@dataclass
+class _SemanticScope:
+    entries: List[_SemanticEntry] = field(default_factory=list)
+    matrix: Optional[np.ndarray] = None  # rows of entries, rebuilt lazily
+
+    def search(self, vector: np.ndarray) -> Tuple[Optional[_SemanticEntry], float]:
+        if not self.entries:
+            return None, 0.0
+        if self.matrix is None:
+            self.matrix = np.stack([entry.vector for entry in self.entries])
+        similarities = self.matrix @ vector
+        best = int(np.argmax(similarities))
+        return self.entries[best], float(similarities[best])
+
+    def prune(self, now: float, max_entries: int, keys: Optional[Set[str]] = None) -> None:
+        kept = [
+            entry for entry in self.entries
+            if entry.expires_at > now and (keys is None or entry.key not in keys)
+        ][-max_entries:]
+        if len(kept) != len(self.entries):
+            self.entries = kept
+            self.matrix = None
+
+
+class LLMResponseCache:
+    """Exact and semantic response cache with TTLs and source-based invalidation"""
+
+    def __init__(
+        self,
+        store: Any = None,
+        embedder: Optional[Embedder] = None,
+        ttl: int = 86400,
+        semantic_threshold: float = 0.93,
+        max_semantic_entries: int = 5000,
+        prefix: str = "llm",
+    ):
+        self.store = store or MemoryStore()
+        self.embedder = embedder
+        self.ttl = ttl
+        self.semantic_threshold = semantic_threshold
+        self.max_semantic_entries = max_semantic_entries
+        self.prefix = prefix
+        self.metrics = get_metrics_registry()
+        self._scopes: Dict[Scope, _SemanticScope] = {}
+        self.lookups = 0
+        self.hits = {TIER_EXACT: 0, TIER_SEMANTIC: 0}
+        self.tokens_saved = 0
+
+    def _entry_key(self, key: str) -> str:
+        return f"{self.prefix}:response:{key}"
+
+    def _source_key(self, source: str) -> str:
+        return f"{self.prefix}:source:{source}"
+
+    async def _embed(self, text: str) -> Optional[np.ndarray]:
+        if self.embedder is None:
+            return None
+        try:
+            vector = np.asarray(await self.embedder(" ".join(text.lower().split())), dtype=np.float32)
+        except Exception as e:
+            logger.warning("Query embedding failed, semantic cache skipped", error=str(e))
+            return None
+        norm = float(np.linalg.norm(vector)) if vector.size else 0.0
+        return vector / norm if norm else None
+
+    async def get(
+        self,
+        key: str,
+        operation: str,
+        semantic_text: Optional[str] = None,
+        scope: Scope = (),
+    ) -> Optional[CacheHit]:
+        """Exact lookup first, then the nearest cached query of the same scope"""
+        self.lookups += 1
+        entry = await self.store.get(self._entry_key(key))
+        if isinstance(entry, dict):
+            return self._hit(TIER_EXACT, operation, entry)
+
+        if semantic_text is not None and scope in self._scopes:
+            vector = await self._embed(semantic_text)
+            semantic_scope = self._scopes[scope]
+            semantic_scope.prune(time.time(), self.max_semantic_entries)
+            if vector is not None:
+                match, similarity = semantic_scope.search(vector)
+                if match is not None and similarity >= self.semantic_threshold:
+                    entry = await self.store.get(self._entry_key(match.key))
+                    if isinstance(entry, dict):
+                        return self._hit(TIER_SEMANTIC, operation, entry, similarity)
+                    # Expired or invalidated in the shared store
+                    semantic_scope.prune(time.time(), self.max_semantic_entries, {match.key})
+
+        self.metrics.counter("llm_cache_lookups_total").inc(operation=operation, result="miss")
+        return None
+
+    def _hit(self, tier: str, operation: str, entry: Dict[str, Any], similarity: float = 1.0) -> CacheHit:
+        usage = entry.get("usage") or {}
+        saved = sum(int(count) for count in usage.values())
+        self.hits[tier] += 1
+        self.tokens_saved += saved
+        self.metrics.counter("llm_cache_lookups_total").inc(operation=operation, result=tier)
+        self.metrics.counter("llm_cache_tokens_saved_total").inc(saved, operation=operation, tier=tier)
+        logger.debug("LLM cache hit", operation=operation, tier=tier, similarity=round(similarity, 4))
+        return CacheHit(tier=tier, response=entry["response"], usage=usage, similarity=similarity)
+
+    async def put(
+        self,
+        key: str,
+        response: Dict[str, Any],
+        usage: Dict[str, int],
+        semantic_text: Optional[str] = None,
+        scope: Scope = (),
+        sources: Sequence[str] = (),
+        ttl: Optional[int] = None,
+    ) -> None:
+        """Store a response, index its query for the semantic tier and tag it with its sources"""
+        ttl = ttl or self.ttl
+        entry = {"response": response, "usage": usage, "sources": list(sources), "created_at": time.time()}
+        await self.store.set(self._entry_key(key), entry, expire=ttl)
+        for source in sources:
+            await self.store.add_to_set(self._source_key(source), key, expire=ttl)
+
+        if semantic_text is not None:
+            vector = await self._embed(semantic_text)
+            if vector is not None:
+                semantic_scope = self._scopes.setdefault(scope, _SemanticScope())
+                semantic_scope.entries.append(_SemanticEntry(vector, key, time.time() + ttl))
+                semantic_scope.matrix = None
+                semantic_scope.prune(time.time(), self.max_semantic_entries)
+
+    async def invalidate_sources(self, sources: Iterable[str]) -> int:
+        """Drop every cached response tagged with one of the sources; returns how many"""
+        keys: Set[str] = set()
+        for source in sources:
+            members = await self.store.get_set_members(self._source_key(source))
+            keys.update(members)
+            await self.store.delete(self._source_key(source))
+        for key in keys:
+            await self.store.delete(self._entry_key(key))
+        if keys:
+            now = time.time()
+            for semantic_scope in self._scopes.values():
+                semantic_scope.prune(now, self.max_semantic_entries, keys)
+            self.metrics.counter("llm_cache_invalidations_total").inc(len(keys))
+            logger.info("LLM cache entries invalidated", entries=len(keys))
+        return len(keys)
+
+    def report(self) -> Dict[str, Any]:
+        hits = sum(self.hits.values())
+        return {
+            "lookups": self.lookups,
+            "exact_hits": self.hits[TIER_EXACT],
+            "semantic_hits": self.hits[TIER_SEMANTIC],
+            "hit_rate": hits / self.lookups if self.lookups else 0.0,
+            "tokens_saved": self.tokens_saved,
+            "semantic_entries": sum(len(scope.entries) for scope in self._scopes.values()),
+        }
+
+
+# Global LLM cache instance
+_llm_cache = None
+
+
+async def _local_embedding(text: str) -> List[float]:
+    from ..vector_search.embeddings import get_embedding_manager
+
+    manager = await get_embedding_manager()
+    return await manager.generate_embedding(text, prefer_openai=False)
+
+
+async def get_llm_cache() -> LLMResponseCache:
+    """Get the global LLM cache; falls back to a process-local store without Redis"""
+    global _llm_cache
+    if _llm_cache is None:
+        try:
+            from .redis_manager import get_redis_manager
+
+            store = await get_redis_manager()
+        except Exception as e:
+            logger.warning("Redis unavailable, LLM cache is process-local", error=str(e))
+            store = MemoryStore()
+        try:
+            import sentence_transformers  # noqa: F401
+            embedder = _local_embedding
+        except ImportError:
+            logger.warning("sentence-transformers not installed, semantic LLM cache disabled")
+            embedder = None
+        _llm_cache = LLMResponseCache(store, embedder)
+        get_metrics_registry().register_collector("llm_cache", _llm_cache.report)
+    return _llm_cache
@@ -10,6 +10,7 @@ import aioredis
 from aioredis import Redis
 import structlog
 from ..config.settings import get_settings
+from .llm_cache import LLMResponseCache
 
 logger = structlog.get_logger()
 
@@ -197,6 +198,53 @@ class RedisManager:
             logger.error("Redis hash get failed", key=key, error=str(e))
             return None
     
+    async def get_hash_field(self, key: str, field: str) -> Optional[Any]:
+        """Get a single field of a Redis hash"""
+        try:
+            if not self.redis:
+                await self.initialize()
+            
+            result = await self.redis.hget(key, field)
+            
+            if result is None:
+                return None
+            
+            try:
+                return json.loads(result)
+            except (json.JSONDecodeError, TypeError):
+                return result
+            
+        except Exception as e:
+            logger.error("Redis hash field get failed", key=key, field=field, error=str(e))
+            return None
+    
+    async def add_to_set(self, key: str, *members: str, expire: Optional[int] = None) -> bool:
+        """Add members to a Redis set, optionally refreshing its expiration"""
+        try:
+            if not self.redis:
+                await self.initialize()
+            
+            await self.redis.sadd(key, *members)
+            if expire:
+                await self.redis.expire(key, expire)
+            return True
+            
+        except Exception as e:
+            logger.error("Redis set add failed", key=key, error=str(e))
+            return False
+    
+    async def get_set_members(self, key: str) -> List[str]:
+        """Get all members of a Redis set"""
+        try:
+            if not self.redis:
+                await self.initialize()
+            
+            return list(await self.redis.smembers(key))
+            
+        except Exception as e:
+            logger.error("Redis set members failed", key=key, error=str(e))
+            return []
+    
     async def close(self):
         """Close Redis connection"""
         if self.redis:
@@ -259,6 +307,9 @@ class CacheManager:
             for key in keys_to_delete:
                 await self.redis.delete(key)
             
+            # LLM responses that were generated from or cite this document
+            await LLMResponseCache(self.redis).invalidate_sources([document_id])
+            
             return True
             
         except Exception as e:
@@ -0,0 +1,204 @@
+"""
+Shared outbound HTTP transport for AI providers
+
+Every AI client (Anthropic, OpenAI embeddings) gets its ``httpx.AsyncClient``
+from here instead of building its own: one client per provider, so its
+keep-alive pool is shared by everything talking to that provider. Clients
+are tuned from settings: HTTP/2 when the ``h2`` package is installed,
+connection and keep-alive limits, connect/read timeouts, and transport
+retries of failed connection attempts (requests themselves are retried by
+the LLM scheduler).
+
+Clients are opened at app startup (``start_http_clients``) and closed at
+shutdown (``close_http_clients``); anything asking earlier gets one created
+on demand. Per provider, request latency up to the response headers is
+recorded in ``http_request_seconds``, and every new TCP connection is counted,
+so the ``http_clients`` collector reports how often pooled connections are
+reused.
+"""
+import importlib.util
+import sys
+import time
+from typing import Any, Callable, Dict, Optional, Type
+
+import httpx
+import structlog
+
+from ..config.settings import get_settings
+from .metrics import get_metrics_registry
+
+logger = structlog.get_logger()
+
+PROVIDER_ANTHROPIC = "anthropic"
+PROVIDER_OPENAI = "openai"
+
+_STARTED = "energia_request_started"
+
+
+def _client_class(provider: str) -> Type[Any]:
+    """The provider SDK's httpx client class (with its defaults), or plain httpx"""
+    try:
+        if provider == PROVIDER_ANTHROPIC:
+            from anthropic import DefaultAsyncHttpxClient
+            return DefaultAsyncHttpxClient
+        if provider == PROVIDER_OPENAI:
+            from openai import DefaultAsyncHttpxClient
+            return DefaultAsyncHttpxClient
+    except ImportError:
+        pass
+    return httpx.AsyncClient
+
+
+def _httpx_package(client_class: Type[Any]) -> Any:
+    # SDKs may ship their own httpx build; transports and limits must come from the same package
+    for base in client_class.__mro__:
+        if base.__name__ == "AsyncClient":
+            return sys.modules[base.__module__.split(".")[0]]
+    return httpx
+
+
+class HTTPClients:
+    """One pooled async HTTP client per provider, with latency and connection reuse accounting"""
+
+    def __init__(self, settings: Any = None):
+        self.settings = settings or get_settings()
+        self.http2 = self.settings.http2 and importlib.util.find_spec("h2") is not None
+        if self.settings.http2 and not self.http2:
+            logger.info("h2 package not installed, AI provider clients use HTTP/1.1")
+        self.clients: Dict[str, Any] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.metrics = get_metrics_registry()
+        self.metrics.register_collector("http_clients", self.report)
+
+    def get(self, provider: str, client_class: Optional[Type[Any]] = None) -> Any:
+        """The provider's shared client, created on first use"""
+        client = self.clients.get(provider)
+        if client is None or client.is_closed:
+            client = self.clients[provider] = self._create(provider, client_class or _client_class(provider))
+        return client
+
+    def _create(self, provider: str, client_class: Type[Any]) -> Any:
+        package = _httpx_package(client_class)
+        settings = self.settings
+        limits = package.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry_seconds,
+        )
+        transport = package.AsyncHTTPTransport(
+            limits=limits, http2=self.http2, retries=settings.http_transport_retries
+        )
+        self.stats[provider] = {"requests": 0, "connections_opened": 0, "http2_responses": 0, "errors": 0}
+        client = client_class(
+            transport=transport,
+            timeout=package.Timeout(settings.http_read_timeout_seconds, connect=settings.http_connect_timeout_seconds),
+            event_hooks={"request": [self._on_request(provider)], "response": [self._on_response(provider)]},
+        )
+        logger.info(
+            "AI provider HTTP client created",
+            provider=provider,
+            http2=self.http2,
+            max_connections=settings.http_max_connections,
+        )
+        return client
+
+    def add_response_hook(self, provider: str, hook: Callable[[Any], Any]) -> None:
+        """Also call ``hook`` with every response from this provider (e.g. to read rate-limit headers)"""
+        hooks = self.get(provider).event_hooks["response"]
+        if hook not in hooks:
+            hooks.append(hook)
+
+    def remove_response_hook(self, provider: str, hook: Callable[[Any], Any]) -> None:
+        """Stop calling a hook added with ``add_response_hook``"""
+        client = self.clients.get(provider)
+        if client is not None and hook in client.event_hooks["response"]:
+            client.event_hooks["response"].remove(hook)
+
+    def _on_request(self, provider: str) -> Callable[[Any], Any]:
+        stats_of = self.stats
+        counter = self.metrics.counter("http_connections_opened_total")
+
+        async def trace(event: str, info: Dict[str, Any]) -> None:
+            if event == "connection.connect_tcp.complete":
+                stats_of[provider]["connections_opened"] += 1
+                counter.inc(provider=provider)
+
+        async def on_request(request: Any) -> None:
+            request.extensions[_STARTED] = time.perf_counter()
+            # Connection pool events, only reported through the trace extension
+            request.extensions.setdefault("trace", trace)
+
+        return on_request
+
+    def _on_response(self, provider: str) -> Callable[[Any], Any]:
+        async def on_response(response: Any) -> None:
+            started = response.request.extensions.get(_STARTED)
+            stats = self.stats[provider]
+            stats["requests"] += 1
+            http_version = response.extensions.get("http_version", b"")
+            if http_version == b"HTTP/2":
+                stats["http2_responses"] += 1
+            if response.status_code >= 500:
+                stats["errors"] += 1
+            self.metrics.counter("http_requests_total").inc(
+                provider=provider, status=f"{response.status_code // 100}xx"
+            )
+            if started is not None:
+                self.metrics.histogram("http_request_seconds").observe(time.perf_counter() - started, provider=provider)
+
+        return on_response
+
+    async def close(self) -> None:
+        for provider, client in self.clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning("Closing AI provider HTTP client failed", provider=provider, error=str(e))
+        self.clients.clear()
+
+    def report(self) -> Dict[str, Any]:
+        latency = self.metrics.histogram("http_request_seconds")
+        report = {}
+        for provider, stats in self.stats.items():
+            requests = stats["requests"]
+            report[provider] = {
+                **stats,
+                "connection_reuse_rate": round(1 - stats["connections_opened"] / requests, 3) if requests else None,
+                "latency": latency.summary(provider=provider),
+            }
+        return report
+
+
+# Global client registry
+_http_clients = None
+
+
+def get_http_clients() -> HTTPClients:
+    """Get the global AI provider HTTP client registry"""
+    global _http_clients
+    if _http_clients is None:
+        _http_clients = HTTPClients()
+    return _http_clients
+
+
+def get_http_client(provider: str) -> Any:
+    """The shared HTTP client for an AI provider"""
+    return get_http_clients().get(provider)
+
+
+async def start_http_clients() -> HTTPClients:
+    """Open the clients of the configured providers (app startup)"""
+    clients = get_http_clients()
+    clients.get(PROVIDER_ANTHROPIC)
+    if clients.settings.openai_api_key:
+        clients.get(PROVIDER_OPENAI)
+    return clients
+
+
+async def close_http_clients() -> None:
+    """Close every provider client (app shutdown)"""
+    global _http_clients
+    if _http_clients is not None:
+        await _http_clients.close()
+        _http_clients.metrics.unregister_collector("http_clients")
+        _http_clients = None
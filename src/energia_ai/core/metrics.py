@@ -0,0 +1,164 @@
+"""
+In-process metrics registry
+
+Components record counters, gauges and latency histograms here; the
+``/metrics`` endpoint returns a snapshot. Pull-style values (connection pool
+state, queue depths) are registered as collectors and evaluated on snapshot.
+"""
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import structlog
+
+logger = structlog.get_logger()
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _label_name(key: LabelKey) -> str:
+    return ",".join(f"{k}={v}" for k, v in key) or "_"
+
+
+class Counter:
+    """Monotonically increasing value per label set"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def snapshot(self) -> Dict[str, float]:
+        return {_label_name(k): v for k, v in self._values.items()}
+
+
+class Gauge:
+    """Point-in-time value per label set"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        self._values[_label_key(labels)] = value
+
+    def value(self, **labels: Any) -> Optional[float]:
+        return self._values.get(_label_key(labels))
+
+    def snapshot(self) -> Dict[str, float]:
+        return {_label_name(k): v for k, v in self._values.items()}
+
+
+class Histogram:
+    """Latency/size distribution per label set over a bounded sample window"""
+
+    def __init__(self, name: str, window: int = 1024):
+        self.name = name
+        self.window = window
+        self._samples: Dict[LabelKey, deque] = {}
+        self._totals: Dict[LabelKey, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(value)
+            count, total = self._totals.get(key, (0, 0.0))
+            self._totals[key] = (count + 1, total + value)
+
+    def summary(self, **labels: Any) -> Dict[str, float]:
+        return self._summarize(_label_key(labels))
+
+    def _summarize(self, key: LabelKey) -> Dict[str, float]:
+        samples = sorted(self._samples.get(key, ()))
+        count, total = self._totals.get(key, (0, 0.0))
+        if not samples:
+            return {"count": 0, "sum": 0.0}
+
+        def quantile(q: float) -> float:
+            return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+        return {
+            "count": count,
+            "sum": total,
+            "min": samples[0],
+            "max": samples[-1],
+            "p50": quantile(0.50),
+            "p95": quantile(0.95),
+            "p99": quantile(0.99),
+        }
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {_label_name(k): self._summarize(k) for k in list(self._samples)}
+
+
+class MetricsRegistry:
+    """Named metrics plus pull-style collectors"""
+
+    def __init__(self):
+        self._counters: Dict[str, Counter] = {}
+        self._gauges: Dict[str, Gauge] = {}
+        self._histograms: Dict[str, Histogram] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def counter(self, name: str) -> Counter:
+        if name not in self._counters:
+            self._counters[name] = Counter(name)
+        return self._counters[name]
+
+    def gauge(self, name: str) -> Gauge:
+        if name not in self._gauges:
+            self._gauges[name] = Gauge(name)
+        return self._gauges[name]
+
+    def histogram(self, name: str) -> Histogram:
+        if name not in self._histograms:
+            self._histograms[name] = Histogram(name)
+        return self._histograms[name]
+
+    def register_collector(self, name: str, collector: Callable[[], Dict[str, Any]]) -> None:
+        """Register a callable evaluated on every snapshot"""
+        self._collectors[name] = collector
+
+    def unregister_collector(self, name: str) -> None:
+        self._collectors.pop(name, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        collected = {}
+        for name, collector in list(self._collectors.items()):
+            try:
+                collected[name] = collector()
+            except Exception as e:
+                logger.warning("Metrics collector failed", collector=name, error=str(e))
+        return {
+            "counters": {name: c.snapshot() for name, c in self._counters.items()},
+            "gauges": {name: g.snapshot() for name, g in self._gauges.items()},
+            "histograms": {name: h.snapshot() for name, h in self._histograms.items()},
+            "collectors": collected,
+        }
+
+
+# Global metrics registry
+_metrics_registry = None
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Get the global metrics registry"""
+    global _metrics_registry
+    if _metrics_registry is None:
+        _metrics_registry = MetricsRegistry()
+    return _metrics_registry
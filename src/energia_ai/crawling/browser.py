@@ -0,0 +1,72 @@
+"""
+Pool of Playwright pages for concurrent crawling
+
+One browser is shared; every pooled page lives in its own browser context so
+cookies, headers and proxies stay isolated between workers. Pages are handed
+out through a queue and replaced if a worker leaves them in a broken state.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, List, Optional
+
+import structlog
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Page
+
+logger = structlog.get_logger()
+
+ContextFactory = Callable[["Browser"], Awaitable["BrowserContext"]]
+
+
+class PagePool:
+    """Fixed-size pool of pages, one browser context each"""
+
+    def __init__(self, browser: "Browser", size: int = 4, context_factory: Optional[ContextFactory] = None):
+        self.browser = browser
+        self.size = size
+        self.context_factory = context_factory
+        self._contexts: List["BrowserContext"] = []
+        self._pages: "asyncio.Queue[Page]" = asyncio.Queue()
+
+    async def start(self) -> "PagePool":
+        for _ in range(self.size):
+            if self.context_factory:
+                context = await self.context_factory(self.browser)
+            else:
+                context = await self.browser.new_context()
+            self._contexts.append(context)
+            self._pages.put_nowait(await context.new_page())
+        logger.info("Browser page pool started", size=self.size)
+        return self
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator["Page"]:
+        """Borrow a page; a page that raised is closed and replaced with a fresh one"""
+        page = await self._pages.get()
+        try:
+            yield page
+        except Exception:
+            context = page.context
+            try:
+                await page.close()
+            except Exception as e:
+                logger.warning("Failed to close broken page", error=str(e))
+            page = await context.new_page()
+            raise
+        finally:
+            self._pages.put_nowait(page)
+
+    async def close(self) -> None:
+        for context in self._contexts:
+            try:
+                await context.close()
+            except Exception as e:
+                logger.warning("Failed to close browser context", error=str(e))
+        self._contexts = []
+
+    async def __aenter__(self) -> "PagePool":
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
@@ -0,0 +1,193 @@
+"""
+Change detection for re-crawls
+
+Stores the ETag, Last-Modified and a hash of the raw response body for every
+fetched URL in a local SQLite database. Re-crawls send conditional requests
+(``If-None-Match`` / ``If-Modified-Since``) so unchanged pages come back as an
+empty 304, and pages from servers that ignore validators are recognised by
+their body hash before anything is parsed. Callers skip parsing, chunking,
+embedding and indexing for every result marked unchanged, and commit the new
+validators of a changed page only after it was processed, so a failure leaves
+the page to be fetched and processed again.
+"""
+import hashlib
+import sqlite3
+import time
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+import structlog
+
+from ..core.metrics import get_metrics_registry
+
+if TYPE_CHECKING:
+    from .fetcher import FetchResult
+
+logger = structlog.get_logger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS page_versions (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    checked_at REAL NOT NULL
+);
+"""
+
+
+def body_hash(content: bytes) -> str:
+    """SHA-256 of a response body as received"""
+    return hashlib.sha256(content).hexdigest()
+
+
+@dataclass
+class PageVersion:
+    """Validators stored for one URL"""
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: str
+    size: int
+    fetched_at: float
+    checked_at: float
+
+
+@dataclass
+class ChangeStats:
+    """What conditional fetching saved during one crawl"""
+    new: int = 0
+    changed: int = 0
+    not_modified: int = 0  # 304, no body transferred
+    unchanged: int = 0  # body transferred but identical to the stored one
+    bytes_downloaded: int = 0
+    bytes_saved: int = 0  # stored size of pages answered with 304
+
+    @property
+    def documents_skipped(self) -> int:
+        return self.not_modified + self.unchanged
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "documents_skipped": self.documents_skipped}
+
+
+class ChangeTracker:
+    """Per-URL validators and body hashes that survive between crawls"""
+
+    def __init__(self, path: str = ":memory:", name: str = "crawl"):
+        self.path = path
+        self.name = name
+        self.stats = ChangeStats()
+        self.metrics = get_metrics_registry()
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def get(self, url: str) -> Optional[PageVersion]:
+        row = self.connection.execute(
+            "SELECT url, etag, last_modified, content_hash, size, fetched_at, checked_at "
+            "FROM page_versions WHERE url = ?",
+            (url,),
+        ).fetchone()
+        return PageVersion(*row) if row else None
+
+    def request_headers(self, url: str) -> Dict[str, str]:
+        """Conditional request headers for a URL fetched before"""
+        version = self.get(url)
+        headers: Dict[str, str] = {}
+        if version is None:
+            return headers
+        if version.etag:
+            headers["If-None-Match"] = version.etag
+        if version.last_modified:
+            headers["If-Modified-Since"] = version.last_modified
+        return headers
+
+    def check(self, url: str, result: "FetchResult") -> bool:
+        """Whether the page changed since the last committed fetch of url
+
+        Changed and new pages are not recorded here: ``commit`` them once they
+        have been processed, so a page whose processing fails is still seen as
+        changed (and sent without validators) when it is retried.
+        """
+        now = time.time()
+        version = self.get(url)
+
+        if result.not_modified:
+            if version is None:
+                # A 304 without stored validators (e.g. a shared cache); nothing to compare against
+                logger.warning("Not modified response for unknown URL", url=url)
+                return True
+            self.connection.execute("UPDATE page_versions SET checked_at = ? WHERE url = ?", (now, url))
+            self.stats.not_modified += 1
+            self.stats.bytes_saved += version.size
+            self._count("not_modified", saved=version.size)
+            return False
+
+        content = result.content or result.html.encode("utf-8")
+        self.stats.bytes_downloaded += len(content)
+        if version is None:
+            self.stats.new += 1
+            self._count("new")
+            return True
+        if version.content_hash == body_hash(content):
+            # Same body as the processed one: refreshing its validators is safe
+            self.commit(url, result)
+            self.stats.unchanged += 1
+            self._count("unchanged")
+            return False
+        self.stats.changed += 1
+        self._count("changed")
+        return True
+
+    def commit(self, url: str, result: "FetchResult") -> None:
+        """Store a fetch's validators and body hash after the page was processed"""
+        if result.not_modified:
+            return
+        now = time.time()
+        content = result.content or result.html.encode("utf-8")
+        self.connection.execute(
+            "INSERT INTO page_versions (url, etag, last_modified, content_hash, size, fetched_at, checked_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(url) DO UPDATE SET etag = excluded.etag, last_modified = excluded.last_modified, "
+            "content_hash = excluded.content_hash, size = excluded.size, checked_at = excluded.checked_at, "
+            "fetched_at = CASE WHEN page_versions.content_hash = excluded.content_hash "
+            "THEN page_versions.fetched_at ELSE excluded.fetched_at END",
+            (
+                url,
+                _header(result.headers, "etag"),
+                _header(result.headers, "last-modified"),
+                body_hash(content),
+                len(content),
+                now,
+                now,
+            ),
+        )
+
+    def observe(self, url: str, result: "FetchResult") -> bool:
+        """Check and commit in one step, for callers with nothing that can fail in between"""
+        changed = self.check(url, result)
+        self.commit(url, result)
+        return changed
+
+    def reset_stats(self) -> None:
+        self.stats = ChangeStats()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _count(self, outcome: str, saved: int = 0) -> None:
+        self.metrics.counter("crawl_change_checks_total").inc(crawl=self.name, outcome=outcome)
+        if saved:
+            self.metrics.counter("crawl_bytes_saved_total").inc(saved, crawl=self.name)
+
+
+def _header(headers: Dict[str, str], name: str) -> Optional[str]:
+    """Case-insensitive lookup; httpx lowercases names, Playwright keeps them as sent"""
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
@@ -0,0 +1,433 @@
+"""
+HTML extraction engine for crawled legislation pages
+
+Site extractors describe where the title and body of a page live (simple CSS
+selectors) and which boilerplate to drop. The parsing backend is pluggable:
+``selectolax`` (lexbor) when installed, ``lxml`` otherwise, and BeautifulSoup's
+pure-Python ``html.parser`` only as a reference. Body text is produced as a
+stream of paragraphs in a single pass over the tree, so block structure
+survives for the chunker (paragraphs are joined with blank lines).
+
+Selectors are limited to ``tag``, ``#id``, ``.class`` and combinations of
+those separated by descendant spaces, which every backend understands.
+"""
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import structlog
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on optional extra
+    LXML_AVAILABLE = False
+
+try:
+    from selectolax.parser import HTMLParser as SelectolaxParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on optional extra
+    SELECTOLAX_AVAILABLE = False
+
+logger = structlog.get_logger()
+
+# Elements that start and end a paragraph of body text
+BLOCK_TAGS = frozenset({
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "figcaption",
+    "figure", "form", "h1", "h2", "h3", "h4", "h5", "h6", "hr", "li", "main", "ol", "p", "pre",
+    "section", "table", "tbody", "thead", "tfoot", "tr", "ul",
+})
+# Table cells are kept on one line, separated by a space
+CELL_TAGS = frozenset({"td", "th"})
+DEFAULT_DROP = ("script", "style", "noscript", "template", "nav", "header", "footer", "form", "iframe")
+
+_SIMPLE_SELECTOR = re.compile(r"^([a-zA-Z][a-zA-Z0-9]*)?((?:[#.][\w-]+)*)$")
+
+
+@dataclass
+class SiteExtractor:
+    """Where the title and body of one site's pages live"""
+    name: str
+    hosts: Sequence[str]
+    title: Sequence[str] = ("h1", "title")  # tried in order
+    content: Sequence[str] = ("main", "article", "body")
+    drop: Sequence[str] = DEFAULT_DROP
+
+    def matches(self, url: str) -> bool:
+        host = urlsplit(url).hostname or ""
+        return any(host == h or host.endswith("." + h) for h in self.hosts)
+
+
+NJT_EXTRACTOR = SiteExtractor(
+    name="njt",
+    hosts=("njt.hu",),
+    title=("div.jogszabalyCim", "h1", "title"),
+    content=("div.jogszabaly", "#jogszabaly", "div.content", "main", "body"),
+    drop=DEFAULT_DROP + (".breadcrumb", "div.jogszabalyMenu", "div.hatalyValaszto", "#cookie-consent"),
+)
+MAGYAR_KOZLONY_EXTRACTOR = SiteExtractor(
+    name="magyar_kozlony",
+    hosts=("magyarkozlony.hu",),
+    title=("div.journal-title h1", "h1", "title"),
+    content=("div.journal-content", "div.document-content", "main", "body"),
+    drop=DEFAULT_DROP + (".breadcrumb", "div.journal-actions", "div.sidebar"),
+)
+JOGTAR_EXTRACTOR = SiteExtractor(
+    name="jogtar",
+    hosts=("jogtar.hu", "net.jogtar.hu"),
+    title=("h1.docTitle", "div.docHeader h1", "h1", "title"),
+    content=("div.docBody", "#docBody", "div.document", "main", "body"),
+    drop=DEFAULT_DROP + ("div.docToolbar", "div.hatalyInfo", ".breadcrumb", "div.advert"),
+)
+GENERIC_EXTRACTOR = SiteExtractor(name="generic", hosts=())
+
+SITE_EXTRACTORS: List[SiteExtractor] = [NJT_EXTRACTOR, MAGYAR_KOZLONY_EXTRACTOR, JOGTAR_EXTRACTOR]
+
+
+@dataclass
+class ExtractedPage:
+    """Title and paragraph-structured body of a page"""
+    url: str
+    title: str
+    paragraphs: List[str] = field(default_factory=list)
+    site: str = GENERIC_EXTRACTOR.name
+
+    @property
+    def text(self) -> str:
+        """Body text with paragraphs separated by blank lines"""
+        return "\n\n".join(self.paragraphs)
+
+
+@lru_cache(maxsize=256)
+def css_to_xpath(selector: str) -> str:
+    """Translate the supported CSS subset to a relative XPath expression"""
+    steps = []
+    for part in selector.split():
+        match = _SIMPLE_SELECTOR.match(part)
+        if not match:
+            raise ValueError(f"Unsupported selector: {selector!r}")
+        tag, qualifiers = match.group(1) or "*", match.group(2)
+        predicates = []
+        for kind, name in re.findall(r"([#.])([\w-]+)", qualifiers):
+            if kind == "#":
+                predicates.append(f"@id='{name}'")
+            else:
+                predicates.append(f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')")
+        steps.append(tag.lower() + "".join(f"[{p}]" for p in predicates))
+    return "descendant-or-self::" + "//".join(steps)
+
+
+class _Paragraphs:
+    """Collects text runs and emits whitespace-normalized paragraphs"""
+
+    def __init__(self):
+        self.parts: List[str] = []
+
+    def add(self, text: Optional[str]) -> None:
+        if text:
+            self.parts.append(text)
+
+    def flush(self) -> Optional[str]:
+        if not self.parts:
+            return None
+        text = " ".join("".join(self.parts).split())
+        self.parts = []
+        return text or None
+
+
+class ExtractionBackend:
+    """Parser adapter used by ExtractionEngine"""
+    name = ""
+
+    def parse(self, html: str) -> Any:
+        raise NotImplementedError
+
+    def select_first(self, node: Any, selector: str) -> Any:
+        raise NotImplementedError
+
+    def drop(self, node: Any, selector: str) -> None:
+        raise NotImplementedError
+
+    def text(self, node: Any) -> str:
+        raise NotImplementedError
+
+    def iter_paragraphs(self, node: Any) -> Iterator[str]:
+        raise NotImplementedError
+
+    def links(self, document: Any) -> List[Tuple[str, str]]:
+        raise NotImplementedError
+
+
+class LxmlBackend(ExtractionBackend):
+    """libxml2 through lxml.html"""
+    name = "lxml"
+
+    def __init__(self):
+        self._parser = lxml_html.HTMLParser(encoding="utf-8", remove_comments=True)
+
+    def parse(self, html: str) -> Any:
+        if not html.strip():
+            return None
+        return lxml_html.document_fromstring(html.encode("utf-8"), parser=self._parser)
+
+    def select_first(self, node: Any, selector: str) -> Any:
+        found = _compiled_xpath(css_to_xpath(selector))(node)
+        return found[0] if found else None
+
+    def drop(self, node: Any, selector: str) -> None:
+        for element in _compiled_xpath(css_to_xpath(selector))(node):
+            if element is not node:
+                element.drop_tree()
+
+    def text(self, node: Any) -> str:
+        return " ".join(node.text_content().split())
+
+    def iter_paragraphs(self, node: Any) -> Iterator[str]:
+        buffer = _Paragraphs()
+        for event, element in etree.iterwalk(node, events=("start", "end")):
+            tag = element.tag if isinstance(element.tag, str) else None
+            if event == "start":
+                if tag in BLOCK_TAGS:
+                    paragraph = buffer.flush()
+                    if paragraph:
+                        yield paragraph
+                if tag:
+                    buffer.add(element.text)
+                continue
+            if tag in BLOCK_TAGS:
+                paragraph = buffer.flush()
+                if paragraph:
+                    yield paragraph
+            elif tag in CELL_TAGS:
+                buffer.add(" ")
+            if element is not node:
+                buffer.add(element.tail)
+        paragraph = buffer.flush()
+        if paragraph:
+            yield paragraph
+
+    def links(self, document: Any) -> List[Tuple[str, str]]:
+        return [(a.get("href"), a.text_content()) for a in document.iter("a") if a.get("href")]
+
+
+class SelectolaxBackend(ExtractionBackend):
+    """lexbor through selectolax"""
+    name = "selectolax"
+
+    def parse(self, html: str) -> Any:
+        if not html.strip():
+            return None
+        return SelectolaxParser(html)
+
+    def select_first(self, node: Any, selector: str) -> Any:
+        return node.css_first(selector)
+
+    def drop(self, node: Any, selector: str) -> None:
+        for element in node.css(selector):
+            if element is not node:
+                element.decompose()
+
+    def text(self, node: Any) -> str:
+        return " ".join(node.text(separator=" ").split())
+
+    def iter_paragraphs(self, node: Any) -> Iterator[str]:
+        buffer = _Paragraphs()
+        yield from self._walk(node, buffer)
+        paragraph = buffer.flush()
+        if paragraph:
+            yield paragraph
+
+    def _walk(self, node: Any, buffer: _Paragraphs) -> Iterator[str]:
+        for child in node.iter(include_text=True):
+            tag = child.tag
+            if tag == "-text":
+                buffer.add(child.text(deep=False))
+                continue
+            if tag.startswith(("-", "_")):  # comments, doctype
+                continue
+            block = tag in BLOCK_TAGS
+            if block:
+                paragraph = buffer.flush()
+                if paragraph:
+                    yield paragraph
+            yield from self._walk(child, buffer)
+            if block:
+                paragraph = buffer.flush()
+                if paragraph:
+                    yield paragraph
+            elif tag in CELL_TAGS:
+                buffer.add(" ")
+
+    def links(self, document: Any) -> List[Tuple[str, str]]:
+        return [
+            (a.attributes.get("href"), a.text(separator=" "))
+            for a in document.css("a")
+            if a.attributes.get("href")
+        ]
+
+
+class SoupBackend(ExtractionBackend):
+    """BeautifulSoup with the pure-Python html.parser (reference implementation)"""
+    name = "bs4"
+
+    def parse(self, html: str) -> Any:
+        from bs4 import BeautifulSoup
+
+        if not html.strip():
+            return None
+        return BeautifulSoup(html, "html.parser")
+
+    def select_first(self, node: Any, selector: str) -> Any:
+        return node.select_one(selector)
+
+    def drop(self, node: Any, selector: str) -> None:
+        for element in node.select(selector):
+            if element is not node:
+                element.decompose()
+
+    def text(self, node: Any) -> str:
+        return " ".join(node.get_text(" ").split())
+
+    def iter_paragraphs(self, node: Any) -> Iterator[str]:
+        buffer = _Paragraphs()
+        yield from self._walk(node, buffer)
+        paragraph = buffer.flush()
+        if paragraph:
+            yield paragraph
+
+    def _walk(self, node: Any, buffer: _Paragraphs) -> Iterator[str]:
+        from bs4 import Comment, NavigableString
+
+        for child in node.children:
+            if isinstance(child, NavigableString):
+                if not isinstance(child, Comment):
+                    buffer.add(str(child))
+                continue
+            block = child.name in BLOCK_TAGS
+            if block:
+                paragraph = buffer.flush()
+                if paragraph:
+                    yield paragraph
+            yield from self._walk(child, buffer)
+            if block:
+                paragraph = buffer.flush()
+                if paragraph:
+                    yield paragraph
+            elif child.name in CELL_TAGS:
+                buffer.add(" ")
+
+    def links(self, document: Any) -> List[Tuple[str, str]]:
+        return [(a["href"], a.get_text()) for a in document.find_all("a", href=True)]
+
+
+@lru_cache(maxsize=256)
+def _compiled_xpath(expression: str) -> Any:
+    return etree.XPath(expression)
+
+
+def available_backends() -> List[str]:
+    """Backends importable here, fastest first"""
+    names = []
+    if SELECTOLAX_AVAILABLE:
+        names.append(SelectolaxBackend.name)
+    if LXML_AVAILABLE:
+        names.append(LxmlBackend.name)
+    names.append(SoupBackend.name)
+    return names
+
+
+def get_backend(name: Optional[str] = None) -> ExtractionBackend:
+    """Backend by name, or the fastest available one"""
+    name = name or available_backends()[0]
+    if name == SelectolaxBackend.name and SELECTOLAX_AVAILABLE:
+        return SelectolaxBackend()
+    if name == LxmlBackend.name and LXML_AVAILABLE:
+        return LxmlBackend()
+    if name == SoupBackend.name:
+        return SoupBackend()
+    raise ValueError(f"Extraction backend not available: {name}")
+
+
+class ExtractionEngine:
+    """Extracts title, paragraphs and links with a site extractor and a parser backend"""
+
+    def __init__(self, backend: Optional[str] = None, extractors: Optional[Sequence[SiteExtractor]] = None):
+        self.backend = get_backend(backend)
+        self.extractors = list(extractors) if extractors is not None else SITE_EXTRACTORS
+
+    def extractor_for(self, url: str) -> SiteExtractor:
+        """Site extractor for url, falling back to a generic one"""
+        for extractor in self.extractors:
+            if extractor.matches(url):
+                return extractor
+        return GENERIC_EXTRACTOR
+
+    def extract(self, html: str, url: str) -> ExtractedPage:
+        """Title and paragraphs of a page"""
+        extractor = self.extractor_for(url)
+        document = self.backend.parse(html)
+        if document is None:
+            return ExtractedPage(url=url, title="", site=extractor.name)
+        return ExtractedPage(
+            url=url,
+            title=self._title(document, extractor),
+            paragraphs=list(self._paragraphs(document, extractor)),
+            site=extractor.name,
+        )
+
+    def iter_paragraphs(self, html: str, url: str) -> Iterator[str]:
+        """Body paragraphs of a page, produced lazily"""
+        extractor = self.extractor_for(url)
+        document = self.backend.parse(html)
+        if document is not None:
+            yield from self._paragraphs(document, extractor)
+
+    def links(self, html: str, base_url: str) -> List[Tuple[str, str]]:
+        """(absolute URL, link text) for every anchor on the page"""
+        document = self.backend.parse(html)
+        if document is None:
+            return []
+        return [
+            (urljoin(base_url, href.strip()), " ".join(text.split()))
+            for href, text in self.backend.links(document)
+        ]
+
+    def _title(self, document: Any, extractor: SiteExtractor) -> str:
+        for selector in extractor.title:
+            node = self.backend.select_first(document, selector)
+            if node is not None:
+                title = self.backend.text(node)
+                if title:
+                    return title
+        return ""
+
+    def _paragraphs(self, document: Any, extractor: SiteExtractor) -> Iterator[str]:
+        root = None
+        for selector in extractor.content:
+            root = self.backend.select_first(document, selector)
+            if root is not None:
+                break
+        if root is None:
+            root = document
+        for selector in extractor.drop:
+            self.backend.drop(root, selector)
+        return self.backend.iter_paragraphs(root)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend.name, "sites": [e.name for e in self.extractors]}
+
+
+# Global extraction engine instance
+_extraction_engine: Optional[ExtractionEngine] = None
+
+
+def get_extraction_engine() -> ExtractionEngine:
+    """Get global extraction engine instance"""
+    global _extraction_engine
+    if _extraction_engine is None:
+        _extraction_engine = ExtractionEngine()
+        logger.info("HTML extraction engine initialized", backend=_extraction_engine.backend.name)
+    return _extraction_engine
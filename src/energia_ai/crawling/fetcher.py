@@ -0,0 +1,234 @@
+"""
+Tiered page fetcher: plain HTTP first, headless browser only when needed
+
+Most legislation pages are server-rendered, so a pooled HTTP client (HTTP/2
+when the ``h2`` package is installed, compressed transfer) fetches them at a
+fraction of the CPU and memory of a browser. Responses that look like a
+JavaScript-rendered shell are re-fetched with Playwright, and the decision is
+remembered per URL pattern so later pages of the same kind go straight to the
+right tier.
+"""
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional, Sequence
+from urllib.parse import urlsplit
+
+import httpx
+import structlog
+
+from ..core.metrics import get_metrics_registry
+from .browser import PagePool
+from .changes import ChangeTracker
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on optional extra
+    HTTP2_AVAILABLE = False
+
+logger = structlog.get_logger()
+
+TIER_HTTP = "http"
+TIER_BROWSER = "browser"
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "hu-HU,hu;q=0.9,en;q=0.5",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+# Markers of client-side rendered shells
+_SHELL_MARKERS = re.compile(
+    r"<div[^>]+id=[\"'](?:root|app|__next)[\"'][^>]*>\s*</div>"
+    r"|<noscript[^>]*>[^<]*(?:enable JavaScript|JavaScript engedélyezése|javascript szükséges)",
+    re.IGNORECASE,
+)
+_SCRIPT_OR_STYLE = re.compile(r"<(script|style)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_TAG = re.compile(r"<[^>]+>")
+_DIGITS = re.compile(r"\d+")
+
+
+@dataclass
+class FetchResult:
+    """A fetched page"""
+    url: str
+    status: int
+    html: str
+    tier: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0
+    content: bytes = b""  # response body as received, before any parsing
+    changed: bool = True  # False when a ChangeTracker saw the same page last time
+
+    @property
+    def size(self) -> int:
+        return len(self.content) if self.content else len(self.html.encode("utf-8"))
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+
+def visible_text_length(html: str) -> int:
+    """Rough length of the text a reader would see, without building a DOM"""
+    return len(" ".join(_TAG.sub(" ", _SCRIPT_OR_STYLE.sub(" ", html)).split()))
+
+
+def needs_javascript(html: str, required_markers: Sequence[str] = (), min_text: int = 200) -> bool:
+    """Heuristically decide whether a response is an unrendered JavaScript shell
+
+    A page needs a browser when it carries an empty app root or a "please
+    enable JavaScript" notice, when it is missing any marker that a rendered
+    page of this site always contains, or when almost none of it is visible
+    text.
+    """
+    if _SHELL_MARKERS.search(html):
+        return True
+    if any(marker not in html for marker in required_markers):
+        return True
+    return visible_text_length(html) < min_text
+
+
+def url_pattern(url: str) -> str:
+    """Group URLs of the same page kind: host plus path with numbers and the final segment generalized"""
+    parts = urlsplit(url)
+    segments = [_DIGITS.sub("#", segment) for segment in parts.path.split("/") if segment]
+    if len(segments) > 1:
+        segments[-1] = "*"
+    return f"{parts.netloc.lower()}/{'/'.join(segments)}"
+
+
+class HttpFetcher:
+    """Pooled HTTP client for server-rendered pages"""
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_keepalive: int = 10,
+        timeout: float = 30.0,
+        headers: Optional[Dict[str, str]] = None,
+        http2: bool = True,
+    ):
+        self.client = httpx.AsyncClient(
+            http2=http2 and HTTP2_AVAILABLE,
+            headers=headers or DEFAULT_HEADERS,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+            timeout=timeout,
+            follow_redirects=True,
+        )
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        start = time.perf_counter()
+        response = await self.client.get(url, headers=headers)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return FetchResult(
+            url=str(response.url),
+            status=response.status_code,
+            html=response.text,
+            tier=TIER_HTTP,
+            headers=dict(response.headers),
+            elapsed=time.perf_counter() - start,
+            content=response.content,
+        )
+
+    async def download(self, url: str, destination: str, chunk_size: int = 1 << 16) -> int:
+        """Stream a large response (e.g. a PDF) to a file; returns the number of bytes written"""
+        written = 0
+        async with self.client.stream("GET", url) as response:
+            response.raise_for_status()
+            with open(destination, "wb") as f:
+                async for chunk in response.aiter_bytes(chunk_size):
+                    f.write(chunk)
+                    written += len(chunk)
+        return written
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class BrowserFetcher:
+    """Renders pages in a pooled Playwright page"""
+
+    def __init__(self, pool: PagePool, wait_until: str = "domcontentloaded", timeout: float = 30.0):
+        self.pool = pool
+        self.wait_until = wait_until
+        self.timeout = timeout
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        start = time.perf_counter()
+        async with self.pool.page() as page:
+            response = await page.goto(url, wait_until=self.wait_until, timeout=self.timeout * 1000)
+            html = await page.content()
+            return FetchResult(
+                url=page.url,
+                status=response.status if response else 200,
+                html=html,
+                tier=TIER_BROWSER,
+                headers=await response.all_headers() if response else {},
+                elapsed=time.perf_counter() - start,
+            )
+
+
+class TieredFetcher:
+    """HTTP first, browser on detected JavaScript shells, with per-pattern memory
+
+    With a ``ChangeTracker`` the HTTP tier sends conditional requests and every
+    result is marked ``changed=False`` when the page is the same as last time.
+    Changed pages count as changed until ``commit`` records them as processed.
+    """
+
+    def __init__(
+        self,
+        http: HttpFetcher,
+        browser: Optional[Callable[[str], Awaitable[FetchResult]]] = None,
+        required_markers: Sequence[str] = (),
+        min_text: int = 200,
+        tracker: Optional[ChangeTracker] = None,
+    ):
+        self.http = http
+        self.browser = browser
+        self.required_markers = required_markers
+        self.min_text = min_text
+        self.tracker = tracker
+        self.decisions: Dict[str, str] = {}
+        self.metrics = get_metrics_registry()
+
+    async def fetch(self, url: str, conditional: bool = True) -> FetchResult:
+        """Fetch url; conditional=False always returns the full page (e.g. listings that must be parsed)"""
+        pattern = url_pattern(url)
+        tracked = conditional and self.tracker is not None
+        if self.decisions.get(pattern) == TIER_BROWSER and self.browser:
+            return self._record(url, await self.browser(url), tracked)
+
+        headers = self.tracker.request_headers(url) if tracked else None
+        result = await self.http.fetch(url, headers=headers)
+        if (
+            self.browser
+            and not result.not_modified
+            and needs_javascript(result.html, self.required_markers, self.min_text)
+        ):
+            self.decisions[pattern] = TIER_BROWSER
+            logger.info("Escalating URL pattern to browser", pattern=pattern, url=url)
+            self.metrics.counter("crawl_fetch_escalations_total").inc(pattern=pattern)
+            return self._record(url, await self.browser(url), tracked)
+
+        self.decisions.setdefault(pattern, TIER_HTTP)
+        return self._record(url, result, tracked)
+
+    def commit(self, url: str, result: FetchResult) -> None:
+        """Remember a changed page as processed; until then re-fetches still report it changed"""
+        if self.tracker is not None and result.changed:
+            self.tracker.commit(url, result)
+
+    def _record(self, url: str, result: FetchResult, tracked: bool) -> FetchResult:
+        if tracked:
+            result.changed = self.tracker.check(url, result)
+        self.metrics.counter("crawl_fetch_total").inc(tier=result.tier)
+        self.metrics.histogram("crawl_fetch_seconds").observe(result.elapsed, tier=result.tier)
+        return result
+
+    async def close(self) -> None:
+        await self.http.close()
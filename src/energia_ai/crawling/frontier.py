@@ -0,0 +1,222 @@
+"""
+Persistent URL frontier for crawls
+
+The frontier is a local SQLite database, so a crawl can be stopped or crash
+at any point and resume where it left off: URLs are claimed with a lease,
+and leases left behind by an interrupted run go back to the queue when the
+frontier is reopened. URLs are deduplicated on insert, retried with exponential
+backoff and finally marked failed. With ``revisit_after`` set, finished URLs
+older than that are queued again when re-added, which is how periodic re-crawls
+pick up pages that may have changed. SQLite calls are short local writes and
+run inline on the event loop.
+"""
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+import structlog
+
+logger = structlog.get_logger()
+
+STATUS_PENDING = "pending"
+STATUS_IN_PROGRESS = "in_progress"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL UNIQUE,
+    host TEXT NOT NULL,
+    depth INTEGER NOT NULL DEFAULT 0,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    leased_until REAL,
+    last_error TEXT,
+    job_id TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_frontier_ready ON frontier (status, priority DESC, next_attempt_at, id);
+CREATE INDEX IF NOT EXISTS idx_frontier_host ON frontier (host, status);
+"""
+
+
+def url_host(url: str) -> str:
+    """Host (with port) a URL is fetched from, used for politeness limits"""
+    return urlsplit(url).netloc.lower()
+
+
+@dataclass
+class FrontierEntry:
+    """A URL claimed from the frontier"""
+    url: str
+    host: str
+    depth: int
+    attempts: int
+
+
+class CrawlFrontier:
+    """SQLite-backed crawl queue with leases, dedupe and retry backoff"""
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        job_id: Optional[str] = None,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3,
+        retry_base_delay: float = 30.0,
+        revisit_after: Optional[float] = None,
+    ):
+        self.path = path
+        self.job_id = job_id
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.revisit_after = revisit_after
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        recovered = self.recover()
+        if recovered:
+            logger.info("Recovered interrupted frontier leases", path=path, urls=recovered)
+
+    def add(self, urls: Iterable[str], depth: int = 0, priority: int = 0) -> int:
+        """Queue URLs that have not been seen (or are due for a revisit); returns how many were queued"""
+        now = time.time()
+        rows = [(url, url_host(url), depth, priority, self.job_id, now) for url in urls]
+        if not rows:
+            return 0
+        before = self.connection.total_changes
+        if self.revisit_after is None:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO frontier (url, host, depth, priority, job_id, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        else:
+            self.connection.executemany(
+                "INSERT INTO frontier (url, host, depth, priority, job_id, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET status = ?, depth = excluded.depth, priority = excluded.priority, "
+                "attempts = 0, next_attempt_at = 0, last_error = NULL, job_id = excluded.job_id, "
+                "updated_at = excluded.updated_at "
+                "WHERE frontier.status IN (?, ?) AND frontier.updated_at <= ?",
+                [(*row, STATUS_PENDING, STATUS_DONE, STATUS_FAILED, now - self.revisit_after) for row in rows],
+            )
+        return self.connection.total_changes - before
+
+    def claim(
+        self,
+        limit: int,
+        exclude_hosts: Iterable[str] = (),
+        per_host: Optional[int] = None,
+        host_limits: Optional[Dict[str, int]] = None,
+    ) -> List[FrontierEntry]:
+        """Lease up to limit ready URLs, highest priority first
+
+        At most ``host_limits[host]`` URLs are taken from a listed host and
+        ``per_host`` from any other.
+        """
+        now = time.time()
+        excluded = list(exclude_hosts)
+        host_filter = f"AND host NOT IN ({','.join('?' * len(excluded))})" if excluded else ""
+        limits = dict(host_limits or {})
+        host_cap = f"CASE host {'WHEN ? THEN ? ' * len(limits)}ELSE ? END" if limits else "?"
+        with self._transaction():
+            rows = self.connection.execute(
+                f"SELECT id, url, host, depth, attempts FROM ("
+                f"  SELECT *, ROW_NUMBER() OVER (PARTITION BY host ORDER BY priority DESC, id) AS host_rank"
+                f"  FROM frontier WHERE status = ? AND next_attempt_at <= ? {host_filter}"
+                f") WHERE host_rank <= {host_cap} ORDER BY priority DESC, id LIMIT ?",
+                (
+                    STATUS_PENDING, now, *excluded,
+                    *(value for item in limits.items() for value in item), per_host or limit,
+                    limit,
+                ),
+            ).fetchall()
+            self.connection.executemany(
+                "UPDATE frontier SET status = ?, leased_until = ?, attempts = attempts + 1, updated_at = ? "
+                "WHERE id = ?",
+                [(STATUS_IN_PROGRESS, now + self.lease_seconds, now, row[0]) for row in rows],
+            )
+        return [FrontierEntry(url, host, depth, attempts + 1) for _, url, host, depth, attempts in rows]
+
+    def complete(self, url: str) -> None:
+        self.connection.execute(
+            "UPDATE frontier SET status = ?, leased_until = NULL, last_error = NULL, updated_at = ? WHERE url = ?",
+            (STATUS_DONE, time.time(), url),
+        )
+
+    def fail(self, url: str, error: str) -> bool:
+        """Record a failed attempt; returns True if the URL will be retried"""
+        now = time.time()
+        row = self.connection.execute("SELECT attempts FROM frontier WHERE url = ?", (url,)).fetchone()
+        attempts = row[0] if row else self.max_attempts
+        retry = attempts < self.max_attempts
+        self.connection.execute(
+            "UPDATE frontier SET status = ?, next_attempt_at = ?, leased_until = NULL, last_error = ?, "
+            "updated_at = ? WHERE url = ?",
+            (
+                STATUS_PENDING if retry else STATUS_FAILED,
+                now + self.retry_base_delay * 2 ** (attempts - 1) if retry else 0,
+                error[:1000],
+                now,
+                url,
+            ),
+        )
+        return retry
+
+    def recover(self, expired_only: bool = False) -> int:
+        """Return leased URLs to the queue
+
+        A frontier file is owned by one crawl process, so on open every lease
+        belongs to a previous run and is recovered; while running, only
+        leases that outlived ``lease_seconds`` are.
+        """
+        query = "UPDATE frontier SET status = ?, leased_until = NULL WHERE status = ?"
+        params = [STATUS_PENDING, STATUS_IN_PROGRESS]
+        if expired_only:
+            query += " AND leased_until < ?"
+            params.append(time.time())
+        return self.connection.execute(query, params).rowcount
+
+    def next_ready_in(self) -> Optional[float]:
+        """Seconds until the next pending URL becomes ready (None if nothing is pending)"""
+        row = self.connection.execute(
+            "SELECT MIN(next_attempt_at) FROM frontier WHERE status = ?", (STATUS_PENDING,)
+        ).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def stats(self) -> Dict[str, int]:
+        counts = dict.fromkeys((STATUS_PENDING, STATUS_IN_PROGRESS, STATUS_DONE, STATUS_FAILED), 0)
+        for status, count in self.connection.execute("SELECT status, COUNT(*) FROM frontier GROUP BY status"):
+            counts[status] = count
+        return counts
+
+    def pending_by_host(self) -> Dict[str, int]:
+        return dict(
+            self.connection.execute(
+                "SELECT host, COUNT(*) FROM frontier WHERE status = ? GROUP BY host", (STATUS_PENDING,)
+            ).fetchall()
+        )
+
+    def close(self) -> None:
+        self.connection.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """BEGIN IMMEDIATE ... COMMIT on the autocommit connection"""
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.connection
+        except Exception:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
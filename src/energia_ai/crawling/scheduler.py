@@ -0,0 +1,230 @@
+"""
+Concurrent crawl scheduler with per-host politeness
+
+URLs are leased from a persistent ``CrawlFrontier`` and processed by a pool of
+concurrent workers. Each host has its own concurrency cap and minimum interval
+between request starts, so many hosts can be crawled in parallel without
+hammering any one of them. Links returned by the worker are queued one level
+deeper. Throughput, failures and queue depth are reported to the metrics
+registry.
+"""
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+import structlog
+
+from ..core.metrics import get_metrics_registry
+from .frontier import CrawlFrontier, FrontierEntry
+
+logger = structlog.get_logger()
+
+# Processes one claimed URL and returns the links it discovered
+CrawlWorker = Callable[[FrontierEntry], Awaitable[Optional[Iterable[str]]]]
+
+
+@dataclass
+class HostPolicy:
+    """Politeness limits for one host"""
+    max_concurrency: int = 2
+    min_interval: float = 1.0  # seconds between request starts
+    jitter: float = 0.0  # extra random delay added to min_interval
+
+
+@dataclass
+class _HostState:
+    semaphore: asyncio.Semaphore
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    next_start: float = 0.0
+    reserved: int = 0
+
+
+class HostLimiter:
+    """Per-host concurrency caps and request spacing"""
+
+    def __init__(self, default: Optional[HostPolicy] = None, overrides: Optional[Dict[str, HostPolicy]] = None):
+        self.default = default or HostPolicy()
+        self.overrides = overrides or {}
+        self._hosts: Dict[str, _HostState] = {}
+
+    def policy(self, host: str) -> HostPolicy:
+        return self.overrides.get(host, self.default)
+
+    def saturated_hosts(self) -> List[str]:
+        """Hosts that already have as many requests queued or running as they allow"""
+        return [
+            host for host, state in self._hosts.items()
+            if state.reserved >= self.policy(host).max_concurrency
+        ]
+
+    def claim_limits(self) -> Dict[str, int]:
+        """Free slots of hosts with their own policy or requests in flight; other hosts get the default cap"""
+        hosts = set(self.overrides) | set(self._hosts)
+        return {host: max(0, self.policy(host).max_concurrency - self._reserved(host)) for host in hosts}
+
+    def _reserved(self, host: str) -> int:
+        state = self._hosts.get(host)
+        return state.reserved if state else 0
+
+    def active_by_host(self) -> Dict[str, int]:
+        return {host: state.reserved for host, state in self._hosts.items() if state.reserved}
+
+    @asynccontextmanager
+    async def slot(self, host: str) -> AsyncIterator[None]:
+        """Wait for a free slot on host and for its request spacing"""
+        policy = self.policy(host)
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(asyncio.Semaphore(policy.max_concurrency))
+
+        state.reserved += 1
+        try:
+            async with state.semaphore:
+                loop = asyncio.get_running_loop()
+                async with state.lock:
+                    wait = state.next_start - loop.time()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    state.next_start = loop.time() + policy.min_interval + random.uniform(0, policy.jitter)
+                yield
+        finally:
+            state.reserved -= 1
+
+
+@dataclass
+class CrawlStats:
+    """Outcome of one scheduler run"""
+    processed: int = 0
+    failed: int = 0
+    retried: int = 0
+    discovered: int = 0
+    seconds: float = 0.0
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.processed / self.seconds if self.seconds else 0.0
+
+
+class CrawlScheduler:
+    """Drives workers over the frontier within global and per-host limits"""
+
+    def __init__(
+        self,
+        frontier: CrawlFrontier,
+        worker: CrawlWorker,
+        concurrency: int = 8,
+        host_policy: Optional[HostPolicy] = None,
+        host_policies: Optional[Dict[str, HostPolicy]] = None,
+        max_depth: Optional[int] = None,
+        name: str = "crawl",
+    ):
+        self.frontier = frontier
+        self.worker = worker
+        self.concurrency = concurrency
+        self.limiter = HostLimiter(host_policy, host_policies)
+        self.max_depth = max_depth
+        self.name = name
+        self.metrics = get_metrics_registry()
+        self.stats = CrawlStats()
+        self._started: Optional[float] = None
+
+    async def run(self, max_pages: Optional[int] = None, idle_poll: float = 1.0) -> CrawlStats:
+        """Crawl until the frontier is drained or max_pages URLs have been dispatched"""
+        self.stats = CrawlStats()
+        self._started = time.perf_counter()
+        self.metrics.register_collector(f"crawl:{self.name}", self.report)
+        tasks: Set[asyncio.Task] = set()
+        dispatched = 0
+
+        try:
+            while True:
+                budget = self.concurrency - len(tasks)
+                if max_pages is not None:
+                    budget = min(budget, max_pages - dispatched)
+                if budget > 0:
+                    entries = self.frontier.claim(
+                        budget,
+                        exclude_hosts=self.limiter.saturated_hosts(),
+                        per_host=self.limiter.default.max_concurrency,
+                        host_limits=self.limiter.claim_limits(),
+                    )
+                    for entry in entries:
+                        tasks.add(asyncio.create_task(self._process(entry)))
+                    dispatched += len(entries)
+
+                if not tasks:
+                    if max_pages is not None and dispatched >= max_pages:
+                        break
+                    ready_in = self.frontier.next_ready_in()
+                    if ready_in is None:
+                        break
+                    await asyncio.sleep(min(ready_in, idle_poll))
+                    continue
+
+                # Wake up for a finished task, or when a backed-off retry becomes ready;
+                # ready URLs that could not be claimed only free up when a task finishes
+                ready_in = self.frontier.next_ready_in()
+                done, tasks = await asyncio.wait(
+                    tasks,
+                    timeout=min(ready_in, idle_poll) if ready_in else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                self.frontier.recover(expired_only=True)
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            self.stats.seconds = time.perf_counter() - self._started
+            self.metrics.unregister_collector(f"crawl:{self.name}")
+
+        logger.info(
+            "Crawl run finished",
+            crawl=self.name,
+            processed=self.stats.processed,
+            failed=self.stats.failed,
+            retried=self.stats.retried,
+            discovered=self.stats.discovered,
+            pages_per_second=round(self.stats.pages_per_second, 2),
+            frontier=self.frontier.stats(),
+        )
+        return self.stats
+
+    async def _process(self, entry: FrontierEntry) -> None:
+        # Still "cancelled" if the task is cancelled before the worker returns or fails
+        status = "cancelled"
+        async with self.limiter.slot(entry.host):
+            start = time.perf_counter()
+            try:
+                links = await self.worker(entry)
+            except Exception as e:
+                retry = self.frontier.fail(entry.url, str(e))
+                status = "retry" if retry else "failed"
+                if retry:
+                    self.stats.retried += 1
+                else:
+                    self.stats.failed += 1
+                logger.warning("Crawl worker failed", url=entry.url, attempt=entry.attempts, retry=retry, error=str(e))
+            else:
+                self.frontier.complete(entry.url)
+                status = "done"
+                self.stats.processed += 1
+                if links and (self.max_depth is None or entry.depth < self.max_depth):
+                    self.stats.discovered += self.frontier.add(links, depth=entry.depth + 1)
+            finally:
+                self.metrics.histogram("crawl_page_seconds").observe(
+                    time.perf_counter() - start, crawl=self.name, host=entry.host
+                )
+                self.metrics.counter("crawl_pages_total").inc(crawl=self.name, status=status)
+
+    def report(self) -> Dict[str, Any]:
+        """Queue depth and throughput for the metrics endpoint"""
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        return {
+            "frontier": self.frontier.stats(),
+            "pending_by_host": self.frontier.pending_by_host(),
+            "active_by_host": self.limiter.active_by_host(),
+            "processed": self.stats.processed,
+            "pages_per_second": self.stats.processed / elapsed if elapsed else 0.0,
+        }
@@ -2,34 +2,103 @@
 Database connection management for PostgreSQL
 """
 import asyncio
-from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+import time
+from typing import Any, AsyncGenerator, Dict, Optional, Tuple
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.pool import NullPool
 import structlog
-from ..config.settings import get_settings
+from ..config.settings import Settings, get_settings
+from ..core.metrics import get_metrics_registry
 
 logger = structlog.get_logger()
 
+# SQLSTATE of a statement cancelled by statement_timeout (query_canceled)
+QUERY_CANCELED = "57014"
+
+def pool_sizes(settings: Settings) -> Tuple[int, int]:
+    """(pool_size, max_overflow) for the current environment; development keeps the pool small"""
+    pool_size = settings.database_pool_size
+    max_overflow = settings.database_max_overflow
+    if settings.environment == "development":
+        pool_size = min(pool_size, 5)
+        max_overflow = min(max_overflow, 5)
+    return pool_size, max_overflow
+
+def is_statement_timeout(error: BaseException) -> bool:
+    """Whether a database error is a statement cancelled by statement_timeout"""
+    return isinstance(error, DBAPIError) and getattr(error.orig, "sqlstate", None) == QUERY_CANCELED
+
+def build_engine_options(settings: Settings, read_only: bool = False) -> Dict[str, Any]:
+    """
+    Engine keyword arguments for the current environment
+    
+    Testing uses NullPool (no pool sizing arguments - SQLAlchemy rejects them),
+    development a small pool, everything else the configured pool. Every
+    connection gets a server-side statement_timeout; replica connections are
+    additionally forced read-only.
+    """
+    timeout_ms = (
+        settings.database_read_statement_timeout_ms if read_only
+        else settings.database_statement_timeout_ms
+    )
+    server_settings = {"statement_timeout": str(timeout_ms)}
+    if read_only:
+        server_settings["default_transaction_read_only"] = "on"
+    
+    options: Dict[str, Any] = {
+        "echo": settings.debug,
+        "pool_pre_ping": True,
+        "connect_args": {"server_settings": server_settings},
+    }
+    
+    if settings.environment == "testing":
+        options["poolclass"] = NullPool
+        return options
+    
+    pool_size, max_overflow = pool_sizes(settings)
+    options.update(
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.database_pool_timeout,
+        pool_recycle=3600,
+    )
+    return options
+
+def pool_status(engine: Optional[AsyncEngine], max_overflow: Optional[int] = None) -> Dict[str, Any]:
+    """Checked-out/overflow counters of an engine's connection pool, against the configured max_overflow"""
+    if engine is None:
+        return {}
+    pool = engine.sync_engine.pool
+    if isinstance(pool, NullPool):
+        return {"pool": "null"}
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": max_overflow,
+    }
+
 class DatabaseManager:
     """Async PostgreSQL database manager"""
     
     def __init__(self):
         self.settings = get_settings()
-        self.engine = None
+        self.engine: Optional[AsyncEngine] = None
+        self.read_engine: Optional[AsyncEngine] = None
         self.session_factory = None
+        self.read_session_factory = None
+        self.metrics = get_metrics_registry()
         
     async def initialize(self):
-        """Initialize database connection"""
+        """Initialize primary and (optional) read-replica connections"""
         try:
             # Create async engine
             self.engine = create_async_engine(
                 self.settings.database_url,
-                echo=self.settings.debug,
-                poolclass=NullPool if self.settings.environment == "testing" else None,
-                pool_size=10,
-                max_overflow=20,
-                pool_pre_ping=True,
-                pool_recycle=3600,
+                **build_engine_options(self.settings)
             )
             
             # Create session factory
@@ -39,27 +108,67 @@ class DatabaseManager:
                 expire_on_commit=False
             )
             
-            logger.info("Database connection initialized", database_url=self.settings.database_url)
+            if self.settings.database_read_url:
+                self.read_engine = create_async_engine(
+                    self.settings.database_read_url,
+                    **build_engine_options(self.settings, read_only=True)
+                )
+                self.read_session_factory = async_sessionmaker(
+                    self.read_engine,
+                    class_=AsyncSession,
+                    expire_on_commit=False
+                )
+            else:
+                # Without a replica, read-only sessions share the primary pool
+                self.read_session_factory = self.session_factory
+            
+            self.metrics.register_collector("database_pool", self.pool_metrics)
+            
+            logger.info(
+                "Database connection initialized",
+                database_url=self.settings.database_url,
+                read_replica=bool(self.settings.database_read_url),
+                environment=self.settings.environment,
+            )
             
         except Exception as e:
             logger.error("Failed to initialize database", error=str(e))
             raise
     
-    async def get_session(self) -> AsyncGenerator[AsyncSession, None]:
-        """Get database session"""
+    async def get_session(self, read_only: bool = False) -> AsyncGenerator[AsyncSession, None]:
+        """Get database session; read_only sessions are routed to the replica"""
         if not self.session_factory:
             await self.initialize()
         
-        async with self.session_factory() as session:
+        factory = self.read_session_factory if read_only else self.session_factory
+        engine_name = "replica" if read_only and self.read_engine is not None else "primary"
+        
+        async with factory() as session:
             try:
+                # Acquire the connection up front so pool wait time is measurable
+                start = time.perf_counter()
+                await session.connection()
+                self.metrics.histogram("db_pool_acquire_seconds").observe(
+                    time.perf_counter() - start, engine=engine_name
+                )
                 yield session
             except Exception as e:
                 await session.rollback()
-                logger.error("Database session error", error=str(e))
+                if is_statement_timeout(e):
+                    self.metrics.counter("db_statement_timeouts").inc(engine=engine_name)
+                logger.error("Database session error", error=str(e), engine=engine_name)
                 raise
             finally:
                 await session.close()
     
+    def pool_metrics(self) -> Dict[str, Any]:
+        """Pool saturation for the metrics surface"""
+        _, max_overflow = pool_sizes(self.settings)
+        metrics = {"primary": pool_status(self.engine, max_overflow)}
+        if self.read_engine is not None:
+            metrics["replica"] = pool_status(self.read_engine, max_overflow)
+        return metrics
+    
     async def create_tables(self):
         """Create all database tables"""
         try:
@@ -79,6 +188,9 @@ class DatabaseManager:
     
     async def close(self):
         """Close database connections"""
+        self.metrics.unregister_collector("database_pool")
+        if self.read_engine:
+            await self.read_engine.dispose()
         if self.engine:
             await self.engine.dispose()
             logger.info("Database connections closed")
@@ -99,3 +211,9 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     db_manager = await get_database_manager()
     async for session in db_manager.get_session():
         yield session
+
+async def get_db_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """Get read-only (replica-routed) session dependency for FastAPI"""
+    db_manager = await get_database_manager()
+    async for session in db_manager.get_session(read_only=True):
+        yield session
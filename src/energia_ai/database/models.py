@@ -1,7 +1,8 @@
 """
 Database models for Energia AI using SQLAlchemy
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, Float, String, Text, DateTime, Boolean, ForeignKey, JSON, UniqueConstraint
+from sqlalchemy.dialects.postgresql import ENUM, JSONB, UUID
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -9,6 +10,11 @@ from datetime import datetime
 
 Base = declarative_base()
 
+# Tables created and altered by the Supabase migrations (supabase/migrations),
+# with their enum types. They live on their own metadata so that
+# Base.metadata.create_all/drop_all never create or drop them.
+SupabaseBase = declarative_base()
+
 class User(Base):
     """User model for authentication and authorization"""
     __tablename__ = 'users'
@@ -101,3 +107,132 @@ class SystemMetrics(Base):
     metric_data = Column(JSON)  # Additional structured data
     
     created_at = Column(DateTime, default=func.now())
+
+# Enum types owned by the Supabase migrations
+CHANGE_TYPES = ('amendment', 'repeal', 'new_legislation', 'other')
+NOTIFICATION_STATUSES = ('detected', 'analyzed', 'notified')
+CONTRACT_TYPES = ('service', 'employment', 'nda', 'partnership', 'other')
+IMPACT_LEVELS = ('low', 'medium', 'high', 'critical')
+PRIORITY_LEVELS = ('low', 'medium', 'high', 'urgent')
+
+class LegalChangeEvent(SupabaseBase):
+    """A detected change in a monitored legal source"""
+    __tablename__ = 'legal_change_events'
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    source_url = Column(Text)
+    change_type = Column(ENUM(*CHANGE_TYPES, name='change_type', create_type=False))
+    summary = Column(Text)
+    status = Column(
+        ENUM(*NOTIFICATION_STATUSES, name='notification_status', create_type=False),
+        server_default='detected',
+    )
+    detected_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class QueueMessage(SupabaseBase):
+    """Work item for asynchronous downstream processing"""
+    __tablename__ = 'queue_messages'
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    type = Column(Text, nullable=False)
+    payload = Column(JSONB, nullable=False)
+    status = Column(Text, nullable=False, server_default='pending', index=True)  # pending, processing, done, dead
+    error = Column(Text)
+    attempts = Column(Integer, nullable=False, server_default='0')
+    claimed_at = Column(DateTime(timezone=True))  # start of the current lease
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # retry backoff
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+class CrawlerProxy(SupabaseBase):
+    """Outbound proxy used by the crawlers, with its last known health"""
+    __tablename__ = 'crawler_proxies'
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    host = Column(Text, nullable=False)
+    port = Column(Integer, nullable=False)
+    username = Column(Text)
+    password = Column(Text)
+    is_active = Column(Boolean, server_default='true', index=True)
+    last_used_at = Column(DateTime(timezone=True))
+    failure_count = Column(Integer, server_default='0')
+    latency_ms = Column(Float)
+    success_rate = Column(Float)
+    cooldown_until = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+class Contract(SupabaseBase):
+    """Contract monitored for the impact of legal changes"""
+    __tablename__ = 'contracts'
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    contract_name = Column(Text, nullable=False)
+    content = Column(Text, nullable=False)
+    contract_type = Column(ENUM(*CONTRACT_TYPES, name='contract_type', create_type=False), nullable=False)
+    risk_level = Column(ENUM(*IMPACT_LEVELS, name='impact_level', create_type=False), nullable=False)
+    last_reviewed = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+class ContractImpact(SupabaseBase):
+    """Impact of a legal change on one contract, with the action it requires"""
+    __tablename__ = 'contract_impacts'
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    contract_id = Column(UUID(as_uuid=True), ForeignKey('contracts.id', ondelete='CASCADE'), index=True)
+    change_id = Column(UUID(as_uuid=True), index=True)  # legal_changes.id
+    impact_description = Column(Text, nullable=False)
+    action_required = Column(Text, nullable=False)
+    priority_level = Column(ENUM(*PRIORITY_LEVELS, name='priority_level', create_type=False), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+class ImpactAnalysisResult(SupabaseBase):
+    """Outcome of analysing the impact of one legal document"""
+    __tablename__ = 'impact_analysis_results'
+    
+    analysis_id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid())
+    document_id = Column(UUID(as_uuid=True))  # legal_documents.id
+    referenced_documents = Column(JSONB)
+    impact_summary = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class AnalysisBatchJob(SupabaseBase):
+    """Bulk analysis of a document set, run through the batch API or a worker pool"""
+    __tablename__ = 'analysis_batch_jobs'
+    
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    analysis_type = Column(Text, nullable=False)
+    mode = Column(Text, nullable=False)
+    status = Column(Text, nullable=False, server_default='pending', index=True)
+    model = Column(Text, nullable=False)
+    tenant = Column(Text, nullable=False, server_default='default')
+    context = Column(Text)
+    change_id = Column(UUID(as_uuid=True))
+    legal_document_id = Column(UUID(as_uuid=True))
+    analysis_id = Column(UUID(as_uuid=True))  # impact_analysis_results row kept up to date
+    total_items = Column(Integer, nullable=False, server_default='0')
+    succeeded_items = Column(Integer, nullable=False, server_default='0')
+    failed_items = Column(Integer, nullable=False, server_default='0')
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    completed_at = Column(DateTime(timezone=True))
+    runner = Column(Text)  # lease holder while a runner works on the job
+    lease_expires_at = Column(DateTime(timezone=True))
+
+class AnalysisBatchItem(SupabaseBase):
+    """One document of a batch job and its outcome"""
+    __tablename__ = 'analysis_batch_items'
+    __table_args__ = (UniqueConstraint('job_id', 'contract_id'),)
+    
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    job_id = Column(UUID(as_uuid=True), ForeignKey('analysis_batch_jobs.id', ondelete='CASCADE'), nullable=False, index=True)
+    contract_id = Column(UUID(as_uuid=True), nullable=False)
+    status = Column(Text, nullable=False, server_default='pending')  # pending, submitting, submitted, succeeded, errored
+    provider_batch_id = Column(Text)
+    result = Column(Text)
+    error = Column(Text)
+    token_usage = Column(JSONB)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
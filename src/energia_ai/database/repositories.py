@@ -0,0 +1,727 @@
+"""
+Repository layer for PostgreSQL models
+
+Repositories wrap an ``AsyncSession`` with the queries each model needs.
+Bulk paths bypass the ORM unit of work: append-only tables (citations,
+search history, metrics) are loaded with asyncpg ``copy_records_to_table``
+and documents are upserted with batched ``INSERT ... ON CONFLICT``. Every
+batch runs in its own transaction so a failure only rolls back that batch.
+"""
+import json
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Generic, Iterable, Iterator, List, Optional, Sequence, Tuple, Type, TypeVar
+
+import structlog
+from sqlalchemy import and_, case, cast, func, or_, select, update
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import (
+    AnalysisBatchItem,
+    AnalysisBatchJob,
+    Citation,
+    Contract,
+    ContractImpact,
+    CrawlerProxy,
+    Document,
+    ImpactAnalysisResult,
+    LegalChangeEvent,
+    QueueMessage,
+    SearchHistory,
+    SystemMetrics,
+)
+
+logger = structlog.get_logger()
+
+ModelT = TypeVar("ModelT")
+
+# Document columns refreshed when an upsert hits an existing content_hash
+DOCUMENT_UPSERT_COLUMNS = (
+    "title",
+    "document_type",
+    "source_url",
+    "file_path",
+    "publication_date",
+    "effective_date",
+    "legal_reference",
+    "processing_status",
+    "extracted_text",
+    "summary",
+    "keywords",
+)
+
+CITATION_COPY_COLUMNS = (
+    "document_id",
+    "cited_document_id",
+    "citation_text",
+    "citation_type",
+    "context",
+    "created_at",
+)
+
+SEARCH_HISTORY_COPY_COLUMNS = (
+    "user_id",
+    "query",
+    "search_type",
+    "results_count",
+    "response_time_ms",
+    "created_at",
+)
+
+SYSTEM_METRICS_COPY_COLUMNS = (
+    "metric_name",
+    "metric_value",
+    "metric_data",
+    "created_at",
+)
+
+
+@dataclass
+class BulkWriteResult:
+    """Outcome of a bulk write"""
+    table: str
+    rows: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def batched(rows: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    """Split an iterable into lists of at most batch_size items"""
+    if batch_size < 1:
+        raise ValueError("batch_size must be positive")
+    batch: List[Any] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def build_change_event_rows(
+    events: Sequence[Dict[str, Any]], default_message_type: str = "legal_change.detected"
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """legal_change_events rows and their queue_messages rows, linked by a client-side UUID"""
+    event_rows, message_rows = [], []
+    for event in events:
+        event_id = uuid.uuid4()
+        row = {"id": event_id, "source_url": event.get("source_url"), "change_type": event.get("change_type")}
+        row["summary"] = event.get("summary")
+        if event.get("detected_at") is not None:
+            row["detected_at"] = event["detected_at"]
+        event_rows.append(row)
+        message_rows.append({
+            "id": uuid.uuid4(),
+            "type": event.get("message_type") or default_message_type,
+            "payload": {**event.get("payload", {}), "event_id": str(event_id)},
+        })
+    return event_rows, message_rows
+
+
+def _seconds(value: Any) -> Any:
+    """PostgreSQL interval of value seconds"""
+    return func.make_interval(0, 0, 0, 0, 0, 0, value)
+
+
+def build_queue_claim(message_type: str, limit: int, lease_seconds: float, max_attempts: int):
+    """UPDATE leasing pending messages and messages whose lease expired, oldest first"""
+    now = func.now()
+    expired = and_(QueueMessage.status == "processing", QueueMessage.claimed_at < now - _seconds(lease_seconds))
+    claimable = (
+        select(QueueMessage.id)
+        .where(
+            QueueMessage.type == message_type,
+            QueueMessage.attempts < max_attempts,
+            or_(and_(QueueMessage.status == "pending", QueueMessage.available_at <= now), expired),
+        )
+        .order_by(QueueMessage.created_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    return (
+        update(QueueMessage)
+        .where(QueueMessage.id.in_(claimable))
+        .values(status="processing", claimed_at=now, attempts=QueueMessage.attempts + 1, updated_at=now)
+        .returning(QueueMessage)
+    )
+
+
+def build_queue_expiry(message_type: str, lease_seconds: float, max_attempts: int):
+    """UPDATE dead-lettering messages whose last allowed attempt never finished"""
+    now = func.now()
+    return (
+        update(QueueMessage)
+        .where(
+            QueueMessage.type == message_type,
+            QueueMessage.status == "processing",
+            QueueMessage.claimed_at < now - _seconds(lease_seconds),
+            QueueMessage.attempts >= max_attempts,
+        )
+        .values(status="dead", error=func.coalesce(QueueMessage.error, "lease expired"), updated_at=now)
+        .returning(QueueMessage.id)
+    )
+
+
+def build_queue_failure(message_id: uuid.UUID, error: str, max_attempts: int, retry_delay: float):
+    """UPDATE returning a failed message to pending after an exponential backoff, or to dead"""
+    now = func.now()
+    return (
+        update(QueueMessage)
+        .where(QueueMessage.id == message_id, QueueMessage.status == "processing")
+        .values(
+            status=case((QueueMessage.attempts >= max_attempts, "dead"), else_="pending"),
+            error=error,
+            claimed_at=None,
+            available_at=now + _seconds(retry_delay * func.power(2, QueueMessage.attempts - 1)),
+            updated_at=now,
+        )
+        .returning(QueueMessage.status)
+    )
+
+
+def build_job_claim(job_id: uuid.UUID, runner: str, lease_seconds: float):
+    """UPDATE leasing an unfinished batch job to ``runner`` unless another runner's lease is current"""
+    now = func.now()
+    return (
+        update(AnalysisBatchJob)
+        .where(
+            AnalysisBatchJob.id == job_id,
+            AnalysisBatchJob.status != "completed",
+            or_(
+                AnalysisBatchJob.runner.is_(None),
+                AnalysisBatchJob.runner == runner,
+                AnalysisBatchJob.lease_expires_at < now,
+            ),
+        )
+        .values(status="running", runner=runner, lease_expires_at=now + _seconds(lease_seconds), updated_at=now)
+        .returning(AnalysisBatchJob.id)
+    )
+
+
+def build_item_claim(job_id: uuid.UUID, limit: int):
+    """UPDATE moving pending batch items to submitting, returning them"""
+    claimable = (
+        select(AnalysisBatchItem.id)
+        .where(AnalysisBatchItem.job_id == job_id, AnalysisBatchItem.status == "pending")
+        .order_by(AnalysisBatchItem.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    return (
+        update(AnalysisBatchItem)
+        .where(AnalysisBatchItem.id.in_(claimable))
+        .values(status="submitting", updated_at=func.now())
+        .returning(AnalysisBatchItem)
+    )
+
+
+def build_document_upsert(rows: Sequence[Dict[str, Any]]):
+    """INSERT ... ON CONFLICT (content_hash) DO UPDATE for a batch of documents"""
+    statement = pg_insert(Document).values(list(rows))
+    updates = {column: statement.excluded[column] for column in DOCUMENT_UPSERT_COLUMNS}
+    updates["updated_at"] = func.now()
+    return statement.on_conflict_do_update(
+        index_elements=[Document.content_hash], set_=updates
+    ).returning(Document.id)
+
+
+class BaseRepository(Generic[ModelT]):
+    """Common CRUD operations for a single model"""
+    model: Type[ModelT]
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get(self, entity_id: int) -> Optional[ModelT]:
+        """Fetch a row by primary key"""
+        return await self.session.get(self.model, entity_id)
+
+    async def add(self, entity: ModelT) -> ModelT:
+        """Add a single row and flush so it gets its primary key"""
+        self.session.add(entity)
+        await self.session.flush()
+        return entity
+
+    async def count(self) -> int:
+        """Count all rows"""
+        result = await self.session.execute(select(func.count()).select_from(self.model))
+        return result.scalar_one()
+
+    async def _copy_records(
+        self,
+        table: str,
+        columns: Sequence[str],
+        records: Iterable[Sequence[Any]],
+        batch_size: int,
+    ) -> BulkWriteResult:
+        """COPY records into a table, committing once per batch"""
+        result = BulkWriteResult(table=table)
+        start = time.perf_counter()
+
+        for batch in batched(records, batch_size):
+            try:
+                connection = await self.session.connection()
+                raw_connection = await connection.get_raw_connection()
+                await raw_connection.driver_connection.copy_records_to_table(
+                    table, records=batch, columns=list(columns)
+                )
+                await self.session.commit()
+            except Exception as e:
+                await self.session.rollback()
+                logger.error("Bulk copy failed", table=table, batch=result.batches, error=str(e))
+                raise
+            result.rows += len(batch)
+            result.batches += 1
+
+        result.seconds = time.perf_counter() - start
+        logger.info(
+            "Bulk copy completed",
+            table=table,
+            rows=result.rows,
+            batches=result.batches,
+            rows_per_second=round(result.rows_per_second),
+        )
+        return result
+
+
+class DocumentRepository(BaseRepository[Document]):
+    """Queries and bulk upserts for legal document metadata"""
+    model = Document
+
+    async def get_by_content_hash(self, content_hash: str) -> Optional[Document]:
+        result = await self.session.execute(
+            select(Document).where(Document.content_hash == content_hash)
+        )
+        return result.scalar_one_or_none()
+
+    async def ids_by_content_hash(self, content_hashes: Sequence[str]) -> Dict[str, int]:
+        """Map content hashes to document ids (e.g. to resolve citation targets)"""
+        result = await self.session.execute(
+            select(Document.content_hash, Document.id).where(
+                Document.content_hash.in_(list(content_hashes))
+            )
+        )
+        return {content_hash: document_id for content_hash, document_id in result.all()}
+
+    async def content_hashes(self, document_ids: Sequence[int]) -> Dict[int, str]:
+        """Map document ids to content hashes, the key documents share with MongoDB and the indexes"""
+        result = await self.session.execute(
+            select(Document.id, Document.content_hash).where(
+                Document.id.in_(list(document_ids)), Document.content_hash.is_not(None)
+            )
+        )
+        return {document_id: content_hash for document_id, content_hash in result.all()}
+
+    async def list_by_type(
+        self, document_type: str, limit: int = 50, offset: int = 0
+    ) -> List[Document]:
+        result = await self.session.execute(
+            select(Document)
+            .where(Document.document_type == document_type)
+            .order_by(Document.publication_date.desc())
+            .limit(limit)
+            .offset(offset)
+        )
+        return list(result.scalars())
+
+    async def bulk_upsert(
+        self, rows: Iterable[Dict[str, Any]], batch_size: int = 1000
+    ) -> BulkWriteResult:
+        """Insert or refresh documents keyed by content_hash, one transaction per batch"""
+        result = BulkWriteResult(table=Document.__tablename__)
+        start = time.perf_counter()
+
+        for batch in batched(rows, batch_size):
+            # A single statement may not touch the same conflict key twice
+            batch = list({row["content_hash"]: row for row in batch}.values())
+            try:
+                await self.session.execute(build_document_upsert(batch))
+                await self.session.commit()
+            except Exception as e:
+                await self.session.rollback()
+                logger.error("Document upsert failed", batch=result.batches, error=str(e))
+                raise
+            result.rows += len(batch)
+            result.batches += 1
+
+        result.seconds = time.perf_counter() - start
+        logger.info(
+            "Document upsert completed",
+            rows=result.rows,
+            batches=result.batches,
+            rows_per_second=round(result.rows_per_second),
+        )
+        return result
+
+
+class CitationRepository(BaseRepository[Citation]):
+    """Queries and COPY ingestion for citation edges"""
+    model = Citation
+
+    async def citations_from(self, document_id: int) -> List[Citation]:
+        """Citations made by a document"""
+        result = await self.session.execute(
+            select(Citation).where(Citation.document_id == document_id)
+        )
+        return list(result.scalars())
+
+    async def citations_to(self, document_id: int) -> List[Citation]:
+        """Citations pointing at a document"""
+        result = await self.session.execute(
+            select(Citation).where(Citation.cited_document_id == document_id)
+        )
+        return list(result.scalars())
+
+    async def bulk_insert(
+        self, edges: Iterable[Dict[str, Any]], batch_size: int = 10000
+    ) -> BulkWriteResult:
+        """COPY citation edges (dicts keyed by CITATION_COPY_COLUMNS)"""
+        now = datetime.utcnow()
+        records = (
+            tuple(edge.get(c, now) if c == "created_at" else edge.get(c) for c in CITATION_COPY_COLUMNS)
+            for edge in edges
+        )
+        return await self._copy_records(
+            Citation.__tablename__, CITATION_COPY_COLUMNS, records, batch_size
+        )
+
+
+class SearchHistoryRepository(BaseRepository[SearchHistory]):
+    """Queries and COPY ingestion for search history"""
+    model = SearchHistory
+
+    async def recent_for_user(self, user_id: int, limit: int = 20) -> List[SearchHistory]:
+        result = await self.session.execute(
+            select(SearchHistory)
+            .where(SearchHistory.user_id == user_id)
+            .order_by(SearchHistory.created_at.desc())
+            .limit(limit)
+        )
+        return list(result.scalars())
+
+    async def bulk_insert(
+        self, entries: Iterable[Dict[str, Any]], batch_size: int = 5000
+    ) -> BulkWriteResult:
+        now = datetime.utcnow()
+        records = (
+            tuple(entry.get(c, now) if c == "created_at" else entry.get(c) for c in SEARCH_HISTORY_COPY_COLUMNS)
+            for entry in entries
+        )
+        return await self._copy_records(
+            SearchHistory.__tablename__, SEARCH_HISTORY_COPY_COLUMNS, records, batch_size
+        )
+
+
+class SystemMetricsRepository(BaseRepository[SystemMetrics]):
+    """Queries and COPY ingestion for system metrics"""
+    model = SystemMetrics
+
+    async def series(
+        self, metric_name: str, since: Optional[datetime] = None, limit: int = 1000
+    ) -> List[SystemMetrics]:
+        query = select(SystemMetrics).where(SystemMetrics.metric_name == metric_name)
+        if since is not None:
+            query = query.where(SystemMetrics.created_at >= since)
+        result = await self.session.execute(
+            query.order_by(SystemMetrics.created_at.desc()).limit(limit)
+        )
+        return list(result.scalars())
+
+    async def bulk_insert(
+        self, metrics: Iterable[Dict[str, Any]], batch_size: int = 5000
+    ) -> BulkWriteResult:
+        """COPY metric samples; metric_data dicts are passed through as JSON text"""
+        now = datetime.utcnow()
+        records = (
+            (
+                metric["metric_name"],
+                None if metric.get("metric_value") is None else str(metric["metric_value"]),
+                None if metric.get("metric_data") is None else json.dumps(metric["metric_data"], default=str),
+                metric.get("created_at", now),
+            )
+            for metric in metrics
+        )
+        return await self._copy_records(
+            SystemMetrics.__tablename__, SYSTEM_METRICS_COPY_COLUMNS, records, batch_size
+        )
+
+
+class LegalChangeEventRepository(BaseRepository[LegalChangeEvent]):
+    """Change events detected by the monitor and the queue messages that fan them out"""
+    model = LegalChangeEvent
+
+    async def record_batch(self, events: Sequence[Dict[str, Any]]) -> List[uuid.UUID]:
+        """Insert events and one queue message per event in a single transaction"""
+        if not events:
+            return []
+        event_rows, message_rows = build_change_event_rows(events)
+        try:
+            await self.session.execute(pg_insert(LegalChangeEvent).values(event_rows))
+            await self.session.execute(pg_insert(QueueMessage).values(message_rows))
+            await self.session.commit()
+        except Exception as e:
+            await self.session.rollback()
+            logger.error("Change event batch failed", events=len(event_rows), error=str(e))
+            raise
+        return [row["id"] for row in event_rows]
+
+    async def set_status(self, event_ids: Sequence[uuid.UUID], status: str) -> None:
+        await self.session.execute(
+            update(LegalChangeEvent).where(LegalChangeEvent.id.in_(list(event_ids))).values(status=status)
+        )
+        await self.session.commit()
+
+
+class QueueMessageRepository(BaseRepository[QueueMessage]):
+    """Work queue on queue_messages; consumers lease rows with SKIP LOCKED
+
+    A claimed message is leased for lease_seconds. If its worker dies, the
+    lease expires and the next claim picks the message up again. Failed
+    messages return to pending after an exponential backoff. After
+    max_attempts, a failed or expired message is moved to 'dead' for
+    inspection instead of being retried.
+    """
+    model = QueueMessage
+    lease_seconds = 600.0
+    max_attempts = 5
+    retry_delay = 30.0  # seconds before the first retry, doubled per attempt
+
+    async def claim(self, message_type: str, limit: int = 10) -> List[QueueMessage]:
+        """Lease up to limit pending (or abandoned) messages of a type and return them"""
+        expired = await self.session.execute(build_queue_expiry(message_type, self.lease_seconds, self.max_attempts))
+        dead = list(expired.scalars())
+        if dead:
+            logger.warning("Queue messages dead-lettered after expired leases", type=message_type, messages=len(dead))
+        result = await self.session.execute(
+            build_queue_claim(message_type, limit, self.lease_seconds, self.max_attempts)
+        )
+        messages = list(result.scalars())
+        await self.session.commit()
+        return messages
+
+    async def complete(self, message_id: uuid.UUID) -> None:
+        await self.session.execute(
+            update(QueueMessage)
+            .where(QueueMessage.id == message_id)
+            .values(status="done", error=None, updated_at=func.now())
+        )
+        await self.session.commit()
+
+    async def fail(self, message_id: uuid.UUID, error: str) -> None:
+        """Schedule a retry, or dead-letter the message once it used up its attempts"""
+        result = await self.session.execute(
+            build_queue_failure(message_id, error[:1000], self.max_attempts, self.retry_delay)
+        )
+        status = result.scalar_one_or_none()
+        await self.session.commit()
+        if status == "dead":
+            logger.warning("Queue message dead-lettered", message_id=str(message_id), error=error[:200])
+
+
+class CrawlerProxyRepository(BaseRepository[CrawlerProxy]):
+    """Proxies for the crawlers; the proxy pool loads from and saves its health here"""
+    model = CrawlerProxy
+
+    async def load_records(self) -> List[Dict[str, Any]]:
+        """Active proxies as plain records for ProxyPool.from_records"""
+        result = await self.session.execute(select(CrawlerProxy).where(CrawlerProxy.is_active.is_(True)))
+        return [
+            {
+                "id": proxy.id,
+                "host": proxy.host,
+                "port": proxy.port,
+                "username": proxy.username,
+                "password": proxy.password,
+                "failure_count": proxy.failure_count,
+                "latency_ms": proxy.latency_ms,
+                "success_rate": proxy.success_rate,
+                "cooldown_until": proxy.cooldown_until,
+            }
+            for proxy in result.scalars()
+        ]
+
+    async def save_health(self, records: Sequence[Dict[str, Any]]) -> None:
+        """Write ProxyPool.health_records() back in one executemany UPDATE by primary key"""
+        if not records:
+            return
+        try:
+            await self.session.execute(update(CrawlerProxy), [dict(record) for record in records])
+            await self.session.commit()
+        except Exception as e:
+            await self.session.rollback()
+            logger.error("Saving proxy health failed", proxies=len(records), error=str(e))
+            raise
+
+
+class AnalysisBatchRepository(BaseRepository[AnalysisBatchJob]):
+    """Batch analysis jobs, their items and the impact rows their results produce"""
+    model = AnalysisBatchJob
+
+    async def create_job(
+        self,
+        job_row: Dict[str, Any],
+        item_rows: Sequence[Dict[str, Any]],
+        analysis_row: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Insert a job with its items (and its impact_analysis_results row) in one transaction"""
+        try:
+            if analysis_row:
+                await self.session.execute(pg_insert(ImpactAnalysisResult).values(analysis_row))
+            await self.session.execute(pg_insert(AnalysisBatchJob).values(job_row))
+            for batch in batched(item_rows, 5000):
+                await self.session.execute(pg_insert(AnalysisBatchItem).values(batch))
+            await self.session.commit()
+        except Exception as e:
+            await self.session.rollback()
+            logger.error("Creating batch job failed", job_id=str(job_row["id"]), error=str(e))
+            raise
+
+    async def get_job(self, job_id: uuid.UUID) -> Optional[AnalysisBatchJob]:
+        return await self.session.get(AnalysisBatchJob, job_id, populate_existing=True)
+
+    async def unfinished_jobs(self) -> List[AnalysisBatchJob]:
+        result = await self.session.execute(
+            select(AnalysisBatchJob)
+            .where(AnalysisBatchJob.status.in_(("pending", "running")))
+            .order_by(AnalysisBatchJob.created_at)
+        )
+        return list(result.scalars())
+
+    async def claim_job(self, job_id: uuid.UUID, runner: str, lease_seconds: float) -> bool:
+        """Take (or extend) the job's lease unless another runner holds an unexpired one"""
+        result = await self.session.execute(build_job_claim(job_id, runner, lease_seconds))
+        await self.session.commit()
+        return result.first() is not None
+
+    async def release_job(self, job_id: uuid.UUID, runner: str) -> None:
+        await self.session.execute(
+            update(AnalysisBatchJob)
+            .where(AnalysisBatchJob.id == job_id, AnalysisBatchJob.runner == runner)
+            .values(runner=None, lease_expires_at=None)
+        )
+        await self.session.commit()
+
+    async def items(
+        self,
+        job_id: uuid.UUID,
+        statuses: Sequence[str],
+        limit: Optional[int] = None,
+    ) -> List[AnalysisBatchItem]:
+        query = (
+            select(AnalysisBatchItem)
+            .where(AnalysisBatchItem.job_id == job_id, AnalysisBatchItem.status.in_(list(statuses)))
+            .order_by(AnalysisBatchItem.id)
+        )
+        if limit:
+            query = query.limit(limit)
+        result = await self.session.execute(query)
+        return list(result.scalars())
+
+    async def contract_texts(self, contract_ids: Sequence[uuid.UUID]) -> Dict[uuid.UUID, str]:
+        result = await self.session.execute(
+            select(Contract.id, Contract.content).where(Contract.id.in_(list(contract_ids)))
+        )
+        return {contract_id: content for contract_id, content in result.all()}
+
+    async def claim_items(self, job_id: uuid.UUID, limit: int) -> List[AnalysisBatchItem]:
+        """Move up to ``limit`` pending items to submitting before they are sent"""
+        result = await self.session.execute(build_item_claim(job_id, limit))
+        claimed = list(result.scalars())
+        await self.session.commit()
+        return claimed
+
+    async def release_items(self, item_ids: Sequence[uuid.UUID]) -> None:
+        await self.session.execute(
+            update(AnalysisBatchItem)
+            .where(AnalysisBatchItem.id.in_(list(item_ids)), AnalysisBatchItem.status == "submitting")
+            .values(status="pending", updated_at=func.now())
+        )
+        await self.session.commit()
+
+    async def mark_submitted(self, item_ids: Sequence[uuid.UUID], provider_batch_id: str) -> None:
+        await self.session.execute(
+            update(AnalysisBatchItem)
+            .where(AnalysisBatchItem.id.in_(list(item_ids)))
+            .values(status="submitted", provider_batch_id=provider_batch_id, updated_at=func.now())
+        )
+        await self.session.commit()
+
+    async def record_results(
+        self,
+        job_id: uuid.UUID,
+        item_rows: Sequence[Dict[str, Any]],
+        impact_rows: Sequence[Dict[str, Any]],
+        analysis_id: Optional[uuid.UUID] = None,
+        referenced: Sequence[Dict[str, Any]] = (),
+    ) -> None:
+        """Finish items and write their impacts in one transaction
+
+        ``item_rows`` update items by primary key; only items not yet finished
+        are counted, so replaying results after a crash does not double count.
+        """
+        try:
+            ids = [row["id"] for row in item_rows]
+            unfinished = await self.session.execute(
+                select(AnalysisBatchItem.id).where(
+                    AnalysisBatchItem.id.in_(ids), AnalysisBatchItem.status.in_(("pending", "submitting", "submitted"))
+                )
+            )
+            fresh = set(unfinished.scalars())
+            item_rows = [row for row in item_rows if row["id"] in fresh]
+            if not item_rows:
+                return
+            fresh_contracts = {row["contract_id"] for row in item_rows}
+            await self.session.execute(update(AnalysisBatchItem), [
+                {key: value for key, value in row.items() if key != "contract_id"} for row in item_rows
+            ])
+            impact_rows = [row for row in impact_rows if row["contract_id"] in fresh_contracts]
+            if impact_rows:
+                await self.session.execute(pg_insert(ContractImpact).values(impact_rows))
+            referenced = [entry for entry in referenced if uuid.UUID(entry["contract_id"]) in fresh_contracts]
+            if analysis_id is not None and referenced:
+                await self.session.execute(
+                    update(ImpactAnalysisResult)
+                    .where(ImpactAnalysisResult.analysis_id == analysis_id)
+                    .values(referenced_documents=func.coalesce(
+                        ImpactAnalysisResult.referenced_documents, cast("[]", JSONB)
+                    ).op("||")(cast(json.dumps(referenced), JSONB)))
+                )
+            succeeded = sum(row["status"] == "succeeded" for row in item_rows)
+            await self.session.execute(
+                update(AnalysisBatchJob)
+                .where(AnalysisBatchJob.id == job_id)
+                .values(
+                    succeeded_items=AnalysisBatchJob.succeeded_items + succeeded,
+                    failed_items=AnalysisBatchJob.failed_items + len(item_rows) - succeeded,
+                    updated_at=func.now(),
+                )
+            )
+            await self.session.commit()
+        except Exception as e:
+            await self.session.rollback()
+            logger.error("Recording batch results failed", job_id=str(job_id), items=len(item_rows), error=str(e))
+            raise
+
+    async def update_job(self, job_id: uuid.UUID, **values: Any) -> None:
+        await self.session.execute(
+            update(AnalysisBatchJob).where(AnalysisBatchJob.id == job_id).values(updated_at=func.now(), **values)
+        )
+        await self.session.commit()
+
+    async def set_impact_summary(self, analysis_id: uuid.UUID, summary: str) -> None:
+        await self.session.execute(
+            update(ImpactAnalysisResult)
+            .where(ImpactAnalysisResult.analysis_id == analysis_id)
+            .values(impact_summary=summary)
+        )
+        await self.session.commit()
@@ -0,0 +1,354 @@
+"""
+In-memory citation graph engine
+
+Replaces the recursive ``find_impact_chains`` SQL function. Citation edges
+(source cites target) are held in compressed sparse row (CSR) arrays for both
+directions, so impact chains, reverse impact and k-hop neighborhoods are
+level-synchronous BFS over numpy arrays with a visited set - bounded and
+cycle-safe. Newly extracted citations are applied incrementally to a small
+overlay that is folded into the CSR arrays once it grows large enough.
+"""
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+import structlog
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.metrics import get_metrics_registry
+from ..database.connection import get_database_manager
+from ..database.models import Citation
+
+logger = structlog.get_logger()
+
+FORWARD = "forward"  # documents cited (transitively) by the start document
+REVERSE = "reverse"  # documents citing (transitively) the start document
+BOTH = "both"
+
+# Edge sources the service can load from
+EDGE_QUERIES = {
+    "citations": select(Citation.document_id, Citation.cited_document_id),
+    "citation_edges": text("SELECT source_document_id, target_document_id FROM citation_edges"),
+}
+
+
+@dataclass
+class ImpactChain:
+    """A document reached from the start document and the shortest path to it"""
+    document_id: Hashable
+    depth: int
+    path: List[Hashable]
+
+
+def build_csr(sources: np.ndarray, targets: np.ndarray, num_nodes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Build (indptr, indices) for edges sources[i] -> targets[i]"""
+    order = np.argsort(sources, kind="stable")
+    indices = targets[order].astype(np.int32, copy=False)
+    counts = np.bincount(sources, minlength=num_nodes)
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, indices
+
+
+def expand_frontier(
+    indptr: np.ndarray, indices: np.ndarray, frontier: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Gather all (parent, neighbor) pairs of a frontier in one vectorized step"""
+    starts = indptr[frontier]
+    lengths = indptr[frontier + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        empty = np.empty(0, dtype=np.int32)
+        return empty, empty
+    # Offset of every neighbor slot: start of its row plus its position in the row
+    row_offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    positions = row_offsets + np.arange(total)
+    return np.repeat(frontier, lengths), indices[positions]
+
+
+class CitationGraph:
+    """CSR-backed directed citation graph with an incremental edge overlay"""
+
+    def __init__(self, compact_threshold: int = 100_000):
+        self.compact_threshold = compact_threshold
+        self._ids: List[Hashable] = []
+        self._index: Dict[Hashable, int] = {}
+        self._csr_nodes = 0
+        self._forward = (np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int32))
+        self._reverse = (np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int32))
+        self._edge_keys: set = set()
+        self._pending_forward: Dict[int, List[int]] = {}
+        self._pending_reverse: Dict[int, List[int]] = {}
+        self._pending_edges = 0
+        self._csr_edges = 0
+
+    @classmethod
+    def from_edges(
+        cls, edges: Iterable[Tuple[Hashable, Hashable]], compact_threshold: int = 100_000
+    ) -> "CitationGraph":
+        """Build a graph from (source, target) document id pairs"""
+        graph = cls(compact_threshold=compact_threshold)
+        sources, targets = array("q"), array("q")
+        for source, target in edges:
+            if source == target:
+                continue
+            sources.append(graph._node(source))
+            targets.append(graph._node(target))
+        graph._rebuild(np.frombuffer(sources, dtype=np.int64), np.frombuffer(targets, dtype=np.int64))
+        return graph
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self._ids)
+
+    @property
+    def num_edges(self) -> int:
+        return self._csr_edges + self._pending_edges
+
+    @property
+    def document_ids(self) -> List[Hashable]:
+        """Document ids in node order"""
+        return self._ids
+
+    def edge_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """All edges as (sources, targets) node index arrays, folding in the overlay first"""
+        self.compact()
+        return self._csr_edge_arrays()
+
+    def add_edges(self, edges: Iterable[Tuple[Hashable, Hashable]]) -> int:
+        """Apply newly extracted citations; returns how many edges were new"""
+        added = 0
+        for source, target in edges:
+            if source == target:
+                continue
+            s, t = self._node(source), self._node(target)
+            if self._has_edge(s, t):
+                continue
+            self._pending_forward.setdefault(s, []).append(t)
+            self._pending_reverse.setdefault(t, []).append(s)
+            self._edge_keys.add((s, t))
+            self._pending_edges += 1
+            added += 1
+
+        if self._pending_edges >= self.compact_threshold:
+            self.compact()
+        return added
+
+    def compact(self) -> None:
+        """Fold the incremental overlay into the CSR arrays"""
+        if not self._pending_edges and self._csr_nodes == self.num_nodes:
+            return
+        sources, targets = self._csr_edge_arrays()
+        extra_s = [s for s, ts in self._pending_forward.items() for _ in ts]
+        extra_t = [t for ts in self._pending_forward.values() for t in ts]
+        self._rebuild(
+            np.concatenate([sources, np.asarray(extra_s, dtype=np.int64)]),
+            np.concatenate([targets, np.asarray(extra_t, dtype=np.int64)]),
+        )
+
+    def impact_chains(self, document_id: Hashable, max_depth: int = 5) -> List[ImpactChain]:
+        """Documents reachable by following citations from document_id (cycle-safe)"""
+        return self._chains(document_id, max_depth, FORWARD)
+
+    def reverse_impact(self, document_id: Hashable, max_depth: int = 5) -> List[ImpactChain]:
+        """Documents that (transitively) cite document_id"""
+        return self._chains(document_id, max_depth, REVERSE)
+
+    def neighborhood(
+        self, document_id: Hashable, k: int = 2, direction: str = BOTH
+    ) -> Dict[Hashable, int]:
+        """All documents within k hops, mapped to their hop distance"""
+        depths, _ = self._bfs(document_id, k, direction)
+        return {self._ids[node]: int(depth) for node, depth in depths.items()}
+
+    def _chains(self, document_id: Hashable, max_depth: int, direction: str) -> List[ImpactChain]:
+        depths, parents = self._bfs(document_id, max_depth, direction)
+        start = self._index.get(document_id)
+        parent_of = parents.tolist()
+        ids = self._ids
+        chains = []
+        for node, depth in depths.items():
+            if node == start:
+                continue
+            path = [node]
+            while path[-1] != start:
+                path.append(parent_of[path[-1]])
+            # Order paths along citation direction: citing document first
+            if direction == FORWARD:
+                path.reverse()
+            chains.append(ImpactChain(ids[node], depth, [ids[p] for p in path]))
+        chains.sort(key=lambda c: c.depth)
+        return chains
+
+    def _bfs(self, document_id: Hashable, max_depth: int, direction: str) -> Tuple[Dict[int, int], np.ndarray]:
+        """Level-synchronous BFS; returns {node: depth} and the parent array"""
+        start = self._index.get(document_id)
+        if start is None:
+            return {}, np.empty(0, dtype=np.int32)
+
+        parents = np.full(self.num_nodes, -1, dtype=np.int32)
+        parents[start] = start
+        depths = {start: 0}
+        frontier = np.array([start], dtype=np.int32)
+
+        for depth in range(1, max_depth + 1):
+            pairs_parent, pairs_child = [], []
+            if direction in (FORWARD, BOTH):
+                self._gather(self._forward, self._pending_forward, frontier, pairs_parent, pairs_child)
+            if direction in (REVERSE, BOTH):
+                self._gather(self._reverse, self._pending_reverse, frontier, pairs_parent, pairs_child)
+            if not pairs_child:
+                break
+
+            parent_arr = np.concatenate(pairs_parent)
+            child_arr = np.concatenate(pairs_child)
+            unseen = parents[child_arr] == -1
+            child_arr, parent_arr = child_arr[unseen], parent_arr[unseen]
+            if child_arr.size == 0:
+                break
+
+            frontier, first = np.unique(child_arr, return_index=True)
+            parents[frontier] = parent_arr[first]
+            depths.update(dict.fromkeys(frontier.tolist(), depth))
+
+        return depths, parents
+
+    def _gather(
+        self,
+        csr: Tuple[np.ndarray, np.ndarray],
+        pending: Dict[int, List[int]],
+        frontier: np.ndarray,
+        pairs_parent: List[np.ndarray],
+        pairs_child: List[np.ndarray],
+    ) -> None:
+        in_csr = frontier[frontier < self._csr_nodes]
+        if in_csr.size:
+            parent, child = expand_frontier(csr[0], csr[1], in_csr)
+            if child.size:
+                pairs_parent.append(parent)
+                pairs_child.append(child)
+        if pending:
+            for node in frontier.tolist():
+                neighbors = pending.get(node)
+                if neighbors:
+                    pairs_parent.append(np.full(len(neighbors), node, dtype=np.int32))
+                    pairs_child.append(np.asarray(neighbors, dtype=np.int32))
+
+    def _node(self, document_id: Hashable) -> int:
+        node = self._index.get(document_id)
+        if node is None:
+            node = self._index[document_id] = len(self._ids)
+            self._ids.append(document_id)
+        return node
+
+    def _has_edge(self, source: int, target: int) -> bool:
+        if (source, target) in self._edge_keys:
+            return True
+        if source >= self._csr_nodes:
+            return False
+        indptr, indices = self._forward
+        row = indices[indptr[source]:indptr[source + 1]]
+        return bool(row.size) and target in row
+
+    def _csr_edge_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        indptr, indices = self._forward
+        sources = np.repeat(np.arange(self._csr_nodes, dtype=np.int64), np.diff(indptr))
+        return sources, indices.astype(np.int64)
+
+    def _rebuild(self, sources: np.ndarray, targets: np.ndarray) -> None:
+        num_nodes = self.num_nodes
+        if sources.size:
+            # Sort-based dedupe; much faster than np.unique's hash path on int64 keys
+            keys = np.sort(sources * num_nodes + targets)
+            keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+            sources, targets = keys // num_nodes, keys % num_nodes
+        self._forward = build_csr(sources, targets, num_nodes)
+        self._reverse = build_csr(targets, sources, num_nodes)
+        self._csr_nodes = num_nodes
+        self._csr_edges = int(sources.size)
+        self._edge_keys = set()
+        self._pending_forward, self._pending_reverse = {}, {}
+        self._pending_edges = 0
+
+
+class CitationGraphService:
+    """Loads the citation graph from PostgreSQL and keeps it current"""
+
+    def __init__(self, source: str = "citations"):
+        if source not in EDGE_QUERIES:
+            raise ValueError(f"Unknown citation edge source: {source}")
+        self.source = source
+        self.graph = CitationGraph()
+        self.loaded_at: Optional[float] = None
+        self.metrics = get_metrics_registry()
+        self.metrics.register_collector("citation_graph", self.stats)
+
+    async def load(self, session: AsyncSession, chunk_size: int = 50_000) -> None:
+        """(Re)build the graph by streaming all edges from the database"""
+        start = time.perf_counter()
+        try:
+            result = await session.stream(EDGE_QUERIES[self.source].execution_options(yield_per=chunk_size))
+            edges = []
+            async for partition in result.partitions(chunk_size):
+                edges.extend((row[0], row[1]) for row in partition)
+            self.graph = CitationGraph.from_edges(edges)
+            self.loaded_at = time.time()
+
+            logger.info(
+                "Citation graph loaded",
+                source=self.source,
+                nodes=self.graph.num_nodes,
+                edges=self.graph.num_edges,
+                seconds=round(time.perf_counter() - start, 3),
+            )
+        except Exception as e:
+            logger.error("Failed to load citation graph", source=self.source, error=str(e))
+            raise
+
+    def apply_citations(self, edges: Iterable[Tuple[Hashable, Hashable]]) -> int:
+        """Add freshly extracted (source, target) citations without a reload"""
+        added = self.graph.add_edges(edges)
+        self.metrics.counter("citation_graph_edges_added").inc(added)
+        return added
+
+    def impact_chains(self, document_id: Hashable, max_depth: int = 5) -> List[ImpactChain]:
+        return self._timed("impact_chains", self.graph.impact_chains, document_id, max_depth)
+
+    def reverse_impact(self, document_id: Hashable, max_depth: int = 5) -> List[ImpactChain]:
+        return self._timed("reverse_impact", self.graph.reverse_impact, document_id, max_depth)
+
+    def neighborhood(self, document_id: Hashable, k: int = 2, direction: str = BOTH) -> Dict[Hashable, int]:
+        return self._timed("neighborhood", self.graph.neighborhood, document_id, k, direction)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "nodes": self.graph.num_nodes,
+            "edges": self.graph.num_edges,
+            "loaded_at": self.loaded_at,
+        }
+
+    def _timed(self, operation: str, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        self.metrics.histogram("citation_graph_query_seconds").observe(
+            time.perf_counter() - start, operation=operation
+        )
+        return result
+
+
+# Global citation graph service instance
+_citation_graph_service = None
+
+async def get_citation_graph_service() -> CitationGraphService:
+    """Get the global citation graph service, loading it on first use"""
+    global _citation_graph_service
+    if _citation_graph_service is None:
+        service = CitationGraphService()
+        db_manager = await get_database_manager()
+        async for session in db_manager.get_session(read_only=True):
+            await service.load(session)
+        _citation_graph_service = service
+    return _citation_graph_service
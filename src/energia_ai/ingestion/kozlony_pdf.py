@@ -0,0 +1,255 @@
+"""
+Magyar Közlöny PDF ingestion
+
+An issue of the official gazette is one PDF of up to several hundred pages
+holding many acts, decrees and resolutions. Pages are extracted with PyPDF2 in
+a process pool, a few pages per task; each worker opens the file itself, so
+only page text crosses process boundaries. Results are consumed in page order
+through a bounded window of in-flight tasks and split into individual acts at
+their header lines. Every act is yielded as soon as the next header appears,
+so chunking and citation extraction start long before the issue is finished,
+and memory is bounded by the window and the longest single act rather than
+by the issue.
+"""
+import asyncio
+import os
+import re
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+import structlog
+
+from ..core.metrics import get_metrics_registry
+from ..nlp.citation_extractor import (
+    KIND_ACT,
+    KIND_DECREE,
+    KIND_GOVERNMENT_DECREE,
+    cited_acts,
+    njt_eli_uri,
+)
+
+logger = structlog.get_logger()
+
+KIND_RESOLUTION = "hatarozat"
+
+# "2023. évi XXV. törvény" on a line of its own
+_ACT_HEADER = re.compile(r"^(?P<year>\d{4})\. évi (?P<number>[IVXLCDM]+)\. törvény$")
+# "A Kormány 273/2023. (VI. 30.) Korm. rendelete", "Az Országgyűlés 12/2023. (V. 3.) OGY határozata"
+_ISSUED_HEADER = re.compile(
+    r"^(?:A|Az) (?P<issuer>\w.{1,150}?) (?P<number>\d+)/(?P<year>\d{4})\. "
+    r"\([IVX]+\. \d{1,2}\.\) (?:(?P<abbr>[\w.]+) )?(?P<type>rendelete|határozata)$"
+)
+# Running headers, footers and page numbers printed on every page
+_PAGE_FURNITURE = re.compile(
+    r"^(?:M\s*A\s*G\s*Y\s*A\s*R\s+K\s*Ö\s*Z\s*L\s*Ö\s*N\s*Y\b.*|\d{1,5}|\d{4}\. évi \d+\. szám)$",
+    re.IGNORECASE,
+)
+# Structural starts that begin a new paragraph inside an act
+_PARAGRAPH_START = re.compile(
+    r"^(?:\d+(?:/[A-Z])?\. §|\(\d+[a-z]?\)|[a-z]{1,2}\)|\d+\. (?:melléklet|[A-ZÁÉÍÓÖŐÚÜŰ])|[IVX]+\. FEJEZET)"
+)
+
+
+@dataclass
+class KozlonyAct:
+    """One act, decree or resolution cut out of a gazette issue"""
+    kind: str
+    header: str
+    year: int
+    number: str
+    issuer: str
+    first_page: int
+    last_page: int
+    paragraphs: List[str] = field(default_factory=list)
+    source: str = ""
+
+    @property
+    def text(self) -> str:
+        """Act text with paragraphs separated by blank lines, as the chunker expects"""
+        return "\n\n".join(self.paragraphs)
+
+    @property
+    def title(self) -> str:
+        """Header line plus the title paragraph that follows it"""
+        return f"{self.header} {self.paragraphs[0]}" if self.paragraphs else self.header
+
+    @property
+    def eli_uri(self) -> Optional[str]:
+        if self.kind == KIND_RESOLUTION:
+            return None
+        return njt_eli_uri(self.kind, self.year, self.number)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "title": self.title, "eli_uri": self.eli_uri, "text": self.text}
+
+
+def parse_header(line: str) -> Optional[Tuple[str, int, str, str]]:
+    """(kind, year, number, issuer) if line is the header of an act in the gazette"""
+    match = _ACT_HEADER.match(line)
+    if match:
+        return KIND_ACT, int(match.group("year")), match.group("number"), "Országgyűlés"
+    match = _ISSUED_HEADER.match(line)
+    if match:
+        if match.group("type") == "határozata":
+            kind = KIND_RESOLUTION
+        elif match.group("abbr") == "Korm.":
+            kind = KIND_GOVERNMENT_DECREE
+        else:
+            kind = KIND_DECREE
+        return kind, int(match.group("year")), match.group("number"), match.group("issuer")
+    return None
+
+
+def clean_page_lines(text: str) -> List[str]:
+    """Non-empty lines of a page without running headers and page numbers"""
+    lines = []
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if line and not _PAGE_FURNITURE.match(line):
+            lines.append(line)
+    return lines
+
+
+# Per-process reader cache, so a worker parses the cross-reference table once per issue
+_open_reader: Dict[str, Any] = {}
+
+
+def _extract_pages(path: str, start: int, stop: int) -> List[Tuple[int, List[str]]]:
+    """Cleaned lines of pages [start, stop) of the PDF at path (runs in a worker process)"""
+    from PyPDF2 import PdfReader
+
+    reader = _open_reader.get(path)
+    if reader is None:
+        _open_reader.clear()
+        reader = _open_reader[path] = PdfReader(path)
+    return [(number, clean_page_lines(reader.pages[number].extract_text() or "")) for number in range(start, stop)]
+
+
+def page_count(path: str) -> int:
+    from PyPDF2 import PdfReader
+
+    return len(PdfReader(path).pages)
+
+
+class _ActSplitter:
+    """Assembles page lines into acts, emitting each act once the next header is seen"""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.current: Optional[KozlonyAct] = None
+        self._lines: List[str] = []
+
+    def feed(self, page: int, lines: List[str]) -> List[KozlonyAct]:
+        finished = []
+        for line in lines:
+            header = parse_header(line)
+            if header is None and self._lines and line.endswith(("rendelete", "határozata")):
+                # Long issuer names wrap the header onto a second line
+                header = parse_header(f"{self._lines[-1]} {line}")
+                if header:
+                    line = f"{self._lines.pop()} {line}"
+            if header:
+                act = self.close()
+                if act:
+                    finished.append(act)
+                kind, year, number, issuer = header
+                self.current = KozlonyAct(kind, line, year, number, issuer, page + 1, page + 1, source=self.source)
+                continue
+            if self.current is None:
+                self._lines = self._lines[-1:] + [line]  # cover page and table of contents
+                continue
+            self.current.last_page = page + 1
+            if self._lines and self._starts_paragraph(line):
+                self._flush()
+            self._lines.append(line)
+        return finished
+
+    def _starts_paragraph(self, line: str) -> bool:
+        if _PARAGRAPH_START.match(line):
+            return True
+        # The title ("a villamos energiáról") is followed by the preamble or enacting clause
+        return not self.current.paragraphs and self._lines[0][:1].islower() and line[:1].isupper()
+
+    def close(self) -> Optional[KozlonyAct]:
+        act = self.current
+        if act is not None:
+            self._flush()
+        self.current = None
+        self._lines = []
+        return act
+
+    def _flush(self) -> None:
+        if self._lines:
+            self.current.paragraphs.append(" ".join(self._lines))
+            self._lines = []
+
+
+class KozlonyPdfPipeline:
+    """Streams a gazette PDF through a process pool and yields acts as they complete"""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        pages_per_task: int = 4,
+        max_in_flight: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.pages_per_task = pages_per_task
+        self.max_in_flight = max_in_flight or self.workers * 2
+        self._executor = executor
+        self._owns_executor = executor is None
+        self.metrics = get_metrics_registry()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def stream_acts(self, path: str) -> AsyncIterator[KozlonyAct]:
+        """Yield the acts of the issue at path in order, each as soon as it is complete"""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        total = await loop.run_in_executor(executor, page_count, path)
+        batches = [(start, min(start + self.pages_per_task, total)) for start in range(0, total, self.pages_per_task)]
+        splitter = _ActSplitter(source=path)
+        pending: Deque[asyncio.Future] = deque()
+        next_batch = 0
+        acts = 0
+
+        try:
+            while pending or next_batch < len(batches):
+                # Keep a bounded window of batches in flight; results are consumed in page order
+                while next_batch < len(batches) and len(pending) < self.max_in_flight:
+                    start, stop = batches[next_batch]
+                    pending.append(loop.run_in_executor(executor, _extract_pages, path, start, stop))
+                    next_batch += 1
+                for page, lines in await pending.popleft():
+                    for act in splitter.feed(page, lines):
+                        acts += 1
+                        self.metrics.counter("kozlony_acts_total").inc(kind=act.kind)
+                        yield act
+                    self.metrics.counter("kozlony_pages_total").inc()
+            act = splitter.close()
+            if act:
+                acts += 1
+                self.metrics.counter("kozlony_acts_total").inc(kind=act.kind)
+                yield act
+        finally:
+            for future in pending:
+                future.cancel()
+
+        logger.info("Magyar Közlöny issue processed", path=path, pages=total, acts=acts)
+
+    def close(self) -> None:
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+def act_citations(act: KozlonyAct) -> List[str]:
+    """ELI URIs of the acts an act cites, without itself"""
+    own = act.eli_uri
+    return [uri for uri in cited_acts(act.text) if uri != own]
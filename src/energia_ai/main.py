@@ -3,6 +3,7 @@ Main FastAPI application for Energia AI
 Hungarian Legal AI System
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -16,19 +17,30 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from energia_ai.config.settings import get_settings
+from energia_ai.core.http import close_http_clients, start_http_clients
 from energia_ai.core.logging import setup_logging
+from energia_ai.core.metrics import get_metrics_registry
+from energia_ai.api.ai.endpoints import router as ai_router
 
 # Initialize settings and logging
 settings = get_settings()
 logger = setup_logging()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the shared AI provider HTTP clients at startup and close them at shutdown"""
+    await start_http_clients()
+    yield
+    await close_http_clients()
+
 # Create FastAPI app
 app = FastAPI(
     title="Energia AI - Hungarian Legal AI System",
     description="Advanced AI system for Hungarian legal document analysis and research",
     version="0.1.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -40,6 +52,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.include_router(ai_router)
+
 # Health check endpoints
 @app.get("/health")
 async def health_check():
@@ -69,6 +83,11 @@ async def readiness_check():
         logger.error(f"Readiness check failed: {e}")
         raise HTTPException(status_code=503, detail="Service not ready")
 
+@app.get("/metrics")
+async def metrics():
+    """In-process metrics snapshot (pools, latencies, throughput)"""
+    return JSONResponse(get_metrics_registry().snapshot())
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -87,4 +106,4 @@ if __name__ == "__main__":
         port=settings.port,
         reload=settings.debug,
         log_level="info"
-    )\nfrom energia_ai.api.ai.endpoints import router as ai_router
+    )
@@ -0,0 +1,217 @@
+"""
+Event-driven legal change monitor
+
+Every source is polled on its own adaptive schedule with conditional
+requests, so an unchanged feed costs a 304. Detected changes are buffered and
+written to ``legal_change_events`` in batches, together with one
+``queue_messages`` row per event in the same transaction; parsing and
+ingestion happen in queue consumers, never inside the poll loop. Detection
+latency (publication to detection, for sources that date their items) is
+exported as the ``legal_change_detection_seconds`` histogram.
+
+A source's new snapshot (seen items and page validators) is only committed
+once every event found in it has been written. Events lost to a failing sink
+or a shutdown are therefore detected again on the next poll, and a source is
+not polled again while its events are still waiting to be written.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+import structlog
+
+from ..core.metrics import get_metrics_registry
+from ..crawling.changes import ChangeTracker
+from ..crawling.fetcher import FetchResult, HttpFetcher, TieredFetcher
+from .sources import CHANGE_AMENDMENT, CHANGE_NEW, ChangeSource, DetectedChange, SeenStore, SourceItem
+
+logger = structlog.get_logger()
+
+ChangeSink = Callable[[List[DetectedChange]], Awaitable[None]]
+
+
+async def postgres_change_sink(changes: List[DetectedChange]) -> None:
+    """Write a batch of changes and their queue messages to PostgreSQL"""
+    from ..database.connection import get_database_manager
+    from ..database.repositories import LegalChangeEventRepository
+
+    db_manager = await get_database_manager()
+    async for session in db_manager.get_session():
+        await LegalChangeEventRepository(session).record_batch([change.to_event() for change in changes])
+
+
+@dataclass
+class PendingSnapshot:
+    """A polled snapshot whose changes are not all written yet"""
+    source: ChangeSource
+    items: List[SourceItem]
+    result: FetchResult
+    unwritten: int
+
+
+class ChangeMonitor:
+    """Polls sources on adaptive schedules and emits change events in batches"""
+
+    def __init__(
+        self,
+        sources: Sequence[ChangeSource],
+        sink: ChangeSink = postgres_change_sink,
+        state_path: str = ":memory:",
+        batch_size: int = 100,
+        flush_interval: float = 5.0,
+        fetcher: Optional[TieredFetcher] = None,
+    ):
+        self.sources = list(sources)
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.seen = SeenStore(state_path)
+        self.tracker = ChangeTracker(state_path, name="change_monitor")
+        self.fetcher = fetcher or TieredFetcher(HttpFetcher(max_connections=4), tracker=self.tracker)
+        self.metrics = get_metrics_registry()
+        self.idle_polls: Dict[str, int] = {source.name: 0 for source in self.sources}
+        self.next_poll: Dict[str, float] = {}
+        self._buffer: List[DetectedChange] = []
+        self._buffer_ready = asyncio.Event()
+        self._pending: Dict[str, PendingSnapshot] = {}
+
+    async def poll(self, source: ChangeSource) -> List[DetectedChange]:
+        """Fetch a source once and return its new and updated items
+
+        The snapshot is committed right away when nothing changed, otherwise
+        once ``flush`` has written all the returned changes.
+        """
+        start = time.perf_counter()
+        result = await self.fetcher.fetch(source.url)
+        self.metrics.histogram("change_monitor_poll_seconds").observe(time.perf_counter() - start, source=source.name)
+        if not result.changed:
+            return []
+
+        # A parse failure raises before anything is committed, so the next poll fetches and parses again
+        items = source.parse_result(result)
+        new, updated = self.seen.diff(source.name, items)
+        snapshot = PendingSnapshot(source, items, result, unwritten=len(new) + len(updated))
+        if not snapshot.unwritten:
+            self._commit(snapshot)
+            return []
+        self._pending[source.name] = snapshot
+        changes = [
+            DetectedChange(source.name, item.url, CHANGE_NEW, item.title, item.published_at) for item in new
+        ] + [
+            DetectedChange(source.name, item.url, CHANGE_AMENDMENT, item.title, item.published_at) for item in updated
+        ]
+        for change in changes:
+            self.metrics.counter("legal_changes_detected_total").inc(source=source.name, change_type=change.change_type)
+            if change.latency is not None:
+                self.metrics.histogram("legal_change_detection_seconds").observe(change.latency, source=source.name)
+        return changes
+
+    async def run(self, stop: Optional[asyncio.Event] = None) -> None:
+        """Poll every source and flush batches until stop is set"""
+        stop = stop or asyncio.Event()
+        self.metrics.register_collector("change_monitor", self.report)
+        tasks = [asyncio.create_task(self._source_loop(source, stop)) for source in self.sources]
+        writer = asyncio.create_task(self._writer_loop(stop))
+        logger.info("Change monitor started", sources=[source.name for source in self.sources])
+        try:
+            await stop.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await writer
+            try:
+                while self._buffer:
+                    await self.flush()
+            except Exception:
+                logger.error(
+                    "Change events not written at shutdown; their sources are re-checked on the next run",
+                    events=len(self._buffer),
+                    sources=sorted(self._pending),
+                )
+            self.metrics.unregister_collector("change_monitor")
+            await self.fetcher.close()
+            self.tracker.close()
+            self.seen.close()
+
+    async def flush(self) -> int:
+        """Write buffered changes; on failure they stay buffered for the next attempt"""
+        if not self._buffer:
+            return 0
+        batch, self._buffer = self._buffer[: self.batch_size], self._buffer[self.batch_size:]
+        try:
+            await self.sink(batch)
+        except Exception as e:
+            self._buffer = batch + self._buffer
+            logger.error("Failed to write change events", events=len(batch), error=str(e))
+            raise
+        self.metrics.counter("legal_change_events_written_total").inc(len(batch))
+        logger.info("Change events written", events=len(batch))
+        for change in batch:
+            snapshot = self._pending.get(change.source)
+            if snapshot is None:
+                continue
+            snapshot.unwritten -= 1
+            if snapshot.unwritten == 0:
+                del self._pending[change.source]
+                self._commit(snapshot)
+        return len(batch)
+
+    def _commit(self, snapshot: PendingSnapshot) -> None:
+        """Store a source's snapshot and validators; later polls diff against it"""
+        self.seen.commit(snapshot.source.name, snapshot.items)
+        self.fetcher.commit(snapshot.source.url, snapshot.result)
+
+    async def _source_loop(self, source: ChangeSource, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            if source.name in self._pending:
+                # Its last changes are still unwritten; polling now would only detect them again
+                changes = []
+                self.metrics.counter("change_monitor_polls_deferred_total").inc(source=source.name)
+            else:
+                try:
+                    changes = await self.poll(source)
+                except Exception as e:
+                    changes = []
+                    self.metrics.counter("change_monitor_poll_errors_total").inc(source=source.name)
+                    logger.warning("Source poll failed", source=source.name, error=str(e))
+            if changes:
+                self.idle_polls[source.name] = 0
+                self._buffer.extend(changes)
+                self._buffer_ready.set()
+            elif source.name not in self._pending:
+                self.idle_polls[source.name] += 1
+
+            interval = source.schedule.interval(datetime.now(timezone.utc), self.idle_polls[source.name])
+            self.next_poll[source.name] = time.time() + interval
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _writer_loop(self, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(self._buffer_ready.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            if len(self._buffer) < self.batch_size and not stop.is_set():
+                # Give other sources a moment to add to the same batch
+                await asyncio.sleep(min(self.flush_interval, 1.0))
+            self._buffer_ready.clear()
+            try:
+                while self._buffer:
+                    await self.flush()
+            except Exception:
+                await asyncio.sleep(self.flush_interval)
+
+    def report(self) -> Dict[str, object]:
+        now = time.time()
+        return {
+            "buffered_events": len(self._buffer),
+            "sources_awaiting_write": sorted(self._pending),
+            "idle_polls": dict(self.idle_polls),
+            "next_poll_in": {name: max(0.0, at - now) for name, at in self.next_poll.items()},
+        }
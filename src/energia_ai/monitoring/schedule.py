@@ -0,0 +1,59 @@
+"""
+Adaptive polling intervals for monitored sources
+
+Hungarian legislation is published on working days, mostly during office
+hours, so sources are polled often then and rarely at night and on weekends.
+Each poll that finds nothing stretches the interval further, up to a cap; a
+detected change resets it. The cap is low during publishing hours, so a quiet
+morning never pushes detection latency towards the off-peak interval.
+Off-peak waits never run past the start of the next publishing window.
+"""
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Tuple
+from zoneinfo import ZoneInfo
+
+
+@dataclass
+class PollSchedule:
+    """Polling interval as a function of local time and consecutive idle polls"""
+    peak_interval: float = 120.0  # seconds, during publishing hours
+    off_peak_interval: float = 1800.0  # seconds, nights and weekends
+    publishing_hours: Tuple[int, int] = (7, 22)  # [start, end) local hour
+    publishing_days: Tuple[int, ...] = (0, 1, 2, 3, 4)  # Monday..Friday
+    idle_backoff: float = 1.5  # interval growth per poll without changes
+    peak_max_interval: float = 600.0  # cap during publishing hours
+    max_interval: float = 3600.0  # cap off-peak
+    timezone: str = "Europe/Budapest"
+
+    def in_publishing_hours(self, now: datetime) -> bool:
+        local = now.astimezone(ZoneInfo(self.timezone))
+        start, end = self.publishing_hours
+        return local.weekday() in self.publishing_days and start <= local.hour < end
+
+    def interval(self, now: datetime, idle_polls: int = 0) -> float:
+        """Seconds to wait before the next poll"""
+        if self.in_publishing_hours(now):
+            return self._backed_off(self.peak_interval, self.peak_max_interval, idle_polls)
+        interval = self._backed_off(self.off_peak_interval, self.max_interval, idle_polls)
+        return max(1.0, min(interval, self.seconds_until_publishing(now)))
+
+    def _backed_off(self, base: float, cap: float, idle_polls: int) -> float:
+        cap = max(base, cap)
+        if self.idle_backoff > 1 and base > 0:
+            # Polls past the one reaching the cap change nothing; without this bound
+            # the power overflows after a few weeks without changes
+            idle_polls = min(idle_polls, math.ceil(math.log(cap / base, self.idle_backoff)))
+        return min(base * self.idle_backoff ** idle_polls, cap)
+
+    def seconds_until_publishing(self, now: datetime) -> float:
+        """Seconds until the next publishing window opens"""
+        local = now.astimezone(ZoneInfo(self.timezone))
+        opening = local.replace(hour=self.publishing_hours[0], minute=0, second=0, microsecond=0)
+        for days in range(8):
+            candidate = opening + timedelta(days=days)
+            if candidate > local and candidate.weekday() in self.publishing_days:
+                # Compare in UTC: same-zone subtraction ignores DST transitions
+                return (candidate.astimezone(timezone.utc) - local.astimezone(timezone.utc)).total_seconds()
+        return float("inf")
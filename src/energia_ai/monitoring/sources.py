@@ -0,0 +1,271 @@
+"""
+Change sources for the legal change monitor
+
+A source turns one fetched page (sitemap, RSS/Atom feed or HTML listing) into
+a snapshot of ``{item key: version}``. ``SeenStore`` diffs it against the
+previous snapshot, so only new and updated items become ``DetectedChange``
+events. The first snapshot of a source is recorded as a baseline without
+emitting events. A snapshot is only stored by ``SeenStore.commit``, which the
+monitor calls once the events found in it are persisted.
+
+Items carry their publication time where the source gives one: feed and
+sitemap dates, and for HTML listings the listing's Last-Modified header (the
+moment the new item appeared) or else the issue date in the link text.
+"""
+import re
+import sqlite3
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import structlog
+
+from ..crawling.extraction import get_extraction_engine
+from .schedule import PollSchedule
+
+if TYPE_CHECKING:
+    from ..crawling.fetcher import FetchResult
+
+logger = structlog.get_logger()
+
+CHANGE_NEW = "new_legislation"
+CHANGE_AMENDMENT = "amendment"
+
+HUNGARIAN_MONTHS = (
+    "január", "február", "március", "április", "május", "június",
+    "július", "augusztus", "szeptember", "október", "november", "december",
+)
+# "2024. március 12." or "2024.03.12."
+_HUNGARIAN_DATE = re.compile(
+    r"\b(?P<year>\d{4})\.\s*(?:(?P<month>\d{1,2})\.|(?P<name>" + "|".join(HUNGARIAN_MONTHS) + r"))\s*(?P<day>\d{1,2})\.",
+    re.IGNORECASE,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen_items (
+    source TEXT NOT NULL,
+    key TEXT NOT NULL,
+    version TEXT NOT NULL,
+    seen_at REAL NOT NULL,
+    PRIMARY KEY (source, key)
+);
+"""
+
+
+@dataclass
+class SourceItem:
+    """One entry of a sitemap, feed or listing"""
+    url: str
+    version: str = ""  # lastmod / updated / pubDate; empty when the source has none
+    title: str = ""
+    published_at: Optional[datetime] = None
+
+
+@dataclass
+class DetectedChange:
+    """A new or updated item found by the monitor"""
+    source: str
+    url: str
+    change_type: str
+    title: str = ""
+    published_at: Optional[datetime] = None
+    detected_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    @property
+    def latency(self) -> Optional[float]:
+        """Seconds between publication and detection, when the source dates its items"""
+        if self.published_at is None:
+            return None
+        return max(0.0, (self.detected_at - self.published_at).total_seconds())
+
+    @property
+    def message_type(self) -> str:
+        return f"legal_change.{self.source}"
+
+    def to_event(self) -> Dict[str, object]:
+        """Row for legal_change_events plus the payload of its queue message"""
+        return {
+            "source_url": self.url,
+            "change_type": self.change_type,
+            "summary": self.title or None,
+            "detected_at": self.detected_at,
+            "message_type": self.message_type,
+            "payload": {
+                "source": self.source,
+                "url": self.url,
+                "change_type": self.change_type,
+                "title": self.title,
+                "published_at": self.published_at.isoformat() if self.published_at else None,
+                "detected_at": self.detected_at.isoformat(),
+            },
+        }
+
+
+class ChangeSource:
+    """A polled URL and how to read items from it"""
+
+    def __init__(self, name: str, url: str, schedule: Optional[PollSchedule] = None):
+        self.name = name
+        self.url = url
+        self.schedule = schedule or PollSchedule()
+
+    def parse(self, body: str) -> List[SourceItem]:
+        raise NotImplementedError
+
+    def parse_result(self, result: "FetchResult") -> List[SourceItem]:
+        """Items of a fetched page; sources that date items from response headers override this"""
+        return self.parse(result.html)
+
+
+class SitemapSource(ChangeSource):
+    """XML sitemap: <url><loc/><lastmod/></url> entries
+
+    Child sitemaps of a sitemap index are configured as sources of their own.
+    """
+
+    def parse(self, body: str) -> List[SourceItem]:
+        items = []
+        for entry in ET.fromstring(body.encode("utf-8")):
+            if _local(entry.tag) != "url":
+                continue
+            loc = _child_text(entry, "loc")
+            if loc:
+                lastmod = _child_text(entry, "lastmod")
+                items.append(SourceItem(loc, lastmod, published_at=parse_date(lastmod)))
+        return items
+
+
+class FeedSource(ChangeSource):
+    """RSS 2.0 <item> or Atom <entry> elements"""
+
+    def parse(self, body: str) -> List[SourceItem]:
+        items = []
+        for entry in ET.fromstring(body.encode("utf-8")).iter():
+            tag = _local(entry.tag)
+            if tag == "item":
+                link = _child_text(entry, "link") or _child_text(entry, "guid")
+                date = _child_text(entry, "pubDate") or _child_text(entry, "date")
+            elif tag == "entry":
+                link = next(
+                    (child.get("href") for child in entry if _local(child.tag) == "link" and child.get("href")),
+                    _child_text(entry, "id"),
+                )
+                date = _child_text(entry, "updated") or _child_text(entry, "published")
+            else:
+                continue
+            if link:
+                items.append(SourceItem(link, date, _child_text(entry, "title"), parse_date(date)))
+        return items
+
+
+class ListingSource(ChangeSource):
+    """HTML page whose matching links are the items (for sites without feeds)"""
+
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        link_filter: Callable[[str], bool],
+        schedule: Optional[PollSchedule] = None,
+    ):
+        super().__init__(name, url, schedule)
+        self.link_filter = link_filter
+
+    def parse(self, body: str) -> List[SourceItem]:
+        items: Dict[str, SourceItem] = {}
+        for url, text in get_extraction_engine().links(body, self.url):
+            if self.link_filter(url) and url not in items:
+                items[url] = SourceItem(url, title=text, published_at=parse_hungarian_date(text))
+        return list(items.values())
+
+    def parse_result(self, result: "FetchResult") -> List[SourceItem]:
+        """Items dated by the listing's Last-Modified, which is more precise than a calendar date"""
+        items = self.parse(result.html)
+        modified = next((value for name, value in result.headers.items() if name.lower() == "last-modified"), None)
+        published_at = parse_date(modified)
+        if published_at is not None:
+            for item in items:
+                item.published_at = published_at
+        return items
+
+
+class SeenStore:
+    """Last snapshot of every source, kept in SQLite between runs"""
+
+    def __init__(self, path: str = ":memory:"):
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def diff(self, source: str, items: List[SourceItem]) -> Tuple[List[SourceItem], List[SourceItem]]:
+        """(new, updated) items relative to the stored snapshot; nothing is stored until ``commit``"""
+        known = self._known(source)
+        if not known:
+            logger.info("Recording baseline snapshot", source=source, items=len(items))
+            return [], []
+        new = [item for item in items if item.url not in known]
+        updated = [item for item in items if item.url in known and item.version != known[item.url]]
+        return new, updated
+
+    def commit(self, source: str, items: List[SourceItem]) -> None:
+        """Make items the stored snapshot, once the changes found in them are persisted"""
+        known = self._known(source)
+        now = time.time()
+        self.connection.execute("BEGIN")
+        self.connection.executemany(
+            "INSERT INTO seen_items (source, key, version, seen_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(source, key) DO UPDATE SET version = excluded.version, seen_at = excluded.seen_at",
+            [(source, item.url, item.version, now) for item in items if known.get(item.url) != item.version],
+        )
+        self.connection.execute("COMMIT")
+
+    def _known(self, source: str) -> Dict[str, str]:
+        return dict(
+            self.connection.execute("SELECT key, version FROM seen_items WHERE source = ?", (source,)).fetchall()
+        )
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def parse_date(value: Optional[str]) -> Optional[datetime]:
+    """W3C/ISO 8601 or RFC 822 timestamp as an aware datetime (UTC when no offset is given)"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def parse_hungarian_date(text: str, tz: str = "Europe/Budapest") -> Optional[datetime]:
+    """First Hungarian date in text ("2024. március 12.", "2024.03.12.") as local midnight"""
+    match = _HUNGARIAN_DATE.search(text or "")
+    if match is None:
+        return None
+    month = int(match["month"]) if match["month"] else HUNGARIAN_MONTHS.index(match["name"].lower()) + 1
+    try:
+        return datetime(int(match["year"]), month, int(match["day"]), tzinfo=ZoneInfo(tz))
+    except ValueError:
+        return None
+
+
+def _local(tag: str) -> str:
+    """Tag name without its XML namespace"""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _child_text(element: ET.Element, name: str) -> str:
+    for child in element:
+        if _local(child.tag) == name and child.text:
+            return child.text.strip()
+    return ""
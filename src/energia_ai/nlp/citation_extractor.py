@@ -0,0 +1,270 @@
+"""
+Citation extraction for Hungarian legal references
+
+One compiled alternation covers every reference form and each document is
+scanned in a single pass. A one-character-class prefilter (which the regex
+engine skips through with its fast charset search) finds the few positions
+where a citation can start, and the alternation is only tried there:
+
+* Acts: ``2011. évi CXCV. törvény``, plus the Alaptörvény and code
+  abbreviations such as ``Ptk. 6:519. §``
+* Government and ministerial decrees: ``368/2011. (XII. 31.) Korm. rendelet``,
+  ``12/2020. (III. 5.) ITM rendelet``
+* EU acts: ``(EU) 2016/679 rendelet``, ``2006/112/EK irányelv``,
+  ``(EK) 1907/2006 rendelet``
+* Pinpoints: ``12. § (3) bekezdés b) pont`` after any of the above, or on
+  their own as references within the same document
+
+Every match becomes a ``LegalCitation`` with character offsets and a
+normalized ELI target. ``extract_corpus`` fans documents out across a
+process pool for corpus-wide backfills.
+"""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+KIND_ACT = "torveny"
+KIND_CONSTITUTION = "alaptorveny"
+KIND_GOVERNMENT_DECREE = "korm.rendelet"
+KIND_DECREE = "rendelet"
+KIND_EU = "eu"
+KIND_SECTION = "section"  # pinpoint without an act: refers to the citing document
+
+NJT_ELI_BASE = "http://www.njt.hu/eli/hu"
+EU_ELI_BASE = "http://data.europa.eu/eli"
+
+EU_ACT_TYPES = {"rendelet": "reg", "irányelv": "dir", "határozat": "dec"}
+
+# Code abbreviations that are cited without the full act title: (year, number)
+CODE_ABBREVIATIONS = {
+    "Ptk.": (2013, "V"),
+    "Btk.": (2012, "C"),
+    "Mt.": (2012, "I"),
+    "Pp.": (2016, "CXXX"),
+    "Be.": (2017, "XC"),
+    "Ákr.": (2016, "CL"),
+    "Art.": (2017, "CL"),
+    "Áht.": (2011, "CXCV"),
+    "Vet.": (2007, "LXXXVI"),
+    "Get.": (2008, "XL"),
+}
+
+_UPPER = "A-ZÁÉÍÓÖŐÚÜŰ"
+_WORD = "A-Za-zÁÉÍÓÖŐÚÜŰáéíóöőúüű"
+
+# "12. §", "6:519. §-a", "12/A. § (3) bekezdés b) pont", "3. § 24. pontja"
+_PINPOINT = (
+    rf"(?P<{{p}}sec>\d+(?::\d+)?(?:/[{_UPPER}])?)\.\s*§(?:-[{_WORD}]+)?"
+    rf"(?:\s*\((?P<{{p}}par>\d+[a-z]?)\)\s*bekezdés[{_WORD}]*)?"
+    rf"(?:\s*(?P<{{p}}pnt>\d+\.|[a-z]{{{{1,2}}}}\))\s*(?:al)?pont[{_WORD}]*)?"
+)
+
+
+def _pinpoint(prefix: str) -> str:
+    return _PINPOINT.format(p=prefix)
+
+
+_PATTERNS = [
+    # 2011. évi CXCV. törvény [12. § ...]; "törvénnyel" doubles the ny before -val/-vel
+    rf"(?P<act_year>\d{{4}})\.\s*évi\s+(?P<act_number>[IVXLCDM]+)\.\s*[tT]örvén(?:y|ny)[{_WORD}]*"
+    rf"(?:\s+{_pinpoint('act_')})?",
+    # 368/2011. (XII. 31.) Korm. rendelet / 12/2020. (III. 5.) ITM rendelet
+    rf"(?P<dec_number>\d+)/(?P<dec_year>\d{{4}})\.\s*\([IVX]+\.\s*\d{{1,2}}\.\)\s*"
+    rf"(?P<dec_issuer>Korm\.|[{_UPPER}][{_WORD}]{{0,9}}(?:-[{_UPPER}]+)?)\s+rendelet[{_WORD}]*"
+    rf"(?:\s+{_pinpoint('dec_')})?",
+    # (EU) 2016/679 rendelet, (EK) 1907/2006 európai parlamenti és tanácsi rendelet
+    rf"\((?P<eu1_family>EU|EK|EGK|Euratom)\)\s*(?:No\s*)?(?P<eu1_a>\d{{1,4}})/(?P<eu1_b>\d{{1,4}})"
+    rf"(?:\s+[{_WORD}]+){{0,4}}?\s+(?P<eu1_type>rendelet|irányelv|határozat)[{_WORD}]*",
+    # 2006/112/EK irányelv
+    rf"(?P<eu2_year>\d{{2,4}})/(?P<eu2_number>\d{{1,4}})/(?:EU|EK|EGK|Euratom)\b"
+    rf"(?:\s+[{_WORD}]+){{0,4}}?\s+(?P<eu2_type>rendelet|irányelv|határozat)[{_WORD}]*",
+    # Alaptörvény [B) cikk ...] - articles use their own numbering
+    rf"(?P<constitution>Alaptörvén(?:y|ny))[{_WORD}]*",
+    # Ptk. 6:519. §
+    rf"(?P<code>{'|'.join(re.escape(a) for a in CODE_ABBREVIATIONS)})\s+{_pinpoint('code_')}",
+    # 12. § (3) bekezdés b) pont on its own
+    _pinpoint("own_"),
+]
+
+CITATION_PATTERN = re.compile("|".join(f"(?:{p})" for p in _PATTERNS))
+
+# Every alternative starts with a digit, "(", "Alaptörvény" or a code abbreviation
+_START_CHARS = "".join(sorted({"(", "A"} | {a[0] for a in CODE_ABBREVIATIONS}))
+CANDIDATE_PATTERN = re.compile(rf"[\d{re.escape(_START_CHARS)}]\d*")
+
+
+@dataclass
+class LegalCitation:
+    """A legal reference found in a document"""
+    kind: str
+    text: str
+    start: int
+    end: int
+    act_uri: Optional[str] = None  # ELI of the cited act, without pinpoint
+    eli_uri: Optional[str] = None  # ELI including the pinpoint path
+    year: Optional[int] = None
+    number: Optional[str] = None
+    issuer: Optional[str] = None
+    section: Optional[str] = None
+    paragraph: Optional[str] = None
+    point: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def njt_eli_uri(kind: str, year: int, number: str, point: str = "") -> str:
+    """ELI URI in the template used for NJT documents"""
+    uri = f"{NJT_ELI_BASE}/{kind}/{year}/{number}"
+    return f"{uri}/{point}" if point else uri
+
+
+def pinpoint_path(section: Optional[str], paragraph: Optional[str], point: Optional[str]) -> str:
+    """ELI subdivision path, e.g. ``sec_12/par_3/pnt_b``"""
+    parts = []
+    if section:
+        parts.append(f"sec_{section.replace(':', '-').replace('/', '')}")
+    if paragraph:
+        parts.append(f"par_{paragraph}")
+    if point:
+        parts.append(f"pnt_{point}")
+    return "/".join(parts)
+
+
+def _eu_year_number(first: str, second: str) -> Tuple[int, str]:
+    """Order an EU act's numbers: (EK) 1907/2006 is number/year, (EU) 2016/679 is year/number"""
+    if len(second) == 4 and 1950 <= int(second) <= 2014:
+        return int(second), first
+    return _full_year(first), second
+
+
+def _full_year(year: str) -> int:
+    value = int(year)
+    if value < 100:
+        return value + (1900 if value >= 50 else 2000)
+    return value
+
+
+def _citation(match: "re.Match") -> LegalCitation:
+    groups = match.groupdict()
+    citation = LegalCitation(kind="", text=match.group(0), start=match.start(), end=match.end())
+
+    if groups["act_year"]:
+        prefix = "act_"
+        citation.kind, citation.year, citation.number = KIND_ACT, int(groups["act_year"]), groups["act_number"]
+    elif groups["dec_number"]:
+        prefix = "dec_"
+        issuer = groups["dec_issuer"]
+        citation.kind = KIND_GOVERNMENT_DECREE if issuer == "Korm." else KIND_DECREE
+        citation.year, citation.number = int(groups["dec_year"]), groups["dec_number"]
+        citation.issuer = issuer.rstrip(".")
+    elif groups["eu1_family"] or groups["eu2_year"]:
+        if groups["eu1_family"]:
+            year, number = _eu_year_number(groups["eu1_a"], groups["eu1_b"])
+            act_type = groups["eu1_type"]
+        else:
+            year, number = _full_year(groups["eu2_year"]), groups["eu2_number"]
+            act_type = groups["eu2_type"]
+        citation.kind, citation.year, citation.number = KIND_EU, year, number
+        citation.act_uri = citation.eli_uri = f"{EU_ELI_BASE}/{EU_ACT_TYPES[act_type]}/{year}/{number}/oj"
+        return citation
+    elif groups["constitution"]:
+        citation.kind = KIND_CONSTITUTION
+        citation.act_uri = citation.eli_uri = f"{NJT_ELI_BASE}/{KIND_CONSTITUTION}"
+        return citation
+    elif groups["code"]:
+        prefix = "code_"
+        citation.kind = KIND_ACT
+        citation.year, citation.number = CODE_ABBREVIATIONS[groups["code"]]
+    else:
+        prefix = "own_"
+        citation.kind = KIND_SECTION
+
+    citation.section = groups[f"{prefix}sec"]
+    citation.paragraph = groups[f"{prefix}par"]
+    point = groups[f"{prefix}pnt"]
+    citation.point = point.rstrip(".)") if point else None
+
+    if citation.kind != KIND_SECTION:
+        citation.act_uri = njt_eli_uri(citation.kind, citation.year, citation.number)
+        citation.eli_uri = njt_eli_uri(
+            citation.kind,
+            citation.year,
+            citation.number,
+            pinpoint_path(citation.section, citation.paragraph, citation.point),
+        )
+    return citation
+
+
+def _scan(text: str) -> Iterator["re.Match"]:
+    """Citation matches in document order, trying the alternation only at candidate starts"""
+    search, match = CANDIDATE_PATTERN.search, CITATION_PATTERN.match
+    pos = 0
+    while True:
+        candidate = search(text, pos)
+        if candidate is None:
+            return
+        start = candidate.start()
+        # Citations start at a word boundary, never inside a number or word
+        found = match(text, start) if not start or not text[start - 1].isalnum() else None
+        if found:
+            yield found
+            pos = found.end()
+        else:
+            pos = candidate.end()
+
+
+def extract_citations(text: str, self_uri: Optional[str] = None) -> List[LegalCitation]:
+    """All legal references in text, in document order
+
+    Pinpoints that follow no act refer to the document itself; they get
+    ``self_uri`` as their act when it is given.
+    """
+    citations = []
+    for match in _scan(text):
+        citation = _citation(match)
+        if citation.kind == KIND_SECTION and self_uri:
+            citation.act_uri = self_uri
+            citation.eli_uri = "/".join(
+                p for p in (self_uri, pinpoint_path(citation.section, citation.paragraph, citation.point)) if p
+            )
+        citations.append(citation)
+    return citations
+
+
+def cited_acts(text: str) -> List[str]:
+    """Distinct ELI URIs of the external acts a document cites, in first-seen order"""
+    return list(dict.fromkeys(c.act_uri for c in extract_citations(text) if c.kind != KIND_SECTION))
+
+
+def first_citation(text: str) -> Optional[LegalCitation]:
+    """The first external act reference in text (e.g. to identify a document from its title)"""
+    for match in _scan(text):
+        citation = _citation(match)
+        if citation.kind != KIND_SECTION:
+            return citation
+    return None
+
+
+def _extract_document(item: Tuple[Hashable, str]) -> Tuple[Hashable, List[LegalCitation]]:
+    document_id, text = item
+    return document_id, extract_citations(text)
+
+
+def extract_corpus(
+    documents: Iterable[Tuple[Hashable, str]],
+    workers: Optional[int] = None,
+    chunksize: int = 32,
+) -> Iterator[Tuple[Hashable, List[LegalCitation]]]:
+    """Extract citations from (document_id, text) pairs across a process pool
+
+    Results are yielded in input order. ``workers=1`` runs in-process.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield from map(_extract_document, documents)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_extract_document, documents, chunksize=chunksize)
@@ -10,6 +10,11 @@ from ..config.settings import get_settings
 
 logger = structlog.get_logger()
 
+# Fields added to the mapping after indices were first created; put on existing indices at startup
+ADDED_FIELDS = {
+    "authority_score": {"type": "rank_feature"},
+}
+
 class ElasticsearchManager:
     """Elasticsearch manager for lexical search"""
     
@@ -17,6 +22,8 @@ class ElasticsearchManager:
         self.settings = get_settings()
         self.client: Optional[AsyncElasticsearch] = None
         self.index_name = "legal_documents"
+        # Set once the index is known to map authority_score; the boost clause fails on indices without it
+        self.authority_mapped = False
         
     async def initialize(self):
         """Initialize Elasticsearch connection"""
@@ -50,6 +57,7 @@ class ElasticsearchManager:
             # Check if index exists
             if await self.client.indices.exists(index=self.index_name):
                 logger.info("Index already exists", index=self.index_name)
+                await self.migrate_index()
                 return
             
             # Define Hungarian language analyzer
@@ -83,10 +91,10 @@ class ElasticsearchManager:
                             "hungarian_stop": {
                                 "type": "stop",
                                 "stopwords": [
-                                    "a", "az", "s", "vagy", "de", "hogy", "egy", "ez", "az",
-                                    "van", "volt", "lesz", "lehet", "kell", "csak", "mg",
-                                    "mr", "nem", "igen", "igen", "is", "el", "fel", "le",
-                                    "ki", "be", "meg", "t", "r", "ssze", "szt"
+                                    "a", "az", "és", "vagy", "de", "hogy", "egy", "ez", "az",
+                                    "van", "volt", "lesz", "lehet", "kell", "csak", "még",
+                                    "már", "nem", "igen", "igen", "is", "el", "fel", "le",
+                                    "ki", "be", "meg", "át", "rá", "össze", "szét"
                                 ]
                             },
                             "hungarian_stemmer": {
@@ -151,6 +159,9 @@ class ElasticsearchManager:
                         "content_hash": {
                             "type": "keyword"
                         },
+                        "authority_score": {
+                            "type": "rank_feature"
+                        },
                         "created_at": {
                             "type": "date"
                         },
@@ -167,12 +178,31 @@ class ElasticsearchManager:
                 body=index_settings
             )
             
+            self.authority_mapped = True
             logger.info("Elasticsearch index created successfully", index=self.index_name)
             
         except Exception as e:
             logger.error("Failed to create Elasticsearch index", error=str(e))
             raise
     
+    async def migrate_index(self):
+        """Add the fields of ``ADDED_FIELDS`` an existing index does not map yet"""
+        try:
+            response = await self.client.indices.get_mapping(index=self.index_name)
+            # Keyed by concrete index name, which differs when index_name is an alias
+            mapped = set()
+            for index in response.values():
+                mapped.update(index["mappings"].get("properties", {}))
+            missing = {name: spec for name, spec in ADDED_FIELDS.items() if name not in mapped}
+            if missing:
+                await self.client.indices.put_mapping(index=self.index_name, body={"properties": missing})
+                logger.info("Index mapping extended", index=self.index_name, fields=sorted(missing))
+            self.authority_mapped = True
+            
+        except Exception as e:
+            # Searches still work, without the authority boost
+            logger.warning("Failed to migrate Elasticsearch index mapping", index=self.index_name, error=str(e))
+    
     async def index_document(self, document_id: str, document: Dict[str, Any]) -> bool:
         """Index a single document"""
         try:
@@ -244,7 +274,8 @@ class ElasticsearchManager:
         date_range: Optional[Dict[str, str]] = None,
         keywords: Optional[List[str]] = None,
         limit: int = 50,
-        offset: int = 0
+        offset: int = 0,
+        authority_boost: float = 1.0
     ) -> Dict[str, Any]:
         """Search documents using Elasticsearch"""
         try:
@@ -292,6 +323,16 @@ class ElasticsearchManager:
             else:
                 search_body["query"]["bool"]["must"].append({"match_all": {}})
             
+            # Boost documents that are central in the citation graph
+            if authority_boost and self.authority_mapped:
+                search_body["query"]["bool"]["should"] = [{
+                    "rank_feature": {
+                        "field": "authority_score",
+                        "saturation": {},
+                        "boost": authority_boost
+                    }
+                }]
+            
             # Add filters
             if document_type:
                 search_body["query"]["bool"]["filter"].append({
@@ -344,6 +385,44 @@ class ElasticsearchManager:
             logger.error("Search failed", query=query, error=str(e))
             return {"total": 0, "documents": [], "aggregations": {}}
     
+    async def update_authority_scores(
+        self,
+        scores: Dict[str, float],
+        chunk_size: int = 1000
+    ) -> int:
+        """Write precomputed citation authority scores, keyed by index document id, onto indexed documents"""
+        try:
+            if not self.client:
+                await self.initialize()
+            
+            actions = (
+                {
+                    "_op_type": "update",
+                    "_index": self.index_name,
+                    "_id": document_id,
+                    "doc": {"authority_score": score},
+                }
+                for document_id, score in scores.items()
+                if score > 0  # rank_feature values must be positive
+            )
+            
+            success_count, failed_items = await async_bulk(
+                self.client,
+                actions,
+                chunk_size=chunk_size,
+                raise_on_error=False,
+            )
+            
+            logger.info("Authority scores updated",
+                       updated=success_count,
+                       failed=len(failed_items) if failed_items else 0)
+            
+            return success_count
+            
+        except Exception as e:
+            logger.error("Authority score update failed", error=str(e))
+            return 0
+    
     async def suggest_completions(self, text: str, size: int = 5) -> List[str]:
         """Get search suggestions/completions"""
         try:
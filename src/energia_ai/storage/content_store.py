@@ -0,0 +1,221 @@
+"""
+Compressed storage for bulky legal document bodies
+
+The hot ``documents`` collection only keeps metadata that listings and searches
+need. Raw/processed/extracted text and the embedding vector live here, in the
+``document_contents`` collection (or GridFS for very large bodies), compressed
+with zstd when available.
+"""
+import zlib
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import structlog
+from bson import Binary
+from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorGridFSBucket
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zlib fallback keeps the store usable
+    zstandard = None
+
+logger = structlog.get_logger()
+
+# Fields moved out of the hot documents collection
+TEXT_CONTENT_FIELDS = ("raw_content", "processed_content", "extracted_text")
+VECTOR_CONTENT_FIELDS = ("search_vector",)
+CONTENT_FIELDS = TEXT_CONTENT_FIELDS + VECTOR_CONTENT_FIELDS
+
+# Leading slice of the extracted text kept inline for the Mongo text index
+TEXT_EXCERPT_LENGTH = 2000
+
+# Compressed bodies above this size go to GridFS instead of an inline Binary
+GRIDFS_THRESHOLD_BYTES = 4 * 1024 * 1024
+
+CODEC_ZSTD = "zstd"
+CODEC_ZLIB = "zlib"
+CODEC_FLOAT32 = "f32"
+
+
+def compress_text(text: str, level: int = 3) -> Tuple[bytes, str]:
+    """Compress text with zstd, falling back to zlib when zstandard is missing"""
+    raw = text.encode("utf-8")
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=level).compress(raw), CODEC_ZSTD
+    return zlib.compress(raw, min(level, 9)), CODEC_ZLIB
+
+
+def decompress_text(data: bytes, codec: str) -> str:
+    """Decompress a body produced by ``compress_text``"""
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed content")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data).decode("utf-8")
+    raise ValueError(f"Unknown content codec: {codec}")
+
+
+def pack_vector(vector: Iterable[float]) -> bytes:
+    """Pack an embedding as little-endian float32 (4 bytes/dim instead of BSON doubles)"""
+    packed = array("f", vector)
+    if packed.itemsize != 4:  # pragma: no cover - exotic platforms only
+        raise RuntimeError("float32 array support is required to pack vectors")
+    return packed.tobytes()
+
+
+def unpack_vector(data: bytes) -> List[float]:
+    """Unpack a float32 embedding produced by ``pack_vector``"""
+    vector = array("f")
+    vector.frombytes(data)
+    return vector.tolist()
+
+
+def split_document(document: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Split a document dict into its hot metadata part and its bulky bodies
+
+    The hot part gets a ``text_excerpt`` (for the text index) and a
+    ``content_size`` so listings can show sizes without touching the bodies.
+    """
+    hot = {k: v for k, v in document.items() if k not in CONTENT_FIELDS}
+    bodies = {k: document[k] for k in CONTENT_FIELDS if document.get(k) is not None}
+
+    excerpt_source = bodies.get("extracted_text") or bodies.get("processed_content") or ""
+    if excerpt_source:
+        hot["text_excerpt"] = excerpt_source[:TEXT_EXCERPT_LENGTH]
+    if "raw_content" in bodies:
+        hot["content_size"] = len(bodies["raw_content"].encode("utf-8"))
+
+    return hot, bodies
+
+
+def _projection(fields: Optional[Iterable[str]]) -> Dict[str, int]:
+    """Projection transferring only the requested content fields"""
+    wanted = list(fields) if fields is not None else list(CONTENT_FIELDS)
+    unknown = set(wanted) - set(CONTENT_FIELDS)
+    if unknown:
+        raise ValueError(f"Not a content field: {', '.join(sorted(unknown))}")
+    return {f"fields.{name}": 1 for name in wanted}
+
+
+class DocumentContentStore:
+    """Stores document bodies compressed, keyed by the owning document's _id"""
+
+    def __init__(
+        self,
+        database: AsyncIOMotorDatabase,
+        compression_level: int = 3,
+        gridfs_threshold: int = GRIDFS_THRESHOLD_BYTES,
+    ):
+        self.collection = database.document_contents
+        self.gridfs = AsyncIOMotorGridFSBucket(database, bucket_name="document_contents")
+        self.compression_level = compression_level
+        self.gridfs_threshold = gridfs_threshold
+
+    async def save(self, document_id: Any, bodies: Dict[str, Any]) -> None:
+        """Compress and upsert the given bodies for a document"""
+        if not bodies:
+            return
+
+        try:
+            existing = await self.collection.find_one(
+                {"_id": document_id},
+                {f"fields.{name}.gridfs_id": 1 for name in bodies},
+            )
+
+            encoded = {}
+            for name, value in bodies.items():
+                encoded[f"fields.{name}"] = await self._encode_field(document_id, name, value)
+
+            await self.collection.update_one(
+                {"_id": document_id}, {"$set": encoded}, upsert=True
+            )
+
+            # Drop GridFS blobs that were superseded by this write
+            for name, entry in ((existing or {}).get("fields") or {}).items():
+                if entry.get("gridfs_id") is not None:
+                    await self.gridfs.delete(entry["gridfs_id"])
+
+            logger.debug("Document content stored", document_id=str(document_id), fields=list(bodies))
+
+        except Exception as e:
+            logger.error("Failed to store document content", document_id=str(document_id), error=str(e))
+            raise
+
+    async def load(
+        self, document_id: Any, fields: Optional[Iterable[str]] = None
+    ) -> Dict[str, Any]:
+        """Load and decompress bodies; only the requested fields are transferred"""
+        projection = _projection(fields)
+        try:
+            stored = await self.collection.find_one({"_id": document_id}, projection)
+            return await self._decode_fields(stored) if stored else {}
+
+        except Exception as e:
+            logger.error("Failed to load document content", document_id=str(document_id), error=str(e))
+            raise
+
+    async def load_many(
+        self, document_ids: Iterable[Any], fields: Optional[Iterable[str]] = None
+    ) -> Dict[Any, Dict[str, Any]]:
+        """Bodies of several documents in one query, keyed by document _id"""
+        projection = _projection(fields)
+        ids = list(document_ids)
+        if not ids:
+            return {}
+
+        try:
+            cursor = self.collection.find({"_id": {"$in": ids}}, projection)
+            return {stored["_id"]: await self._decode_fields(stored) async for stored in cursor}
+
+        except Exception as e:
+            logger.error("Failed to load document contents", documents=len(ids), error=str(e))
+            raise
+
+    async def delete(self, document_id: Any) -> None:
+        """Remove all stored bodies of a document"""
+        try:
+            stored = await self.collection.find_one({"_id": document_id}, {"fields": 1})
+            for entry in ((stored or {}).get("fields") or {}).values():
+                if entry.get("gridfs_id") is not None:
+                    await self.gridfs.delete(entry["gridfs_id"])
+            await self.collection.delete_one({"_id": document_id})
+
+        except Exception as e:
+            logger.error("Failed to delete document content", document_id=str(document_id), error=str(e))
+            raise
+
+    async def _encode_field(self, document_id: Any, name: str, value: Any) -> Dict[str, Any]:
+        """Encode one body into its stored representation"""
+        if name in VECTOR_CONTENT_FIELDS:
+            data, codec = pack_vector(value), CODEC_FLOAT32
+            size = len(data)
+        else:
+            data, codec = compress_text(value, self.compression_level)
+            size = len(value.encode("utf-8"))
+
+        entry: Dict[str, Any] = {"codec": codec, "size": size, "stored_size": len(data)}
+        if len(data) > self.gridfs_threshold:
+            entry["gridfs_id"] = await self.gridfs.upload_from_stream(
+                f"{document_id}/{name}", data
+            )
+        else:
+            entry["data"] = Binary(data)
+        return entry
+
+    async def _decode_fields(self, stored: Dict[str, Any]) -> Dict[str, Any]:
+        """Decode every body of a stored content record"""
+        return {name: await self._decode_field(entry) for name, entry in (stored.get("fields") or {}).items()}
+
+    async def _decode_field(self, entry: Dict[str, Any]) -> Any:
+        """Decode one stored body"""
+        if entry.get("gridfs_id") is not None:
+            stream = await self.gridfs.open_download_stream(entry["gridfs_id"])
+            data = await stream.read()
+        else:
+            data = bytes(entry["data"])
+
+        if entry["codec"] == CODEC_FLOAT32:
+            return unpack_vector(data)
+        return decompress_text(data, entry["codec"])
@@ -1,16 +1,78 @@
 """
 MongoDB connection and operations manager
 """
-import asyncio
-from typing import List, Dict, Any, Optional
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable, Union, AsyncIterator
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase, AsyncIOMotorCollection
 from pymongo import IndexModel, TEXT, ASCENDING, DESCENDING
 import structlog
 from ..config.settings import get_settings
-from .schemas import LegalDocumentSchema, DocumentVersionSchema, DocumentCollectionSchema
+from .content_store import DocumentContentStore, CONTENT_FIELDS, split_document
+from .version_store import DocumentVersionStore, VersionDiff
+from .schemas import (
+    LegalDocumentSchema,
+    LegalDocumentSummarySchema,
+    DocumentVersionSchema,
+    DocumentCollectionSchema,
+    FetchMode,
+    SUMMARY_PROJECTION,
+)
 
 logger = structlog.get_logger()
 
+# Fields the summary schema cannot be built without
+SUMMARY_REQUIRED_FIELDS = ("title", "document_type", "content_hash")
+
+@dataclass(frozen=True)
+class SearchKeyset:
+    """Keyset position in a text search ordered by (score desc, _id asc)"""
+    score: float
+    document_id: Union[str, ObjectId]
+    
+    def encode(self) -> str:
+        """Opaque, URL-safe page token"""
+        is_object_id = isinstance(self.document_id, ObjectId)
+        payload = json.dumps([self.score, str(self.document_id), is_object_id])
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+    
+    @classmethod
+    def decode(cls, token: str) -> "SearchKeyset":
+        """Parse a token produced by encode()"""
+        score, document_id, is_object_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return cls(float(score), ObjectId(document_id) if is_object_id else document_id)
+
+def build_search_pipeline(
+    query: str,
+    document_type: Optional[str] = None,
+    projection: Optional[Dict[str, Any]] = None,
+    after: Optional[SearchKeyset] = None,
+    limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Aggregation pipeline for a keyset-paginated, projected text search"""
+    match: Dict[str, Any] = {"$text": {"$search": query}}
+    if document_type:
+        match["document_type"] = document_type
+    
+    pipeline: List[Dict[str, Any]] = [
+        {"$match": match},
+        {"$addFields": {"score": {"$meta": "textScore"}}},
+    ]
+    if after is not None:
+        pipeline.append({"$match": {"$or": [
+            {"score": {"$lt": after.score}},
+            {"score": after.score, "_id": {"$gt": after.document_id}},
+        ]}})
+    pipeline.append({"$sort": {"score": -1, "_id": 1}})
+    if limit is not None:
+        pipeline.append({"$limit": limit})
+    if projection:
+        pipeline.append({"$project": {**projection, "score": 1}})
+    return pipeline
+
 class MongoDBManager:
     """Async MongoDB manager for document storage"""
     
@@ -18,6 +80,8 @@ class MongoDBManager:
         self.settings = get_settings()
         self.client: Optional[AsyncIOMotorClient] = None
         self.database: Optional[AsyncIOMotorDatabase] = None
+        self.content_store: Optional[DocumentContentStore] = None
+        self.version_store: Optional[DocumentVersionStore] = None
         
     async def initialize(self):
         """Initialize MongoDB connection"""
@@ -33,6 +97,8 @@ class MongoDBManager:
             
             # Get database
             self.database = self.client.energia_ai
+            self.content_store = DocumentContentStore(self.database)
+            self.version_store = DocumentVersionStore(self.database)
             
             # Test connection
             await self.client.admin.command('ping')
@@ -52,7 +118,7 @@ class MongoDBManager:
             # Documents collection indexes
             documents = self.database.documents
             await documents.create_indexes([
-                IndexModel([("title", TEXT), ("extracted_text", TEXT)], name="text_search"),
+                IndexModel([("title", TEXT), ("text_excerpt", TEXT)], name="text_search"),
                 IndexModel([("document_type", ASCENDING)], name="document_type_idx"),
                 IndexModel([("legal_reference", ASCENDING)], name="legal_reference_idx"),
                 IndexModel([("content_hash", ASCENDING)], unique=True, name="content_hash_idx"),
@@ -64,8 +130,17 @@ class MongoDBManager:
             # Document versions collection indexes
             versions = self.database.document_versions
             await versions.create_indexes([
-                IndexModel([("document_id", ASCENDING), ("version_number", DESCENDING)], name="document_version_idx"),
+                # Unique: concurrent writers of the same version number conflict and retry
+                IndexModel(
+                    [("document_id", ASCENDING), ("version_number", DESCENDING)],
+                    unique=True,
+                    name="document_version_unique_idx",
+                ),
                 IndexModel([("created_at", DESCENDING)], name="version_created_idx"),
+                IndexModel(
+                    [("document_id", ASCENDING), ("kind", ASCENDING), ("version_number", DESCENDING)],
+                    name="document_snapshot_idx",
+                ),
             ])
             
             # Collections collection indexes
@@ -82,10 +157,12 @@ class MongoDBManager:
             raise
     
     async def store_document(self, document: LegalDocumentSchema) -> str:
-        """Store a legal document in MongoDB"""
+        """Store a legal document, keeping bulky bodies in the content store"""
         try:
             collection = self.database.documents
-            result = await collection.insert_one(document.dict(by_alias=True, exclude_unset=True))
+            hot, bodies = split_document(document.dict(by_alias=True, exclude_unset=True))
+            result = await collection.insert_one(hot)
+            await self.content_store.save(result.inserted_id, bodies)
             
             logger.info("Document stored", document_id=str(result.inserted_id))
             return str(result.inserted_id)
@@ -94,26 +171,70 @@ class MongoDBManager:
             logger.error("Failed to store document", error=str(e))
             raise
     
-    async def get_document(self, document_id: str) -> Optional[LegalDocumentSchema]:
-        """Retrieve a document by ID"""
+    async def get_document(
+        self,
+        document_id: str,
+        mode: FetchMode = FetchMode.FULL
+    ) -> Optional[Union[LegalDocumentSchema, LegalDocumentSummarySchema]]:
+        """Retrieve a document by ID as a summary or with all bodies loaded"""
         try:
             collection = self.database.documents
-            doc = await collection.find_one({"_id": document_id})
+            if mode == FetchMode.SUMMARY:
+                doc = await collection.find_one({"_id": _document_key(document_id)}, SUMMARY_PROJECTION)
+                return LegalDocumentSummarySchema(**doc) if doc else None
             
+            doc = await collection.find_one({"_id": _document_key(document_id)})
             if doc:
-                return LegalDocumentSchema(**doc)
+                return await self._hydrate(doc)
             return None
             
         except Exception as e:
             logger.error("Failed to retrieve document", document_id=document_id, error=str(e))
             raise
     
+    async def load_document_content(
+        self,
+        document_id: str,
+        fields: Optional[Iterable[str]] = None
+    ) -> Dict[str, Any]:
+        """Lazily load large fields (raw_content, extracted_text, ...) of a document"""
+        return await self.content_store.load(_document_key(document_id), fields)
+    
+    async def ids_by_content_hash(self, content_hashes: Iterable[str]) -> Dict[str, str]:
+        """Map content hashes to document ids (the ids used by the search and vector indexes)"""
+        cursor = self.database.documents.find({"content_hash": {"$in": list(content_hashes)}}, {"content_hash": 1})
+        return {doc["content_hash"]: str(doc["_id"]) async for doc in cursor}
+    
+    async def list_documents(
+        self,
+        document_type: Optional[str] = None,
+        limit: int = 50,
+        skip: int = 0,
+        mode: FetchMode = FetchMode.SUMMARY
+    ) -> List[Union[LegalDocumentSchema, LegalDocumentSummarySchema]]:
+        """List documents, newest publication first"""
+        try:
+            collection = self.database.documents
+            query = {"document_type": document_type} if document_type else {}
+            projection = SUMMARY_PROJECTION if mode == FetchMode.SUMMARY else None
+            
+            cursor = collection.find(query, projection).sort(
+                [("publication_date", DESCENDING)]
+            ).skip(skip).limit(limit)
+            
+            return await self._materialize(cursor, mode)
+            
+        except Exception as e:
+            logger.error("Document listing failed", document_type=document_type, error=str(e))
+            raise
+    
     async def search_documents(
         self, 
         query: str, 
         document_type: Optional[str] = None,
-        limit: int = 50
-    ) -> List[LegalDocumentSchema]:
+        limit: int = 50,
+        mode: FetchMode = FetchMode.SUMMARY
+    ) -> List[Union[LegalDocumentSchema, LegalDocumentSummarySchema]]:
         """Search documents using full-text search"""
         try:
             collection = self.database.documents
@@ -123,15 +244,17 @@ class MongoDBManager:
             if document_type:
                 search_filter["document_type"] = document_type
             
+            projection = {"score": {"$meta": "textScore"}}
+            if mode == FetchMode.SUMMARY:
+                projection.update(SUMMARY_PROJECTION)
+            
             # Execute search
             cursor = collection.find(
                 search_filter,
-                {"score": {"$meta": "textScore"}}
+                projection
             ).sort([("score", {"$meta": "textScore"})]).limit(limit)
             
-            documents = []
-            async for doc in cursor:
-                documents.append(LegalDocumentSchema(**doc))
+            documents = await self._materialize(cursor, mode)
             
             logger.info("Document search completed", query=query, results_count=len(documents))
             return documents
@@ -140,14 +263,82 @@ class MongoDBManager:
             logger.error("Document search failed", query=query, error=str(e))
             raise
     
+    async def stream_search_documents(
+        self,
+        query: str,
+        document_type: Optional[str] = None,
+        fields: Optional[Iterable[str]] = None,
+        raw: bool = False,
+        batch_size: int = 500,
+        after: Optional[SearchKeyset] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[List[Union[Dict[str, Any], LegalDocumentSummarySchema]]]:
+        """
+        Stream text search hits in batches straight from the server cursor
+        
+        Args:
+            query: Full-text query
+            document_type: Optional document type filter
+            fields: Hot-collection fields to return (defaults to the summary projection)
+            raw: Yield plain dicts and skip Pydantic validation
+            batch_size: Documents per yielded batch (and per cursor round-trip)
+            after: Resume after this keyset position (see SearchKeyset)
+            limit: Stop after this many hits
+            
+        Yields:
+            Lists of hits; ``SearchKeyset(score, _id)`` of the last hit seen
+            resumes the search from that point
+        """
+        if fields is None:
+            projection = dict(SUMMARY_PROJECTION)
+        else:
+            projection = {field: 1 for field in fields}
+            unknown = set(projection) & set(CONTENT_FIELDS)
+            if unknown:
+                raise ValueError(f"Content fields are not stored in the documents collection: {sorted(unknown)}")
+            if not raw:
+                projection.update({field: 1 for field in SUMMARY_REQUIRED_FIELDS})
+        
+        pipeline = build_search_pipeline(query, document_type, projection, after, limit)
+        
+        try:
+            cursor = self.database.documents.aggregate(pipeline, batchSize=batch_size)
+            batch: List[Union[Dict[str, Any], LegalDocumentSummarySchema]] = []
+            streamed = 0
+            
+            async for doc in cursor:
+                batch.append(doc if raw else LegalDocumentSummarySchema(**doc))
+                if len(batch) >= batch_size:
+                    streamed += len(batch)
+                    yield batch
+                    batch = []
+            
+            if batch:
+                streamed += len(batch)
+                yield batch
+            
+            logger.info("Streamed document search completed", query=query, results_count=streamed, raw=raw)
+            
+        except Exception as e:
+            logger.error("Streamed document search failed", query=query, error=str(e))
+            raise
+    
     async def update_document(self, document_id: str, updates: Dict[str, Any]) -> bool:
-        """Update a document"""
+        """Update a document; body fields are routed to the content store"""
         try:
             collection = self.database.documents
+            key = _document_key(document_id)
+            
+            body_updates = {k: updates.pop(k) for k in CONTENT_FIELDS if k in updates}
+            if body_updates:
+                hot_updates, _ = split_document(body_updates)
+                updates.update(hot_updates)
+                await self.content_store.save(key, body_updates)
+            
             updates["updated_at"] = datetime.utcnow()
             
             result = await collection.update_one(
-                {"_id": document_id},
+                {"_id": key},
                 {"$set": updates}
             )
             
@@ -160,10 +351,12 @@ class MongoDBManager:
             raise
     
     async def delete_document(self, document_id: str) -> bool:
-        """Delete a document"""
+        """Delete a document and its stored bodies"""
         try:
             collection = self.database.documents
-            result = await collection.delete_one({"_id": document_id})
+            key = _document_key(document_id)
+            result = await collection.delete_one({"_id": key})
+            await self.content_store.delete(key)
             
             success = result.deleted_count > 0
             logger.info("Document deleted", document_id=document_id, success=success)
@@ -173,12 +366,90 @@ class MongoDBManager:
             logger.error("Failed to delete document", document_id=document_id, error=str(e))
             raise
     
+    async def migrate_inline_content(self, batch_size: int = 100) -> int:
+        """Move bodies still stored inline in the documents collection to the content store"""
+        collection = self.database.documents
+        inline_filter = {"$or": [{field: {"$exists": True}} for field in CONTENT_FIELDS]}
+        migrated = 0
+        
+        while True:
+            batch = await collection.find(inline_filter).limit(batch_size).to_list(batch_size)
+            if not batch:
+                break
+            
+            for doc in batch:
+                hot, bodies = split_document(doc)
+                await self.content_store.save(doc["_id"], bodies)
+                await collection.update_one(
+                    {"_id": doc["_id"]},
+                    {
+                        "$set": {k: v for k, v in hot.items() if k in ("text_excerpt", "content_size")},
+                        "$unset": {field: "" for field in CONTENT_FIELDS},
+                    }
+                )
+                migrated += 1
+        
+        logger.info("Inline document content migrated", documents=migrated)
+        return migrated
+    
+    async def add_document_version(
+        self,
+        document_id: str,
+        content: str,
+        changes_summary: Optional[str] = None
+    ) -> int:
+        """Record a new version of a document's content"""
+        return await self.version_store.add_version(_document_key(document_id), content, changes_summary)
+    
+    async def get_document_version(
+        self,
+        document_id: str,
+        version_number: int
+    ) -> Optional[DocumentVersionSchema]:
+        """Reconstruct a stored version of a document"""
+        return await self.version_store.get_version(_document_key(document_id), version_number)
+    
+    async def diff_document_versions(
+        self,
+        document_id: str,
+        from_version: int,
+        to_version: int
+    ) -> VersionDiff:
+        """Line-level diff between two stored versions of a document"""
+        return await self.version_store.diff(_document_key(document_id), from_version, to_version)
+    
+    async def _hydrate(self, doc: Dict[str, Any]) -> LegalDocumentSchema:
+        """Merge stored bodies into a hot document and build the full schema"""
+        bodies = await self.content_store.load(doc["_id"])
+        doc.update(bodies)
+        return LegalDocumentSchema(**doc)
+    
+    async def _materialize(
+        self,
+        cursor,
+        mode: FetchMode
+    ) -> List[Union[LegalDocumentSchema, LegalDocumentSummarySchema]]:
+        """Turn a cursor into summary or fully hydrated documents"""
+        if mode == FetchMode.SUMMARY:
+            return [LegalDocumentSummarySchema(**doc) async for doc in cursor]
+        
+        # One $in query for the bodies of the whole page instead of one per document
+        hot_docs = [doc async for doc in cursor]
+        bodies = await self.content_store.load_many(doc["_id"] for doc in hot_docs)
+        return [LegalDocumentSchema(**{**doc, **bodies.get(doc["_id"], {})}) for doc in hot_docs]
+    
     async def close(self):
         """Close MongoDB connection"""
         if self.client:
             self.client.close()
             logger.info("MongoDB connection closed")
 
+def _document_key(document_id: Union[str, ObjectId]) -> Union[str, ObjectId]:
+    """Documents are inserted with ObjectId keys; accept their string form too"""
+    if isinstance(document_id, str) and ObjectId.is_valid(document_id):
+        return ObjectId(document_id)
+    return document_id
+
 # Global MongoDB manager instance
 _mongo_manager = None
 
@@ -3,14 +3,21 @@ MongoDB document schemas for legal document storage
 """
 from typing import Optional, List, Dict, Any
 from datetime import datetime
+from enum import Enum
 from pydantic import BaseModel, Field
+from pydantic_core import core_schema
 from bson import ObjectId
 
 class PyObjectId(ObjectId):
     """Custom ObjectId type for Pydantic"""
     @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
+    def __get_pydantic_core_schema__(cls, source_type, handler):
+        return core_schema.no_info_plain_validator_function(
+            cls.validate,
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda v: v, when_used="always"
+            ),
+        )
 
     @classmethod
     def validate(cls, v):
@@ -19,8 +26,8 @@ class PyObjectId(ObjectId):
         return ObjectId(v)
 
     @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
+    def __get_pydantic_json_schema__(cls, schema, handler):
+        return {"type": "string"}
 
 class LegalDocumentSchema(BaseModel):
     """Schema for legal documents stored in MongoDB"""
@@ -61,6 +68,55 @@ class LegalDocumentSchema(BaseModel):
         arbitrary_types_allowed = True
         json_encoders = {ObjectId: str}
 
+class FetchMode(str, Enum):
+    """How much of a legal document a query should transfer"""
+    SUMMARY = "summary"  # metadata only, served from the hot documents collection
+    FULL = "full"        # metadata plus bodies from the content store
+
+# Projection used for summary fetches - never pulls bodies or vectors
+SUMMARY_PROJECTION = {
+    "title": 1,
+    "document_type": 1,
+    "source_url": 1,
+    "publication_date": 1,
+    "effective_date": 1,
+    "legal_reference": 1,
+    "content_hash": 1,
+    "file_size": 1,
+    "content_size": 1,
+    "language": 1,
+    "keywords": 1,
+    "text_excerpt": 1,
+    "indexed_at": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
+
+class LegalDocumentSummarySchema(BaseModel):
+    """Lightweight view of a legal document used by listings and searches"""
+    id: Optional[PyObjectId] = Field(None, alias="_id")
+    title: str = Field(..., description="Document title")
+    document_type: str = Field(..., description="Type of legal document")
+    source_url: Optional[str] = Field(None, description="Original URL")
+    publication_date: Optional[datetime] = Field(None, description="Publication date")
+    effective_date: Optional[datetime] = Field(None, description="Effective date")
+    legal_reference: Optional[str] = Field(None, description="Legal reference number")
+    content_hash: str = Field(..., description="SHA-256 hash of content")
+    file_size: Optional[int] = Field(None, description="File size in bytes")
+    content_size: Optional[int] = Field(None, description="Raw content size in bytes")
+    language: str = Field(default="hu", description="Document language")
+    keywords: List[str] = Field(default_factory=list, description="Extracted keywords")
+    text_excerpt: Optional[str] = Field(None, description="Leading slice of the extracted text")
+    score: Optional[float] = Field(None, description="Text search score")
+    indexed_at: Optional[datetime] = Field(None, description="When document was indexed")
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        allow_population_by_field_name = True
+        arbitrary_types_allowed = True
+        json_encoders = {ObjectId: str}
+
 class DocumentVersionSchema(BaseModel):
     """Schema for document version history"""
     id: Optional[PyObjectId] = Field(default_factory=PyObjectId, alias="_id")
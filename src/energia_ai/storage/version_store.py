@@ -0,0 +1,307 @@
+"""
+Delta-compressed document version store
+
+Consolidated acts are amended many times, so storing the full text of every
+version grows storage quadratically. Versions are stored as a full snapshot
+every ``snapshot_interval`` versions and as line-level deltas against the
+previous version in between. Materialized versions are kept in an LRU cache.
+
+Records written before deltas existed have no ``kind`` and keep their text in
+``content``; they are read as uncompressed snapshots. ``(document_id,
+version_number)`` is unique, and a writer that loses a race for a version
+number re-reads the latest version and tries again.
+"""
+import difflib
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import structlog
+from bson import Binary
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+
+from .content_store import compress_text, decompress_text
+from .schemas import DocumentVersionSchema
+
+logger = structlog.get_logger()
+
+KIND_SNAPSHOT = "snapshot"
+KIND_DELTA = "delta"
+
+# Delta op codes: copy a line range of the base version, or insert new lines
+OP_COPY = "c"
+OP_INSERT = "i"
+
+
+def compute_line_delta(old_lines: List[str], new_lines: List[str]) -> List[list]:
+    """Encode new_lines as copy/insert operations against old_lines"""
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    ops: List[list] = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([OP_COPY, i1, i2])
+        elif tag in ("replace", "insert"):
+            ops.append([OP_INSERT, new_lines[j1:j2]])
+        # "delete" needs no op: the base lines are simply not copied
+    return ops
+
+
+def apply_line_delta(old_lines: List[str], ops: List[list]) -> List[str]:
+    """Rebuild the new version's lines from the base lines and a delta"""
+    new_lines: List[str] = []
+    for op in ops:
+        if op[0] == OP_COPY:
+            new_lines.extend(old_lines[op[1]:op[2]])
+        elif op[0] == OP_INSERT:
+            new_lines.extend(op[1])
+        else:
+            raise ValueError(f"Unknown delta op: {op[0]}")
+    return new_lines
+
+
+@dataclass
+class DiffHunk:
+    """One changed region between two versions"""
+    tag: str  # 'replace', 'delete', 'insert'
+    old_start: int
+    old_lines: List[str]
+    new_start: int
+    new_lines: List[str]
+
+
+@dataclass
+class VersionDiff:
+    """Line-level difference between two versions of a document"""
+    document_id: str
+    from_version: int
+    to_version: int
+    hunks: List[DiffHunk] = field(default_factory=list)
+
+    @property
+    def added_lines(self) -> int:
+        return sum(len(h.new_lines) for h in self.hunks)
+
+    @property
+    def removed_lines(self) -> int:
+        return sum(len(h.old_lines) for h in self.hunks)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.hunks)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for change detection / API responses"""
+        return {
+            "document_id": self.document_id,
+            "from_version": self.from_version,
+            "to_version": self.to_version,
+            "added_lines": self.added_lines,
+            "removed_lines": self.removed_lines,
+            "hunks": [h.__dict__ for h in self.hunks],
+        }
+
+
+def diff_lines(
+    document_id: str, from_version: int, old_lines: List[str], to_version: int, new_lines: List[str]
+) -> VersionDiff:
+    """Compute the hunks that turn old_lines into new_lines"""
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    diff = VersionDiff(document_id=document_id, from_version=from_version, to_version=to_version)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            diff.hunks.append(DiffHunk(tag, i1, old_lines[i1:i2], j1, new_lines[j1:j2]))
+    return diff
+
+
+class DocumentVersionStore:
+    """Snapshot + delta storage for document versions with an LRU materialization cache"""
+
+    def __init__(
+        self,
+        database: AsyncIOMotorDatabase,
+        snapshot_interval: int = 10,
+        cache_size: int = 64,
+        max_write_attempts: int = 5,
+    ):
+        self.collection = database.document_versions
+        self.snapshot_interval = snapshot_interval
+        self.cache_size = cache_size
+        self.max_write_attempts = max_write_attempts
+        self._cache: "OrderedDict[Tuple[str, int], List[str]]" = OrderedDict()
+
+    async def add_version(
+        self,
+        document_id: Any,
+        content: str,
+        changes_summary: Optional[str] = None,
+    ) -> int:
+        """Append a new version of a document and return its version number"""
+        for attempt in range(1, self.max_write_attempts + 1):
+            try:
+                return await self._add_version(document_id, content, changes_summary)
+            except DuplicateKeyError:
+                # Another writer took the version number first: build on its version
+                if attempt == self.max_write_attempts:
+                    logger.error("Document version conflict persisted", document_id=str(document_id), attempts=attempt)
+                    raise
+                logger.debug("Document version conflict, retrying", document_id=str(document_id), attempt=attempt)
+            except Exception as e:
+                logger.error("Failed to store document version", document_id=str(document_id), error=str(e))
+                raise
+
+    async def _add_version(self, document_id: Any, content: str, changes_summary: Optional[str]) -> int:
+        latest = await self.collection.find_one(
+            {"document_id": document_id},
+            {"version_number": 1, "content_hash": 1},
+            sort=[("version_number", -1)],
+        )
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        if latest and latest.get("content_hash") == content_hash:
+            return latest["version_number"]
+
+        version_number = (latest["version_number"] + 1) if latest else 1
+        new_lines = content.splitlines(keepends=True)
+
+        record: Dict[str, Any] = {
+            "document_id": document_id,
+            "version_number": version_number,
+            "content_hash": content_hash,
+            "changes_summary": changes_summary,
+            "size": len(content.encode("utf-8")),
+            "created_at": datetime.utcnow(),
+        }
+
+        if (version_number - 1) % self.snapshot_interval == 0:
+            payload = content
+            record["kind"] = KIND_SNAPSHOT
+        else:
+            old_lines = await self._materialize(document_id, version_number - 1)
+            payload = json.dumps(compute_line_delta(old_lines, new_lines), ensure_ascii=False)
+            record["kind"] = KIND_DELTA
+
+        data, codec = compress_text(payload)
+        record["payload"] = Binary(data)
+        record["codec"] = codec
+        record["stored_size"] = len(data)
+
+        await self.collection.insert_one(record)
+        self._remember(document_id, version_number, new_lines)
+
+        logger.info(
+            "Document version stored",
+            document_id=str(document_id),
+            version_number=version_number,
+            kind=record["kind"],
+            size=record["size"],
+            stored_size=record["stored_size"],
+        )
+        return version_number
+
+    async def get_version(self, document_id: Any, version_number: int) -> Optional[DocumentVersionSchema]:
+        """Reconstruct a specific version of a document"""
+        try:
+            meta = await self.collection.find_one(
+                {"document_id": document_id, "version_number": version_number},
+                {"payload": 0},
+            )
+            if not meta:
+                return None
+
+            lines = await self._materialize(document_id, version_number)
+            return DocumentVersionSchema(
+                _id=meta["_id"],
+                document_id=document_id,
+                version_number=version_number,
+                content="".join(lines),
+                changes_summary=meta.get("changes_summary"),
+                created_at=meta["created_at"],
+            )
+
+        except Exception as e:
+            logger.error(
+                "Failed to reconstruct document version",
+                document_id=str(document_id),
+                version_number=version_number,
+                error=str(e),
+            )
+            raise
+
+    async def latest_version_number(self, document_id: Any) -> Optional[int]:
+        """Return the newest version number of a document"""
+        latest = await self.collection.find_one(
+            {"document_id": document_id}, {"version_number": 1}, sort=[("version_number", -1)]
+        )
+        return latest["version_number"] if latest else None
+
+    async def diff(self, document_id: Any, from_version: int, to_version: int) -> VersionDiff:
+        """Line-level diff between version N and version M of a document"""
+        old_lines = await self._materialize(document_id, from_version)
+        new_lines = await self._materialize(document_id, to_version)
+        return diff_lines(str(document_id), from_version, old_lines, to_version, new_lines)
+
+    async def _materialize(self, document_id: Any, version_number: int) -> List[str]:
+        """Rebuild a version's lines from the nearest snapshot or cached version"""
+        cached = self._cache.get((str(document_id), version_number))
+        if cached is not None:
+            self._cache.move_to_end((str(document_id), version_number))
+            return cached
+
+        snapshot = await self.collection.find_one(
+            {
+                "document_id": document_id,
+                "version_number": {"$lte": version_number},
+                # Legacy records without a kind are full snapshots
+                "kind": {"$ne": KIND_DELTA},
+            },
+            {"version_number": 1},
+            sort=[("version_number", -1)],
+        )
+        if not snapshot:
+            raise LookupError(f"No snapshot found for document {document_id} version {version_number}")
+
+        # Start from a cached version between the snapshot and the target if there is one
+        start = snapshot["version_number"]
+        base_lines: Optional[List[str]] = None
+        for candidate in range(version_number - 1, start - 1, -1):
+            base_lines = self._cache.get((str(document_id), candidate))
+            if base_lines is not None:
+                start = candidate + 1
+                break
+
+        cursor = self.collection.find(
+            {"document_id": document_id, "version_number": {"$gte": start, "$lte": version_number}},
+            {"version_number": 1, "kind": 1, "payload": 1, "codec": 1, "content": 1},
+        ).sort([("version_number", 1)])
+
+        lines = base_lines
+        expected = start
+        async for record in cursor:
+            if record["version_number"] != expected:
+                raise LookupError(f"Version chain broken for document {document_id} at {expected}")
+            if "payload" in record:
+                payload = decompress_text(bytes(record["payload"]), record["codec"])
+            else:
+                payload = record.get("content") or ""
+            if record.get("kind", KIND_SNAPSHOT) == KIND_SNAPSHOT:
+                lines = payload.splitlines(keepends=True)
+            else:
+                lines = apply_line_delta(lines, json.loads(payload))
+            expected += 1
+
+        if lines is None or expected != version_number + 1:
+            raise LookupError(f"Version {version_number} not found for document {document_id}")
+
+        self._remember(document_id, version_number, lines)
+        return lines
+
+    def _remember(self, document_id: Any, version_number: int, lines: List[str]) -> None:
+        """Put a materialized version into the LRU cache"""
+        key = (str(document_id), version_number)
+        self._cache[key] = lines
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
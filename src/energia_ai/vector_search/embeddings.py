@@ -9,6 +9,7 @@ import numpy as np
 from sentence_transformers import SentenceTransformer
 import structlog
 from ..config.settings import get_settings
+from ..core.http import PROVIDER_OPENAI, get_http_client
 
 logger = structlog.get_logger()
 
@@ -25,10 +26,12 @@ class EmbeddingManager:
     async def initialize(self):
         """Initialize embedding models"""
         try:
-            # Initialize OpenAI client if API key is available
+            # Initialize OpenAI client if API key is available, on the shared pooled transport
             if self.settings.openai_api_key:
-                openai.api_key = self.settings.openai_api_key
-                self.openai_client = openai
+                self.openai_client = openai.AsyncOpenAI(
+                    api_key=self.settings.openai_api_key,
+                    http_client=get_http_client(PROVIDER_OPENAI)
+                )
                 logger.info("OpenAI embedding client initialized")
             
             # Initialize local sentence transformer for Hungarian support
@@ -48,12 +51,12 @@ class EmbeddingManager:
             # Clean and truncate text
             cleaned_text = self.preprocess_text(text)
             
-            response = await self.openai_client.Embedding.acreate(
+            response = await self.openai_client.embeddings.create(
                 model=self.embedding_model,
                 input=cleaned_text
             )
             
-            embedding = response['data'][0]['embedding']
+            embedding = response.data[0].embedding
             
             logger.debug("OpenAI embedding generated", text_length=len(text))
             return embedding
@@ -97,6 +97,12 @@ class QdrantManager:
                 field_schema=models.PayloadSchemaType.DATETIME,
             )
             
+            self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name="authority_score",
+                field_schema=models.PayloadSchemaType.FLOAT,
+            )
+            
             logger.info("Qdrant collection created successfully", collection=self.collection_name)
             
         except Exception as e:
@@ -249,6 +255,41 @@ class QdrantManager:
                         error=str(e))
             return False
     
+    async def update_authority_scores(
+        self, 
+        scores: Dict[str, float],
+        batch_size: int = 500
+    ) -> int:
+        """Set precomputed citation authority scores, keyed by point id, in point payloads"""
+        try:
+            if not self.client:
+                await self.initialize()
+            
+            items = list(scores.items())
+            updated = 0
+            for start in range(0, len(items), batch_size):
+                batch = items[start:start + batch_size]
+                self.client.batch_update_points(
+                    collection_name=self.collection_name,
+                    update_operations=[
+                        models.SetPayloadOperation(
+                            set_payload=models.SetPayload(
+                                payload={"authority_score": score},
+                                points=[document_id]
+                            )
+                        )
+                        for document_id, score in batch
+                    ]
+                )
+                updated += len(batch)
+            
+            logger.info("Authority scores stored in vector DB", updated=updated)
+            return updated
+            
+        except Exception as e:
+            logger.error("Failed to store authority scores", error=str(e))
+            return 0
+    
     async def delete_document(self, document_id: str) -> bool:
         """Delete a document from the vector database"""
         try:
@@ -0,0 +1,6 @@
+-- Rolling proxy health kept by the crawler proxy pool. A proxy that keeps
+-- failing is put on a cool-down (cooldown_until) instead of being deactivated;
+-- is_active stays an operator switch.
+ALTER TABLE crawler_proxies ADD COLUMN IF NOT EXISTS latency_ms REAL;
+ALTER TABLE crawler_proxies ADD COLUMN IF NOT EXISTS success_rate REAL;
+ALTER TABLE crawler_proxies ADD COLUMN IF NOT EXISTS cooldown_until TIMESTAMP WITH TIME ZONE;
@@ -0,0 +1,52 @@
+-- Bulk analysis jobs (e.g. compliance scans of every contract after a law
+-- change). Job and item state is kept here so an interrupted job resumes
+-- where it stopped; item results are also written to contract_impacts and
+-- impact_analysis_results as they arrive.
+CREATE TABLE IF NOT EXISTS analysis_batch_jobs (
+  id UUID PRIMARY KEY,
+  analysis_type TEXT NOT NULL,
+  mode TEXT NOT NULL,
+  status TEXT NOT NULL DEFAULT 'pending',
+  model TEXT NOT NULL,
+  tenant TEXT NOT NULL DEFAULT 'default',
+  context TEXT,
+  change_id UUID REFERENCES legal_changes(id) ON DELETE SET NULL,
+  legal_document_id UUID REFERENCES legal_documents(id) ON DELETE SET NULL,
+  analysis_id UUID REFERENCES impact_analysis_results(analysis_id) ON DELETE SET NULL,
+  total_items INTEGER NOT NULL DEFAULT 0,
+  succeeded_items INTEGER NOT NULL DEFAULT 0,
+  failed_items INTEGER NOT NULL DEFAULT 0,
+  error TEXT,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL,
+  completed_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE TABLE IF NOT EXISTS analysis_batch_items (
+  id UUID PRIMARY KEY,
+  job_id UUID NOT NULL REFERENCES analysis_batch_jobs(id) ON DELETE CASCADE,
+  contract_id UUID NOT NULL REFERENCES contracts(id) ON DELETE CASCADE,
+  status TEXT NOT NULL DEFAULT 'pending',
+  provider_batch_id TEXT,
+  result TEXT,
+  error TEXT,
+  token_usage JSONB,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL,
+  UNIQUE (job_id, contract_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_analysis_batch_jobs_status ON analysis_batch_jobs(status);
+CREATE INDEX IF NOT EXISTS idx_analysis_batch_items_job_status ON analysis_batch_items(job_id, status);
+
+ALTER TABLE analysis_batch_jobs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE analysis_batch_items ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Lawyers can view analysis batch jobs"
+ON public.analysis_batch_jobs FOR SELECT
+TO authenticated
+USING (public.get_my_role() IN ('admin', 'jogász'));
+
+CREATE POLICY "Lawyers can view analysis batch items"
+ON public.analysis_batch_items FOR SELECT
+TO authenticated
+USING (public.get_my_role() IN ('admin', 'jogász'));
@@ -0,0 +1,11 @@
+-- Leases and retries for queue_messages. A claimed message is leased
+-- (claimed_at); a lease that expires because its worker died is reclaimed by
+-- the next consumer. Failed messages go back to pending after a backoff
+-- (available_at) until max attempts, then to 'dead' for inspection.
+ALTER TABLE queue_messages ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMP WITH TIME ZONE;
+ALTER TABLE queue_messages ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE queue_messages ADD COLUMN IF NOT EXISTS available_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now();
+
+CREATE INDEX IF NOT EXISTS idx_queue_messages_claimable
+  ON queue_messages(type, status, available_at)
+  WHERE status IN ('pending', 'processing');
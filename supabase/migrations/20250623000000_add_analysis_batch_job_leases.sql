@@ -0,0 +1,6 @@
+-- A batch job is run by one runner at a time: the runner holds a lease it
+-- renews while working, and a second run of the job is refused until the
+-- lease expires. Items move to 'submitting' before their provider batch is
+-- created, so an interrupted run never submits them twice.
+ALTER TABLE analysis_batch_jobs ADD COLUMN IF NOT EXISTS runner TEXT;
+ALTER TABLE analysis_batch_jobs ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE;
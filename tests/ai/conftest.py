@@ -0,0 +1,137 @@
+"""
+Shared fixtures for the AI tests: a ClaudeClient on a stand-in Messages API, and the /ai endpoints
+"""
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.ai.claude_client import ClaudeClient, get_claude_client
+from src.energia_ai.ai.routing import ModelRouter
+from src.energia_ai.api.ai.endpoints import router
+
+
+class FakeMessages:
+    """Messages API stand-in recording the calls it was sent
+
+    ``replies`` is the reply to every call, or a dict of replies per model;
+    a list value there is replayed in order. A reply is the response text,
+    a list of content blocks, or a ``(reply, stop_reason)`` pair.
+    """
+
+    def __init__(self, replies, usage=(100, 20), stop_reason="end_turn", delay=0.0):
+        if isinstance(replies, dict):
+            # Copied, so replaying a script does not consume the caller's lists
+            replies = {model: list(reply) if isinstance(reply, list) else reply for model, reply in replies.items()}
+        self.replies = replies
+        self.usage = usage
+        self.stop_reason = stop_reason
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+
+    @property
+    def models(self):
+        return [call["model"] for call in self.calls]
+
+    @property
+    def prompts(self):
+        """Text of the last user block of every call"""
+        return [call["messages"][0]["content"][-1]["text"] for call in self.calls]
+
+    def _reply(self, model):
+        reply = self.replies[model] if isinstance(self.replies, dict) else self.replies
+        if isinstance(reply, list) and isinstance(self.replies, dict):
+            reply = reply.pop(0)
+        content, stop_reason = reply if isinstance(reply, tuple) else (reply, self.stop_reason)
+        if isinstance(content, str):
+            content = [SimpleNamespace(type="text", text=content)]
+        return content, stop_reason
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        content, stop_reason = self._reply(kwargs["model"])
+        usage = SimpleNamespace(input_tokens=self.usage[0], output_tokens=self.usage[1])
+        return SimpleNamespace(content=content, usage=usage, stop_reason=stop_reason)
+
+    def stream(self, **kwargs):
+        """Streaming twin of ``create``: the reply's text arrives word by word"""
+        return FakeStream(self.create(**kwargs))
+
+
+class FakeStream:
+    """The SDK's message stream manager and stream, over one ``FakeMessages`` reply"""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.message = None
+
+    async def __aenter__(self):
+        self.message = await self.reply
+        self.current_message_snapshot = self.message
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    async def text_stream(self):
+        for word in self.message.content[0].text.split(" "):
+            yield word + " "
+
+    async def get_final_message(self):
+        return self.message
+
+
+@pytest.fixture
+def make_client():
+    """Build ClaudeClients answering from ``FakeMessages(replies, **options)``, or from ``messages`` as given
+
+    ``tiers`` and ``routes`` replace the configured model router.
+    """
+    clients = []
+
+    def make(replies=None, messages=None, scheduler=None, tiers=None, routes=None, **options):
+        with patch("src.energia_ai.ai.claude_client.AsyncAnthropic"):
+            client = ClaudeClient(scheduler=scheduler)
+        if tiers is not None:
+            client.router = ModelRouter(tiers, routes)
+        client.client = SimpleNamespace(messages=messages or FakeMessages(replies, **options))
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.close()
+
+
+@pytest.fixture
+def api_client():
+    """Build a test client for the /ai endpoints served by the given Claude client"""
+
+    def make(claude_client):
+        app = FastAPI()
+        app.include_router(router)
+
+        async def override():
+            return claude_client
+
+        app.dependency_overrides[get_claude_client] = override
+        return TestClient(app)
+
+    return make
@@ -0,0 +1,251 @@
+"""
+Tests for batch analysis jobs against a mock Message Batches provider
+"""
+import asyncio
+import sys
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import anthropic
+import httpx
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.ai.batch import (
+    ITEM_ERRORED,
+    ITEM_SUCCEEDED,
+    JOB_COMPLETED,
+    JOB_RUNNING,
+    MODE_WORKERS,
+    BatchAnalyzer,
+    BatchJobBusy,
+    MemoryBatchStore,
+    parse_impact,
+)
+from src.energia_ai.ai.claude_client import ClaudeClient
+
+AFFECTED = "A 4. pont szerinti díjszámítás a módosítás miatt nem tartható.\nPriority: high\nAction required: Update clause 4"
+UNAFFECTED = "A szerződést a módosítás nem érinti.\nPriority: none\nAction required: none"
+
+
+def prompt_text(messages) -> str:
+    return "".join(block["text"] for block in messages[0]["content"])
+
+
+def reply(text: str) -> str:
+    return UNAFFECTED if "bérleti" in text else AFFECTED
+
+
+class MockBatchesProvider:
+    """Message Batches API stand-in: batches end after a number of polls, results stream per request"""
+
+    def __init__(
+        self, polls_until_ended: int = 2, fail_results_after: int = None, available: bool = True, lose_response: bool = False
+    ):
+        self.polls_until_ended = polls_until_ended
+        self.fail_results_after = fail_results_after
+        self.available = available
+        self.lose_response = lose_response
+        self.batches = {}
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+
+    # Message Batches
+    async def create(self, requests):
+        if not self.available:
+            response = httpx.Response(404, request=httpx.Request("POST", "https://api.anthropic.com/v1/messages/batches"))
+            raise anthropic.NotFoundError("Not found", response=response, body=None)
+        batch_id = f"msgbatch_{len(self.batches)}"
+        self.batches[batch_id] = {"requests": requests, "polls": 0}
+        await asyncio.sleep(0)
+        if self.lose_response:
+            self.lose_response = False
+            raise ConnectionError("connection reset after the batch was created")
+        return SimpleNamespace(id=batch_id, processing_status="in_progress")
+
+    async def retrieve(self, batch_id):
+        batch = self.batches[batch_id]
+        batch["polls"] += 1
+        status = "ended" if batch["polls"] >= self.polls_until_ended else "in_progress"
+        return SimpleNamespace(id=batch_id, processing_status=status)
+
+    async def results(self, batch_id):
+        requests = self.batches[batch_id]["requests"]
+        fail_after = self.fail_results_after
+        self.fail_results_after = None
+
+        async def stream():
+            for n, request in enumerate(requests):
+                if fail_after is not None and n == fail_after:
+                    raise ConnectionError("results stream dropped")
+                text = prompt_text(request["params"]["messages"])
+                if "hibás" in text:
+                    error = SimpleNamespace(error=SimpleNamespace(message="invalid request"))
+                    result = SimpleNamespace(type="errored", error=error)
+                else:
+                    usage = SimpleNamespace(input_tokens=100, output_tokens=20)
+                    message = SimpleNamespace(content=[SimpleNamespace(type="text", text=reply(text))], usage=usage)
+                    result = SimpleNamespace(type="succeeded", message=message)
+                yield SimpleNamespace(custom_id=request["custom_id"], result=result)
+        return stream()
+
+    # Messages, used by the worker pool
+    async def create_message(self, **kwargs):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        usage = SimpleNamespace(input_tokens=100, output_tokens=20)
+        text = reply(prompt_text(kwargs["messages"]))
+        return SimpleNamespace(content=[SimpleNamespace(text=text)], usage=usage)
+
+
+def make_analyzer(provider, contracts, **kwargs):
+    with patch("src.energia_ai.ai.claude_client.AsyncAnthropic"):
+        client = ClaudeClient()
+    client.client = SimpleNamespace(messages=SimpleNamespace(create=provider.create_message, batches=provider))
+    store = MemoryBatchStore(contracts)
+    return BatchAnalyzer(client, store, poll_interval=0, flush_size=2, **kwargs), store
+
+
+def contracts(affected: int, unaffected: int = 0, broken: int = 0):
+    texts = ["Villamosenergia-adásvételi szerződés"] * affected
+    texts += ["Irodaterület bérleti szerződés"] * unaffected
+    texts += ["hibás szerződés"] * broken
+    return {uuid.uuid4(): text for text in texts}
+
+
+def test_parse_impact():
+    impact = parse_impact(AFFECTED)
+    assert impact["priority_level"] == "high"
+    assert impact["action_required"] == "Update clause 4"
+    assert impact["impact_description"].startswith("A 4. pont")
+    assert parse_impact(UNAFFECTED) is None
+    # Without the closing lines the result still needs review
+    assert parse_impact("Szabadszöveges elemzés.")["priority_level"] == "medium"
+
+
+@pytest.mark.asyncio
+async def test_batch_api_job_writes_impacts_per_contract():
+    documents = contracts(affected=3, unaffected=1, broken=1)
+    provider = MockBatchesProvider()
+    analyzer, store = make_analyzer(provider, documents, max_batch_requests=2)
+    change_id = uuid.uuid4()
+
+    job = await analyzer.submit(list(documents), change_id=change_id)
+    job = await analyzer.run(job.id)
+
+    assert job.status == JOB_COMPLETED
+    assert (job.total_items, job.succeeded_items, job.failed_items) == (5, 4, 1)
+    assert len(provider.batches) == 3
+    assert provider.calls == 0
+    request = provider.batches["msgbatch_0"]["requests"][0]
+    assert request["params"]["system"][-1]["cache_control"] == {"type": "ephemeral"}
+
+    affected = [contract_id for contract_id, text in documents.items() if text.startswith("Villamos")]
+    assert sorted(impact["contract_id"] for impact in store.impacts) == sorted(affected)
+    assert all(impact["change_id"] == change_id and impact["priority_level"] == "high" for impact in store.impacts)
+    analysis = store.analyses[job.analysis_id]
+    assert len(analysis["referenced_documents"]) == 3
+    assert "4 analysed, 1 failed" in analysis["impact_summary"]
+
+
+@pytest.mark.asyncio
+async def test_interrupted_job_resumes_without_double_counting():
+    documents = contracts(affected=5)
+    provider = MockBatchesProvider(fail_results_after=3)
+    analyzer, store = make_analyzer(provider, documents)
+    job = await analyzer.submit(list(documents))
+
+    with pytest.raises(ConnectionError):
+        await analyzer.run(job.id)
+    job = await store.get_job(job.id)
+    # Results flushed before the stream dropped are kept
+    assert job.status == JOB_RUNNING
+    assert job.succeeded_items == 2
+    assert len(store.impacts) == 2
+
+    # Restarted process: the same batch is polled again, not resubmitted
+    resumed_analyzer = BatchAnalyzer(analyzer.client, store, poll_interval=0, flush_size=2)
+    [job] = await resumed_analyzer.resume()
+    assert job.status == JOB_COMPLETED
+    assert len(provider.batches) == 1
+    assert (job.succeeded_items, job.failed_items) == (5, 0)
+    assert len(store.impacts) == 5
+    assert await resumed_analyzer.resume() == []
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_worker_pool_without_batch_api():
+    documents = contracts(affected=10, unaffected=2)
+    provider = MockBatchesProvider(available=False)
+    analyzer, store = make_analyzer(provider, documents, concurrency=3)
+
+    job = await analyzer.run((await analyzer.submit(list(documents))).id)
+    assert job.mode == MODE_WORKERS
+    assert job.status == JOB_COMPLETED
+    assert job.succeeded_items == 12
+    assert provider.calls == 12
+    assert provider.peak == 3
+    assert len(store.impacts) == 10
+    items = await store.items(job.id, [ITEM_SUCCEEDED])
+    assert all(item.token_usage["input_tokens"] == 100 for item in items)
+
+
+@pytest.mark.asyncio
+async def test_a_running_job_is_not_run_twice():
+    documents = contracts(affected=4)
+    provider = MockBatchesProvider(polls_until_ended=3)
+    analyzer, store = make_analyzer(provider, documents)
+    job = await analyzer.submit(list(documents))
+
+    first, second = await asyncio.gather(analyzer.run(job.id), analyzer.run(job.id), return_exceptions=True)
+    assert isinstance(second, BatchJobBusy)
+    assert first.status == JOB_COMPLETED and first.succeeded_items == 4
+    assert len(provider.batches) == 1
+    # The lease is released when the run ends
+    assert not (await store.get_job(job.id)).leased()
+
+
+@pytest.mark.asyncio
+async def test_interrupted_submissions_are_not_resubmitted():
+    documents = contracts(affected=3)
+    provider = MockBatchesProvider(lose_response=True)
+    analyzer, store = make_analyzer(provider, documents)
+    job = await analyzer.submit(list(documents))
+
+    with pytest.raises(ConnectionError):
+        await analyzer.run(job.id)
+    job = await analyzer.run(job.id)
+
+    # The batch was created but its id never stored: the items fail instead of being paid for twice
+    assert len(provider.batches) == 1
+    assert (job.status, job.succeeded_items, job.failed_items) == (JOB_COMPLETED, 0, 3)
+    assert all(item.error.startswith("Submission interrupted") for item in await store.items(job.id, [ITEM_ERRORED]))
+
+
+@pytest.mark.asyncio
+async def test_batch_submissions_are_charged_to_the_tenant_budget():
+    documents = contracts(affected=3)
+    provider = MockBatchesProvider(polls_until_ended=1)
+    analyzer, store = make_analyzer(provider, documents, max_tokens=1000)
+    analyzer.client.scheduler.set_budget("acme", 2500)
+    job = await analyzer.submit(list(documents), tenant="acme")
+
+    job = await analyzer.run(job.id)
+    # Two requests fit the budget; the third waits for a resume
+    assert job.status == JOB_RUNNING
+    assert job.error.startswith("Paused: token budget")
+    assert [len(batch["requests"]) for batch in provider.batches.values()] == [2]
+    assert job.succeeded_items == 2
+    assert analyzer.client.scheduler.report()["tenants"]["acme"]["used"] > 2000
+
+    analyzer.client.scheduler.set_budget("acme", None)
+    job = await analyzer.run(job.id)
+    assert (job.status, job.succeeded_items) == (JOB_COMPLETED, 3)
@@ -39,7 +39,7 @@ async def test_analyze_legal_document(mock_claude_client):
     
     assert "analysis" in result
     assert result["analysis"] == "Test analysis result"
-    assert result["model"] == "claude-3-sonnet-20240229"
+    assert result["model"] == "claude-3-5-sonnet-20241022"
     assert "token_usage" in result
 
 @pytest.mark.asyncio
@@ -61,3 +61,68 @@ async def test_answer_legal_question(mock_claude_client):
     assert "answer" in result
     assert result["answer"] == "Test analysis result"
     assert result["question"] == "What is Hungarian contract law?"
+
+
+class FakeStream:
+    """Stands in for the SDK's message stream manager and stream"""
+
+    def __init__(self, chunks, input_tokens=120, output_tokens=30):
+        self.chunks = chunks
+        self.current_message_snapshot = Mock(usage=Mock(input_tokens=input_tokens, output_tokens=0))
+        self.final = Mock(stop_reason="end_turn", usage=Mock(input_tokens=input_tokens, output_tokens=output_tokens))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    async def text_stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+    async def get_final_message(self):
+        return self.final
+
+
+@pytest.mark.asyncio
+async def test_stream_legal_answer(mock_claude_client):
+    """Streaming yields text deltas, then usage and timings"""
+    from src.energia_ai.core.metrics import get_metrics_registry
+
+    mock_claude_client.client.messages.stream = Mock(return_value=FakeStream(["A szerződés ", "érvényes."]))
+    tokens = get_metrics_registry().counter("llm_tokens_total")
+    before = tokens.value(operation="answer_question", kind="output")
+
+    events = [event async for event in mock_claude_client.stream_legal_answer(question="Érvényes?")]
+
+    assert [event["text"] for event in events[:-1]] == ["A szerződés ", "érvényes."]
+    done = events[-1]
+    assert done["type"] == "done"
+    assert done["question"] == "Érvényes?"
+    assert done["token_usage"] == {
+        "input_tokens": 120,
+        "cache_creation_input_tokens": 0,
+        "cache_read_input_tokens": 0,
+        "output_tokens": 30,
+    }
+    assert done["time_to_first_token_ms"] <= done["latency_ms"]
+    assert tokens.value(operation="answer_question", kind="output") == before + 30
+    assert mock_claude_client.client.messages.stream.call_args.kwargs["max_tokens"] == 3000
+
+
+@pytest.mark.asyncio
+async def test_stream_cancelled_accounts_input_tokens(mock_claude_client):
+    """A consumer leaving early still accounts the prompt tokens"""
+    from src.energia_ai.core.metrics import get_metrics_registry
+
+    mock_claude_client.client.messages.stream = Mock(return_value=FakeStream(["egy", "kettő", "három"]))
+    requests = get_metrics_registry().counter("llm_requests_total")
+    before = requests.value(operation="analyze_document", outcome="cancelled")
+
+    events = mock_claude_client.stream_legal_document_analysis(document_text="Teszt")
+    assert (await events.__anext__())["text"] == "egy"
+    await events.aclose()
+
+    assert requests.value(operation="analyze_document", outcome="cancelled") == before + 1
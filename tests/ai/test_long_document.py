@@ -0,0 +1,157 @@
+"""
+Tests for map-reduce analysis of long documents
+"""
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.ai.claude_client import ClaudeClient
+from src.energia_ai.ai.long_document import (
+    CHUNK_MAX_TOKENS, PREAMBLE, TEMPERATURE, LongDocumentAnalyzer, chunk_document, chunk_prompt, document_overview,
+    split_units,
+)
+from src.energia_ai.ai.scheduler import PRIORITY_BATCH
+from src.energia_ai.cache.llm_cache import LLMResponseCache, request_key
+from src.energia_ai.core.http import PROVIDER_ANTHROPIC, get_http_clients
+
+
+def build_document(sections: int) -> str:
+    filler = "Az engedélyes a Hivatal határozatában megállapított határidőn belül adatot szolgáltat. " * 12
+    body = "".join(f"{i}. § (1) Rendelkezés {i}. {filler}\n(2) Bekezdés.\n\n" for i in range(1, sections + 1))
+    return "2007. évi LXXXVI. törvény a villamos energiáról\n\n" + body + "1. melléklet a 2007. évi LXXXVI. törvényhez\n\nTáblázat."
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client("- notes", delay=0.01)
+
+
+def test_chunks_follow_structure_and_cover_the_document():
+    document = build_document(60)
+    units = split_units(document)
+    assert units[0][0] == PREAMBLE
+    assert units[1][0] == "1. §"
+    assert units[-1][0] == "1. melléklet"
+
+    chunks = chunk_document(document, max_chars=8000, min_chars=2000)
+    assert len(chunks) > 3
+    assert all(len(chunk.text) <= 8000 for chunk in chunks)
+    # Every chunk starts at a structural heading and nothing is lost between chunks
+    assert all(chunk.text.startswith(("2007.", *(f"{i}. §" for i in range(1, 61)), "1. melléklet")) for chunk in chunks)
+    assert "".join(chunk.text for chunk in chunks).replace("\n", "") == document.replace("\n", "")
+
+
+def test_amending_one_section_changes_one_chunk():
+    document = build_document(200)
+    amended = document.replace("\n57. § (1) Rendelkezés", "\n57. § (1) Módosított rendelkezés")
+    before = [chunk.digest for chunk in chunk_document(document, max_chars=8000, min_chars=2000)]
+    after = [chunk.digest for chunk in chunk_document(amended, max_chars=8000, min_chars=2000)]
+    assert len(before) == len(after)
+    assert sum(old != new for old, new in zip(before, after)) == 1
+
+
+@pytest.mark.asyncio
+async def test_map_reduce_bounds_concurrency_and_reuses_chunk_notes(client):
+    analyzer = LongDocumentAnalyzer(client, max_concurrency=3, cache=LLMResponseCache(), chunk_chars=8000, min_chunk_chars=2000, reduce_fan_in=4)
+    document = build_document(200)
+
+    result = await analyzer.analyze(document, "key_points")
+    messages = client.client.messages
+    assert messages.peak == 3
+    assert result["chunks_cached"] == 0
+    assert result["analysis_type"] == "key_points"
+    # Chunk calls, grouped merges and the final reduce in the requested format
+    assert len(messages.prompts) > result["chunks"] + 1
+    assert "Format as a bullet list" in messages.prompts[-1]
+    assert result["token_usage"]["input_tokens"] == 100 * len(messages.prompts)
+
+    messages.calls.clear()
+    amended = document.replace("\n57. § (1) Rendelkezés", "\n57. § (1) Módosított rendelkezés")
+    result = await analyzer.analyze(amended, "key_points")
+    assert result["chunks_cached"] == result["chunks"] - 1
+    assert sum("<part " in prompt for prompt in messages.prompts) == 1
+
+
+@pytest.mark.asyncio
+async def test_only_accepted_chunk_notes_are_cached_with_their_usage(client):
+    cache = LLMResponseCache()
+    analyzer = LongDocumentAnalyzer(client, cache=cache, chunk_chars=8000, min_chunk_chars=2000)
+    document = build_document(40)
+
+    client.client.messages.stop_reason = "max_tokens"
+    result = await analyzer.analyze(document, "summary")
+    assert result["chunks"] > 1
+    result = await analyzer.analyze(document, "summary")
+    assert result["chunks_cached"] == 0
+
+    client.client.messages.stop_reason = "end_turn"
+    await analyzer.analyze(document, "summary")
+    messages = client.client.messages
+    messages.calls.clear()
+    result = await analyzer.analyze(document, "summary")
+    assert result["chunks_cached"] == result["chunks"]
+    assert result["token_usage"]["input_tokens"] == 100 * len(messages.prompts)
+    chunk = chunk_document(document, 8000, 2000)[0]
+    key = request_key(
+        client.router.route("analyze_chunk").cache_model,
+        chunk_prompt(document_overview(document), chunk.label, chunk.text, "summary").fingerprint(),
+        max_tokens=CHUNK_MAX_TOKENS,
+        temperature=TEMPERATURE,
+    )
+    hit = await cache.get(key, "analyze_chunk")
+    assert (hit.usage["input_tokens"], hit.usage["output_tokens"]) == (100, 20)
+
+
+@pytest.mark.asyncio
+async def test_analyze_legal_document_delegates_long_documents(client):
+    client.long_document_chars = 10000
+    result = await client.analyze_legal_document(build_document(40), "summary")
+    assert result["chunks"] > 1
+
+    result = await client.analyze_legal_document("Rövid dokumentum", "summary")
+    assert "chunks" not in result
+
+
+@pytest.mark.asyncio
+async def test_streamed_long_documents_stream_the_reduce(client):
+    client.long_document_chars = 10000
+    document = build_document(40)
+    events = [event async for event in client.stream_legal_document_analysis(document, "summary")]
+
+    messages = client.client.messages
+    assert [event["type"] for event in events[:-1]] == ["delta"] * (len(events) - 1)
+    done = events[-1]
+    assert done["chunks"] > 1 and done["chunks_cached"] == 0
+    # Chunk calls and the streamed reduce are all charged
+    assert done["token_usage"]["input_tokens"] == 100 * len(messages.calls)
+    assert messages.prompts[-1].startswith("Below are notes on consecutive parts")
+    assert all(len(prompt) < len(document) for prompt in messages.prompts)
+
+
+@pytest.mark.asyncio
+async def test_long_documents_keep_the_callers_priority(client):
+    client.long_document_chars = 10000
+    priorities = []
+    complete = client.complete
+
+    async def recording(*args, **kwargs):
+        priorities.append(kwargs.get("priority"))
+        return await complete(*args, **kwargs)
+
+    client.complete = recording
+    await client.analyze_legal_document(build_document(40), "summary", priority=PRIORITY_BATCH)
+    assert len(priorities) > 2 and set(priorities) == {PRIORITY_BATCH}
+
+
+def test_closed_clients_leave_the_shared_http_client():
+    hooks = get_http_clients().get(PROVIDER_ANTHROPIC).event_hooks["response"]
+    before = len(hooks)
+    for _ in range(3):
+        with patch("src.energia_ai.ai.claude_client.AsyncAnthropic"):
+            ClaudeClient().close()
+    assert len(hooks) == before
@@ -0,0 +1,86 @@
+"""
+Tests for the cache-friendly prompt layout
+"""
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.ai.claude_client import ClaudeClient, token_usage
+from src.energia_ai.ai.prompts import CACHE_BREAKPOINT, analysis_prompt, question_prompt
+
+DOCUMENT = "1. § E törvény célja a villamosenergia-ellátás biztonságának megteremtése."
+
+
+def test_static_instructions_and_document_come_first():
+    summary = analysis_prompt(DOCUMENT, "summary")
+    compliance = analysis_prompt(DOCUMENT, "compliance", context="Kereskedelmi engedélyes")
+
+    # Identical cacheable prefix, different request tail
+    assert summary.system_blocks() == compliance.system_blocks()
+    assert summary.messages()[0]["content"][:-1] == compliance.messages()[0]["content"][:-1]
+    assert summary.request != compliance.request
+    assert "Kereskedelmi engedélyes" in compliance.request
+    assert DOCUMENT not in summary.system_blocks()[0]["text"]
+
+    assert summary.system_blocks()[-1]["cache_control"] == CACHE_BREAKPOINT
+    content = summary.messages()[0]["content"]
+    assert content[0]["cache_control"] == CACHE_BREAKPOINT
+    assert "cache_control" not in content[-1]
+    assert summary.fingerprint() != compliance.fingerprint()
+
+
+def test_question_goes_last_after_context_documents():
+    layout = question_prompt("Mi a célja?", ["Első dokumentum", "Második dokumentum"])
+    content = layout.messages()[0]["content"]
+    assert [block.get("cache_control") for block in content] == [None, CACHE_BREAKPOINT, None]
+    assert content[-1]["text"].endswith("Question: Mi a célja?")
+
+    bare = question_prompt("Mi a célja?")
+    assert len(bare.messages()[0]["content"]) == 1
+
+
+def test_token_usage_separates_cached_input():
+    usage = SimpleNamespace(input_tokens=40, output_tokens=300, cache_creation_input_tokens=None, cache_read_input_tokens=2100)
+    assert token_usage(usage) == {
+        "input_tokens": 40,
+        "cache_creation_input_tokens": 0,
+        "cache_read_input_tokens": 2100,
+        "output_tokens": 300,
+    }
+
+
+@pytest.mark.asyncio
+async def test_multiple_analysis_types_share_the_cached_prefix():
+    with patch("src.energia_ai.ai.claude_client.AsyncAnthropic") as mock_anthropic:
+        mock_client = Mock()
+        mock_anthropic.return_value = mock_client
+        responses = [
+            SimpleNamespace(
+                content=[SimpleNamespace(text=f"- Elemzés {n}")],
+                usage=SimpleNamespace(
+                    input_tokens=50,
+                    output_tokens=200,
+                    cache_creation_input_tokens=0 if n else 2000,
+                    cache_read_input_tokens=2000 if n else 0,
+                ),
+            )
+            for n in range(3)
+        ]
+        mock_client.messages.create = AsyncMock(side_effect=responses)
+        client = ClaudeClient()
+
+        results = await client.analyze_legal_document_types(DOCUMENT, ["summary", "key_points", "compliance"])
+
+    assert list(results) == ["summary", "key_points", "compliance"]
+    assert results["summary"]["token_usage"]["cache_creation_input_tokens"] == 2000
+    assert results["compliance"]["token_usage"]["cache_read_input_tokens"] == 2000
+
+    calls = mock_client.messages.create.call_args_list
+    prefixes = {(str(call.kwargs["system"]), str(call.kwargs["messages"][0]["content"][:-1])) for call in calls}
+    assert len(prefixes) == 1
@@ -0,0 +1,163 @@
+"""
+Tests for retrieval-augmented question answering
+"""
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.ai.rag import Candidate, Passage, RetrievalPipeline, _load_text, fuse, pack
+from src.energia_ai.storage.content_store import DocumentContentStore
+
+QUESTION = "Milyen határidővel kell bejelenteni a villamosenergia-kereskedelmi engedély módosítását?"
+LICENCE = "12. § (1) Az engedélyes a villamosenergia-kereskedelmi engedély módosítását 15 napon belül bejelenti."
+FEES = "30. § A felügyeleti díj mértéke évente változik."
+
+
+def prompt_text(call):
+    blocks = [block["text"] for message in call["messages"] for block in message["content"]]
+    return "\n".join(blocks)
+
+
+@pytest.mark.asyncio
+async def test_answers_cite_fused_and_packed_passages(make_client):
+    started = {"embed": asyncio.Event(), "lexical": asyncio.Event()}
+
+    async def embed(question):
+        started["embed"].set()
+        # Only returns once the lexical search is under way: the two must overlap
+        await asyncio.wait_for(started["lexical"].wait(), 1)
+        return [0.1, 0.2]
+
+    async def vector_search(embedding, limit, document_type):
+        return [{"id": "vet", "score": 0.9, "metadata": {"title": "VET", "legal_reference": "2007. évi LXXXVI. törvény"}}]
+
+    async def lexical_search(question, limit, document_type):
+        started["lexical"].set()
+        await asyncio.wait_for(started["embed"].wait(), 1)
+        return [
+            {"id": "fees", "score": 3.0, "source": {"title": "Díjrendelet", "content": FEES}},
+            {"id": "copy", "score": 2.0, "source": {"title": "VET másolat", "content": LICENCE}},
+        ]
+
+    async def load_text(document_id):
+        assert document_id == "vet"
+        return LICENCE
+
+    client = make_client("A módosítást 15 napon belül kell bejelenteni [1].", usage=(800, 60))
+    pipeline = RetrievalPipeline(client, embed, vector_search, lexical_search, load_text)
+    result = await pipeline.answer(QUESTION)
+
+    assert result["citations"] == [{
+        "index": 1, "document_id": "vet", "title": "VET", "legal_reference": "2007. évi LXXXVI. törvény",
+        "source_url": "", "passage": "12. §",
+    }]
+    metadata = result["metadata"]
+    assert (metadata["candidates"], metadata["passages"], metadata["duplicate_passages"]) == (3, 2, 1)
+    assert set(metadata["stage_latency_ms"]) == {
+        "embed", "vector_search", "lexical_search", "retrieve", "load", "rerank", "pack", "generate", "total"
+    }
+    [call] = client.client.messages.calls
+    text = prompt_text(call)
+    assert text.index('index="1" source="2007. évi LXXXVI. törvény, 12. §"') < text.index(FEES)
+    assert text.count(LICENCE) == 1
+    assert pipeline.report()["total"]["count"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_a_failing_retriever_leaves_the_other(make_client):
+    async def embed(question):
+        raise ConnectionError("embedding service down")
+
+    async def lexical_search(question, limit, document_type):
+        assert document_type == "law"
+        return [{"id": "vet", "score": 1.0, "source": {"title": "VET", "extracted_text": LICENCE}}]
+
+    async def unused(*args):
+        raise AssertionError("not expected")
+
+    client = make_client("15 napon belül [1][7].")
+    result = await RetrievalPipeline(client, embed, unused, lexical_search, unused).answer(QUESTION, document_type="law")
+    assert [citation["document_id"] for citation in result["citations"]] == ["vet"]
+    assert "vector_search" not in result["metadata"]["stage_latency_ms"]
+
+
+class StoredContents:
+    """Motor collection stand-in keeping the projection of every lookup"""
+
+    def __init__(self):
+        self.docs = {}
+        self.projections = []
+
+    async def find_one(self, query, projection=None):
+        self.projections.append(projection)
+        return self.docs.get(query["_id"])
+
+    async def update_one(self, query, update, upsert=False):
+        record = self.docs.setdefault(query["_id"], {"_id": query["_id"], "fields": {}})
+        for key, value in update["$set"].items():
+            record["fields"][key.split(".", 1)[1]] = value
+
+
+@pytest.mark.asyncio
+async def test_vector_hits_load_their_text_from_the_content_store():
+    contents = StoredContents()
+    with patch("src.energia_ai.storage.content_store.AsyncIOMotorGridFSBucket"):
+        store = DocumentContentStore(SimpleNamespace(document_contents=contents))
+    await store.save("vet", {"raw_content": "<html>VET</html>", "processed_content": LICENCE})
+    manager = SimpleNamespace(load_document_content=store.load)
+
+    async def get_manager():
+        return manager
+
+    with patch("src.energia_ai.storage.mongodb_manager.get_mongodb_manager", get_manager):
+        assert await _load_text("vet") == LICENCE
+    assert {key.split(".")[1] for key in contents.projections[-1]} == {"extracted_text", "processed_content", "raw_content"}
+
+
+def test_fusion_and_packing():
+    candidates = fuse(
+        [{"id": "a", "metadata": {}}, {"id": "b", "metadata": {}}],
+        [{"id": "b", "source": {"content": "B"}}, {"id": "c", "source": {}}],
+    )
+    assert [candidate.document_id for candidate in candidates] == ["b", "a", "c"]
+    assert candidates[0].text == "B"
+
+    document = Candidate(document_id="d")
+    passages = [
+        Passage(document, "1. §", "x" * 400),
+        Passage(document, "2. §", "y" * 4000),
+        Passage(document, "3. §", "z" * 40),
+        Passage(document, "4. §", "  " + "Z" * 40 + "\n"),
+    ]
+    # Too long for the budget: skipped, shorter passages after it still fit; reformatted copies are dropped
+    packed, duplicates, used = pack(passages, token_budget=200)
+    assert [passage.label for passage in packed] == ["1. §", "3. §"]
+    assert (duplicates, used) == (1, 112)
+
+
+def test_endpoint_retrieval_mode(api_client):
+    class FakeClaudeClient:
+        async def answer_with_retrieval(self, question, document_type=None):
+            return {
+                "answer": "15 nap [1].", "question": question, "model": "test-model",
+                "token_usage": {"input_tokens": 10}, "cached": None,
+                "citations": [{"index": 1, "document_id": "vet"}],
+                "metadata": {"stage_latency_ms": {"total": 12.5}},
+            }
+
+    http = api_client(FakeClaudeClient())
+
+    response = http.post("/ai/answer-question", json={"question": QUESTION, "retrieve": True})
+    assert response.status_code == 200
+    assert response.json()["citations"] == [{"index": 1, "document_id": "vet"}]
+    assert response.json()["metadata"]["stage_latency_ms"]["total"] == 12.5
+
+    response = http.post("/ai/answer-question", json={"question": QUESTION, "retrieve": True, "context_documents": ["x"]})
+    assert response.status_code == 422
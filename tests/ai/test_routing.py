@@ -0,0 +1,73 @@
+"""
+Tests for model tiering and cascade routing
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.ai.routing import TIER_FAST, TIER_STRONG, ModelRouter, cost
+
+FAST = "claude-3-haiku-20240307"
+STRONG = "claude-3-sonnet-20240229"
+
+
+def tiered(make_client, replies, routes=None):
+    return make_client(replies, tiers={TIER_FAST: FAST, TIER_STRONG: STRONG}, routes=routes, usage=(1000, 100))
+
+
+@pytest.mark.asyncio
+async def test_structured_tasks_stay_on_the_fast_tier(make_client):
+    client = tiered(make_client, {FAST: ("- Első pont\n- Második pont", "end_turn"), STRONG: ("Elemzés", "end_turn")})
+
+    key_points = await client.analyze_legal_document("Dokumentum", "key_points")
+    assert key_points["model"] == FAST
+    summary = await client.analyze_legal_document("Dokumentum", "summary")
+    assert summary["model"] == STRONG
+    assert client.client.messages.models == [FAST, STRONG]
+
+    report = client.router.report()
+    assert report["analyze_document:key_points"]["escalation_rate"] == 0
+    assert report["analyze_document:key_points"]["cost_usd"] == pytest.approx(cost(FAST, {"input_tokens": 1000, "output_tokens": 100}))
+    assert report["analyze_document"]["models"][STRONG]["calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_answers_failing_the_route_check_escalate(make_client):
+    client = tiered(make_client, {FAST: ("A dokumentum fő pontjai: határidők.", "end_turn"), STRONG: ("• Határidő", "end_turn")})
+
+    result = await client.analyze_legal_document("Dokumentum", "key_points")
+    assert result["analysis"] == "• Határidő"
+    assert client.client.messages.models == [FAST, STRONG]
+    assert client.router.report()["analyze_document:key_points"]["escalation_rate"] == 1.0
+    # Both tiers were billed
+    assert (result["token_usage"]["input_tokens"], result["token_usage"]["output_tokens"]) == (2000, 200)
+
+
+@pytest.mark.asyncio
+async def test_truncated_and_unsure_answers_escalate(make_client):
+    client = tiered(make_client, 
+        {FAST: ("Összefoglaló...", "max_tokens"), STRONG: ("Összefoglaló.\nConfidence: low", "end_turn")},
+        routes={"analyze_document:summary": "fast,strong"},
+    )
+    result = await client.analyze_legal_document("Dokumentum", "summary")
+    # The last tier answers even when unsure; the rejection is recorded
+    assert result["model"] == STRONG
+    assert client.client.messages.models == [FAST, STRONG]
+    assert client.router.stats["analyze_document:summary"]["escalations"] == 1
+
+    client.client.messages.replies[FAST] = ("Összefoglaló.", "end_turn")
+    result = await client.analyze_legal_document("Dokumentum", "summary")
+    assert result["model"] == FAST
+
+
+def test_routes_are_validated():
+    router = ModelRouter({TIER_FAST: FAST, TIER_STRONG: STRONG}, {"answer_question": "fast"})
+    assert router.route("answer_question").models == (FAST,)
+    assert router.route("analyze_document", "compliance").models == (STRONG,)
+    assert router.route("analyze_document", "key_points").cache_model == f"{FAST}+{STRONG}"
+    with pytest.raises(ValueError):
+        ModelRouter({TIER_FAST: FAST, TIER_STRONG: STRONG}, {"answer_question": "fast,huge"})
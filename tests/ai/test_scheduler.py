@@ -0,0 +1,194 @@
+"""
+Tests for the LLM scheduler against a simulated rate-limited Messages API
+"""
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+import anthropic
+import httpx
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.ai.scheduler import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    LLMRateLimited,
+    LLMScheduler,
+    TokenBudgetExceeded,
+)
+
+API_URL = "https://api.anthropic.com/v1/messages"
+
+
+def api_error(error_class, status, headers=None):
+    response = httpx.Response(status, headers=headers or {}, request=httpx.Request("POST", API_URL))
+    return error_class(f"status {status}", response=response, body=None)
+
+
+class FakeRateLimitedServer:
+    """Messages API stand-in with fixed-window request and token limits, reported in response headers"""
+
+    def __init__(self, requests_per_window, tokens_per_window, window=0.3, latency=0.01, on_response=None):
+        self.requests_per_window = requests_per_window
+        self.tokens_per_window = tokens_per_window
+        self.window = window
+        self.latency = latency
+        self.on_response = on_response
+        self.window_start = time.monotonic()
+        self.requests = 0
+        self.tokens = 0
+        self.served = 0
+        self.rejected = 0
+
+    def _roll(self, now):
+        if now - self.window_start >= self.window:
+            self.window_start += (now - self.window_start) // self.window * self.window
+            self.requests = 0
+            self.tokens = 0
+
+    def _headers(self, now):
+        reset_in = self.window_start + self.window - now
+        reset = datetime.fromtimestamp(time.time() + reset_in, tz=timezone.utc).isoformat()
+        return {
+            "anthropic-ratelimit-requests-limit": str(self.requests_per_window),
+            "anthropic-ratelimit-requests-remaining": str(self.requests_per_window - self.requests),
+            "anthropic-ratelimit-requests-reset": reset,
+            "anthropic-ratelimit-tokens-limit": str(self.tokens_per_window),
+            "anthropic-ratelimit-tokens-remaining": str(max(0, self.tokens_per_window - self.tokens)),
+            "anthropic-ratelimit-tokens-reset": reset,
+        }
+
+    async def create(self, **kwargs):
+        now = time.monotonic()
+        self._roll(now)
+        text = "".join(block["text"] for block in kwargs["system"])
+        text += "".join(block["text"] for block in kwargs["messages"][0]["content"])
+        input_tokens, output_tokens = len(text) // 4 + 1, 20
+        headers = self._headers(now)
+        if self.requests >= self.requests_per_window or self.tokens + input_tokens > self.tokens_per_window:
+            self.rejected += 1
+            headers["retry-after"] = f"{self.window_start + self.window - now:.3f}"
+            if self.on_response:
+                self.on_response(headers)
+            raise api_error(anthropic.RateLimitError, 429, headers)
+        self.requests += 1
+        self.tokens += input_tokens + output_tokens
+        headers = self._headers(now)
+        await asyncio.sleep(self.latency)
+        if self.on_response:
+            self.on_response(headers)
+        self.served += 1
+        usage = SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens)
+        return SimpleNamespace(content=[SimpleNamespace(text="Válasz.")], usage=usage)
+
+
+@pytest.mark.asyncio
+async def test_bursts_are_paced_by_rate_limit_headers(make_client):
+    scheduler = LLMScheduler(max_concurrency=10, base_delay=0.05, rng=random.Random(1))
+    server = FakeRateLimitedServer(requests_per_window=5, tokens_per_window=100_000)
+    server.on_response = scheduler.observe
+    client = make_client(messages=server, scheduler=scheduler)
+
+    results = await asyncio.gather(*(client.answer_legal_question(f"Kérdés {n}?") for n in range(30)))
+    assert all(result["answer"] == "Válasz." for result in results)
+    assert server.served == 30
+    # Only the opening burst, sent before any limits were known, can draw 429s
+    assert server.rejected <= 10 - 5
+
+    # A naive client firing the same burst is mostly rejected
+    naive = FakeRateLimitedServer(requests_per_window=5, tokens_per_window=100_000)
+    outcomes = await asyncio.gather(
+        *(naive.create(system=[{"text": "s"}], messages=[{"content": [{"text": "q"}]}]) for _ in range(30)),
+        return_exceptions=True,
+    )
+    assert sum(isinstance(outcome, anthropic.RateLimitError) for outcome in outcomes) == 25
+
+
+@pytest.mark.asyncio
+async def test_interactive_requests_overtake_queued_batch_work():
+    scheduler = LLMScheduler(max_concurrency=1)
+    finished = []
+
+    async def call(name, priority):
+        async def send():
+            await asyncio.sleep(0.01)
+            finished.append(name)
+            return name
+        return await scheduler.run(send, "test", priority=priority)
+
+    batch = [asyncio.create_task(call(f"batch {n}", PRIORITY_BATCH)) for n in range(5)]
+    await asyncio.sleep(0)
+    interactive = asyncio.create_task(call("question", PRIORITY_INTERACTIVE))
+    await asyncio.gather(*batch, interactive)
+    # The first batch call was already running; the question goes next
+    assert finished[:2] == ["batch 0", "question"]
+    assert scheduler.report()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_tenant_token_budgets_are_enforced_per_tenant():
+    scheduler = LLMScheduler(budget_window=60.0)
+    scheduler.set_budget("acme", 400)
+
+    async def send():
+        return SimpleNamespace(tokens=150)
+
+    def run(tenant):
+        return scheduler.run(send, "test", tenant=tenant, input_tokens=100, max_tokens=100, usage=lambda r: r.tokens)
+
+    await run("acme")
+    await run("acme")
+    # 300 spent; the next request reserves 200 before knowing it will use 150
+    with pytest.raises(TokenBudgetExceeded) as excinfo:
+        await run("acme")
+    assert 0 < excinfo.value.retry_after <= 60.0
+    await run("other")  # unbudgeted tenants are not affected
+    assert scheduler.report()["tenants"]["acme"] == {"budget": 400, "used": 300}
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried_with_backoff():
+    scheduler = LLMScheduler(max_retries=3, base_delay=0.01, rng=random.Random(3))
+    calls = []
+
+    async def overloaded_twice():
+        calls.append(time.monotonic())
+        if len(calls) <= 2:
+            raise api_error(anthropic.InternalServerError, 529)
+        return "ok"
+
+    assert await scheduler.run(overloaded_twice, "test") == "ok"
+    assert len(calls) == 3
+
+    async def rate_limited():
+        raise api_error(anthropic.RateLimitError, 429, {"retry-after": "0.02"})
+
+    scheduler.max_retries = 1
+    with pytest.raises(LLMRateLimited):
+        await scheduler.run(rate_limited, "test")
+
+    async def bad_request():
+        calls.append(time.monotonic())
+        raise api_error(anthropic.BadRequestError, 400)
+
+    calls.clear()
+    with pytest.raises(anthropic.BadRequestError):
+        await scheduler.run(bad_request, "test")
+    assert len(calls) == 1
+
+
+def test_rate_limited_requests_get_429_with_retry_after(api_client):
+    class BudgetSpentClient:
+        async def answer_legal_question(self, question, context_documents=None):
+            raise TokenBudgetExceeded("Token budget of tenant default exceeded", 12.3)
+
+    response = api_client(BudgetSpentClient()).post("/ai/answer-question", json={"question": "Mi a határidő?"})
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "13"
@@ -0,0 +1,61 @@
+"""
+Tests for the Server-Sent Events variants of the /ai endpoints
+"""
+import json
+
+
+class FakeClaudeClient:
+    model = "test-model"
+
+    def __init__(self, fail_after_first=False, fail_at_start=False):
+        self.fail_after_first = fail_after_first
+        self.fail_at_start = fail_at_start
+
+    async def stream_legal_answer(self, question, context_documents=None):
+        if self.fail_at_start:
+            raise RuntimeError("overloaded")
+        yield {"type": "delta", "text": "Igen, "}
+        if self.fail_after_first:
+            raise RuntimeError("connection reset")
+        yield {"type": "delta", "text": "érvényes."}
+        yield {
+            "type": "done",
+            "model": self.model,
+            "question": question,
+            "token_usage": {"input_tokens": 10, "output_tokens": 4},
+            "time_to_first_token_ms": 5.0,
+            "latency_ms": 9.0,
+        }
+
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        name, data = block.split("\n")
+        events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def test_answer_question_stream_emits_deltas_and_usage(api_client):
+    client = api_client(FakeClaudeClient())
+    response = client.post("/ai/answer-question/stream", json={"question": "Érvényes?"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+    assert [name for name, _ in events] == ["delta", "delta", "done"]
+    assert "".join(data["text"] for name, data in events if name == "delta") == "Igen, érvényes."
+    assert events[-1][1]["token_usage"] == {"input_tokens": 10, "output_tokens": 4}
+
+
+def test_stream_errors_before_and_after_first_event(api_client):
+    response = api_client(FakeClaudeClient(fail_at_start=True)).post(
+        "/ai/answer-question/stream", json={"question": "Érvényes?"}
+    )
+    assert response.status_code == 500
+
+    response = api_client(FakeClaudeClient(fail_after_first=True)).post(
+        "/ai/answer-question/stream", json={"question": "Érvényes?"}
+    )
+    assert response.status_code == 200
+    assert [name for name, _ in parse_events(response.text)] == ["delta", "error"]
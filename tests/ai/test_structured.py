@@ -0,0 +1,99 @@
+"""
+Tests for schema-validated structured outputs
+"""
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.agents.task_understanding_agent import TaskUnderstandingAgent
+from src.energia_ai.ai.prompts import PromptLayout
+from src.energia_ai.ai.routing import TIER_FAST, TIER_STRONG
+from src.energia_ai.ai.structured import RiskAssessment, StructuredOutputError, repair
+
+FAST = "claude-3-haiku-20240307"
+STRONG = "claude-3-sonnet-20240229"
+RISK = {"description": "Késedelmi kötbér", "likelihood": "medium", "impact": "high"}
+
+
+def tool_call(payload):
+    return [SimpleNamespace(type="tool_use", id="toolu_1", name="tool", input=payload)]
+
+
+def text(payload):
+    return [SimpleNamespace(type="text", text=payload)]
+
+
+def scripted(make_client, script):
+    return make_client(script, tiers={TIER_FAST: FAST, TIER_STRONG: STRONG}, usage=(500, 50), stop_reason="tool_use")
+
+
+@pytest.mark.asyncio
+async def test_key_points_come_from_a_forced_tool_call(make_client):
+    client = scripted(make_client, {FAST: [tool_call({"points": ["Bejelentési kötelezettség (12. §)", "30 napos határidő"]})]})
+
+    points = await client.extract_key_points("Dokumentum")
+    assert points == ["Bejelentési kötelezettség (12. §)", "30 napos határidő"]
+    [call] = client.client.messages.calls
+    assert call["model"] == FAST
+    assert call["tool_choice"] == {"type": "tool", "name": "key_points"}
+    assert call["tools"][0]["input_schema"]["required"] == ["points"]
+
+
+@pytest.mark.asyncio
+async def test_near_misses_are_repaired_locally(make_client):
+    findings = [{"requirement": "Adatszolgáltatás", "status": "Non-compliant", "action_required": "Bejelentés"}]
+    client = scripted(make_client, {STRONG: [tool_call({"findings": json.dumps(findings), "summary": "Hiányos."})]})
+
+    result = await client.extract_compliance_findings("Dokumentum")
+    assert result["findings"][0]["status"] == "non_compliant"
+    assert len(client.client.messages.calls) == 1
+    assert client.structured.report()["compliance_findings"]["local_repairs"] == 1
+
+    assert repair({"risks": "- a\n- b", "overall_risk": "HIGH"}, RiskAssessment) == {"risks": ["a", "b"], "overall_risk": "high"}
+
+
+@pytest.mark.asyncio
+async def test_only_failed_fields_are_asked_again(make_client):
+    client = scripted(make_client, {STRONG: [
+        tool_call({"risks": [RISK], "overall_risk": "catastrophic"}),
+        tool_call({"overall_risk": "high"}),
+    ]})
+
+    result = await client.assess_risks("Dokumentum")
+    assert result["risks"][0]["description"] == "Késedelmi kötbér"
+    assert result["overall_risk"] == "high"
+
+    retry = client.client.messages.calls[1]
+    assert list(retry["tools"][0]["input_schema"]["properties"]) == ["overall_risk"]
+    feedback = retry["messages"][-1]["content"][0]
+    assert feedback["type"] == "tool_result" and feedback["is_error"]
+    assert "overall_risk" in feedback["content"]
+    stats = client.structured.report()["risks"]
+    assert (stats["reasks"], stats["succeeded"], stats["success_rate"]) == (1, 1, 1.0)
+
+
+@pytest.mark.asyncio
+async def test_plans_escalate_when_the_fast_tier_keeps_failing(make_client):
+    plan = {"plan": {"steps": [{"agent": "information_retrieval_agent", "query": "villamosenergia-törvény"}]}}
+    client = scripted(make_client, {
+        FAST: [text("Íme a terv."), tool_call({"plan": {"steps": []}}), tool_call({"plan": {"steps": [{"agent": "x"}]}})],
+        STRONG: [tool_call(plan)],
+    })
+
+    result = await TaskUnderstandingAgent(client).execute("Keresd meg a villamosenergia-törvényt")
+    assert result.status == "completed"
+    assert result.output == plan
+    assert result.metadata == {"model": STRONG, "retries": 2}
+    assert [call["model"] for call in client.client.messages.calls] == [FAST, FAST, FAST, STRONG]
+    assert client.router.report()["plan_task"]["escalation_rate"] == 1.0
+
+    client = scripted(make_client, {FAST: [text("?")] * 3, STRONG: [text("?")] * 3})
+    with pytest.raises(StructuredOutputError):
+        await client.structured.extract("plan", PromptLayout(system=[], request="Terv"), "plan_task")
+    assert client.structured.report()["plan"]["failed"] == 1
@@ -0,0 +1,131 @@
+"""
+Tests for the exact and semantic LLM response cache
+"""
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.ai.claude_client import ClaudeClient
+from src.energia_ai.cache.llm_cache import (
+    TIER_EXACT,
+    TIER_SEMANTIC,
+    LLMResponseCache,
+    MemoryStore,
+    citation_fingerprint,
+    context_fingerprint,
+    request_key,
+)
+
+VOCABULARY = ["villamos", "energia", "engedély", "szerződés", "felmondás", "határidő"]
+
+
+async def bag_of_words(text):
+    """Tiny deterministic embedder: word counts over a fixed vocabulary"""
+    words = text.replace("?", " ").split()
+    return [float(sum(word.startswith(term) for word in words)) for term in VOCABULARY]
+
+
+def make_cache(**kwargs):
+    return LLMResponseCache(MemoryStore(), bag_of_words, semantic_threshold=0.9, **kwargs)
+
+
+USAGE = {"input_tokens": 900, "output_tokens": 100}
+
+
+@pytest.mark.asyncio
+async def test_exact_and_semantic_tiers():
+    cache = make_cache()
+    question = "Kell-e engedély villamos energia kereskedéshez?"
+    scope = ("tenant-a", "answer_question", "-")
+    key = request_key("model", f"prompt {question}", max_tokens=3000, temperature=0.2)
+    await cache.put(key, {"text": "Igen."}, USAGE, semantic_text=question, scope=scope)
+
+    exact = await cache.get(key, "answer_question", semantic_text=question, scope=scope)
+    assert exact.tier == TIER_EXACT and exact.response["text"] == "Igen."
+
+    rephrased = "Villamos energia kereskedéshez kell-e engedély"
+    other_key = request_key("model", f"prompt {rephrased}", max_tokens=3000, temperature=0.2)
+    semantic = await cache.get(other_key, "answer_question", semantic_text=rephrased, scope=scope)
+    assert semantic.tier == TIER_SEMANTIC and semantic.similarity >= 0.9
+
+    # Other tenants and unrelated questions miss
+    assert await cache.get(other_key, "answer_question", semantic_text=rephrased, scope=("tenant-b",) + scope[1:]) is None
+    assert await cache.get("x", "answer_question", semantic_text="Mi a felmondási határidő?", scope=scope) is None
+
+    report = cache.report()
+    assert report["exact_hits"] == 1 and report["semantic_hits"] == 1
+    assert report["tokens_saved"] == 2000
+    assert report["hit_rate"] == pytest.approx(0.5)
+
+
+@pytest.mark.asyncio
+async def test_ttl_and_source_invalidation():
+    cache = make_cache()
+    scope = ("t", "answer_question", "-")
+    await cache.put("a", {"text": "A"}, USAGE, semantic_text="villamos energia", scope=scope, sources=["eli/2007/86"])
+    await cache.put("b", {"text": "B"}, USAGE, sources=["eli/2011/5"])
+    await cache.put("c", {"text": "C"}, USAGE, ttl=-1)
+
+    assert await cache.get("c", "op") is None
+    assert await cache.invalidate_sources(["eli/2007/86"]) == 1
+    assert await cache.get("a", "op", semantic_text="villamos energia", scope=scope) is None
+    assert cache.report()["semantic_entries"] == 0
+    assert (await cache.get("b", "op")).response["text"] == "B"
+
+
+@pytest.fixture
+def cached_client():
+    with patch("src.energia_ai.ai.claude_client.AsyncAnthropic") as mock_anthropic:
+        mock_client = Mock()
+        mock_anthropic.return_value = mock_client
+        message = Mock()
+        message.content = [Mock(text="A 2007. évi LXXXVI. törvény szerint engedély kell.")]
+        message.usage = Mock(input_tokens=900, output_tokens=100)
+        mock_client.messages.create = AsyncMock(return_value=message)
+        client = ClaudeClient(cache=make_cache())
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_claude_client_serves_repeats_from_cache(cached_client):
+    first = await cached_client.answer_legal_question("Kell-e engedély villamos energia kereskedéshez?")
+    again = await cached_client.answer_legal_question("Villamos energia kereskedéshez kell-e engedély?")
+    assert first["cached"] is None
+    assert again["cached"] == TIER_SEMANTIC
+    assert again["answer"] == first["answer"]
+    assert cached_client.client.messages.create.await_count == 1
+
+    # Different context documents never share semantic answers
+    other = await cached_client.answer_legal_question(
+        "Villamos energia kereskedéshez kell-e engedély?", context_documents=["Belső szabályzat"]
+    )
+    assert other["cached"] is None
+    assert context_fingerprint(["Belső szabályzat"]) != context_fingerprint(None)
+
+    # The answer cites the Electricity Act, so publishing an amendment to it invalidates the entries
+    assert await cached_client.cache.invalidate_sources(["http://www.njt.hu/eli/hu/torveny/2007/LXXXVI"]) == 2
+    refreshed = await cached_client.answer_legal_question("Kell-e engedély villamos energia kereskedéshez?")
+    assert refreshed["cached"] is None
+    assert cached_client.client.messages.create.await_count == 3
+
+    await cached_client.analyze_legal_document("Szöveg", analysis_type="summary")
+    repeat = await cached_client.analyze_legal_document("Szöveg", analysis_type="summary")
+    assert repeat["cached"] == TIER_EXACT
+
+
+@pytest.mark.asyncio
+async def test_questions_about_different_sections_never_share_answers(cached_client):
+    first = await cached_client.answer_legal_question("Mit ír elő a 2007. évi LXXXVI. törvény 12. § a villamos energia engedély kapcsán?")
+    other = await cached_client.answer_legal_question("Mit ír elő a 2007. évi LXXXVI. törvény 13. § a villamos energia engedély kapcsán?")
+    again = await cached_client.answer_legal_question("A villamos energia engedély kapcsán mit ír elő a 2007. évi LXXXVI. törvény 12. §?")
+    assert (first["cached"], other["cached"], again["cached"]) == (None, None, TIER_SEMANTIC)
+    assert cached_client.client.messages.create.await_count == 2
+
+    assert citation_fingerprint("Vet. 12. § (1) bekezdés") != citation_fingerprint("Vet. 12. § (2) bekezdés")
+    assert citation_fingerprint("12. §") != citation_fingerprint("13. §")
+    assert citation_fingerprint("Kell-e engedély?") == "-"
@@ -0,0 +1,85 @@
+"""
+Tests for the shared outbound HTTP clients
+"""
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from anthropic import AsyncAnthropic
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.config.settings import Settings
+from src.energia_ai.core.http import PROVIDER_ANTHROPIC, HTTPClients
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_requests_reuse_pooled_connections(server_url):
+    clients = HTTPClients(Settings(http_max_connections=4, http_transport_retries=1))
+    client = clients.get("test")
+    assert clients.get("test") is client
+
+    seen = []
+
+    async def hook(response):
+        seen.append(response.status_code)
+
+    clients.add_response_hook("test", hook)
+    clients.add_response_hook("test", hook)
+    for _ in range(5):
+        response = await client.get(f"{server_url}/v1/embeddings")
+        assert response.json() == {"ok": True}
+
+    report = clients.report()["test"]
+    assert report["requests"] == 5
+    assert report["connections_opened"] == 1
+    assert report["connection_reuse_rate"] == 0.8
+    assert report["latency"]["count"] == 5
+    assert seen == [200] * 5
+    clients.remove_response_hook("test", hook)
+    await client.get(f"{server_url}/v1/embeddings")
+    assert seen == [200] * 5
+
+    await clients.close()
+    assert client.is_closed
+    assert clients.get("test") is not client
+    await clients.close()
+
+
+@pytest.mark.asyncio
+async def test_provider_clients_fit_their_sdk():
+    clients = HTTPClients(Settings())
+    http_client = clients.get(PROVIDER_ANTHROPIC)
+    # The SDK accepts the shared client (and its transport) as its own
+    with patch.dict("os.environ", {"ANTHROPIC_API_KEY": "test-key"}):
+        assert AsyncAnthropic(http_client=http_client, max_retries=0)._client is http_client
+    await clients.close()
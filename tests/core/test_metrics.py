@@ -0,0 +1,33 @@
+"""
+Tests for the in-process metrics registry
+"""
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.core.metrics import MetricsRegistry
+
+def test_counters_and_histograms_are_labelled():
+    """Values are tracked separately per label set"""
+    registry = MetricsRegistry()
+    registry.counter("requests").inc(engine="primary")
+    registry.counter("requests").inc(2, engine="replica")
+    for value in range(1, 101):
+        registry.histogram("latency").observe(value / 100, route="search")
+    
+    assert registry.counter("requests").value(engine="replica") == 2
+    summary = registry.histogram("latency").summary(route="search")
+    assert summary["count"] == 100
+    assert summary["min"] == 0.01 and summary["max"] == 1.0
+    assert 0.5 <= summary["p50"] <= 0.52
+
+def test_snapshot_evaluates_collectors_and_survives_failures():
+    """Pull-style collectors run on snapshot; a failing one is skipped"""
+    registry = MetricsRegistry()
+    registry.register_collector("pool", lambda: {"checked_out": 3})
+    registry.register_collector("broken", lambda: 1 / 0)
+    
+    snapshot = registry.snapshot()
+    assert snapshot["collectors"] == {"pool": {"checked_out": 3}}
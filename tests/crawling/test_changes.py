@@ -0,0 +1,152 @@
+"""
+Tests for conditional re-crawls and content-hash change detection
+"""
+import sys
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.crawling.changes import ChangeTracker
+from src.energia_ai.crawling.fetcher import HttpFetcher, TieredFetcher
+from src.energia_ai.crawling.frontier import CrawlFrontier
+from src.energia_ai.crawling.scheduler import CrawlScheduler
+
+PAGE = "<html><body><h1>2007. évi LXXXVI. törvény</h1><p>{text}</p></body></html>"
+
+
+@pytest_asyncio.fixture
+async def server():
+    state = {"text": "eredeti szöveg", "requests": 0}
+
+    async def with_validators(request):
+        state["requests"] += 1
+        etag = f'"{hash(state["text"]) & 0xffffffff:x}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(text=PAGE.format(text=state["text"]), content_type="text/html", headers={"ETag": etag})
+
+    async def without_validators(request):
+        state["requests"] += 1
+        return web.Response(text=PAGE.format(text=state["text"]), content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/etag", with_validators)
+    app.router.add_get("/plain", without_validators)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    state["base_url"] = f"http://127.0.0.1:{runner.addresses[0][1]}"
+    yield state
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_short_circuits_unchanged_pages(server):
+    tracker = ChangeTracker()
+    fetcher = TieredFetcher(HttpFetcher(), tracker=tracker)
+    url = f"{server['base_url']}/etag"
+    try:
+        first = await fetcher.fetch(url)
+        fetcher.commit(url, first)
+        second = await fetcher.fetch(url)
+        server["text"] = "módosított szöveg"
+        third = await fetcher.fetch(url)
+    finally:
+        await fetcher.close()
+
+    assert first.changed and first.status == 200
+    assert second.not_modified and not second.changed and second.html == ""
+    assert third.changed and "módosított" in third.html
+    assert tracker.stats.new == 1
+    assert tracker.stats.not_modified == 1
+    assert tracker.stats.changed == 1
+    assert tracker.stats.bytes_saved == first.size
+    assert tracker.stats.documents_skipped == 1
+
+
+@pytest.mark.asyncio
+async def test_body_hash_detects_unchanged_pages_without_validators(server):
+    tracker = ChangeTracker()
+    fetcher = TieredFetcher(HttpFetcher(), tracker=tracker)
+    url = f"{server['base_url']}/plain"
+    try:
+        first = await fetcher.fetch(url)
+        fetcher.commit(url, first)
+        second = await fetcher.fetch(url)
+        listing = await fetcher.fetch(url, conditional=False)
+    finally:
+        await fetcher.close()
+
+    assert first.changed
+    assert not second.changed and second.status == 200
+    assert listing.changed
+    assert tracker.stats.unchanged == 1
+    assert tracker.stats.bytes_saved == 0
+    assert tracker.stats.bytes_downloaded == first.size + second.size
+
+
+@pytest.mark.asyncio
+async def test_pages_failing_processing_are_processed_on_retry(server):
+    tracker = ChangeTracker()
+    fetcher = TieredFetcher(HttpFetcher(), tracker=tracker)
+    frontier = CrawlFrontier(retry_base_delay=0)
+    url = f"{server['base_url']}/etag"
+    frontier.add([url], depth=1)
+    processed = []
+    failures = {"indexing": 1}
+
+    async def worker(entry):
+        result = await fetcher.fetch(entry.url)
+        if not result.changed:
+            return []
+        if failures["indexing"]:
+            failures["indexing"] -= 1
+            raise RuntimeError("index unavailable")
+        processed.append(result.html)
+        fetcher.commit(entry.url, result)
+        return []
+
+    try:
+        stats = await CrawlScheduler(frontier, worker, name="changes").run()
+        # Processed now, so the next visit is answered with 304 and skipped
+        again = await fetcher.fetch(url)
+    finally:
+        await fetcher.close()
+        frontier.close()
+
+    assert (stats.retried, stats.processed) == (1, 1)
+    assert len(processed) == 1 and "eredeti" in processed[0]
+    assert tracker.stats.new == 2
+    assert again.not_modified and not again.changed
+    assert server["requests"] == 3
+
+
+def test_validators_persist_between_trackers(tmp_path):
+    from src.energia_ai.crawling.fetcher import FetchResult
+
+    path = str(tmp_path / "validators.sqlite")
+    result = FetchResult(
+        url="https://njt.hu/jogszabaly/2007-86-00-00",
+        status=200,
+        html="<html></html>",
+        tier="http",
+        headers={"etag": '"abc"', "last-modified": "Wed, 01 Jan 2025 00:00:00 GMT"},
+        content=b"<html></html>",
+    )
+    tracker = ChangeTracker(path)
+    assert tracker.request_headers(result.url) == {}
+    tracker.observe(result.url, result)
+    tracker.close()
+
+    reopened = ChangeTracker(path)
+    assert reopened.request_headers(result.url) == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT",
+    }
+    reopened.close()
@@ -0,0 +1,95 @@
+"""
+Tests for the tiered HTTP/browser fetcher against a local fixture server
+"""
+import sys
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.crawling.fetcher import (
+    TIER_BROWSER,
+    TIER_HTTP,
+    FetchResult,
+    HttpFetcher,
+    TieredFetcher,
+    needs_javascript,
+    url_pattern,
+)
+
+SERVER_RENDERED = (
+    "<html><head><title>2007. évi LXXXVI. törvény</title><script>var x = 1;</script></head><body>"
+    + "<h1>2007. évi LXXXVI. törvény a villamos energiáról</h1>"
+    + "<p>1. § E törvény célja a villamosenergia-piac működésének szabályozása.</p>" * 5
+    + "</body></html>"
+)
+JS_SHELL = (
+    '<html><head><script src="/static/app.js"></script></head>'
+    '<body><div id="root"></div><noscript>Please enable JavaScript</noscript></body></html>'
+)
+
+
+@pytest_asyncio.fixture
+async def base_url():
+    async def handle(request):
+        if request.path.startswith("/spa/"):
+            return web.Response(text=JS_SHELL, content_type="text/html")
+        return web.Response(text=SERVER_RENDERED, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    yield f"http://127.0.0.1:{runner.addresses[0][1]}"
+    await runner.cleanup()
+
+
+def test_needs_javascript_heuristics():
+    assert not needs_javascript(SERVER_RENDERED)
+    assert needs_javascript(JS_SHELL)
+    assert needs_javascript(SERVER_RENDERED, required_markers=['class="jogszabaly"'])
+    assert needs_javascript("<html><body><p>Betöltés...</p><script>" + "x" * 5000 + "</script></body></html>")
+
+
+def test_url_pattern_generalizes_ids_and_last_segment():
+    assert url_pattern("https://NJT.hu/jogszabaly/2007-86-00-00") == url_pattern("https://njt.hu/jogszabaly/2013-5-00-00")
+    assert url_pattern("https://njt.hu/jogszabaly/2007-86-00-00") == "njt.hu/jogszabaly/*"
+    assert url_pattern("https://njt.hu/spa/view") != url_pattern("https://njt.hu/jogszabaly/x")
+
+
+@pytest.mark.asyncio
+async def test_escalates_shells_to_browser_and_remembers_pattern(base_url):
+    rendered = []
+
+    async def browser(url):
+        rendered.append(url)
+        return FetchResult(url=url, status=200, html=SERVER_RENDERED, tier=TIER_BROWSER)
+
+    fetcher = TieredFetcher(HttpFetcher(), browser=browser)
+    try:
+        first = await fetcher.fetch(f"{base_url}/jogszabaly/2007-86-00-00")
+        shell = await fetcher.fetch(f"{base_url}/spa/1")
+        remembered = await fetcher.fetch(f"{base_url}/spa/2")
+    finally:
+        await fetcher.close()
+
+    assert first.tier == TIER_HTTP and "villamos energiáról" in first.html
+    assert shell.tier == remembered.tier == TIER_BROWSER
+    assert rendered == [f"{base_url}/spa/1", f"{base_url}/spa/2"]
+    assert fetcher.decisions[url_pattern(f"{base_url}/spa/2")] == TIER_BROWSER
+
+
+@pytest.mark.asyncio
+async def test_without_browser_http_result_is_returned(base_url):
+    fetcher = TieredFetcher(HttpFetcher())
+    try:
+        result = await fetcher.fetch(f"{base_url}/spa/1")
+    finally:
+        await fetcher.close()
+    assert result.tier == TIER_HTTP and result.status == 200
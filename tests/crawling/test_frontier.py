@@ -0,0 +1,76 @@
+"""
+Tests for the persistent crawl frontier
+"""
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.crawling.frontier import CrawlFrontier, url_host
+
+
+def test_add_deduplicates_and_claim_respects_priority_and_per_host_limit():
+    frontier = CrawlFrontier()
+    assert frontier.add(["http://a.hu/1", "http://a.hu/2", "http://a.hu/3", "http://b.hu/1"]) == 4
+    assert frontier.add(["http://a.hu/1", "http://b.hu/2"], priority=5) == 1
+    
+    claimed = frontier.claim(10, per_host=2)
+    assert [e.url for e in claimed] == ["http://b.hu/2", "http://a.hu/1", "http://a.hu/2", "http://b.hu/1"]
+    assert frontier.stats() == {"pending": 1, "in_progress": 4, "done": 0, "failed": 0}
+    assert frontier.claim(10, exclude_hosts=["a.hu"]) == []
+    assert [e.url for e in frontier.claim(10)] == ["http://a.hu/3"]
+    assert url_host("http://Localhost:8080/x") == "localhost:8080"
+
+
+def test_claim_honours_per_host_overrides():
+    frontier = CrawlFrontier()
+    frontier.add([f"http://a.hu/{i}" for i in range(5)] + [f"http://b.hu/{i}" for i in range(3)])
+    
+    claimed = frontier.claim(10, per_host=1, host_limits={"a.hu": 3, "c.hu": 0})
+    assert sorted(e.url for e in claimed) == ["http://a.hu/0", "http://a.hu/1", "http://a.hu/2", "http://b.hu/0"]
+    assert [e.url for e in frontier.claim(10, per_host=2, host_limits={"a.hu": 0})] == ["http://b.hu/1", "http://b.hu/2"]
+
+
+def test_failures_back_off_then_give_up():
+    frontier = CrawlFrontier(max_attempts=2, retry_base_delay=0)
+    frontier.add(["http://a.hu/1"])
+    
+    [entry] = frontier.claim(1)
+    assert frontier.fail(entry.url, "timeout") is True
+    [entry] = frontier.claim(1)
+    assert entry.attempts == 2
+    assert frontier.fail(entry.url, "timeout") is False
+    assert frontier.stats()["failed"] == 1
+    assert frontier.next_ready_in() is None
+
+
+def test_reopening_recovers_interrupted_leases(tmp_path):
+    path = str(tmp_path / "frontier.sqlite")
+    frontier = CrawlFrontier(path)
+    frontier.add(["http://a.hu/1", "http://a.hu/2"])
+    first, second = frontier.claim(2)
+    frontier.complete(first.url)
+    frontier.close()  # crash while second is in flight
+    
+    reopened = CrawlFrontier(path)
+    assert reopened.stats() == {"pending": 1, "in_progress": 0, "done": 1, "failed": 0}
+    assert [e.url for e in reopened.claim(5)] == [second.url]
+
+
+def test_revisit_after_requeues_finished_urls_only():
+    frontier = CrawlFrontier(revisit_after=0)
+    frontier.add(["http://a.hu/1", "http://a.hu/2"])
+    [first, second] = frontier.claim(2)
+    frontier.complete(first.url)
+    
+    # the in-progress URL is left alone, the finished one is queued again
+    assert frontier.add([first.url, second.url]) == 1
+    assert frontier.stats() == {"pending": 1, "in_progress": 1, "done": 0, "failed": 0}
+    [again] = frontier.claim(1)
+    assert again.url == first.url and again.attempts == 1
+    
+    recent = CrawlFrontier(revisit_after=3600)
+    recent.add(["http://a.hu/1"])
+    recent.complete(recent.claim(1)[0].url)
+    assert recent.add(["http://a.hu/1"]) == 0
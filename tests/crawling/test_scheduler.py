@@ -0,0 +1,174 @@
+"""
+Tests for the crawl scheduler against a local fixture HTTP server
+"""
+import asyncio
+import re
+import sys
+from pathlib import Path
+
+import aiohttp
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.core.metrics import get_metrics_registry
+from src.energia_ai.crawling.frontier import CrawlFrontier
+from src.energia_ai.crawling.scheduler import CrawlScheduler, HostPolicy
+
+DOCUMENTS = 12
+
+
+class FixtureSite:
+    """Index page linking to document pages; tracks in-flight requests per Host header"""
+
+    def __init__(self):
+        self.in_flight = {}
+        self.max_in_flight = {}
+        self.fail_once = {"/doc/3"}
+
+    async def handle(self, request):
+        host = request.host
+        self.in_flight[host] = self.in_flight.get(host, 0) + 1
+        self.max_in_flight[host] = max(self.max_in_flight.get(host, 0), self.in_flight[host])
+        try:
+            await asyncio.sleep(0.02)
+            if request.path in self.fail_once:
+                self.fail_once.discard(request.path)
+                raise web.HTTPServiceUnavailable()
+            if request.path == "/":
+                links = "".join(f'<a href="/doc/{i}">{i}. törvény</a>' for i in range(DOCUMENTS))
+                return web.Response(text=f"<html><body>{links}</body></html>", content_type="text/html")
+            return web.Response(text=f"<html><body>{request.path}</body></html>", content_type="text/html")
+        finally:
+            self.in_flight[host] -= 1
+
+
+@pytest_asyncio.fixture
+async def site():
+    fixture = FixtureSite()
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", fixture.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    tcp = web.TCPSite(runner, "127.0.0.1", 0)
+    await tcp.start()
+    fixture.port = runner.addresses[0][1]
+    yield fixture
+    await runner.cleanup()
+
+
+def make_worker(session, fetched):
+    async def worker(entry):
+        async with session.get(entry.url) as response:
+            response.raise_for_status()
+            html = await response.text()
+        fetched.append(entry.url)
+        base = entry.url.split("/", 3)[:3]
+        return ["/".join(base) + href for href in re.findall(r'href="([^"]+)"', html)]
+    return worker
+
+
+@pytest.mark.asyncio
+async def test_crawls_both_hosts_within_per_host_limits(site):
+    frontier = CrawlFrontier(retry_base_delay=0)
+    frontier.add([f"http://127.0.0.1:{site.port}/", f"http://localhost:{site.port}/"])
+    fetched = []
+    
+    async with aiohttp.ClientSession() as session:
+        scheduler = CrawlScheduler(
+            frontier,
+            make_worker(session, fetched),
+            concurrency=8,
+            host_policy=HostPolicy(max_concurrency=3, min_interval=0),
+            name="fixture",
+        )
+        stats = await scheduler.run()
+    
+    assert stats.processed == 2 * (DOCUMENTS + 1)
+    assert stats.retried == 1 and stats.failed == 0  # /doc/3 failed once, then succeeded
+    assert frontier.stats()["done"] == 2 * (DOCUMENTS + 1)
+    assert set(site.max_in_flight) == {f"127.0.0.1:{site.port}", f"localhost:{site.port}"}
+    assert max(site.max_in_flight.values()) <= 3
+    assert get_metrics_registry().counter("crawl_pages_total").value(crawl="fixture", status="done") >= stats.processed
+
+
+@pytest.mark.asyncio
+async def test_min_interval_spaces_requests_to_a_host(site):
+    frontier = CrawlFrontier()
+    frontier.add([f"http://127.0.0.1:{site.port}/doc/{i}" for i in range(5) if i != 3])
+    
+    async with aiohttp.ClientSession() as session:
+        scheduler = CrawlScheduler(
+            frontier,
+            make_worker(session, []),
+            host_policy=HostPolicy(max_concurrency=4, min_interval=0.05),
+        )
+        stats = await scheduler.run()
+    
+    assert stats.processed == 4
+    assert stats.seconds >= 3 * 0.05
+
+
+@pytest.mark.asyncio
+async def test_interrupted_crawl_resumes_from_the_frontier(site, tmp_path):
+    path = str(tmp_path / "frontier.sqlite")
+    seed = f"http://127.0.0.1:{site.port}/"
+    site.fail_once.clear()
+    
+    async with aiohttp.ClientSession() as session:
+        first = CrawlFrontier(path)
+        first.add([seed])
+        fetched = []
+        scheduler = CrawlScheduler(first, make_worker(session, fetched), host_policy=HostPolicy(2, 0))
+        await scheduler.run(max_pages=5)
+        first.close()
+        
+        resumed = CrawlFrontier(path)
+        resumed.add([seed])  # seeds are idempotent
+        scheduler = CrawlScheduler(resumed, make_worker(session, fetched), host_policy=HostPolicy(2, 0))
+        await scheduler.run()
+    
+    assert sorted(fetched) == sorted(set(fetched))
+    assert len(fetched) == DOCUMENTS + 1
+    assert resumed.stats()["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_host_override_raises_concurrency_above_the_default(site):
+    host = f"127.0.0.1:{site.port}"
+    frontier = CrawlFrontier()
+    frontier.add([f"http://{host}/doc/{i}" for i in range(8) if i != 3])
+    
+    async with aiohttp.ClientSession() as session:
+        scheduler = CrawlScheduler(
+            frontier,
+            make_worker(session, []),
+            concurrency=8,
+            host_policy=HostPolicy(max_concurrency=1, min_interval=0),
+            host_policies={host: HostPolicy(max_concurrency=4, min_interval=0)},
+        )
+        stats = await scheduler.run()
+    
+    assert stats.processed == 7
+    assert 1 < site.max_in_flight[host] <= 4
+
+
+@pytest.mark.asyncio
+async def test_cancelled_page_is_counted_as_cancelled(site):
+    frontier = CrawlFrontier()
+    frontier.add([f"http://127.0.0.1:{site.port}/doc/0"])
+    [entry] = frontier.claim(1)
+    
+    async def hang(entry):
+        await asyncio.sleep(10)
+    
+    scheduler = CrawlScheduler(frontier, hang, name="cancelled")
+    task = asyncio.create_task(scheduler._process(entry))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert get_metrics_registry().counter("crawl_pages_total").value(crawl="cancelled", status="cancelled") == 1
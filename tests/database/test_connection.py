@@ -0,0 +1,61 @@
+"""
+Tests for database engine configuration
+"""
+import sys
+from pathlib import Path
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.config.settings import Settings
+from src.energia_ai.database.connection import build_engine_options, is_statement_timeout, pool_sizes, pool_status
+
+def test_testing_environment_uses_null_pool_without_sizing():
+    """NullPool must not receive pool_size/max_overflow - SQLAlchemy rejects them"""
+    settings = Settings(environment="testing")
+    options = build_engine_options(settings)
+    
+    assert options["poolclass"] is NullPool
+    assert "pool_size" not in options and "max_overflow" not in options
+    engine = create_async_engine(settings.database_url, **options)
+    assert pool_status(engine) == {"pool": "null"}
+
+def test_production_pool_uses_configured_sizes_and_timeouts():
+    """Production pools follow settings and guard statements server-side"""
+    settings = Settings(environment="production", database_pool_size=25, database_max_overflow=10)
+    options = build_engine_options(settings)
+    
+    assert options["pool_size"] == 25 and options["max_overflow"] == 10
+    assert options["connect_args"]["server_settings"]["statement_timeout"] == "30000"
+    
+    engine = create_async_engine(settings.database_url, **options)
+    status = pool_status(engine, max_overflow=pool_sizes(settings)[1])
+    assert status["checked_out"] == 0 and status["overflow"] == 0
+    assert status["max_overflow"] == 10
+    assert pool_sizes(Settings(environment="development", database_max_overflow=10)) == (5, 5)
+
+def test_replica_connections_are_read_only():
+    """Replica engines get the longer analytics timeout and read-only transactions"""
+    settings = Settings(environment="production")
+    server_settings = build_engine_options(settings, read_only=True)["connect_args"]["server_settings"]
+    
+    assert server_settings["default_transaction_read_only"] == "on"
+    assert server_settings["statement_timeout"] == str(settings.database_read_statement_timeout_ms)
+
+def test_statement_timeouts_are_recognised_by_sqlstate():
+    """Cancelled statements are told apart by SQLSTATE 57014, not by the message text"""
+    class DriverError(Exception):
+        def __init__(self, message, sqlstate):
+            super().__init__(message)
+            self.sqlstate = sqlstate
+    
+    def wrapped(message, sqlstate):
+        return DBAPIError.instance("SELECT 1", {}, DriverError(message, sqlstate), Exception)
+    
+    assert is_statement_timeout(wrapped("canceling statement due to statement timeout", "57014"))
+    assert is_statement_timeout(wrapped("a lekérdezés megszakítva", "57014"))
+    assert not is_statement_timeout(wrapped("statement timeout mentioned in a constraint name", "23505"))
+    assert not is_statement_timeout(ValueError("statement timeout"))
@@ -0,0 +1,108 @@
+"""
+Tests for the PostgreSQL repository layer
+"""
+import pytest
+import sys
+import uuid
+from pathlib import Path
+from sqlalchemy.dialects import postgresql
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.database.models import Base, SupabaseBase
+from src.energia_ai.database.repositories import (
+    batched,
+    build_change_event_rows,
+    build_document_upsert,
+    build_item_claim,
+    build_job_claim,
+    build_queue_claim,
+    build_queue_expiry,
+    build_queue_failure,
+)
+
+def test_batched_splits_into_bounded_chunks():
+    """Rows are split into full batches plus a remainder"""
+    assert [len(b) for b in batched(range(25), 10)] == [10, 10, 5]
+    assert list(batched([], 10)) == []
+    with pytest.raises(ValueError):
+        list(batched([1], 0))
+
+def test_document_upsert_targets_content_hash():
+    """Documents are upserted on content_hash and refresh their metadata"""
+    statement = build_document_upsert([
+        {"title": "Vet.", "document_type": "törvény", "content_hash": "a" * 64, "owner_id": 1},
+        {"title": "Ptk.", "document_type": "törvény", "content_hash": "b" * 64, "owner_id": 1},
+    ])
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    
+    assert "ON CONFLICT (content_hash) DO UPDATE" in sql
+    assert "title = excluded.title" in sql
+    assert "updated_at = now()" in sql
+    assert "RETURNING documents.id" in sql
+
+def test_change_events_and_queue_messages_are_linked():
+    """Every change event gets a queue message carrying its id"""
+    events, messages = build_change_event_rows([
+        {
+            "source_url": "https://magyarkozlony.hu/dokumentumok/abc/letoltes",
+            "change_type": "new_legislation",
+            "summary": "Magyar Közlöny 2023. évi 95. szám",
+            "message_type": "legal_change.magyar_kozlony",
+            "payload": {"source": "magyar_kozlony"},
+        },
+        {"source_url": "https://njt.hu/jogszabaly/2007-86-00-00", "change_type": "amendment"},
+    ])
+    
+    assert [m["type"] for m in messages] == ["legal_change.magyar_kozlony", "legal_change.detected"]
+    assert [m["payload"]["event_id"] for m in messages] == [str(e["id"]) for e in events]
+    assert messages[0]["payload"]["source"] == "magyar_kozlony"
+    assert "detected_at" not in events[1]
+
+def test_supabase_tables_stay_out_of_create_all():
+    """create_all/drop_all on Base.metadata never touch tables and enums owned by Supabase migrations"""
+    supabase_tables = set(SupabaseBase.metadata.tables)
+    
+    assert {"legal_change_events", "queue_messages", "contracts", "analysis_batch_jobs"} <= supabase_tables
+    assert not supabase_tables & set(Base.metadata.tables)
+    enum_columns = [
+        column for table in Base.metadata.tables.values() for column in table.columns
+        if isinstance(column.type, postgresql.ENUM)
+    ]
+    assert enum_columns == []
+
+def test_queue_claims_lease_messages_and_reclaim_expired_leases():
+    """Claims take pending messages that are due and processing messages whose lease expired"""
+    sql = str(build_queue_claim("legal_change.magyar_kozlony", 5, 600.0, 5).compile(dialect=postgresql.dialect()))
+    
+    assert "queue_messages.status = %(status_1)s::VARCHAR AND queue_messages.available_at <= now()" in sql
+    assert "queue_messages.claimed_at < now() - make_interval(" in sql
+    assert "queue_messages.attempts < %(attempts_2)s" in sql
+    assert "attempts=(queue_messages.attempts + %(attempts_1)s::INTEGER), claimed_at=now()" in sql
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    
+    expiry = str(build_queue_expiry("legal_change.magyar_kozlony", 600.0, 5).compile(dialect=postgresql.dialect()))
+    assert "queue_messages.attempts >= %(attempts_1)s" in expiry and "status=%(status)s" in expiry
+
+def test_failed_queue_messages_back_off_then_go_dead():
+    """Failures are retried with exponential backoff until max attempts, then dead-lettered"""
+    statement = build_queue_failure(uuid.uuid4(), "PDF download failed", 5, 30.0)
+    compiled = statement.compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+    
+    assert "status=CASE WHEN (queue_messages.attempts >= %(attempts_1)s::INTEGER)" in sql
+    assert "power(%(power_2)s::INTEGER, queue_messages.attempts - %(attempts_2)s::INTEGER)" in sql
+    assert "claimed_at=%(claimed_at)s" in sql
+    assert "queue_messages.status = %(status_1)s" in sql  # only the current lease holder can fail it
+    assert (compiled.params["param_1"], compiled.params["param_2"], compiled.params["attempts_1"]) == ("dead", "pending", 5)
+
+
+def test_batch_jobs_are_leased_to_one_runner():
+    sql = str(build_job_claim(uuid.uuid4(), "runner-a", 900.0).compile(dialect=postgresql.dialect()))
+    assert "analysis_batch_jobs.status != %(status_1)s" in sql
+    assert "analysis_batch_jobs.runner IS NULL OR analysis_batch_jobs.runner = %(runner_1)s::VARCHAR OR analysis_batch_jobs.lease_expires_at < now()" in sql
+    assert "RETURNING analysis_batch_jobs.id" in sql
+
+    items = str(build_item_claim(uuid.uuid4(), 100).compile(dialect=postgresql.dialect()))
+    assert "SET status=%(status)s" in items and "FOR UPDATE SKIP LOCKED" in items
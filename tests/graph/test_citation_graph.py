@@ -0,0 +1,65 @@
+"""
+Tests for the in-memory citation graph
+"""
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.graph.citation_graph import CitationGraph
+
+# Ptk. cites Alaptörvény; Vet. and Get. cite Ptk.; Get. and Vet. cite each other (cycle)
+EDGES = [
+    ("ptk", "alaptorveny"),
+    ("vet", "ptk"),
+    ("get", "ptk"),
+    ("get", "vet"),
+    ("vet", "get"),
+    ("vhr", "vet"),
+]
+
+def test_impact_chains_follow_citations_with_shortest_paths():
+    """Forward chains are bounded, cycle-safe and carry the shortest path"""
+    graph = CitationGraph.from_edges(EDGES)
+    chains = {c.document_id: c for c in graph.impact_chains("vhr", max_depth=5)}
+    
+    assert set(chains) == {"vet", "ptk", "get", "alaptorveny"}
+    assert chains["alaptorveny"].depth == 3
+    assert chains["alaptorveny"].path == ["vhr", "vet", "ptk", "alaptorveny"]
+    assert [c.document_id for c in graph.impact_chains("vhr", max_depth=1)] == ["vet"]
+
+def test_reverse_impact_lists_citing_documents():
+    """Reverse impact answers 'what cites this act', citing document first"""
+    graph = CitationGraph.from_edges(EDGES)
+    chains = {c.document_id: c for c in graph.reverse_impact("ptk", max_depth=2)}
+    
+    assert set(chains) == {"vet", "get", "vhr"}
+    assert chains["vhr"].path == ["vhr", "vet", "ptk"]
+
+def test_neighborhood_in_both_directions():
+    """k-hop neighborhoods ignore edge direction when asked to"""
+    graph = CitationGraph.from_edges(EDGES)
+    
+    assert graph.neighborhood("ptk", k=1) == {"ptk": 0, "alaptorveny": 1, "vet": 1, "get": 1}
+    assert graph.neighborhood("unknown", k=2) == {}
+
+def test_incremental_edges_are_visible_before_and_after_compaction():
+    """New citations are queryable immediately and survive compaction"""
+    graph = CitationGraph.from_edges(EDGES, compact_threshold=1000)
+    
+    assert graph.add_edges([("alaptorveny", "eu-direktiva"), ("ptk", "alaptorveny")]) == 1
+    assert graph.num_edges == len(EDGES) + 1
+    assert "eu-direktiva" in {c.document_id for c in graph.impact_chains("vhr")}
+    
+    graph.compact()
+    assert graph.num_edges == len(EDGES) + 1
+    chains = {c.document_id: c for c in graph.impact_chains("vhr")}
+    assert chains["eu-direktiva"].path == ["vhr", "vet", "ptk", "alaptorveny", "eu-direktiva"]
+    assert graph.reverse_impact("eu-direktiva", max_depth=1)[0].document_id == "alaptorveny"
+
+def test_empty_graph():
+    """A graph without edges answers queries with empty results"""
+    graph = CitationGraph.from_edges([])
+    assert graph.num_edges == 0
+    assert graph.impact_chains("ptk") == []
@@ -0,0 +1,129 @@
+"""
+Tests for Magyar Közlöny PDF ingestion
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.ingestion.kozlony_pdf import (
+    KIND_RESOLUTION,
+    KozlonyPdfPipeline,
+    act_citations,
+    clean_page_lines,
+    parse_header,
+)
+
+# WinAnsi lacks the Hungarian double-acute letters; map them to spare codes
+DOUBLE_ACUTE = {"ő": b"\x80", "ű": b"\x81", "Ő": b"\x82", "Ű": b"\x83"}
+FONT = (
+    b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding << /Type /Encoding "
+    b"/BaseEncoding /WinAnsiEncoding /Differences [128 /odblacute /udblacute /Odblacute /Udblacute] >> >>"
+)
+
+
+def _pdf_string(line):
+    line = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return b"".join(DOUBLE_ACUTE.get(char) or char.encode("cp1252") for char in line)
+
+
+def write_pdf(path, pages):
+    """Minimal text-only PDF: one line per entry, one list of lines per page"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", b"", FONT]
+    kids = []
+    for lines in pages:
+        stream = b"BT /F1 10 Tf 12 TL 50 800 Td " + b" ".join(b"(%s) Tj T*" % _pdf_string(line) for line in lines) + b" ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(bytes(out))
+
+
+ISSUE = [
+    [
+        "MAGYAR KÖZLÖNY 95. szám",
+        "Tartalomjegyzék",
+        "2023. évi XXV. törvény a villamos energiáról szóló törvény módosításáról 4512",
+    ],
+    [
+        "MAGYAR KÖZLÖNY • 2023. évi 95. szám",
+        "2023. évi XXV. törvény",
+        "a villamos energiáról szóló 2007. évi LXXXVI. törvény",
+        "módosításáról",
+        "Az Országgyűlés a következő törvényt alkotja:",
+        "1. § (1) A villamos energiáról szóló 2007. évi LXXXVI. törvény 3. §-a",
+        "helyébe a következő rendelkezés lép.",
+        "4512",
+    ],
+    [
+        "MAGYAR KÖZLÖNY • 2023. évi 95. szám",
+        "(2) E törvény a kihirdetését követő napon lép hatályba.",
+        "Az innovációért és technológiáért felelős miniszter 12/2023. (VI. 30.) ITM",
+        "rendelete",
+        "a földgázellátásról szóló rendelet módosításáról",
+        "1. § A 273/2007. (X. 19.) Korm. rendelet 2. §-a hatályát veszti.",
+        "4513",
+    ],
+    [
+        "A Kormány 1234/2023. (VI. 30.) Korm. határozata",
+        "a tárolói kapacitások bővítéséről",
+        "A Kormány felhívja az energiaügyi minisztert a szükséges intézkedések megtételére.",
+    ],
+]
+
+
+def test_parse_header_recognises_acts_decrees_and_resolutions():
+    assert parse_header("2023. évi XXV. törvény") == ("torveny", 2023, "XXV", "Országgyűlés")
+    assert parse_header("A Kormány 273/2023. (VI. 30.) Korm. rendelete") == (
+        "korm.rendelet", 2023, "273", "Kormány"
+    )
+    assert parse_header("Az Országgyűlés 12/2023. (V. 3.) OGY határozata")[0] == KIND_RESOLUTION
+    assert parse_header("a 2023. évi XXV. törvény 3. §-a") is None
+    assert clean_page_lines("MAGYAR KÖZLÖNY • 2023. évi 95. szám\n  1. §  Szöveg \n\n4512") == ["1. § Szöveg"]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_splits_issue_into_acts_across_pages(tmp_path):
+    path = str(tmp_path / "mk_2023_95.pdf")
+    write_pdf(path, ISSUE)
+    pipeline = KozlonyPdfPipeline(workers=2, pages_per_task=1, max_in_flight=2)
+    try:
+        acts = [act async for act in pipeline.stream_acts(path)]
+    finally:
+        pipeline.close()
+
+    assert [(act.kind, act.number, act.first_page, act.last_page) for act in acts] == [
+        ("torveny", "XXV", 2, 3),
+        ("rendelet", "12", 3, 3),
+        (KIND_RESOLUTION, "1234", 4, 4),
+    ]
+    law = acts[0]
+    assert law.eli_uri == "http://www.njt.hu/eli/hu/torveny/2023/XXV"
+    assert law.paragraphs == [
+        "a villamos energiáról szóló 2007. évi LXXXVI. törvény módosításáról",
+        "Az Országgyűlés a következő törvényt alkotja:",
+        "1. § (1) A villamos energiáról szóló 2007. évi LXXXVI. törvény 3. §-a helyébe a következő rendelkezés lép.",
+        "(2) E törvény a kihirdetését követő napon lép hatályba.",
+    ]
+    assert act_citations(law) == ["http://www.njt.hu/eli/hu/torveny/2007/LXXXVI"]
+    assert acts[1].issuer == "innovációért és technológiáért felelős miniszter"
+    assert acts[1].header.endswith("ITM rendelete")
+    assert act_citations(acts[1]) == ["http://www.njt.hu/eli/hu/korm.rendelet/2007/273"]
+    assert acts[2].eli_uri is None
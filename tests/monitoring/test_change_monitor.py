@@ -0,0 +1,227 @@
+"""
+Tests for adaptive polling and feed/sitemap diffing in the change monitor
+"""
+import asyncio
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.monitoring.change_monitor import ChangeMonitor
+from src.energia_ai.monitoring.schedule import PollSchedule
+from src.energia_ai.monitoring.sources import (
+    CHANGE_AMENDMENT,
+    CHANGE_NEW,
+    FeedSource,
+    ListingSource,
+    SeenStore,
+    SitemapSource,
+    SourceItem,
+)
+
+SITEMAP = """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>"""
+SITEMAP_URL = "<url><loc>https://njt.hu/jogszabaly/{id}</loc><lastmod>{lastmod}</lastmod></url>"
+RSS = """<?xml version="1.0"?><rss version="2.0"><channel><title>Hírek</title>
+<item><title>2023. évi XXV. törvény</title><link>https://example.hu/1</link>
+<pubDate>Fri, 30 Jun 2023 18:00:00 +0200</pubDate></item></channel></rss>"""
+ATOM = """<feed xmlns="http://www.w3.org/2005/Atom"><entry><title>Korm. rendelet</title>
+<link href="https://example.hu/2"/><id>urn:2</id><updated>2023-06-30T16:00:00Z</updated></entry></feed>"""
+
+
+def test_schedule_is_fast_in_publishing_hours_and_backs_off_at_night():
+    schedule = PollSchedule(peak_interval=60, off_peak_interval=1800, max_interval=3600)
+    tuesday_noon = datetime(2024, 3, 12, 11, 0, tzinfo=timezone.utc)  # 12:00 in Budapest
+    tuesday_night = datetime(2024, 3, 12, 23, 0, tzinfo=timezone.utc)  # 00:00 in Budapest
+    saturday = datetime(2024, 3, 16, 11, 0, tzinfo=timezone.utc)
+    friday_late = datetime(2024, 3, 15, 21, 30, tzinfo=timezone.utc)  # 22:30 in Budapest
+    
+    assert schedule.interval(tuesday_noon) == 60
+    assert schedule.interval(tuesday_noon, idle_polls=2) == 135
+    # Quiet publishing hours back off to the peak cap only, never to the off-peak one
+    assert schedule.interval(tuesday_noon, idle_polls=50) == 600
+    assert max(schedule.interval(tuesday_noon, idle_polls=n) for n in range(100)) == 600
+    assert PollSchedule(peak_max_interval=300).interval(tuesday_noon, idle_polls=8) == 300
+    assert schedule.interval(tuesday_night) == 1800
+    assert schedule.interval(tuesday_night, idle_polls=5) == 3600
+    # Weeks without a change stay at the caps instead of overflowing
+    assert schedule.interval(tuesday_noon, idle_polls=100_000) == 600
+    assert schedule.interval(tuesday_night, idle_polls=100_000) == 3600
+    # Waits never run past the opening of the next publishing window (Monday 07:00)
+    assert schedule.seconds_until_publishing(saturday) == (48 + 7 - 12) * 3600
+    assert schedule.interval(datetime(2024, 3, 13, 5, 50, tzinfo=timezone.utc)) == 600
+    assert schedule.interval(friday_late) == 1800
+
+
+def test_feed_and_sitemap_parsing():
+    [rss] = FeedSource("rss", "https://example.hu/rss").parse(RSS)
+    assert (rss.url, rss.title) == ("https://example.hu/1", "2023. évi XXV. törvény")
+    assert rss.published_at == datetime(2023, 6, 30, 16, 0, tzinfo=timezone.utc)
+    
+    [atom] = FeedSource("atom", "https://example.hu/atom").parse(ATOM)
+    assert atom.url == "https://example.hu/2" and atom.version == "2023-06-30T16:00:00Z"
+    
+    items = SitemapSource("njt", "https://njt.hu/sitemap.xml").parse(
+        SITEMAP.format(urls=SITEMAP_URL.format(id="2007-86-00-00", lastmod="2024-01-01"))
+    )
+    assert [(i.url, i.version) for i in items] == [("https://njt.hu/jogszabaly/2007-86-00-00", "2024-01-01")]
+    
+    listing = ListingSource("mk", "https://magyarkozlony.hu/", lambda url: url.endswith("/letoltes")).parse(
+        '<a href="/dokumentumok/a/letoltes">95. szám</a><a href="/rolunk">Rólunk</a>'
+    )
+    assert [(i.url, i.title) for i in listing] == [("https://magyarkozlony.hu/dokumentumok/a/letoltes", "95. szám")]
+
+
+def test_listing_items_are_dated_for_detection_latency():
+    from src.energia_ai.crawling.fetcher import FetchResult
+
+    source = ListingSource("mk", "https://magyarkozlony.hu/", lambda url: url.endswith("/letoltes"))
+    html = '<a href="/dokumentumok/a/letoltes">Magyar Közlöny 2024. március 12. (45. szám)</a>'
+    [dated] = source.parse(html)
+    assert dated.published_at == datetime(2024, 3, 11, 23, 0, tzinfo=timezone.utc)  # midnight in Budapest
+    
+    # The listing's Last-Modified, when sent, is when the issue actually appeared
+    result = FetchResult(
+        url=source.url, status=200, html=html, tier="http",
+        headers={"last-modified": "Tue, 12 Mar 2024 09:15:00 GMT"},
+    )
+    [item] = source.parse_result(result)
+    assert item.published_at == datetime(2024, 3, 12, 9, 15, tzinfo=timezone.utc)
+    assert source.parse('<a href="/dokumentumok/b/letoltes">2024. évi 45. szám</a>')[0].published_at is None
+
+
+def test_seen_store_records_baseline_then_diffs():
+    store = SeenStore()
+    baseline = [SourceItem("a", "1"), SourceItem("b", "1")]
+    assert store.diff("njt", baseline) == ([], [])
+    store.commit("njt", baseline)
+    snapshot = [SourceItem("a", "1"), SourceItem("b", "2"), SourceItem("c", "1")]
+    new, updated = store.diff("njt", snapshot)
+    assert [i.url for i in new] == ["c"]
+    assert [i.url for i in updated] == ["b"]
+    # Nothing is stored until the changes are committed
+    assert store.diff("njt", snapshot) == (new, updated)
+    store.commit("njt", snapshot)
+    assert store.diff("njt", snapshot) == ([], [])
+
+
+@pytest_asyncio.fixture
+async def sitemap_server():
+    state = {"urls": [("2007-86-00-00", "2024-01-01")], "requests": 0}
+
+    async def sitemap(request):
+        state["requests"] += 1
+        body = SITEMAP.format(urls="".join(SITEMAP_URL.format(id=i, lastmod=m) for i, m in state["urls"]))
+        etag = f'"{abs(hash(body))}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(text=body, content_type="application/xml", headers={"ETag": etag})
+
+    app = web.Application()
+    app.router.add_get("/sitemap.xml", sitemap)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    state["url"] = f"http://127.0.0.1:{runner.addresses[0][1]}/sitemap.xml"
+    yield state
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_monitor_detects_changes_and_writes_batches(sitemap_server):
+    batches = []
+
+    async def sink(changes):
+        batches.append(changes)
+
+    source = SitemapSource("njt", sitemap_server["url"], PollSchedule(peak_interval=0.05, off_peak_interval=0.05))
+    monitor = ChangeMonitor([source], sink=sink, flush_interval=0.05)
+    
+    assert await monitor.poll(source) == []  # baseline
+    assert await monitor.poll(source) == []  # 304
+    
+    now = datetime.now(timezone.utc).isoformat()
+    sitemap_server["urls"] = [("2007-86-00-00", now), ("2023-25-00-00", now)]
+    stop = asyncio.Event()
+    task = asyncio.create_task(monitor.run(stop))
+    for _ in range(100):
+        if batches:
+            break
+        await asyncio.sleep(0.02)
+    stop.set()
+    await task
+    
+    [batch] = batches
+    assert sorted((c.url.rsplit("/", 1)[-1], c.change_type) for c in batch) == [
+        ("2007-86-00-00", CHANGE_AMENDMENT),
+        ("2023-25-00-00", CHANGE_NEW),
+    ]
+    assert all(0 <= c.latency < 60 for c in batch)
+    assert batch[0].to_event()["message_type"] == "legal_change.njt"
+    assert monitor.metrics.histogram("legal_change_detection_seconds").summary(source="njt")["count"] >= 2
+
+
+@pytest.mark.asyncio
+async def test_unwritten_changes_are_detected_again(sitemap_server, tmp_path):
+    state_path = str(tmp_path / "monitor.sqlite")
+    source = SitemapSource("njt", sitemap_server["url"])
+
+    async def failing_sink(changes):
+        raise ConnectionError("database unavailable")
+
+    monitor = ChangeMonitor([source], sink=failing_sink, state_path=state_path)
+    assert await monitor.poll(source) == []  # baseline
+    sitemap_server["urls"].append(("2023-25-00-00", "2024-02-01"))
+    [change] = await monitor.poll(source)
+    monitor._buffer.append(change)
+    with pytest.raises(ConnectionError):
+        await monitor.flush()
+    assert monitor.report()["sources_awaiting_write"] == ["njt"]
+    await monitor.fetcher.close()
+    monitor.tracker.close()
+    monitor.seen.close()
+
+    # A restarted monitor gets the full sitemap again (no 304) and finds the same change
+    batches = []
+
+    async def sink(changes):
+        batches.append(changes)
+
+    monitor = ChangeMonitor([source], sink=sink, state_path=state_path)
+    [again] = await monitor.poll(source)
+    assert again.url == change.url and again.change_type == CHANGE_NEW
+    monitor._buffer.append(again)
+    assert await monitor.flush() == 1
+    assert await monitor.poll(source) == []
+    assert sitemap_server["requests"] == 4
+    await monitor.fetcher.close()
+    monitor.tracker.close()
+    monitor.seen.close()
+
+
+@pytest.mark.asyncio
+async def test_parse_failures_leave_the_feed_unseen(sitemap_server):
+    class FlakySitemap(SitemapSource):
+        fail = True
+
+        def parse(self, body):
+            if self.fail:
+                self.fail = False
+                raise ValueError("truncated XML")
+            return super().parse(body)
+
+    source = FlakySitemap("njt", sitemap_server["url"])
+    monitor = ChangeMonitor([source], sink=None)
+    with pytest.raises(ValueError):
+        await monitor.poll(source)
+    assert await monitor.poll(source) == []  # baseline, parsed from a full response
+    assert await monitor.poll(source) == []  # 304
+    assert monitor.tracker.stats.new == 2 and monitor.tracker.stats.not_modified == 1
+    await monitor.fetcher.close()
@@ -0,0 +1,88 @@
+"""
+Tests for Hungarian legal citation extraction
+"""
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.nlp.citation_extractor import (
+    KIND_ACT,
+    KIND_CONSTITUTION,
+    KIND_EU,
+    KIND_GOVERNMENT_DECREE,
+    KIND_SECTION,
+    cited_acts,
+    extract_citations,
+    extract_corpus,
+    first_citation,
+)
+
+TEXT = (
+    "A villamos energiáról szóló 2007. évi LXXXVI. törvény 3. § 24. pontja, "
+    "a 273/2007. (X. 19.) Korm. rendelet és a 12/2020. (III. 5.) ITM rendeletben foglaltak, "
+    "az (EU) 2019/944 európai parlamenti és tanácsi irányelv, a 2006/112/EK irányelv, "
+    "az (EK) 714/2009 rendelet, a Ptk. 6:519. §-a, valamint az 5. § (2) bekezdés b) pontja alapján."
+)
+
+
+def test_extracts_every_reference_form_in_document_order():
+    citations = extract_citations(TEXT)
+    
+    assert [c.eli_uri for c in citations] == [
+        "http://www.njt.hu/eli/hu/torveny/2007/LXXXVI/sec_3/pnt_24",
+        "http://www.njt.hu/eli/hu/korm.rendelet/2007/273",
+        "http://www.njt.hu/eli/hu/rendelet/2020/12",
+        "http://data.europa.eu/eli/dir/2019/944/oj",
+        "http://data.europa.eu/eli/dir/2006/112/oj",
+        "http://data.europa.eu/eli/reg/2009/714/oj",
+        "http://www.njt.hu/eli/hu/torveny/2013/V/sec_6-519",
+        None,
+    ]
+    assert [c.kind for c in citations][:2] == [KIND_ACT, KIND_GOVERNMENT_DECREE]
+    assert citations[2].issuer == "ITM"
+    assert citations[3].kind == KIND_EU
+    for citation in citations:
+        assert TEXT[citation.start:citation.end] == citation.text
+
+
+def test_own_pinpoints_resolve_against_the_citing_document():
+    own = extract_citations(TEXT, self_uri="http://www.njt.hu/eli/hu/torveny/2015/I")[-1]
+    
+    assert own.kind == KIND_SECTION
+    assert (own.section, own.paragraph, own.point) == ("5", "2", "b")
+    assert own.eli_uri == "http://www.njt.hu/eli/hu/torveny/2015/I/sec_5/par_2/pnt_b"
+
+
+def test_cited_acts_are_distinct_act_level_targets():
+    text = "A 2007. évi LXXXVI. törvény 3. §-a és a 2007. évi LXXXVI. törvény 5. §-a, továbbá a 7. §."
+    assert cited_acts(text) == ["http://www.njt.hu/eli/hu/torveny/2007/LXXXVI"]
+    assert cited_acts("Nincs hivatkozás 2007-ben.") == []
+
+
+def test_instrumental_case_with_doubled_ny_is_recognised():
+    text = "a 2019. évi LXX. törvénnyel módosított 3. § szerint, az Alaptörvénnyel összhangban"
+    citations = extract_citations(text)
+    
+    assert [c.kind for c in citations] == [KIND_ACT, KIND_SECTION, KIND_CONSTITUTION]
+    assert citations[0].eli_uri == "http://www.njt.hu/eli/hu/torveny/2019/LXX"
+    assert citations[0].text == "2019. évi LXX. törvénnyel"
+    assert citations[2].text == "Alaptörvénnyel"
+    assert cited_acts(text)[0] == "http://www.njt.hu/eli/hu/torveny/2019/LXX"
+
+
+def test_first_citation_identifies_titles():
+    citation = first_citation("2011. évi CXCV. törvény az államháztartásról")
+    assert (citation.kind, citation.year, citation.number) == (KIND_ACT, 2011, "CXCV")
+    assert first_citation("Közlemény") is None
+
+
+def test_extract_corpus_preserves_input_order():
+    documents = [("a", TEXT), ("b", "semmi"), ("c", "a Ptk. 1:1. §")]
+    serial = list(extract_corpus(documents, workers=1))
+    parallel = list(extract_corpus(documents, workers=2, chunksize=1))
+    
+    assert [doc_id for doc_id, _ in parallel] == ["a", "b", "c"]
+    assert parallel == serial
+    assert len(serial[0][1]) == 8 and serial[1][1] == []
@@ -0,0 +1,78 @@
+"""
+Tests for the Elasticsearch manager's index migration and authority boost
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("elasticsearch")
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.search.elasticsearch_manager import ElasticsearchManager
+
+
+class FakeIndices:
+    """Indices API of an index created before authority_score was mapped"""
+
+    def __init__(self, properties, fail_put=False):
+        self.properties = dict(properties)
+        self.fail_put = fail_put
+        self.put = []
+
+    async def exists(self, index):
+        return True
+
+    async def get_mapping(self, index):
+        return {"legal_documents_v1": {"mappings": {"properties": dict(self.properties)}}}
+
+    async def put_mapping(self, index, body):
+        if self.fail_put:
+            raise RuntimeError("rank_feature not supported")
+        self.put.append(body)
+        self.properties.update(body["properties"])
+
+
+class FakeClient:
+    def __init__(self, indices):
+        self.indices = indices
+        self.searches = []
+
+    async def search(self, index, body):
+        self.searches.append(body)
+        # A rank_feature query on an unmapped field is a search error
+        if body["query"]["bool"].get("should") and "authority_score" not in self.indices.properties:
+            raise RuntimeError("failed to create query: field [authority_score] does not exist")
+        return {"hits": {"total": {"value": 1}, "hits": [{"_id": "vet", "_score": 1.0, "_source": {}}]}}
+
+
+def make_manager(indices):
+    manager = ElasticsearchManager()
+    manager.client = FakeClient(indices)
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_existing_index_gains_the_authority_field_before_boosted_searches():
+    manager = make_manager(FakeIndices({"title": {"type": "text"}}))
+    await manager.create_index()
+
+    assert manager.client.indices.put == [{"properties": {"authority_score": {"type": "rank_feature"}}}]
+    result = await manager.search_documents("villamos energia")
+    assert [document["id"] for document in result["documents"]] == ["vet"]
+    assert "should" in manager.client.searches[0]["query"]["bool"]
+
+    await manager.create_index()  # already migrated: nothing to put
+    assert len(manager.client.indices.put) == 1
+
+
+@pytest.mark.asyncio
+async def test_searches_drop_the_boost_when_the_mapping_cannot_be_extended():
+    manager = make_manager(FakeIndices({"title": {"type": "text"}}, fail_put=True))
+    await manager.create_index()
+
+    result = await manager.search_documents("villamos energia")
+    assert result["total"] == 1
+    assert "should" not in manager.client.searches[0]["query"]["bool"]
@@ -0,0 +1,109 @@
+"""
+Tests for compressed document content storage
+"""
+import pytest
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.storage.content_store import (
+    TEXT_EXCERPT_LENGTH,
+    DocumentContentStore,
+    compress_text,
+    decompress_text,
+    pack_vector,
+    split_document,
+    unpack_vector,
+)
+
+def test_text_roundtrip_preserves_hungarian_characters():
+    """Compressed bodies decompress to the original text"""
+    text = "2012. évi I. törvény a munka törvénykönyvéről\n" * 500
+    data, codec = compress_text(text)
+    
+    assert len(data) < len(text.encode("utf-8"))
+    assert decompress_text(data, codec) == text
+
+def test_unknown_codec_rejected():
+    """Unknown codecs are reported instead of silently returning garbage"""
+    with pytest.raises(ValueError):
+        decompress_text(b"data", "lz4")
+
+def test_vector_packing_uses_float32():
+    """Embeddings are stored as 4 bytes per dimension"""
+    vector = [0.5, -1.25, 3.0] * 512
+    data = pack_vector(vector)
+    
+    assert len(data) == 4 * len(vector)
+    assert unpack_vector(data) == vector
+
+def test_split_document_moves_bodies_out_of_hot_part():
+    """Bulky fields leave the hot document; an excerpt and size stay behind"""
+    document = {
+        "title": "Ptk.",
+        "document_type": "törvény",
+        "raw_content": "<html>" + "x" * 5000 + "</html>",
+        "extracted_text": "y" * 5000,
+        "processed_content": None,
+        "search_vector": [0.1, 0.2],
+        "content_hash": "abc",
+    }
+    hot, bodies = split_document(document)
+    
+    assert set(bodies) == {"raw_content", "extracted_text", "search_vector"}
+    assert "raw_content" not in hot and "search_vector" not in hot
+    assert "processed_content" not in hot
+    assert hot["text_excerpt"] == "y" * TEXT_EXCERPT_LENGTH
+    assert hot["content_size"] == len(document["raw_content"])
+    assert hot["title"] == "Ptk."
+
+class _FakeContents:
+    """Just enough of a Motor collection for DocumentContentStore, counting round trips"""
+    
+    def __init__(self):
+        self.docs = {}
+        self.queries = 0
+    
+    async def find_one(self, query, projection=None):
+        self.queries += 1
+        return self.docs.get(query["_id"])
+    
+    async def update_one(self, query, update, upsert=False):
+        record = self.docs.setdefault(query["_id"], {"_id": query["_id"], "fields": {}})
+        for key, value in update["$set"].items():
+            record["fields"][key.split(".", 1)[1]] = value
+    
+    def find(self, query, projection=None):
+        self.queries += 1
+        found = [self.docs[i] for i in query["_id"]["$in"] if i in self.docs]
+        
+        async def cursor():
+            for doc in found:
+                yield doc
+        return cursor()
+
+class _FakeDatabase:
+    def __init__(self):
+        self.document_contents = _FakeContents()
+
+@pytest.mark.asyncio
+async def test_load_many_fetches_a_page_of_bodies_in_one_query():
+    """Hydrating a listing costs one query, not one per document"""
+    database = _FakeDatabase()
+    with patch("src.energia_ai.storage.content_store.AsyncIOMotorGridFSBucket"):
+        store = DocumentContentStore(database)
+    for n in range(5):
+        await store.save(n, {"extracted_text": f"{n}. § szöveg", "search_vector": [0.5, float(n)]})
+    database.document_contents.queries = 0
+    
+    bodies = await store.load_many([0, 3, 9])
+    
+    assert database.document_contents.queries == 1
+    assert bodies == {
+        0: {"extracted_text": "0. § szöveg", "search_vector": [0.5, 0.0]},
+        3: {"extracted_text": "3. § szöveg", "search_vector": [0.5, 3.0]},
+    }
+    assert await store.load_many([]) == {}
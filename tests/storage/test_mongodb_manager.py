@@ -0,0 +1,37 @@
+"""
+Tests for MongoDB search helpers
+"""
+import sys
+from pathlib import Path
+from bson import ObjectId
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.storage.mongodb_manager import SearchKeyset, build_search_pipeline
+
+def test_keyset_token_roundtrip():
+    """Page tokens survive encoding for both ObjectId and string keys"""
+    oid = ObjectId()
+    assert SearchKeyset.decode(SearchKeyset(1.25, oid).encode()) == SearchKeyset(1.25, oid)
+    assert SearchKeyset.decode(SearchKeyset(0.5, "doc-1").encode()) == SearchKeyset(0.5, "doc-1")
+
+def test_pipeline_without_keyset_sorts_by_score_then_id():
+    """First page: text match, score, stable sort and projection"""
+    pipeline = build_search_pipeline("energia", "törvény", {"title": 1}, limit=10)
+    
+    assert pipeline[0] == {"$match": {"$text": {"$search": "energia"}, "document_type": "törvény"}}
+    assert {"$sort": {"score": -1, "_id": 1}} in pipeline
+    assert {"$limit": 10} in pipeline
+    assert pipeline[-1] == {"$project": {"title": 1, "score": 1}}
+
+def test_pipeline_with_keyset_resumes_after_position():
+    """Later pages only return hits strictly after the keyset position"""
+    oid = ObjectId()
+    pipeline = build_search_pipeline("energia", after=SearchKeyset(2.0, oid))
+    
+    keyset_match = pipeline[2]["$match"]["$or"]
+    assert {"score": {"$lt": 2.0}} in keyset_match
+    assert {"score": 2.0, "_id": {"$gt": oid}} in keyset_match
+    # The keyset filter must run after the score is materialized and before sorting
+    assert "$addFields" in pipeline[1] and "$sort" in pipeline[3]
@@ -0,0 +1,181 @@
+"""
+Tests for delta-compressed document versions
+"""
+import asyncio
+import pytest
+import sys
+from pathlib import Path
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from src.energia_ai.storage.version_store import (
+    DocumentVersionStore,
+    apply_line_delta,
+    compute_line_delta,
+    diff_lines,
+)
+
+ORIGINAL = [
+    "1. § E törvény célja a villamosenergia-ellátás biztosítása.\n",
+    "2. § (1) Az engedélyes köteles adatot szolgáltatni.\n",
+    "(2) A Hivatal bírságot szabhat ki.\n",
+    "3. § Ez a törvény a kihirdetését követő napon lép hatályba.\n",
+]
+
+AMENDED = [
+    "1. § E törvény célja a villamosenergia-ellátás biztosítása.\n",
+    "2. § (1) Az engedélyes köteles adatot szolgáltatni a Hivatal részére.\n",
+    "(2) A Hivatal bírságot szabhat ki.\n",
+    "(3) A bírság legfeljebb 100 millió forint.\n",
+]
+
+def test_delta_roundtrip():
+    """Applying a delta to the base reproduces the new version exactly"""
+    ops = compute_line_delta(ORIGINAL, AMENDED)
+    assert apply_line_delta(ORIGINAL, ops) == AMENDED
+
+def test_delta_only_stores_changed_lines():
+    """Unchanged lines are stored as copy ranges, not repeated text"""
+    ops = compute_line_delta(ORIGINAL, AMENDED)
+    inserted = [line for op in ops if op[0] == "i" for line in op[1]]
+    assert ORIGINAL[0] not in inserted
+    assert AMENDED[3] in inserted
+
+def test_diff_reports_changed_regions():
+    """Diff between two versions lists only the changed hunks"""
+    diff = diff_lines("doc", 1, ORIGINAL, 2, AMENDED)
+    
+    assert diff.changed
+    assert diff.added_lines == 2
+    assert diff.removed_lines == 2
+    assert all(h.tag != "equal" for h in diff.hunks)
+    assert not diff_lines("doc", 1, ORIGINAL, 1, ORIGINAL).changed
+
+class _FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+    
+    def sort(self, keys):
+        field, direction = keys[0]
+        self.docs.sort(key=lambda d: d[field], reverse=direction == -1)
+        return self
+    
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+    
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+class _FakeVersions:
+    """Just enough of a Motor collection for DocumentVersionStore"""
+    
+    def __init__(self):
+        self.docs = []
+    
+    def _matches(self, doc, query):
+        for key, cond in query.items():
+            value = doc.get(key)
+            if isinstance(cond, dict):
+                if "$lte" in cond and not value <= cond["$lte"]:
+                    return False
+                if "$gte" in cond and not value >= cond["$gte"]:
+                    return False
+                if "$ne" in cond and value == cond["$ne"]:
+                    return False
+            elif value != cond:
+                return False
+        return True
+    
+    def find(self, query, projection=None):
+        return _FakeCursor([d for d in self.docs if self._matches(d, query)])
+    
+    async def find_one(self, query, projection=None, sort=None):
+        cursor = self.find(query)
+        if sort:
+            cursor.sort(sort)
+        return cursor.docs[0] if cursor.docs else None
+    
+    async def insert_one(self, doc):
+        # Yield like a network round trip, so concurrent writers interleave
+        await asyncio.sleep(0)
+        key = (doc["document_id"], doc["version_number"])
+        if any((d["document_id"], d["version_number"]) == key for d in self.docs):
+            raise DuplicateKeyError("E11000 duplicate key error")
+        doc["_id"] = ObjectId()
+        self.docs.append(dict(doc))
+
+class _FakeDatabase:
+    def __init__(self):
+        self.document_versions = _FakeVersions()
+
+@pytest.mark.asyncio
+async def test_store_reconstructs_every_version_across_snapshots():
+    """Versions before, on and after a snapshot boundary are rebuilt exactly"""
+    database = _FakeDatabase()
+    store = DocumentVersionStore(database, snapshot_interval=3, cache_size=2)
+    document_id = ObjectId()
+    
+    contents = ["".join(ORIGINAL)]
+    for i in range(1, 8):
+        contents.append(contents[-1] + f"{i + 3}. § Módosító rendelkezés {i}.\n")
+    
+    for content in contents:
+        await store.add_version(document_id, content)
+    
+    kinds = [d["kind"] for d in database.document_versions.docs]
+    assert kinds == ["snapshot", "delta", "delta", "snapshot", "delta", "delta", "snapshot", "delta"]
+    
+    store._cache.clear()
+    for number, content in enumerate(contents, start=1):
+        version = await store.get_version(document_id, number)
+        assert version.content == content
+    
+    diff = await store.diff(document_id, 2, 6)
+    assert diff.added_lines == 4 and diff.removed_lines == 0
+
+@pytest.mark.asyncio
+async def test_unchanged_content_does_not_create_a_version():
+    """Re-submitting identical content returns the existing version number"""
+    store = DocumentVersionStore(_FakeDatabase())
+    
+    assert await store.add_version("doc", "a\n") == 1
+    assert await store.add_version("doc", "a\n") == 1
+    assert await store.add_version("doc", "a\nb\n") == 2
+
+@pytest.mark.asyncio
+async def test_legacy_versions_without_kind_are_snapshots():
+    """Versions stored as plain content before deltas existed are still readable and extendable"""
+    database = _FakeDatabase()
+    document_id = ObjectId()
+    database.document_versions.docs.append({
+        "_id": ObjectId(), "document_id": document_id, "version_number": 1,
+        "content": "".join(ORIGINAL), "changes_summary": None, "created_at": datetime.utcnow(),
+    })
+    store = DocumentVersionStore(database, snapshot_interval=3)
+    
+    assert (await store.get_version(document_id, 1)).content == "".join(ORIGINAL)
+    assert await store.add_version(document_id, "".join(AMENDED)) == 2
+    store._cache.clear()
+    assert (await store.get_version(document_id, 2)).content == "".join(AMENDED)
+
+@pytest.mark.asyncio
+async def test_concurrent_writers_get_distinct_version_numbers():
+    """A writer losing the race for a version number retries on top of the winner"""
+    database = _FakeDatabase()
+    store = DocumentVersionStore(database)
+    document_id = ObjectId()
+    
+    numbers = await asyncio.gather(store.add_version(document_id, "a\n"), store.add_version(document_id, "a\nb\n"))
+    
+    assert sorted(numbers) == [1, 2]
+    store._cache.clear()
+    contents = [(await store.get_version(document_id, number)).content for number in numbers]
+    assert contents == ["a\n", "a\nb\n"]
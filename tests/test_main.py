@@ -45,3 +45,10 @@ def test_docs_endpoint():
     response = client.get("/api/docs")
     assert response.status_code == 200
     assert "text/html" in response.headers["content-type"]
+
+def test_metrics_endpoint():
+    """Test that the metrics snapshot is exposed"""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data) == {"counters", "gauges", "histograms", "collectors"}